@@ -1,4 +1,4 @@
-import api from './axios';
+import api, { tokenStore } from './axios';
 
 // Servicios de autenticación
 export const authService = {
@@ -8,15 +8,27 @@ export const authService = {
     return response.data;
   },
 
-  // Iniciar sesión
+  // Iniciar sesión (tokens firmados: sin cookie de sesión ni CSRF)
   login: async (credentials) => {
-    const response = await api.post('/users/login/', credentials);
+    const response = await api.post('/users/token/', credentials);
+    tokenStore.save(response.data);
     return response.data;
   },
 
   // Cerrar sesión
   logout: async () => {
-    const response = await api.post('/users/logout/');
+    try {
+      const response = await api.post('/users/logout/');
+      return response.data;
+    } finally {
+      tokenStore.clear();
+    }
+  },
+
+  // Datos iniciales de la app en una sola petición: CSRF, choices y, si hay
+  // usuario, perfil, sesión de estudio (abierta o reanudada) y lecciones
+  bootstrap: async () => {
+    const response = await api.get('/users/bootstrap/');
     return response.data;
   },
 
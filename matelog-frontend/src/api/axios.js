@@ -10,9 +10,34 @@ const api = axios.create({
   },
 });
 
-// Interceptor para CSRF
+// Tokens firmados (access + refresh) guardados en localStorage.
+// Con token no se usa la cookie de sesión ni hace falta el header CSRF.
+const ACCESS_KEY = 'matelog_access';
+const REFRESH_KEY = 'matelog_refresh';
+
+export const tokenStore = {
+  getAccess: () => localStorage.getItem(ACCESS_KEY),
+  getRefresh: () => localStorage.getItem(REFRESH_KEY),
+  save: ({ access, refresh }) => {
+    localStorage.setItem(ACCESS_KEY, access);
+    if (refresh) {
+      localStorage.setItem(REFRESH_KEY, refresh);
+    }
+  },
+  clear: () => {
+    localStorage.removeItem(ACCESS_KEY);
+    localStorage.removeItem(REFRESH_KEY);
+  },
+};
+
+// Interceptor para autenticación: Bearer si hay token, si no CSRF (sesión)
 api.interceptors.request.use(
   (config) => {
+    const accessToken = tokenStore.getAccess();
+    if (accessToken) {
+      config.headers['Authorization'] = `Bearer ${accessToken}`;
+      return config;
+    }
     const csrfToken = getCookie('csrftoken');
     if (csrfToken) {
       config.headers['X-CSRFToken'] = csrfToken;
@@ -22,16 +47,58 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Una sola renovación en curso aunque fallen varias peticiones a la vez
+let refreshing = null;
+
+const refreshTokens = () => {
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${API_URL}/api/users/token/refrescar/`, { refresh: tokenStore.getRefresh() })
+      .then((response) => {
+        tokenStore.save(response.data);
+        return response.data.access;
+      })
+      .catch((error) => {
+        tokenStore.clear();
+        throw error;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+const redirectToLogin = () => {
+  if (!window.location.pathname.includes('/login') && 
+      !window.location.pathname.includes('/register')) {
+    window.location.href = '/';
+  }
+};
+
 // Interceptor para errores
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      if (!window.location.pathname.includes('/login') && 
-          !window.location.pathname.includes('/register')) {
-        window.location.href = '/';
+  async (error) => {
+    const config = error.config;
+    const status = error.response?.status;
+
+    // Access token expirado: renovar una vez con el refresh token y reintentar
+    if (status === 403 && error.response.data?.detail === 'Token expirado' &&
+        config && !config._retried && tokenStore.getRefresh()) {
+      config._retried = true;
+      try {
+        await refreshTokens();
+        return api(config);
+      } catch (refreshError) {
+        redirectToLogin();
+        return Promise.reject(refreshError);
       }
     }
+
+    if (status === 401) {
+      redirectToLogin();
+    }
     return Promise.reject(error);
   }
 );
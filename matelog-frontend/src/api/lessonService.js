@@ -1,4 +1,60 @@
 import api from './axios';
+import { offlineStore } from './offlineStore';
+
+// Usuario dueño de las respuestas guardadas sin conexión (lo fija AuthContext)
+let offlineUserId = null;
+// Una sola sincronización en curso aunque se pida varias veces
+let syncing = null;
+const SYNC_BATCH_SIZE = 100;
+
+// Sin respuesta del servidor: la red se cayó (no es un error HTTP)
+const isNetworkError = (error) => !error.response;
+
+const newLocalId = () =>
+  window.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+const syncBatches = async () => {
+  for (;;) {
+    const pending = await offlineStore.getPending(offlineUserId);
+    if (!pending.length) {
+      return;
+    }
+    const batch = pending.slice(0, SYNC_BATCH_SIZE).map(({ usuario, ...answer }) => answer);
+    const response = await api.post('/lessons/ejercicios/sincronizar/', { respuestas: batch });
+    // Registradas o rechazadas (ejercicio inexistente, datos inválidos): ya no se reenvían
+    const done = response.data.resultados.map((result) => result.id_local).filter(Boolean);
+    if (!done.length) {
+      return;
+    }
+    await offlineStore.removePending(done);
+  }
+};
+
+// Tema armado con el paquete guardado de su lección y las respuestas pendientes
+const offlineTopic = async (topicId) => {
+  const topic = await offlineStore.findTopic(topicId);
+  if (!topic) {
+    return null;
+  }
+  const ids = new Set(topic.ejercicios.map((ejercicio) => ejercicio.id));
+  const pending = await offlineStore.getPending(offlineUserId);
+  const answered = {};
+  pending.filter((answer) => ids.has(answer.ejercicio_id)).forEach((answer) => {
+    answered[answer.ejercicio_id] = {
+      respuesta_usuario: answer.respuesta,
+      uso_ayuda: answer.uso_ayuda,
+      pendiente: true,
+    };
+  });
+  const nextIndex = topic.ejercicios.findIndex((ejercicio) => !answered[ejercicio.id]);
+  return {
+    ...topic,
+    ejercicios_respondidos: answered,
+    siguiente_ejercicio_index: nextIndex === -1 ? 0 : nextIndex,
+    total_ejercicios_respondidos: Object.keys(answered).length,
+    sin_conexion: true,
+  };
+};
 
 // Servicios de lecciones
 export const lessonService = {
@@ -8,20 +64,73 @@ export const lessonService = {
     return response.data;
   },
 
-  // Obtener detalle de una lección específica
+  // Obtener detalle de una lección específica (sin conexión: la última copia guardada)
   getLessonDetail: async (lessonId) => {
-    const response = await api.get(`/lessons/lecciones/${lessonId}/`);  // ✅ CORREGIDO
-    return response.data;
+    try {
+      const response = await api.get(`/lessons/lecciones/${lessonId}/`);  // ✅ CORREGIDO
+      if (offlineUserId !== null) {
+        offlineStore.saveLesson(offlineUserId, response.data);
+      }
+      return response.data;
+    } catch (error) {
+      const saved = isNetworkError(error) && offlineUserId !== null
+        ? await offlineStore.getLesson(offlineUserId, lessonId)
+        : null;
+      if (!saved) {
+        throw error;
+      }
+      const { usuario, ...lesson } = saved;
+      return { ...lesson, sin_conexion: true };
+    }
+  },
+
+  // Descargar (o revalidar) el paquete de la lección para usarla sin conexión.
+  // Si la versión guardada sigue vigente el servidor responde 304 sin cuerpo.
+  getLessonBundle: async (lessonId) => {
+    const saved = await offlineStore.getBundle(lessonId);
+    try {
+      const response = await api.get(`/lessons/lecciones/${lessonId}/paquete/`, {
+        headers: saved ? { 'If-None-Match': `W/"${saved.version}"` } : {},
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      });
+      if (response.status === 304) {
+        return saved.data;
+      }
+      await offlineStore.saveBundle(response.data);
+      return response.data;
+    } catch (error) {
+      if (saved && isNetworkError(error)) {
+        return saved.data;
+      }
+      throw error;
+    }
   },
 
-  // Obtener contenido completo de un tema
+  // Obtener contenido completo de un tema.
+  // El contenido (igual para todos, cacheado y comprimido en el servidor; el
+  // navegador lo revalida con ETag) y el progreso del estudiante se piden por separado.
+  // Sin conexión se arma con el paquete de la lección guardado en IndexedDB
   getTopicContent: async (topicId) => {
-    const response = await api.get(`/lessons/temas/${topicId}/`);
-    return response.data;
+    try {
+      // Las respuestas pendientes primero, para que cuenten en el progreso
+      await lessonService.syncPendingAnswers();
+      const [contenido, progreso] = await Promise.all([
+        api.get(`/lessons/temas/${topicId}/contenido/`),
+        api.get(`/lessons/temas/${topicId}/`, { params: { contenido: 0 } }),
+      ]);
+      return { ...contenido.data, ...progreso.data };
+    } catch (error) {
+      const topic = isNetworkError(error) ? await offlineTopic(topicId) : null;
+      if (!topic) {
+        throw error;
+      }
+      return topic;
+    }
   },
 
-  // Finalizar un tema
+  // Finalizar un tema (requiere conexión; antes se envían las respuestas pendientes)
   finalizeTopic: async (topicId) => {
+    await lessonService.syncPendingAnswers();
     const response = await api.post(`/lessons/temas/${topicId}/finalizar/`);
     return response.data;
   },
@@ -38,10 +147,60 @@ export const lessonService = {
     return response.data;
   },
 
-  // Validar respuesta de ejercicio
+  // Validar respuesta de ejercicio. Sin conexión la respuesta se guarda para
+  // sincronizarla después y se devuelve { pendiente: true }
   validateAnswer: async (answerData) => {
-    const response = await api.post('/lessons/ejercicios/validar/', answerData);
-    return response.data;
+    try {
+      const response = await api.post('/lessons/ejercicios/validar/', answerData);
+      return response.data;
+    } catch (error) {
+      if (!isNetworkError(error) || offlineUserId === null) {
+        throw error;
+      }
+      await offlineStore.addPending({
+        ...answerData,
+        id_local: newLocalId(),
+        usuario: offlineUserId,
+        respondida_en: new Date().toISOString(),
+      });
+      return { pendiente: true };
+    }
+  },
+
+  // Usuario de la sesión (null al cerrarla): solo se envían sus respuestas
+  // pendientes y solo se leen sus copias de las lecciones
+  setOfflineUser: (userId) => {
+    offlineUserId = userId;
+  },
+
+  // Al cerrar sesión: borra las copias de las lecciones (con el progreso) del
+  // usuario. Sus respuestas pendientes se conservan y se envían en su próximo inicio de sesión
+  clearOfflineUser: async () => {
+    if (offlineUserId !== null) {
+      await offlineStore.removeLessons(offlineUserId);
+    }
+    offlineUserId = null;
+  },
+
+  // Enviar en lotes las respuestas guardadas sin conexión. Nunca falla: lo
+  // que no se pudo enviar queda en la cola para el siguiente intento.
+  syncPendingAnswers: () => {
+    if (offlineUserId === null) {
+      return Promise.resolve();
+    }
+    if (!syncing) {
+      syncing = syncBatches()
+        .catch((error) => {
+          // Sin red se reintenta después; otros errores no deben bloquear el tema
+          if (!isNetworkError(error)) {
+            console.error('Error al sincronizar respuestas:', error);
+          }
+        })
+        .finally(() => {
+          syncing = null;
+        });
+    }
+    return syncing;
   },
 };
 
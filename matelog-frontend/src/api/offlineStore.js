@@ -0,0 +1,115 @@
+// Almacenamiento local (IndexedDB) para seguir trabajando sin conexión:
+// - paquetes: paquete de cada lección (GET /lessons/lecciones/<id>/paquete/),
+//   con la versión de contenido con la que se revalida (ETag).
+// - lecciones: última respuesta del detalle de cada lección, por usuario (trae
+//   su progreso; en una computadora compartida no se muestra a otro estudiante).
+// - pendientes: respuestas guardadas sin conexión, por usuario, hasta que
+//   se sincronicen (POST /lessons/ejercicios/sincronizar/).
+
+const DB_NAME = 'matelog';
+const DB_VERSION = 2;
+
+let dbPromise = null;
+
+const openDb = () => {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve, reject) => {
+      if (!('indexedDB' in window)) {
+        reject(new Error('IndexedDB no disponible'));
+        return;
+      }
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = (event) => {
+        const db = request.result;
+        if (event.oldVersion < 1) {
+          db.createObjectStore('paquetes', { keyPath: 'id' });
+          const pendientes = db.createObjectStore('pendientes', { keyPath: 'id_local' });
+          pendientes.createIndex('usuario', 'usuario');
+        }
+        if (event.oldVersion < 2) {
+          // La versión 1 guardaba las lecciones solo por id: se descartan
+          if (db.objectStoreNames.contains('lecciones')) {
+            db.deleteObjectStore('lecciones');
+          }
+          const lecciones = db.createObjectStore('lecciones', { keyPath: ['usuario', 'id'] });
+          lecciones.createIndex('usuario', 'usuario');
+        }
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    }).catch((error) => {
+      // Sin IndexedDB (modo privado de algunos navegadores) la app sigue en línea
+      dbPromise = null;
+      throw error;
+    });
+  }
+  return dbPromise;
+};
+
+// Ejecuta `operation(store)` en una transacción y resuelve con el resultado del request
+const withStore = async (storeName, mode, operation) => {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction(storeName, mode);
+    const request = operation(transaction.objectStore(storeName));
+    transaction.oncomplete = () => resolve(request?.result);
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+};
+
+const ignoreErrors = (promise, fallback = null) => promise.catch(() => fallback);
+
+export const offlineStore = {
+  // Paquete guardado de la lección ({ id, version, data }) o null
+  getBundle: (lessonId) =>
+    ignoreErrors(withStore('paquetes', 'readonly', (store) => store.get(Number(lessonId)))),
+
+  saveBundle: (bundle) =>
+    ignoreErrors(withStore('paquetes', 'readwrite', (store) =>
+      store.put({ id: bundle.id, version: bundle.version, data: bundle, guardado: Date.now() })
+    )),
+
+  // Busca el tema en los paquetes guardados y devuelve su contenido o null
+  findTopic: async (topicId) => {
+    const bundles = await ignoreErrors(withStore('paquetes', 'readonly', (store) => store.getAll()), []);
+    for (const bundle of bundles || []) {
+      const topic = bundle.data.temas.find((tema) => tema.id === Number(topicId));
+      if (topic) {
+        return topic;
+      }
+    }
+    return null;
+  },
+
+  getLesson: (userId, lessonId) =>
+    ignoreErrors(withStore('lecciones', 'readonly', (store) => store.get([userId, Number(lessonId)]))),
+
+  saveLesson: (userId, lesson) =>
+    ignoreErrors(withStore('lecciones', 'readwrite', (store) => store.put({ ...lesson, usuario: userId }))),
+
+  // Borra las copias de las lecciones del usuario (al cerrar sesión)
+  removeLessons: (userId) =>
+    ignoreErrors(withStore('lecciones', 'readwrite', (store) => {
+      store.index('usuario').openKeyCursor(IDBKeyRange.only(userId)).onsuccess = (event) => {
+        const cursor = event.target.result;
+        if (cursor) {
+          store.delete(cursor.primaryKey);
+          cursor.continue();
+        }
+      };
+    })),
+
+  addPending: (answer) =>
+    withStore('pendientes', 'readwrite', (store) => store.put(answer)),
+
+  getPending: (userId) =>
+    ignoreErrors(withStore('pendientes', 'readonly', (store) => store.index('usuario').getAll(userId)), []),
+
+  removePending: (ids) =>
+    withStore('pendientes', 'readwrite', (store) => {
+      ids.forEach((id) => store.delete(id));
+    }),
+};
+
+export default offlineStore;
@@ -20,6 +20,12 @@ export const trackingService = {
     return response.data;
   },
 
+  // Latido de la sesión de estudio (404 si la sesión expiró por inactividad)
+  heartbeat: async (sessionId) => {
+    const response = await api.post('/tracking/sesion/latido/', { sesion_id: sessionId });
+    return response.data;
+  },
+
   // Finalizar sesión de estudio
   endSession: async (sessionId) => {
     const response = await api.post('/tracking/sesion/finalizar/', { sesion_id: sessionId });
@@ -1,27 +1,76 @@
-import { createContext, useState, useContext, useEffect } from 'react';
+import { createContext, useState, useContext, useEffect, useRef } from 'react';
 import { authService } from '../api/authService';
+import { lessonService } from '../api/lessonService';
 import { trackingService } from '../api/trackingService';
 
 const AuthContext = createContext(null);
 
+// El backend escribe a lo más un latido por minuto y sesión
+const HEARTBEAT_INTERVAL_MS = 60 * 1000;
+
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [sessionId, setSessionId] = useState(null);
+  const [choices, setChoices] = useState(null);
+  // Lecciones del bootstrap: la primera carga de LessonsPage las usa sin pedirlas de nuevo
+  const initialLessons = useRef(null);
 
   // Verificar si hay una sesión activa al cargar
   useEffect(() => {
     checkAuth();
   }, []);
 
+  // Respuestas guardadas sin conexión: se envían al iniciar sesión y al volver la red
+  useEffect(() => {
+    lessonService.setOfflineUser(user?.id ?? null);
+    if (!user) {
+      return undefined;
+    }
+
+    const sync = () => lessonService.syncPendingAnswers();
+    sync();
+    window.addEventListener('online', sync);
+    return () => window.removeEventListener('online', sync);
+  }, [user]);
+
+  // Latido de la sesión de estudio mientras la pestaña está visible.
+  // Si la sesión expiró por inactividad (404) se inicia o reanuda otra.
+  useEffect(() => {
+    if (!sessionId) {
+      return undefined;
+    }
+
+    const beat = async () => {
+      if (document.visibilityState !== 'visible') {
+        return;
+      }
+      try {
+        await trackingService.heartbeat(sessionId);
+      } catch (error) {
+        if (error.response?.status === 404) {
+          const session = await trackingService.startSession().catch(() => null);
+          setSessionId(session?.sesion_id ?? null);
+        }
+      }
+    };
+
+    const interval = setInterval(beat, HEARTBEAT_INTERVAL_MS);
+    document.addEventListener('visibilitychange', beat);
+    return () => {
+      clearInterval(interval);
+      document.removeEventListener('visibilitychange', beat);
+    };
+  }, [sessionId]);
+
+  // Una sola petición al cargar: perfil, sesión de estudio, choices y lecciones
   const checkAuth = async () => {
     try {
-      const userData = await authService.getProfile();
-      setUser(userData);
-      
-      // Iniciar sesión de estudio
-      const session = await trackingService.startSession();
-      setSessionId(session.sesion_id);
+      const data = await authService.bootstrap();
+      setChoices(data.choices);
+      setUser(data.usuario);
+      setSessionId(data.sesion?.sesion_id ?? null);
+      initialLessons.current = data.lecciones;
     } catch (error) {
       setUser(null);
     } finally {
@@ -73,17 +122,28 @@ export const AuthProvider = ({ children }) => {
       }
       
       await authService.logout();
+      // Sin copias de lecciones (con su progreso) para el siguiente estudiante
+      await lessonService.clearOfflineUser();
       setUser(null);
       setSessionId(null);
+      initialLessons.current = null;
     } catch (error) {
       console.error('Error al cerrar sesión:', error);
     }
   };
 
+  const takeInitialLessons = () => {
+    const lessons = initialLessons.current;
+    initialLessons.current = null;
+    return lessons;
+  };
+
   const value = {
     user,
     loading,
     sessionId,
+    choices,
+    takeInitialLessons,
     login,
     register,
     logout,
@@ -1,10 +1,37 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { useScreenTracking } from '../hooks/useScreenTracking';
-import { fetchCSRFToken } from '../api/axios';
 import './AuthPage.css';
 
+// Opciones de registro si no llegaron del bootstrap (/users/bootstrap/)
+const DEFAULT_CHOICES = {
+  grupos: [
+    { value: 'A', label: 'Grupo A' },
+    { value: 'B', label: 'Grupo B' },
+    { value: 'C', label: 'Grupo C' },
+    { value: 'D', label: 'Grupo D' },
+  ],
+  especialidades: [
+    { value: 'INFORMATICA', label: 'Informática' },
+    { value: 'AGRONOMIA', label: 'Agronomía' },
+    { value: 'ADMINISTRACION', label: 'Administración' },
+    { value: 'ELECTRONICA', label: 'Electrónica' },
+  ],
+  generos: [
+    { value: 'M', label: 'Masculino' },
+    { value: 'F', label: 'Femenino' },
+    { value: 'O', label: 'Otro' },
+    { value: 'N', label: 'Prefiero no decir' },
+  ],
+  edades: ['14', '15', '16', '17', '18'].map((edad) => ({ value: edad, label: `${edad} años` })),
+};
+
+const renderOptions = (options) =>
+  options.map(({ value, label }) => (
+    <option key={value} value={value}>{label}</option>
+  ));
+
 const AuthPage = () => {
   const [isLogin, setIsLogin] = useState(true);
   const [formData, setFormData] = useState({
@@ -19,17 +46,13 @@ const AuthPage = () => {
   const [errors, setErrors] = useState({});
   const [loading, setLoading] = useState(false);
 
-  const { login, register } = useAuth();
+  const { login, register, choices } = useAuth();
+  const options = choices || DEFAULT_CHOICES;
   const navigate = useNavigate();
   
   // Tracking de pantalla
   useScreenTracking(isLogin ? 'LOGIN' : 'REGISTRO');
 
-  // Obtener CSRF token al montar el componente
-  useEffect(() => {
-    fetchCSRFToken();
-  }, []);
-
   const handleChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({ ...prev, [name]: value }));
@@ -228,10 +251,7 @@ const AuthPage = () => {
                   disabled={loading}
                 >
                   <option value="">Selecciona tu grupo</option>
-                  <option value="A">Grupo A</option>
-                  <option value="B">Grupo B</option>
-                  <option value="C">Grupo C</option>
-                  <option value="D">Grupo D</option>
+                  {renderOptions(options.grupos)}
                 </select>
                 {errors.grupo && <span className="error-text">{errors.grupo}</span>}
               </div>
@@ -246,10 +266,7 @@ const AuthPage = () => {
                   disabled={loading}
                 >
                   <option value="">Selecciona tu especialidad</option>
-                  <option value="INFORMATICA">Informática</option>
-                  <option value="AGRONOMIA">Agronomía</option>
-                  <option value="ADMINISTRACION">Administración</option>
-                  <option value="ELECTRONICA">Electrónica</option>
+                  {renderOptions(options.especialidades)}
                 </select>
                 {errors.especialidad && <span className="error-text">{errors.especialidad}</span>}
               </div>
@@ -265,10 +282,7 @@ const AuthPage = () => {
                     disabled={loading}
                   >
                     <option value="">Selecciona...</option>
-                    <option value="M">Masculino</option>
-                    <option value="F">Femenino</option>
-                    <option value="O">Otro</option>
-                    <option value="N">Prefiero no decir</option>
+                    {renderOptions(options.generos)}
                   </select>
                   {errors.genero && <span className="error-text">{errors.genero}</span>}
                 </div>
@@ -283,11 +297,7 @@ const AuthPage = () => {
                     disabled={loading}
                   >
                     <option value="">Selecciona...</option>
-                    <option value="14">14 años</option>
-                    <option value="15">15 años</option>
-                    <option value="16">16 años</option>
-                    <option value="17">17 años</option>
-                    <option value="18">18 años</option>
+                    {renderOptions(options.edades)}
                   </select>
                   {errors.edad && <span className="error-text">{errors.edad}</span>}
                 </div>
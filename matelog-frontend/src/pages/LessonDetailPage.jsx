@@ -24,6 +24,8 @@ const LessonDetailPage = () => {
       setLoading(true);
       const data = await lessonService.getLessonDetail(lessonId);
       setLesson(data);
+      // Guarda el contenido de la lección para poder seguirla sin conexión
+      lessonService.getLessonBundle(lessonId).catch(() => {});
     } catch (err) {
       if (err.response?.status === 403) {
         setError('Debes completar la lección anterior primero');
@@ -10,7 +10,7 @@ const LessonsPage = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  const { user, logout } = useAuth();
+  const { user, logout, takeInitialLessons } = useAuth();
   const navigate = useNavigate();
   
   // Tracking de pantalla
@@ -23,7 +23,7 @@ const LessonsPage = () => {
   const loadLessons = async () => {
     try {
       setLoading(true);
-      const data = await lessonService.getAllLessons();
+      const data = takeInitialLessons() || await lessonService.getAllLessons();
       setLessons(data);
     } catch (err) {
       setError('Error al cargar las lecciones. Verifica tu conexión.');
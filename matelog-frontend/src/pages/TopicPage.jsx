@@ -54,7 +54,8 @@ const TopicPage = () => {
           if (data.ejercicios_respondidos[ejercicio.id]) {
             const resp = data.ejercicios_respondidos[ejercicio.id];
             prevAnswers[ejercicio.id] = resp.respuesta_usuario;
-            prevResults[ejercicio.id] = {
+            // Guardada sin conexión: todavía no se sabe si es correcta
+            prevResults[ejercicio.id] = resp.pendiente ? { pendiente: true } : {
               es_correcta: resp.es_correcta,
               retroalimentacion: resp.es_correcta 
                 ? ejercicio.retroalimentacion_correcta 
@@ -251,7 +252,9 @@ const TopicPage = () => {
     }
   } catch (err) {
     console.error('Error al finalizar tema:', err);
-    alert('Error al finalizar tema. Por favor intenta de nuevo.');
+    alert(navigator.onLine
+      ? 'Error al finalizar tema. Por favor intenta de nuevo.'
+      : 'Necesitas conexión para finalizar el tema. Tus respuestas quedaron guardadas.');
   }
 };
   /*const handleFinishExercises = async () => {
@@ -395,7 +398,11 @@ const TopicPage = () => {
           )}
         </div>
         
-        <div className="exercise-instruction">{exercise.instruccion}</div>
+        {/* El HTML llega sanitizado desde el backend (lessons/contenido_html.py) */}
+        <div
+          className="exercise-instruction"
+          dangerouslySetInnerHTML={{ __html: exercise.instruccion }}
+        />
         <div 
           className="exercise-question" 
           dangerouslySetInnerHTML={{ __html: exercise.enunciado }}
@@ -440,7 +447,7 @@ const TopicPage = () => {
             )}
 
             {showHelp[exercise.id] && (
-              <div className="help-box">{exercise.texto_ayuda}</div>
+              <div className="help-box" dangerouslySetInnerHTML={{ __html: exercise.texto_ayuda }} />
             )}
 
             <button onClick={handleSubmitAnswer} className="btn btn-primary submit-btn">
@@ -449,19 +456,30 @@ const TopicPage = () => {
           </>
         )}
 
-        {result && (
+        {result?.pendiente && (
+          <div className="result-box pending">
+            <h3>Respuesta guardada</h3>
+            <p>No hay conexión: se enviará y se revisará al recuperar la red.</p>
+
+            <button onClick={handleNextExercise} className="btn btn-primary next-btn">
+              {currentExercise < topic.ejercicios.length - 1 ? 'Siguiente Ejercicio' : 'Finalizar Tema'}
+            </button>
+          </div>
+        )}
+
+        {result && !result.pendiente && (
           <div className={`result-box ${result.es_correcta ? 'correct' : 'incorrect'}`}>
             <h3>{result.es_correcta ? '¡Correcto!' : 'Incorrecto'}</h3>
             
             {!result.es_correcta && exercise.texto_ayuda && !showHelp[exercise.id] && (
               <div className="auto-help-box">
                 <p className="auto-help-title">💡 Ayuda:</p>
-                <p>{exercise.texto_ayuda}</p>
+                <div dangerouslySetInnerHTML={{ __html: exercise.texto_ayuda }} />
               </div>
             )}
 
             {result.retroalimentacion && (
-              <p className="feedback">{result.retroalimentacion}</p>
+              <div className="feedback" dangerouslySetInnerHTML={{ __html: result.retroalimentacion }} />
             )}
 
             <button onClick={handleNextExercise} className="btn btn-primary next-btn">
@@ -10,6 +10,12 @@ export default defineConfig({
         target: process.env.VITE_API_URL || 'http://localhost:8000',
         changeOrigin: true,
         secure: false,
+      },
+      // Imágenes extraídas del contenido (IMAGENES_URL relativo en el backend)
+      '/media': {
+        target: process.env.VITE_API_URL || 'http://localhost:8000',
+        changeOrigin: true,
+        secure: false,
       }
     }
   },
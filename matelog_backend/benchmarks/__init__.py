@@ -0,0 +1,4 @@
+"""
+Benchmarks y pruebas de carga del backend de MateLog.
+Ejecutar desde la carpeta matelog_backend, p. ej.: python -m benchmarks.student_flow --help
+"""
@@ -0,0 +1,190 @@
+"""
+Escalamiento con conexiones simultáneas: WSGI (gunicorn con workers sync y
+vistas DRF) contra ASGI (gunicorn con workers de uvicorn y ASYNC_VIEWS=True).
+
+Cada conexión es un estudiante que recorre sin pausas la ruta de lectura
+(lista de lecciones, detalle de lección, detalle de tema) con el tracking de
+pantalla intercalado. Para cada modo y nivel de conexiones se levanta el
+servidor sobre una copia nueva de una base SQLite de prueba.
+
+    python -m benchmarks.asgi_concurrency --niveles 8,32,128 --duracion 20 --workers 2
+
+Requiere uvicorn (requirements.txt). Con DATABASE_URL se mide contra esa base
+(PostgreSQL) en lugar de SQLite; debe tener el currículo cargado.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.common import (
+    ClienteHTTP,
+    Mediciones,
+    configurar_django,
+    guardar_resultados,
+    imprimir_tabla,
+    percentil,
+    servidor_gunicorn,
+)
+from benchmarks.sqlite_concurrency import preparar_plantilla
+from benchmarks.student_flow import PASSWORD, preparar_estudiantes
+
+
+def servidor(modo, args, env):
+    if modo == 'wsgi':
+        return servidor_gunicorn(workers=args.workers, threads=args.threads, env={**env, 'ASYNC_VIEWS': 'False'})
+    return servidor_gunicorn(
+        workers=args.workers, env={**env, 'ASYNC_VIEWS': 'True'}, app='matelog_backend.asgi',
+        extra_args=('--worker-class', 'uvicorn.workers.UvicornWorker'),
+    )
+
+
+class LectorVirtual:
+    """
+    Estudiante que recorre la ruta de lectura en bucle hasta el fin de la medición.
+    """
+
+    def __init__(self, url, username, rng):
+        self.cliente = ClienteHTTP(url)
+        self.username = username
+        self.rng = rng
+        self.mediciones = Mediciones()
+
+    def llamar(self, endpoint, metodo, ruta, data=None):
+        respuesta = self.cliente.request(metodo, ruta, data)
+        self.mediciones.registrar(endpoint, respuesta)
+        return respuesta
+
+    def iniciar(self):
+        self.cliente.request('GET', '/api/users/csrf/')
+        login = self.cliente.request('POST', '/api/users/login/', {'username': self.username, 'password': PASSWORD})
+        if not login.ok:
+            raise RuntimeError(f'No se pudo iniciar sesión con {self.username}: {login.status}')
+
+    def ejecutar(self, hasta):
+        while time.perf_counter() < hasta:
+            lecciones = self.llamar('leccion-list', 'GET', '/api/lessons/lecciones/').data or []
+            if not lecciones:
+                raise RuntimeError('No hay lecciones; ¿se cargó el currículo?')
+            leccion = self.rng.choice(lecciones)
+            actividad = self.llamar('iniciar-actividad', 'POST', '/api/tracking/iniciar/', {
+                'tipo_pantalla': 'DETALLE_LECCION', 'metadata': {'leccion_id': leccion['id']},
+            })
+            detalle = self.llamar('leccion-detail', 'GET', f"/api/lessons/lecciones/{leccion['id']}/").data or {}
+            temas = [t['id'] for t in detalle.get('temas', []) if t['progreso']['desbloqueado']]
+            if temas:
+                self.llamar('tema-detail', 'GET', f'/api/lessons/temas/{self.rng.choice(temas)}/')
+            if actividad.ok:
+                self.llamar('finalizar-actividad', 'POST', '/api/tracking/finalizar/',
+                            {'actividad_id': actividad.data['actividad_id']})
+        return self.mediciones
+
+
+def correr_nivel(modo, conexiones, args, usernames, plantilla):
+    env = {'MONITORING_LOG_LEVEL': 'WARNING'}
+    ruta = None
+    if plantilla is not None:
+        ruta = plantilla.with_name(f'{modo}-{conexiones}.sqlite3')
+        shutil.copyfile(plantilla, ruta)
+        env.update({'SQLITE_PATH': str(ruta), 'SQLITE_TUNING': 'True'})
+
+    with servidor(modo, args, env) as url:
+        lectores = [LectorVirtual(url, usernames[i], random.Random(args.semilla + i)) for i in range(conexiones)]
+        with ThreadPoolExecutor(max_workers=conexiones) as pool:
+            list(pool.map(LectorVirtual.iniciar, lectores))
+            inicio = time.perf_counter()
+            hasta = inicio + args.duracion
+            resultados = list(pool.map(lambda lector: lector.ejecutar(hasta), lectores))
+            transcurrido = time.perf_counter() - inicio
+
+    if ruta is not None:
+        for sufijo in ('', '-wal', '-shm'):
+            Path(str(ruta) + sufijo).unlink(missing_ok=True)
+
+    mediciones = Mediciones()
+    for propias in resultados:
+        mediciones.combinar(propias)
+    todas = [ms for d in mediciones.datos.values() for ms in d['ms']]
+    return mediciones.resumen(), {
+        'conexiones': conexiones,
+        'peticiones': len(todas),
+        'rps': round(len(todas) / transcurrido, 1),
+        'p50_ms': round(percentil(todas, 50), 1) if todas else None,
+        'p95_ms': round(percentil(todas, 95), 1) if todas else None,
+        'errores': sum(d['errores'] for d in mediciones.datos.values()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modos', default='wsgi,asgi')
+    parser.add_argument('--niveles', default='8,32,128', help='Conexiones simultáneas a probar')
+    parser.add_argument('--duracion', type=float, default=20, help='Segundos de medición por nivel')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn (ambos modos)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads por worker (solo wsgi)')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--prefijo', default='bench_')
+    parser.add_argument('--salida', default='benchmark_asgi_concurrency.json')
+    args = parser.parse_args(argv)
+
+    modos = [m for m in args.modos.split(',') if m]
+    desconocidos = set(modos) - {'wsgi', 'asgi'}
+    if desconocidos:
+        parser.error(f'Modos desconocidos: {", ".join(sorted(desconocidos))}')
+    if 'asgi' in modos:
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            parser.error('El modo asgi requiere uvicorn (pip install -r requirements.txt)')
+    niveles = sorted(int(n) for n in args.niveles.split(',') if n)
+    usernames = [f'{args.prefijo}{i:05d}' for i in range(max(niveles))]
+
+    meta = {
+        'benchmark': 'asgi_concurrency',
+        'gunicorn_workers': args.workers,
+        'gunicorn_threads_wsgi': args.threads,
+        'duracion_s': args.duracion,
+        'niveles': {},
+    }
+    endpoints = {}
+    with tempfile.TemporaryDirectory(prefix='matelog-asgi-') as directorio:
+        if os.environ.get('DATABASE_URL'):
+            configurar_django()
+            from django.db import connection
+            preparar_estudiantes(args.prefijo, max(niveles))
+            meta['db'] = connection.vendor
+            plantilla = None
+        else:
+            meta['db'] = 'sqlite'
+            plantilla = preparar_plantilla(directorio, max(niveles), args.prefijo)
+
+        for modo in modos:
+            meta['niveles'][modo] = []
+            for conexiones in niveles:
+                print(f'\n== {modo}: {conexiones} conexiones ==')
+                resumen, nivel = correr_nivel(modo, conexiones, args, usernames, plantilla)
+                imprimir_tabla(resumen)
+                print(f"{nivel['rps']} peticiones/s, p50 {nivel['p50_ms']}ms, p95 {nivel['p95_ms']}ms, "
+                      f"{nivel['errores']} errores")
+                meta['niveles'][modo].append(nivel)
+                endpoints.update({f'{modo}/{conexiones}/{e}': r for e, r in resumen.items()})
+
+    print(f"\n{'conexiones':>10} " + ' '.join(f'{modo + " rps":>10} {modo + " p95":>10}' for modo in modos))
+    for i, conexiones in enumerate(niveles):
+        fila = ' '.join(
+            f"{meta['niveles'][modo][i]['rps']:>10} {meta['niveles'][modo][i]['p95_ms']:>8}ms" for modo in modos
+        )
+        print(f'{conexiones:>10} {fila}')
+    guardar_resultados(args.salida, meta, endpoints)
+    print(f'\nResultados guardados en {args.salida}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Utilidades compartidas por los benchmarks: configuración de Django,
+clientes (en proceso y HTTP), medición de latencias y reporte en JSON.
+"""
+
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Los benchmarks simulan a muchos estudiantes desde la misma IP: sin límites de
+# tasa salvo que se pida THROTTLE_ENABLED=True (p. ej. para medir su costo)
+LIMITES_EN_BENCHMARKS = 'False'
+
+
+def configurar_django():
+    """
+    Inicializa Django con los settings del proyecto (SQLite o DATABASE_URL).
+    """
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matelog_backend.settings')
+    os.environ.setdefault('THROTTLE_ENABLED', LIMITES_EN_BENCHMARKS)
+    import django
+    django.setup()
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) con interpolación lineal entre rangos.
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+
+_SQL_SERVER_TIMING = re.compile(r'sql;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def consultas_de_server_timing(headers):
+    """
+    Cantidad de consultas SQL reportada por el header Server-Timing que agrega
+    monitoring.middleware.InstrumentacionMiddleware, o None si no viene.
+    """
+    valor = next((v for k, v in headers.items() if k.lower() == 'server-timing'), None)
+    coincidencia = _SQL_SERVER_TIMING.search(valor or '')
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+class Respuesta:
+    def __init__(self, status, data, ms, queries=None, headers=None):
+        self.status = status
+        self.data = data
+        self.ms = ms
+        self.queries = queries
+        self.headers = headers or {}
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+
+class Mediciones:
+    """
+    Acumula latencias y consultas SQL por endpoint.
+    """
+
+    def __init__(self):
+        self.datos = {}
+
+    def registrar(self, endpoint, respuesta):
+        d = self.datos.setdefault(endpoint, {'ms': [], 'queries': [], 'errores': 0})
+        d['ms'].append(respuesta.ms)
+        if respuesta.queries is not None:
+            d['queries'].append(respuesta.queries)
+        if not respuesta.ok:
+            d['errores'] += 1
+
+    def combinar(self, otras):
+        for endpoint, d in otras.datos.items():
+            destino = self.datos.setdefault(endpoint, {'ms': [], 'queries': [], 'errores': 0})
+            destino['ms'].extend(d['ms'])
+            destino['queries'].extend(d['queries'])
+            destino['errores'] += d['errores']
+
+    def resumen(self):
+        resultado = {}
+        for endpoint, d in sorted(self.datos.items()):
+            ms = d['ms']
+            queries = d['queries']
+            resultado[endpoint] = {
+                'n': len(ms),
+                'errores': d['errores'],
+                'p50_ms': round(percentil(ms, 50), 2),
+                'p95_ms': round(percentil(ms, 95), 2),
+                'p99_ms': round(percentil(ms, 99), 2),
+                'media_ms': round(sum(ms) / len(ms), 2),
+                'max_ms': round(max(ms), 2),
+                'queries_media': round(sum(queries) / len(queries), 2) if queries else None,
+                'queries_max': max(queries) if queries else None,
+            }
+        return resultado
+
+
+def imprimir_tabla(resumen, salida=sys.stdout):
+    salida.write(
+        f"{'endpoint':28} {'n':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8}\n"
+    )
+    for endpoint, r in resumen.items():
+        queries = '-' if r['queries_media'] is None else f"{r['queries_media']:.1f}"
+        salida.write(
+            f"{endpoint:28} {r['n']:>6} {r['errores']:>4} {r['p50_ms']:>7.1f}ms "
+            f"{r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {queries:>8}\n"
+        )
+
+
+def guardar_resultados(ruta, meta, resumen):
+    """
+    Escribe los resultados en JSON junto con los metadatos de la corrida
+    (commit, motor de base de datos, parámetros) para poder compararlos.
+    """
+    documento = {
+        'meta': {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'commit': commit_actual(),
+            'python': platform.python_version(),
+            **meta,
+        },
+        'endpoints': resumen,
+    }
+    Path(ruta).write_text(json.dumps(documento, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+
+def comparar_resultados(ruta_anterior, resumen, salida=sys.stdout):
+    """
+    Imprime la variación de p95 y de consultas respecto a una corrida anterior.
+    """
+    anterior = json.loads(Path(ruta_anterior).read_text(encoding='utf-8'))
+    salida.write(f"\nComparación contra {ruta_anterior} (commit {anterior['meta'].get('commit')}):\n")
+    for endpoint, actual in resumen.items():
+        previo = anterior['endpoints'].get(endpoint)
+        if not previo:
+            salida.write(f'  {endpoint:28} (nuevo)\n')
+            continue
+        delta = actual['p95_ms'] - previo['p95_ms']
+        relativo = (delta / previo['p95_ms'] * 100) if previo['p95_ms'] else 0
+        linea = f'  {endpoint:28} p95 {previo["p95_ms"]:.1f} -> {actual["p95_ms"]:.1f}ms ({relativo:+.0f}%)'
+        if actual['queries_media'] is not None and previo.get('queries_media') is not None:
+            linea += f'  queries {previo["queries_media"]:.1f} -> {actual["queries_media"]:.1f}'
+        salida.write(linea + '\n')
+
+
+class ClienteDjango:
+    """
+    Cliente en proceso (django.test.Client) que además cuenta las consultas SQL.
+    """
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client(enforce_csrf_checks=True)
+
+    def request(self, metodo, ruta, data=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        # Las peticiones son HTTPS, así que la verificación CSRF exige un Referer
+        headers = {'Referer': 'https://testserver/'}
+        csrf = self.client.cookies.get('csrftoken')
+        if csrf:
+            headers['X-CSRFToken'] = csrf.value
+
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            if metodo == 'GET':
+                respuesta = self.client.get(ruta, secure=True, headers=headers)
+            else:
+                respuesta = self.client.post(
+                    ruta, data=json.dumps(data or {}), content_type='application/json',
+                    secure=True, headers=headers,
+                )
+            ms = (time.perf_counter() - inicio) * 1000
+
+        try:
+            cuerpo = json.loads(respuesta.content) if respuesta.content else None
+        except ValueError:
+            cuerpo = None
+        return Respuesta(respuesta.status_code, cuerpo, ms, len(capturadas), dict(respuesta.headers))
+
+
+class _PoliticaCookiesLocal(DefaultCookiePolicy):
+    """
+    Envía también las cookies marcadas como Secure, porque en local el
+    servidor se expone por HTTP detrás de un X-Forwarded-Proto simulado.
+    """
+
+    def return_ok_secure(self, cookie, request):
+        return True
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP con cookies y CSRF para medir contra un servidor real (gunicorn).
+    Las consultas SQL se toman del header Server-Timing del servidor (requiere
+    MONITORING_SERVER_TIMING=True; servidor_gunicorn lo activa). Envía
+    X-Forwarded-Proto: https para que los settings de producción
+    (SECURE_SSL_REDIRECT, cookies seguras) funcionen sobre HTTP local.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.origen_https = 'https://' + self.base_url.split('://', 1)[-1]
+        self.cookies = CookieJar(policy=_PoliticaCookiesLocal())
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return None
+
+    def request(self, metodo, ruta, data=None):
+        headers = {
+            'Content-Type': 'application/json',
+            'Referer': self.origen_https + '/',
+            'X-Forwarded-Proto': 'https',
+        }
+        csrf = self._csrf()
+        if csrf:
+            headers['X-CSRFToken'] = csrf
+        cuerpo = json.dumps(data or {}).encode('utf-8') if metodo != 'GET' else None
+        peticion = urllib.request.Request(self.base_url + ruta, data=cuerpo, headers=headers, method=metodo)
+
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(peticion, timeout=60) as r:
+                contenido = r.read()
+                status, headers_respuesta = r.status, dict(r.headers)
+        except urllib.error.HTTPError as e:
+            contenido = e.read()
+            status, headers_respuesta = e.code, dict(e.headers)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        try:
+            data_respuesta = json.loads(contenido) if contenido else None
+        except ValueError:
+            data_respuesta = None
+        queries = consultas_de_server_timing(headers_respuesta)
+        return Respuesta(status, data_respuesta, ms, queries, headers_respuesta)
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def servidor_gunicorn(workers=2, threads=1, env=None, app='matelog_backend.wsgi', extra_args=()):
+    """
+    Levanta gunicorn en un puerto libre y devuelve la URL base.
+    El servidor se detiene al salir del contexto.
+    """
+    puerto = puerto_libre()
+    # Las consultas por petición se leen del header Server-Timing
+    entorno = {
+        'THROTTLE_ENABLED': LIMITES_EN_BENCHMARKS, 'MONITORING_SERVER_TIMING': 'True', **os.environ, **(env or {}),
+    }
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{puerto}',
+         '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning', *extra_args],
+        cwd=BASE_DIR, env=entorno,
+    )
+    url = f'http://127.0.0.1:{puerto}'
+    try:
+        limite = time.time() + 30
+        while True:
+            try:
+                peticion = urllib.request.Request(
+                    url + '/api/users/choices/', headers={'X-Forwarded-Proto': 'https'}
+                )
+                urllib.request.urlopen(peticion, timeout=1).read()
+                break
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                if proceso.poll() is not None or time.time() > limite:
+                    raise RuntimeError('gunicorn no pudo iniciar')
+                time.sleep(0.2)
+        yield url
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
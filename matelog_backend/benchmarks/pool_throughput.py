@@ -0,0 +1,146 @@
+"""
+Throughput de login + lista de lecciones en PostgreSQL con distintos modos
+de conexión, contra gunicorn con varios threads por worker:
+
+  sin_pool     CONN_MAX_AGE=0: una conexión nueva por petición
+  persistente  CONN_MAX_AGE=600: una conexión persistente por thread (modo anterior)
+  pool         DB_POOL=True: pool de psycopg 3 por worker
+
+    DATABASE_URL=postgres://... python -m benchmarks.pool_throughput \\
+        --workers 2 --threads 8 --concurrencia 32 --duracion 30
+
+Cada estudiante virtual repite: login -> lista de lecciones (--listas-por-login
+veces) -> logout. Los estudiantes bench_* se recrean antes de la corrida.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import (
+    ClienteHTTP,
+    Mediciones,
+    configurar_django,
+    guardar_resultados,
+    imprimir_tabla,
+    servidor_gunicorn,
+)
+from benchmarks.student_flow import PASSWORD, preparar_estudiantes
+
+
+MODOS = {
+    'sin_pool': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+def estudiante_virtual(url, username, hasta, listas_por_login):
+    """
+    Repite el ciclo login/lista/logout hasta el instante `hasta`.
+    """
+    mediciones = Mediciones()
+    cliente = ClienteHTTP(url)
+    mediciones.registrar('csrf', cliente.request('GET', '/api/users/csrf/'))
+    while time.perf_counter() < hasta:
+        login = cliente.request('POST', '/api/users/login/', {'username': username, 'password': PASSWORD})
+        mediciones.registrar('login', login)
+        if not login.ok:
+            continue
+        for _ in range(listas_por_login):
+            mediciones.registrar('leccion-list', cliente.request('GET', '/api/lessons/lecciones/'))
+        mediciones.registrar('logout', cliente.request('POST', '/api/users/logout/'))
+    return mediciones
+
+
+def correr_modo(modo, args, usernames):
+    env = {
+        **MODOS[modo],
+        'DB_POOL_MAX_SIZE': str(args.pool_max),
+        'MONITORING_LOG_LEVEL': 'WARNING',
+    }
+    with servidor_gunicorn(workers=args.workers, threads=args.threads, env=env) as url:
+        # Calentamiento: abre conexiones/pool en todos los workers
+        estudiante_virtual(url, usernames[0], time.perf_counter() + 2, 1)
+
+        inicio = time.perf_counter()
+        hasta = inicio + args.duracion
+        mediciones = Mediciones()
+        with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+            futuros = [
+                pool.submit(estudiante_virtual, url, usernames[i], hasta, args.listas_por_login)
+                for i in range(args.concurrencia)
+            ]
+            for futuro in futuros:
+                mediciones.combinar(futuro.result())
+        transcurrido = time.perf_counter() - inicio
+
+    resumen = mediciones.resumen()
+    peticiones = sum(r['n'] for r in resumen.values())
+    errores = sum(r['errores'] for r in resumen.values())
+    return resumen, round(peticiones / transcurrido, 1), errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modos', default='sin_pool,persistente,pool')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrencia', type=int, default=32, help='Estudiantes virtuales simultáneos')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de medición por modo')
+    parser.add_argument('--listas-por-login', type=int, default=5)
+    parser.add_argument('--pool-max', type=int, default=None, help='DB_POOL_MAX_SIZE (por defecto = threads)')
+    parser.add_argument('--prefijo', default='bench_')
+    parser.add_argument('--salida', default='benchmark_pool_throughput.json')
+    args = parser.parse_args(argv)
+    args.pool_max = args.pool_max or args.threads
+
+    modos = [m for m in args.modos.split(',') if m]
+    desconocidos = set(modos) - set(MODOS)
+    if desconocidos:
+        parser.error(f'Modos desconocidos: {", ".join(sorted(desconocidos))}')
+
+    configurar_django()
+    from django.db import connection
+    from lessons.models import Leccion
+
+    if connection.vendor != 'postgresql':
+        parser.error('Este benchmark requiere DATABASE_URL apuntando a PostgreSQL')
+    if not Leccion.objects.filter(is_active=True).exists():
+        print('Aviso: no hay lecciones; cargar contenido con load_curriculum para una medición realista.')
+
+    preparar_estudiantes(args.prefijo, args.concurrencia)
+    connection.close()
+    usernames = [f'{args.prefijo}{i:05d}' for i in range(args.concurrencia)]
+
+    meta = {
+        'benchmark': 'pool_throughput',
+        'db': connection.vendor,
+        'gunicorn_workers': args.workers,
+        'gunicorn_threads': args.threads,
+        'concurrencia': args.concurrencia,
+        'duracion_s': args.duracion,
+        'listas_por_login': args.listas_por_login,
+        'pool_max_size': args.pool_max,
+        'throughput_rps': {},
+    }
+    endpoints = {}
+    for modo in modos:
+        print(f'\n== {modo} ==')
+        resumen, rps, errores = correr_modo(modo, args, usernames)
+        imprimir_tabla(resumen)
+        print(f'{rps} peticiones/s, {errores} errores')
+        meta['throughput_rps'][modo] = rps
+        endpoints.update({f'{modo}/{endpoint}': r for endpoint, r in resumen.items()})
+
+    print('\nThroughput (peticiones/s):')
+    for modo, rps in meta['throughput_rps'].items():
+        print(f'  {modo:12} {rps:>8}')
+    guardar_resultados(args.salida, meta, endpoints)
+    print(f'\nResultados guardados en {args.salida}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Microbenchmark de serialización de la ruta de lectura del estudiante:
+TemaDetailSerializer y LeccionDetailSerializer de DRF contra los serializers
+en dict plano (tema_detalle_dict, leccion_detalle_dict), y JSONRenderer de
+DRF contra RenderizadorJSON (orjson si está instalado).
+
+Crea un tema con --ejercicios ejercicios (la mitad de opción múltiple) y una
+lección con --temas temas dentro de una transacción que se revierte al
+terminar, los carga una vez con los mismos prefetch que las vistas y mide
+solo la serialización, sin consultas SQL.
+
+    python -m benchmarks.serializacion --ejercicios 60 --repeticiones 300
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.common import configurar_django, guardar_resultados, percentil
+
+
+def medir(funcion, repeticiones):
+    funcion()  # Calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'n': repeticiones,
+        'p50_ms': round(percentil(tiempos, 50), 3),
+        'p95_ms': round(percentil(tiempos, 95), 3),
+        'media_ms': round(sum(tiempos) / len(tiempos), 3),
+    }
+
+
+def casos(tema, leccion):
+    from rest_framework.renderers import JSONRenderer
+
+    from lessons.serializers import (
+        LeccionDetailSerializer,
+        TemaDetailSerializer,
+        leccion_detalle_dict,
+        tema_detalle_dict,
+    )
+    from matelog_backend.json_rapido import RenderizadorJSON
+
+    datos_tema = tema_detalle_dict(tema)
+    return {
+        'tema/drf': lambda: TemaDetailSerializer(tema).data,
+        'tema/dict': lambda: tema_detalle_dict(tema),
+        'leccion/drf': lambda: LeccionDetailSerializer(leccion).data,
+        'leccion/dict': lambda: leccion_detalle_dict(leccion),
+        'tema-json/drf': lambda: JSONRenderer().render(datos_tema),
+        'tema-json/rapido': lambda: RenderizadorJSON().render(datos_tema),
+        'tema-completo/drf': lambda: JSONRenderer().render(TemaDetailSerializer(tema).data),
+        'tema-completo/rapido': lambda: RenderizadorJSON().render(tema_detalle_dict(tema)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ejercicios', type=int, default=60)
+    parser.add_argument('--temas', type=int, default=12)
+    parser.add_argument('--repeticiones', type=int, default=300)
+    parser.add_argument('--salida', default='benchmark_serializacion.json')
+    args = parser.parse_args(argv)
+
+    configurar_django()
+    from django.conf import settings
+    from django.db import models, transaction
+
+    from lessons.models import ContenidoTema, Ejercicio, Leccion, Tema
+    from matelog_backend import json_rapido
+    from matelog_backend.testing import crear_catalogo
+
+    with transaction.atomic():
+        lecciones = crear_catalogo(
+            lecciones=1, temas_por_leccion=args.temas, contenidos_por_tema=4, ejercicios_por_tema=args.ejercicios,
+            orden_inicial=(Leccion.objects.aggregate(models.Max('orden'))['orden__max'] or 0) + 1,
+        )
+        tema = Tema.objects.prefetch_related(
+            models.Prefetch('contenidos', queryset=ContenidoTema.objects.defer(*ContenidoTema.campos_html)),
+            models.Prefetch(
+                'ejercicios', queryset=Ejercicio.objects.defer(*Ejercicio.campos_html).prefetch_related('opciones')
+            ),
+        ).get(leccion=lecciones[0], orden=1)
+        leccion = Leccion.objects.prefetch_related(models.Prefetch('temas', queryset=Tema.objects.annotate(
+            cantidad_contenidos=models.Count('contenidos', distinct=True),
+            cantidad_ejercicios=models.Count('ejercicios', distinct=True),
+        ).order_by('orden'))).get(id=lecciones[0].id)
+
+        resultados = {nombre: medir(funcion, args.repeticiones) for nombre, funcion in casos(tema, leccion).items()}
+        transaction.set_rollback(True)
+
+    print(f"{'caso':24} {'p50':>10} {'p95':>10} {'vs drf':>8}")
+    for nombre, r in resultados.items():
+        base = resultados[nombre.split('/')[0] + '/drf']
+        print(f"{nombre:24} {r['p50_ms']:>8.3f}ms {r['p95_ms']:>8.3f}ms {base['p50_ms'] / r['p50_ms']:>7.1f}x")
+
+    meta = {
+        'benchmark': 'serializacion',
+        'ejercicios': args.ejercicios,
+        'temas': args.temas,
+        'repeticiones': args.repeticiones,
+        'orjson': json_rapido.orjson is not None and settings.JSON_RAPIDO,
+    }
+    guardar_resultados(args.salida, meta, resultados)
+    print(f'\nResultados guardados en {args.salida}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
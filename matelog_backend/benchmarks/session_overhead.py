@@ -0,0 +1,103 @@
+"""
+Costo por petición de la autenticación por sesión en cada SESSION_MODE
+(db, cached_db, signed_cookies).
+
+Para cada modo un estudiante inicia sesión y repite llamadas autenticadas
+frecuentes (perfil y tracking de pantalla). choices no hace consultas propias,
+así que la diferencia entre llamarlo con sesión y sin cookie (anónimo) es el
+costo de autenticar la petición. Corre en proceso contra la base de datos
+configurada y cuenta las consultas SQL de cada llamada.
+
+    python -m benchmarks.session_overhead --repeticiones 500
+
+cached_db usa el cache configurado (REDIS_URL o memoria local).
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.common import ClienteDjango, Mediciones, configurar_django, guardar_resultados, imprimir_tabla
+from benchmarks.student_flow import PASSWORD, preparar_estudiantes
+
+
+MODOS = ('db', 'cached_db', 'signed_cookies')
+
+
+def medir_modo(modo, username, repeticiones):
+    from django.conf import settings
+    from django.test import override_settings
+
+    with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[modo]):
+        cliente = ClienteDjango()
+        cliente.request('GET', '/api/users/csrf/')
+        login = cliente.request('POST', '/api/users/login/', {'username': username, 'password': PASSWORD})
+        if not login.ok:
+            raise RuntimeError(f'No se pudo iniciar sesión con {username}: {login.status}')
+
+        # Referencia sin cookie de sesión: DRF no lee la sesión ni el usuario
+        anonimo = ClienteDjango()
+        mediciones = Mediciones()
+        for _ in range(repeticiones):
+            mediciones.registrar('choices (anónimo)', anonimo.request('GET', '/api/users/choices/'))
+            mediciones.registrar('choices', cliente.request('GET', '/api/users/choices/'))
+            mediciones.registrar('profile', cliente.request('GET', '/api/users/profile/'))
+            actividad = cliente.request('POST', '/api/tracking/iniciar/', {'tipo_pantalla': 'EJERCICIOS'})
+            mediciones.registrar('iniciar-actividad', actividad)
+            if actividad.ok:
+                mediciones.registrar('finalizar-actividad', cliente.request(
+                    'POST', '/api/tracking/finalizar/', {'actividad_id': actividad.data['actividad_id']}
+                ))
+        cliente.request('POST', '/api/users/logout/')
+    return mediciones.resumen()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modos', default=','.join(MODOS))
+    parser.add_argument('--repeticiones', type=int, default=300)
+    parser.add_argument('--prefijo', default='bench_sesion_')
+    parser.add_argument('--salida', default='benchmark_session_overhead.json')
+    args = parser.parse_args(argv)
+
+    modos = [m for m in args.modos.split(',') if m]
+    desconocidos = set(modos) - set(MODOS)
+    if desconocidos:
+        parser.error(f'Modos desconocidos: {", ".join(sorted(desconocidos))}')
+
+    configurar_django()
+    from django.conf import settings
+    from django.db import connection
+
+    preparar_estudiantes(args.prefijo, 1)
+    username = f'{args.prefijo}00000'
+    meta = {
+        'benchmark': 'session_overhead',
+        'db': connection.vendor,
+        'cache': settings.CACHES['default']['BACKEND'],
+        'repeticiones': args.repeticiones,
+    }
+    endpoints = {}
+    inicio = time.perf_counter()
+    for modo in modos:
+        print(f'\n== SESSION_MODE={modo} ==')
+        resumen = medir_modo(modo, username, args.repeticiones)
+        imprimir_tabla(resumen)
+        endpoints.update({f'{modo}/{e}': r for e, r in resumen.items()})
+
+    # choices no hace consultas propias: la diferencia con la llamada anónima es el costo de autenticar
+    print(f"\n{'modo':16} {'choices p50':>12} {'queries':>8} {'costo auth':>11}")
+    for modo in modos:
+        autenticado = endpoints[f'{modo}/choices']
+        base = endpoints[f'{modo}/choices (anónimo)']
+        print(f"{modo:16} {autenticado['p50_ms']:>10.2f}ms {autenticado['queries_media']:>8.1f} "
+              f"{autenticado['p50_ms'] - base['p50_ms']:>9.2f}ms")
+
+    meta['duracion_s'] = round(time.perf_counter() - inicio, 2)
+    guardar_resultados(args.salida, meta, endpoints)
+    print(f'\nResultados guardados en {args.salida}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
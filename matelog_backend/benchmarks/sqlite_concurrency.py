@@ -0,0 +1,221 @@
+"""
+Cuántos estudiantes simultáneos sostiene un servidor con SQLite.
+
+Para cada perfil (basico: configuración por defecto de SQLite; tuning: WAL,
+synchronous=NORMAL, busy timeout, BEGIN IMMEDIATE) y cada nivel de
+concurrencia se levanta gunicorn sobre una copia nueva de una base de datos
+de prueba y se simulan estudiantes resolviendo ejercicios con pausas entre
+acciones (tracking de pantalla, detalle del tema, validar, finalizar).
+
+    python -m benchmarks.sqlite_concurrency --niveles 10,20,40,80 --duracion 30
+
+Un nivel se considera sostenido si no hay errores (p. ej. "database is
+locked") y el p95 de todas las peticiones queda bajo --objetivo-p95.
+No usa db.sqlite3: la base de prueba se crea en un directorio temporal con
+curriculum/demo.json.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.common import (
+    BASE_DIR,
+    ClienteHTTP,
+    Mediciones,
+    configurar_django,
+    guardar_resultados,
+    imprimir_tabla,
+    percentil,
+    servidor_gunicorn,
+)
+from benchmarks.student_flow import PASSWORD, preparar_estudiantes
+
+
+PERFILES = {
+    'basico': {'SQLITE_TUNING': 'False'},
+    'tuning': {'SQLITE_TUNING': 'True'},
+}
+
+
+class EstudianteVirtual:
+    """
+    Estudiante que resuelve ejercicios de los temas desbloqueados con una
+    pausa aleatoria entre acciones.
+    """
+
+    def __init__(self, url, username, rng, pausa):
+        self.cliente = ClienteHTTP(url)
+        self.username = username
+        self.rng = rng
+        self.pausa = pausa
+        self.mediciones = Mediciones()
+
+    def llamar(self, endpoint, metodo, ruta, data=None):
+        respuesta = self.cliente.request(metodo, ruta, data)
+        self.mediciones.registrar(endpoint, respuesta)
+        return respuesta
+
+    def esperar(self):
+        time.sleep(self.rng.uniform(0, 2 * self.pausa))
+
+    def iniciar(self):
+        """
+        Login y descubrimiento de temas (fuera de la ventana de medición).
+        """
+        self.cliente.request('GET', '/api/users/csrf/')
+        login = self.cliente.request('POST', '/api/users/login/', {'username': self.username, 'password': PASSWORD})
+        if not login.ok:
+            raise RuntimeError(f'No se pudo iniciar sesión con {self.username}: {login.status}')
+        self.temas = []
+        for leccion in self.cliente.request('GET', '/api/lessons/lecciones/').data or []:
+            detalle = self.cliente.request('GET', f"/api/lessons/lecciones/{leccion['id']}/").data or {}
+            self.temas.extend(t['id'] for t in detalle.get('temas', []) if t['progreso']['desbloqueado'])
+        if not self.temas:
+            raise RuntimeError('No hay temas desbloqueados; ¿se cargó el currículo?')
+
+    def ejecutar(self, hasta):
+        while time.perf_counter() < hasta:
+            tema_id = self.rng.choice(self.temas)
+            actividad = self.llamar('iniciar-actividad', 'POST', '/api/tracking/iniciar/', {
+                'tipo_pantalla': 'EJERCICIOS', 'metadata': {'tema_id': tema_id},
+            })
+            tema = self.llamar('tema-detail', 'GET', f'/api/lessons/temas/{tema_id}/').data or {}
+            for ejercicio in tema.get('ejercicios', []):
+                if time.perf_counter() >= hasta:
+                    break
+                self.esperar()
+                self.llamar('validar-ejercicio', 'POST', '/api/lessons/ejercicios/validar/', {
+                    'ejercicio_id': ejercicio['id'],
+                    'respuesta': self.rng.choice('ABCD'),
+                    'tiempo_respuesta_segundos': self.rng.randint(5, 120),
+                })
+            else:
+                self.llamar('finalizar-tema', 'POST', f'/api/lessons/temas/{tema_id}/finalizar/')
+                self.llamar('reintentar-tema', 'POST', f'/api/lessons/temas/{tema_id}/reintentar/')
+            if actividad.ok:
+                self.llamar('finalizar-actividad', 'POST', '/api/tracking/finalizar/',
+                            {'actividad_id': actividad.data['actividad_id']})
+        return self.mediciones
+
+
+def preparar_plantilla(directorio, estudiantes, prefijo):
+    """
+    Crea la base de datos de plantilla (sin WAL) con el currículo de demo y los estudiantes.
+    """
+    ruta = Path(directorio) / 'plantilla.sqlite3'
+    os.environ['SQLITE_PATH'] = str(ruta)
+    os.environ['SQLITE_TUNING'] = 'False'
+    configurar_django()
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', verbosity=0)
+    call_command('load_curriculum', str(BASE_DIR / 'curriculum' / 'demo.json'), verbosity=0)
+    preparar_estudiantes(prefijo, estudiantes)
+    connection.close()
+    return ruta
+
+
+def correr_nivel(plantilla, perfil, estudiantes, args, usernames):
+    ruta = plantilla.with_name(f'{perfil}-{estudiantes}.sqlite3')
+    shutil.copyfile(plantilla, ruta)
+    env = {**PERFILES[perfil], 'SQLITE_PATH': str(ruta), 'MONITORING_LOG_LEVEL': 'WARNING'}
+
+    with servidor_gunicorn(workers=args.workers, threads=args.threads, env=env) as url:
+        virtuales = [
+            EstudianteVirtual(url, usernames[i], random.Random(args.semilla + i), args.pausa)
+            for i in range(estudiantes)
+        ]
+        with ThreadPoolExecutor(max_workers=estudiantes) as pool:
+            list(pool.map(EstudianteVirtual.iniciar, virtuales))
+            inicio = time.perf_counter()
+            hasta = inicio + args.duracion
+            resultados = list(pool.map(lambda v: v.ejecutar(hasta), virtuales))
+            transcurrido = time.perf_counter() - inicio
+
+    mediciones = Mediciones()
+    for propias in resultados:
+        mediciones.combinar(propias)
+    todas = [ms for d in mediciones.datos.values() for ms in d['ms']]
+    errores = sum(d['errores'] for d in mediciones.datos.values())
+    for sufijo in ('', '-wal', '-shm'):
+        Path(str(ruta) + sufijo).unlink(missing_ok=True)
+    return mediciones.resumen(), {
+        'estudiantes': estudiantes,
+        'peticiones': len(todas),
+        'rps': round(len(todas) / transcurrido, 1),
+        'p95_ms': round(percentil(todas, 95), 1) if todas else None,
+        'errores': errores,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perfiles', default='basico,tuning')
+    parser.add_argument('--niveles', default='10,20,40,80', help='Estudiantes simultáneos a probar')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de medición por nivel')
+    parser.add_argument('--pausa', type=float, default=1.0, help='Pausa media (s) entre acciones de un estudiante')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--objetivo-p95', type=float, default=500, help='p95 máximo (ms) para considerar sostenido un nivel')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--prefijo', default='bench_')
+    parser.add_argument('--salida', default='benchmark_sqlite_concurrency.json')
+    args = parser.parse_args(argv)
+
+    perfiles = [p for p in args.perfiles.split(',') if p]
+    desconocidos = set(perfiles) - set(PERFILES)
+    if desconocidos:
+        parser.error(f'Perfiles desconocidos: {", ".join(sorted(desconocidos))}')
+    niveles = sorted(int(n) for n in args.niveles.split(',') if n)
+    if os.environ.get('DATABASE_URL'):
+        parser.error('Este benchmark es para SQLite; quitar DATABASE_URL del entorno')
+
+    meta = {
+        'benchmark': 'sqlite_concurrency',
+        'db': 'sqlite',
+        'gunicorn_workers': args.workers,
+        'gunicorn_threads': args.threads,
+        'duracion_s': args.duracion,
+        'pausa_s': args.pausa,
+        'objetivo_p95_ms': args.objetivo_p95,
+        'niveles': {},
+        'sostenidos': {},
+    }
+    endpoints = {}
+    with tempfile.TemporaryDirectory(prefix='matelog-sqlite-') as directorio:
+        plantilla = preparar_plantilla(directorio, max(niveles), args.prefijo)
+        usernames = [f'{args.prefijo}{i:05d}' for i in range(max(niveles))]
+
+        for perfil in perfiles:
+            meta['niveles'][perfil] = []
+            meta['sostenidos'][perfil] = 0
+            for estudiantes in niveles:
+                print(f'\n== {perfil}: {estudiantes} estudiantes ==')
+                resumen, nivel = correr_nivel(plantilla, perfil, estudiantes, args, usernames)
+                imprimir_tabla(resumen)
+                sostenido = nivel['errores'] == 0 and nivel['p95_ms'] is not None and nivel['p95_ms'] <= args.objetivo_p95
+                print(f"{nivel['rps']} peticiones/s, p95 {nivel['p95_ms']}ms, {nivel['errores']} errores"
+                      f" -> {'sostenido' if sostenido else 'NO sostenido'}")
+                meta['niveles'][perfil].append({**nivel, 'sostenido': sostenido})
+                if sostenido:
+                    meta['sostenidos'][perfil] = max(meta['sostenidos'][perfil], estudiantes)
+                endpoints.update({f'{perfil}/{estudiantes}/{e}': r for e, r in resumen.items()})
+
+    print('\nEstudiantes simultáneos sostenidos:')
+    for perfil, estudiantes in meta['sostenidos'].items():
+        print(f'  {perfil:8} {estudiantes}')
+    guardar_resultados(args.salida, meta, endpoints)
+    print(f'\nResultados guardados en {args.salida}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Prueba de carga del recorrido completo de un estudiante:
+csrf -> login -> lista de lecciones -> detalle de lección -> tema ->
+validar cada ejercicio -> finalizar tema, con las llamadas de tracking
+intercaladas como las hace el frontend.
+
+Modos:
+  En proceso (por defecto): usa django.test.Client contra la base de datos
+  configurada (SQLite o DATABASE_URL) y cuenta las consultas SQL por endpoint.
+
+      python -m benchmarks.student_flow --estudiantes 20 --salida resultados.json
+
+  HTTP: mide contra un servidor real. Con --gunicorn se levanta uno local.
+
+      python -m benchmarks.student_flow --gunicorn --workers 4 --concurrencia 8
+      python -m benchmarks.student_flow --url http://127.0.0.1:8000 --concurrencia 8
+
+Los resultados (p50/p95/p99 y consultas por endpoint) se guardan en JSON y
+se pueden comparar con una corrida anterior usando --comparar.
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import (
+    ClienteDjango,
+    ClienteHTTP,
+    Mediciones,
+    comparar_resultados,
+    configurar_django,
+    guardar_resultados,
+    imprimir_tabla,
+    servidor_gunicorn,
+)
+
+
+PASSWORD = 'Bench-12345!'
+
+
+class RecorridoEstudiante:
+    """
+    Ejecuta el recorrido de un estudiante y registra cada llamada con el
+    nombre de la URL correspondiente.
+    """
+
+    def __init__(self, cliente, mediciones, rng, temas_por_leccion=1):
+        self.cliente = cliente
+        self.mediciones = mediciones
+        self.rng = rng
+        self.temas_por_leccion = temas_por_leccion
+
+    def llamar(self, endpoint, metodo, ruta, data=None):
+        respuesta = self.cliente.request(metodo, ruta, data)
+        self.mediciones.registrar(endpoint, respuesta)
+        return respuesta
+
+    def pantalla(self, tipo, **metadata):
+        respuesta = self.llamar('iniciar-actividad', 'POST', '/api/tracking/iniciar/', {
+            'tipo_pantalla': tipo,
+            'metadata': metadata,
+        })
+        return (respuesta.data or {}).get('actividad_id')
+
+    def salir_de_pantalla(self, actividad_id):
+        if actividad_id:
+            self.llamar('finalizar-actividad', 'POST', '/api/tracking/finalizar/', {'actividad_id': actividad_id})
+
+    def ejecutar(self, username, registrar=False):
+        self.llamar('csrf', 'GET', '/api/users/csrf/')
+        actividad = self.pantalla('LOGIN')
+        credenciales = {'username': username, 'password': PASSWORD}
+        login = self.cliente.request('POST', '/api/users/login/', credenciales)
+        if login.status == 401 and registrar:
+            # En modo HTTP el estudiante se registra la primera vez que se usa
+            self.llamar('register', 'POST', '/api/users/register/', {
+                **credenciales, 'password_confirm': PASSWORD,
+                'grupo': 'A', 'especialidad': 'INFORMATICA', 'genero': 'N', 'edad': '16',
+            })
+            login = self.cliente.request('POST', '/api/users/login/', credenciales)
+        self.mediciones.registrar('login', login)
+        if not login.ok:
+            raise RuntimeError(f'No se pudo iniciar sesión con {username}: {login.status}')
+        self.salir_de_pantalla(actividad)
+
+        self.llamar('profile', 'GET', '/api/users/profile/')
+        sesion = self.llamar('iniciar-sesion', 'POST', '/api/tracking/sesion/iniciar/')
+
+        actividad = self.pantalla('LISTA_LECCIONES')
+        lecciones = self.llamar('leccion-list', 'GET', '/api/lessons/lecciones/').data or []
+        self.salir_de_pantalla(actividad)
+
+        for leccion in lecciones:
+            actividad = self.pantalla('DETALLE_LECCION', leccion_id=leccion['id'])
+            detalle = self.llamar('leccion-detail', 'GET', f"/api/lessons/lecciones/{leccion['id']}/").data
+            self.salir_de_pantalla(actividad)
+            if not detalle:
+                continue
+
+            temas = [t for t in detalle['temas'] if t['progreso']['desbloqueado']]
+            for tema in temas[:self.temas_por_leccion]:
+                self.estudiar_tema(leccion['id'], tema['id'])
+
+        if sesion.ok:
+            self.llamar('finalizar-sesion', 'POST', '/api/tracking/sesion/finalizar/',
+                        {'sesion_id': sesion.data['sesion_id']})
+        self.llamar('logout', 'POST', '/api/users/logout/')
+
+    def estudiar_tema(self, leccion_id, tema_id):
+        actividad = self.pantalla('CONTENIDO_TEMA', leccion_id=leccion_id, tema_id=tema_id)
+        tema = self.llamar('tema-detail', 'GET', f'/api/lessons/temas/{tema_id}/').data
+        if not tema or 'ejercicios' not in tema:
+            self.salir_de_pantalla(actividad)
+            return
+        if self.rng.random() < 0.3:
+            self.llamar('volver-contenido', 'POST', '/api/tracking/volver-contenido/', {'actividad_id': actividad})
+        self.salir_de_pantalla(actividad)
+
+        if tema.get('total_ejercicios_respondidos') == len(tema['ejercicios']):
+            self.llamar('reintentar-tema', 'POST', f'/api/lessons/temas/{tema_id}/reintentar/')
+
+        actividad = self.pantalla('EJERCICIOS', leccion_id=leccion_id, tema_id=tema_id)
+        for ejercicio in tema['ejercicios']:
+            if ejercicio['tipo'] == 'MULTIPLE':
+                letras = [o['letra'] for o in ejercicio['opciones']] or ['A']
+                respuesta = self.rng.choice(letras)
+            else:
+                respuesta = self.rng.choice(['verdadero', 'falso'])
+            self.llamar('validar-ejercicio', 'POST', '/api/lessons/ejercicios/validar/', {
+                'ejercicio_id': ejercicio['id'],
+                'respuesta': respuesta,
+                'uso_ayuda': self.rng.random() < 0.2,
+                'tiempo_respuesta_segundos': self.rng.randint(5, 120),
+            })
+        self.llamar('finalizar-tema', 'POST', f'/api/lessons/temas/{tema_id}/finalizar/')
+        self.salir_de_pantalla(actividad)
+
+
+def preparar_estudiantes(prefijo, cantidad):
+    """
+    (Modo en proceso) Recrea los estudiantes del benchmark para que cada
+    corrida empiece sin progreso y sea reproducible.
+    """
+    from django.contrib.auth.hashers import make_password
+    from users.models import CustomUser
+
+    CustomUser.objects.filter(username__startswith=prefijo).delete()
+    password = make_password(PASSWORD)
+    CustomUser.objects.bulk_create([
+        CustomUser(username=f'{prefijo}{i:05d}', password=password, grupo='A',
+                   especialidad='INFORMATICA', genero='N', edad='16')
+        for i in range(cantidad)
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estudiantes', type=int, default=10)
+    parser.add_argument('--temas-por-leccion', type=int, default=1)
+    parser.add_argument('--prefijo', default='bench_')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--url', help='Medir contra un servidor ya levantado')
+    parser.add_argument('--gunicorn', action='store_true', help='Levantar un gunicorn local para la medición')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn (con --gunicorn)')
+    parser.add_argument('--threads', type=int, default=1, help='Threads por worker de gunicorn (con --gunicorn)')
+    parser.add_argument('--concurrencia', type=int, default=1, help='Estudiantes simultáneos (modo HTTP)')
+    parser.add_argument('--salida', default='benchmark_student_flow.json')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar')
+    args = parser.parse_args(argv)
+
+    configurar_django()
+    from django.db import connection
+
+    usernames = [f'{args.prefijo}{i:05d}' for i in range(args.estudiantes)]
+    meta = {
+        'benchmark': 'student_flow',
+        'db': connection.vendor,
+        'estudiantes': args.estudiantes,
+        'temas_por_leccion': args.temas_por_leccion,
+        'semilla': args.semilla,
+    }
+    mediciones = Mediciones()
+    inicio = time.perf_counter()
+
+    if args.url or args.gunicorn:
+        meta.update({'modo': 'http', 'concurrencia': args.concurrencia})
+
+        def correr(url):
+            def un_estudiante(indice):
+                propias = Mediciones()
+                rng = random.Random(args.semilla + indice)
+                RecorridoEstudiante(ClienteHTTP(url), propias, rng, args.temas_por_leccion).ejecutar(
+                    usernames[indice], registrar=True
+                )
+                return propias
+
+            with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+                for propias in pool.map(un_estudiante, range(args.estudiantes)):
+                    mediciones.combinar(propias)
+
+        if args.gunicorn:
+            meta.update({'gunicorn_workers': args.workers, 'gunicorn_threads': args.threads})
+            with servidor_gunicorn(workers=args.workers, threads=args.threads) as url:
+                correr(url)
+        else:
+            correr(args.url)
+    else:
+        meta['modo'] = 'en_proceso'
+        preparar_estudiantes(args.prefijo, args.estudiantes)
+        for indice, username in enumerate(usernames):
+            rng = random.Random(args.semilla + indice)
+            RecorridoEstudiante(ClienteDjango(), mediciones, rng, args.temas_por_leccion).ejecutar(username)
+
+    meta['duracion_s'] = round(time.perf_counter() - inicio, 2)
+    resumen = mediciones.resumen()
+    imprimir_tabla(resumen)
+    guardar_resultados(args.salida, meta, resumen)
+    print(f'\nResultados guardados en {args.salida} ({meta["duracion_s"]}s)')
+    if args.comparar:
+        comparar_resultados(args.comparar, resumen)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -57,6 +57,7 @@ class ContenidoTemaAdmin(admin.ModelAdmin):
     list_filter = ('tipo', 'tema__leccion', 'fecha_creacion')
     search_fields = ('tema__titulo', 'contenido_texto')
     ordering = ('tema__leccion__orden', 'tema__orden', 'orden')
+    readonly_fields = ('html_bytes_fuente', 'html_bytes_procesado')
     
     # Modificación 8: TinyMCE para contenido_texto
     formfield_overrides = {
@@ -78,6 +79,7 @@ class EjercicioAdmin(admin.ModelAdmin):
     search_fields = ('tema__titulo', 'enunciado', 'instruccion')
     ordering = ('tema__leccion__orden', 'tema__orden', 'orden')
     inlines = [OpcionMultipleInline]
+    readonly_fields = ('html_bytes_fuente', 'html_bytes_procesado')
     
     # Modificación 8: TinyMCE para campos de texto largo
     formfield_overrides = {
@@ -0,0 +1,205 @@
+"""
+Versiones async (ORM async de Django) de las vistas de lectura del estudiante.
+Se usan en lugar de las de views.py cuando ASYNC_VIEWS=True (despliegue ASGI);
+las respuestas son idénticas.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import models
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+
+from matelog_backend.asincrono import VistaAsync, respuesta_json
+from monitoring.instrumentacion import medir
+from tracking.models import ProgresoLeccion, ProgresoTema, RespuestaEjercicio
+from . import catalogo, progreso
+from .models import Leccion, Tema, ContenidoTema, Ejercicio
+from .serializers import tema_detalle_dict
+
+
+class LeccionListView(VistaAsync):
+    """
+    Vista async para listar todas las lecciones disponibles.
+    Endpoint: GET /api/lecciones/
+    """
+    throttle_scope = 'aprendizaje'
+
+    async def get(self, request):
+        lecciones = Leccion.objects.filter(is_active=True).annotate(
+            cantidad_temas_activos=models.Count('temas', filter=models.Q(temas__is_active=True))
+        ).order_by('orden')
+
+        progresos = {
+            progreso_leccion.leccion_id: progreso_leccion
+            async for progreso_leccion in ProgresoLeccion.objects.filter(usuario=request.user)
+        }
+        lecciones = [leccion async for leccion in lecciones]
+        return respuesta_json(progreso.lecciones_lista_data(lecciones, progresos))
+
+
+class LeccionDetailView(VistaAsync):
+    """
+    Vista async para obtener el detalle de una lección y sus temas.
+    Endpoint: GET /api/lecciones/<id>/
+    """
+    throttle_scope = 'aprendizaje'
+
+    async def get(self, request, leccion_id):
+        temas_con_conteos = Tema.objects.annotate(
+            cantidad_contenidos=models.Count('contenidos', distinct=True),
+            cantidad_ejercicios=models.Count('ejercicios', distinct=True),
+        ).order_by('orden')
+        leccion = await aget_object_or_404(
+            Leccion.objects.prefetch_related(models.Prefetch('temas', queryset=temas_con_conteos)),
+            id=leccion_id,
+            is_active=True
+        )
+
+        progreso_leccion, created = await ProgresoLeccion.objects.aget_or_create(
+            usuario=request.user,
+            leccion=leccion,
+            defaults={'estado': 'EN_PROGRESO', 'fecha_inicio': timezone.now()}
+        )
+        if progreso.iniciar_leccion(progreso_leccion, created):
+            await progreso_leccion.asave()
+
+        progresos = await self._progresos_temas(request.user, list(leccion.temas.all()))
+
+        leccion_data, desbloqueados = progreso.leccion_detalle_data(leccion, progreso_leccion, progresos)
+        for progreso_tema in desbloqueados:
+            await progreso_tema.asave(update_fields=['desbloqueado'])
+
+        return respuesta_json(leccion_data)
+
+    async def _progresos_temas(self, usuario, temas):
+        """
+        Devuelve {tema_id: ProgresoTema} creando en bloque los que falten.
+        """
+        progresos = {
+            progreso_tema.tema_id: progreso_tema
+            async for progreso_tema in ProgresoTema.objects.filter(usuario=usuario, tema__in=temas)
+        }
+        faltantes = progreso.temas_sin_progreso(usuario, temas, progresos)
+
+        if faltantes:
+            # ignore_conflicts cubre el caso de dos peticiones simultáneas del mismo usuario
+            await ProgresoTema.objects.abulk_create(faltantes, ignore_conflicts=True)
+            progresos = {
+                progreso_tema.tema_id: progreso_tema
+                async for progreso_tema in ProgresoTema.objects.filter(usuario=usuario, tema__in=temas)
+            }
+
+        return progresos
+
+
+class LeccionPaqueteView(VistaAsync):
+    """
+    Vista async del paquete de la lección para usarla sin conexión (lessons.catalogo).
+    Endpoint: GET /api/lecciones/<id>/paquete/
+    """
+    throttle_scope = 'aprendizaje'
+
+    async def get(self, request, leccion_id):
+        version = await sync_to_async(catalogo.version_leccion)(leccion_id)
+        if version is None:
+            raise Http404
+        entrada = await sync_to_async(catalogo.entrada_leccion)(leccion_id, version)
+        return catalogo.respuesta_catalogo(request, entrada)
+
+
+class TemaDetailView(VistaAsync):
+    """
+    Vista async para obtener el contenido completo de un tema.
+    Endpoint: GET /api/temas/<id>/ (?contenido=0: solo el progreso)
+    """
+    throttle_scope = 'aprendizaje'
+
+    async def get(self, request, tema_id):
+        solo_progreso = request.GET.get('contenido') == '0'
+        if solo_progreso:
+            # Solo el progreso del estudiante: el contenido sale de /contenido/ (lessons.catalogo)
+            tema = await aget_object_or_404(Tema, id=tema_id, is_active=True)
+        else:
+            tema = await aget_object_or_404(
+                Tema.objects.prefetch_related(
+                    # Solo el HTML procesado: la fuente puede traer imágenes incrustadas de varios MB
+                    models.Prefetch('contenidos', queryset=ContenidoTema.objects.defer(*ContenidoTema.campos_html)),
+                    models.Prefetch(
+                        'ejercicios',
+                        queryset=Ejercicio.objects.defer(*Ejercicio.campos_html).prefetch_related('opciones'),
+                    ),
+                ),
+                id=tema_id,
+                is_active=True
+            )
+
+        # Verificar que el tema esté desbloqueado
+        progreso_tema, created = await ProgresoTema.objects.aget_or_create(
+            usuario=request.user,
+            tema=tema
+        )
+
+        if not progreso_tema.desbloqueado and tema.orden != 1:
+            return respuesta_json({'error': 'Este tema aún no está desbloqueado'}, status=403)
+
+        if progreso_tema.estado == 'SIN_INICIAR':
+            progreso_tema.estado = 'INICIADO'
+            progreso_tema.fecha_inicio = timezone.now()
+            await progreso_tema.asave()
+
+        if solo_progreso:
+            tema_data = {'id': tema.id}
+            ejercicios_ids = [e async for e in tema.ejercicios.values_list('id', flat=True)]
+        else:
+            with medir('serializer'):
+                tema_data = tema_detalle_dict(tema)
+            ejercicios_ids = [ejercicio['id'] for ejercicio in tema_data['ejercicios']]
+
+        ejercicios_respondidos = {
+            respuesta.ejercicio_id: {
+                'respuesta_usuario': respuesta.respuesta_usuario,
+                'es_correcta': respuesta.es_correcta,
+                'uso_ayuda': respuesta.uso_ayuda
+            }
+            async for respuesta in RespuestaEjercicio.objects.filter(
+                usuario=request.user,
+                progreso_tema=progreso_tema
+            )
+        }
+
+        # Índice del siguiente ejercicio sin responder (0 si están todos respondidos)
+        siguiente_ejercicio_index = 0
+        for idx, ejercicio_id in enumerate(ejercicios_ids):
+            if ejercicio_id not in ejercicios_respondidos:
+                siguiente_ejercicio_index = idx
+                break
+
+        if len(ejercicios_respondidos) == len(ejercicios_ids):
+            siguiente_ejercicio_index = 0
+
+        tema_data['ejercicios_respondidos'] = ejercicios_respondidos
+        tema_data['siguiente_ejercicio_index'] = siguiente_ejercicio_index
+        tema_data['total_ejercicios_respondidos'] = len(ejercicios_respondidos)
+
+        return respuesta_json(tema_data)
+
+
+class TemaContenidoView(VistaAsync):
+    """
+    Vista async del contenido del tema, cacheado y ya comprimido (lessons.catalogo).
+    Endpoint: GET /api/temas/<id>/contenido/
+    """
+    throttle_scope = 'aprendizaje'
+
+    async def get(self, request, tema_id):
+        version = await sync_to_async(catalogo.version_tema)(tema_id)
+        if version is None:
+            raise Http404
+        orden, version = version
+        if orden != 1 and not await ProgresoTema.objects.filter(
+            usuario=request.user, tema_id=tema_id, desbloqueado=True
+        ).aexists():
+            return respuesta_json({'error': 'Este tema aún no está desbloqueado'}, status=403)
+        entrada = await sync_to_async(catalogo.entrada_tema)(tema_id, version)
+        return catalogo.respuesta_catalogo(request, entrada)
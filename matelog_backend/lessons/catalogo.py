@@ -0,0 +1,175 @@
+"""
+Payloads compartidos del catálogo: el contenido de un tema (teoría,
+ejercicios y opciones) y el paquete de una lección (todos sus temas, para
+usarla sin conexión) son iguales para todos los estudiantes, así que se
+serializan y se comprimen (gzip y br al nivel máximo,
+matelog_backend.compresion) una sola vez por versión de contenido y se
+guardan en el cache.
+
+La versión es una huella de las fechas de modificación y cantidades de las
+filas del tema o de la lección, leída en una sola consulta: cualquier cambio
+por el admin, el curriculum (load_curriculum) o process_html la cambia y la
+entrada anterior queda huérfana hasta que expira. Las opciones no tienen
+fecha propia: al cambiar una se actualiza fecha_modificacion de su ejercicio.
+
+Lo que depende del estudiante (respuestas previas, siguiente ejercicio) lo
+devuelve TemaDetailView con ?contenido=0.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from matelog_backend.compresion import comprimir_todo, elegir_codificacion
+from matelog_backend.json_rapido import dumps
+from monitoring import metricas
+from monitoring.instrumentacion import medir
+from .models import Leccion, Tema, ContenidoTema, Ejercicio
+from .serializers import tema_detalle_dict
+
+
+# Cambiar al modificar tema_detalle_dict o el paquete: invalida todas las entradas guardadas
+VERSION_FORMATO = 1
+DURACION = 24 * 60 * 60
+
+
+def _agregado(consulta, grupo, agregado):
+    """
+    Subquery con el agregado de `consulta` (ya filtrada por OuterRef) agrupada por `grupo`.
+    """
+    return Subquery(consulta.order_by().values(grupo).annotate(valor=agregado).values('valor'))
+
+
+def _huella(*valores):
+    return hashlib.blake2b(repr((VERSION_FORMATO, *valores)).encode(), digest_size=10).hexdigest()
+
+
+def _contenido_del_tema():
+    # Solo el HTML procesado: la fuente puede traer imágenes incrustadas de varios MB
+    return (
+        Prefetch('contenidos', queryset=ContenidoTema.objects.defer(*ContenidoTema.campos_html)),
+        Prefetch('ejercicios', queryset=Ejercicio.objects.defer(*Ejercicio.campos_html).prefetch_related('opciones')),
+    )
+
+
+def version_tema(tema_id):
+    """
+    Huella del contenido del tema, o None si no existe o está inactivo.
+    Devuelve también el orden del tema (para verificar el desbloqueo sin
+    otra consulta): (orden, version).
+    """
+    contenidos = ContenidoTema.objects.filter(tema=OuterRef('pk'))
+    ejercicios = Ejercicio.objects.filter(tema=OuterRef('pk'))
+    fila = Tema.objects.filter(id=tema_id, is_active=True).annotate(
+        contenidos_fecha=_agregado(contenidos, 'tema', Max('fecha_modificacion')),
+        contenidos_cantidad=_agregado(contenidos, 'tema', Count('id')),
+        ejercicios_fecha=_agregado(ejercicios, 'tema', Max('fecha_modificacion')),
+        ejercicios_cantidad=_agregado(ejercicios, 'tema', Count('id')),
+    ).values_list(
+        'orden', 'fecha_modificacion', 'contenidos_fecha', 'contenidos_cantidad',
+        'ejercicios_fecha', 'ejercicios_cantidad',
+    ).first()
+    if fila is None:
+        return None
+    return fila[0], _huella(*fila[1:])
+
+
+def version_leccion(leccion_id):
+    """
+    Huella del contenido de la lección y de todos sus temas activos, o None
+    si no existe o está inactiva. Desactivar un tema cambia su fecha y la
+    cantidad de temas activos.
+    """
+    temas = Tema.objects.filter(leccion=OuterRef('pk'))
+    contenidos = ContenidoTema.objects.filter(tema__leccion=OuterRef('pk'), tema__is_active=True)
+    ejercicios = Ejercicio.objects.filter(tema__leccion=OuterRef('pk'), tema__is_active=True)
+    fila = Leccion.objects.filter(id=leccion_id, is_active=True).annotate(
+        temas_fecha=_agregado(temas, 'leccion', Max('fecha_modificacion')),
+        temas_cantidad=_agregado(temas.filter(is_active=True), 'leccion', Count('id')),
+        contenidos_fecha=_agregado(contenidos, 'tema__leccion', Max('fecha_modificacion')),
+        contenidos_cantidad=_agregado(contenidos, 'tema__leccion', Count('id')),
+        ejercicios_fecha=_agregado(ejercicios, 'tema__leccion', Max('fecha_modificacion')),
+        ejercicios_cantidad=_agregado(ejercicios, 'tema__leccion', Count('id')),
+    ).values_list(
+        'fecha_modificacion', 'temas_fecha', 'temas_cantidad', 'contenidos_fecha', 'contenidos_cantidad',
+        'ejercicios_fecha', 'ejercicios_cantidad',
+    ).first()
+    if fila is None:
+        return None
+    return _huella('leccion', *fila)
+
+
+def _comprimir(data, version):
+    cuerpo = dumps(data)
+    with medir('compresion'):
+        return {'etag': f'W/"{version}"', 'identity': cuerpo, **comprimir_todo(cuerpo)}
+
+
+def _entrada(llave, construir):
+    entrada = metricas.leer_cache(cache, llave, nombre='catalogo')
+    if entrada is None:
+        entrada = construir()
+        cache.set(llave, entrada, DURACION)
+    return entrada
+
+
+def _construir_tema(tema_id, version):
+    tema = Tema.objects.prefetch_related(*_contenido_del_tema()).get(id=tema_id)
+    with medir('serializer'):
+        data = tema_detalle_dict(tema)
+    return _comprimir(data, version)
+
+
+def _construir_leccion(leccion_id, version):
+    leccion = Leccion.objects.prefetch_related(Prefetch(
+        'temas', queryset=Tema.objects.filter(is_active=True).order_by('orden').prefetch_related(*_contenido_del_tema())
+    )).get(id=leccion_id)
+    with medir('serializer'):
+        data = {
+            'id': leccion.id,
+            'version': version,
+            'titulo': leccion.titulo,
+            'descripcion': leccion.descripcion,
+            'orden': leccion.orden,
+            'temas': [tema_detalle_dict(tema) for tema in leccion.temas.all()],
+        }
+    return _comprimir(data, version)
+
+
+def entrada_tema(tema_id, version):
+    """
+    {'etag': ..., 'identity': json, 'br'/'gzip': json comprimido} del tema en
+    esa versión, del cache o recién construida.
+    """
+    return _entrada(f'catalogo:tema:{tema_id}:{version}', lambda: _construir_tema(tema_id, version))
+
+
+def entrada_leccion(leccion_id, version):
+    """
+    Como entrada_tema, con el paquete de la lección: sus datos, la versión y
+    el contenido de cada tema activo (como TemaDetailSerializer).
+    """
+    return _entrada(f'catalogo:leccion:{leccion_id}:{version}', lambda: _construir_leccion(leccion_id, version))
+
+
+def respuesta_catalogo(request, entrada):
+    """
+    Respuesta con el cuerpo ya comprimido que acepta el cliente (o 304 si su
+    copia está al día). CompresionMiddleware no la vuelve a comprimir porque
+    ya trae Content-Encoding.
+    """
+    if entrada['etag'] in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        codificacion = elegir_codificacion(request, [c for c in entrada if c not in ('etag', 'identity')])
+        response = HttpResponse(entrada[codificacion or 'identity'], content_type='application/json')
+        if codificacion:
+            response['Content-Encoding'] = codificacion
+    response['ETag'] = entrada['etag']
+    # El cliente guarda la copia pero la revalida siempre (requiere sesión o token)
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
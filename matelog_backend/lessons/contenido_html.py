@@ -0,0 +1,404 @@
+"""
+Procesamiento del HTML que genera TinyMCE al guardar el contenido.
+
+Los campos de texto enriquecido (contenido_texto, enunciado, instruccion,
+texto_ayuda, retroalimentacion_*) guardan el HTML tal como lo escribe el
+editor. Al guardar, `procesar_html` genera una versión limpia que se guarda
+junto a la fuente (`<campo>_procesado`) y es la que sirve la API:
+
+  - Sanitiza: solo se conservan las etiquetas, atributos, estilos y URLs de
+    las listas permitidas. script, style, iframe, etc. se eliminan con su
+    contenido; cualquier otra etiqueta desconocida (p. ej. las de Word al
+    pegar) se quita y se conserva su texto.
+  - Minifica: sin comentarios, espacios colapsados (salvo dentro de <pre>),
+    sin espacios alrededor de los bloques y sin párrafos vacíos al inicio o
+    al final.
+  - Normaliza: etiquetas y atributos en minúsculas con comillas dobles,
+    <strike>/<del> como <s>, estilos como `propiedad:valor;...` y todas
+    las etiquetas cerradas.
+  - Imágenes: las incrustadas como data: URI se extraen a archivos AVIF/WebP
+    en varios anchos (lessons.imagenes) y se sirven con srcset; todas las
+    imágenes se cargan con loading="lazy".
+
+El resultado no depende de cuántas veces se procese: procesar_html(x) ==
+procesar_html(procesar_html(x)).
+"""
+
+import operator
+import re
+from functools import reduce
+from html import escape
+from html.parser import HTMLParser
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .imagenes import TIPOS, extraer_imagen
+
+
+# Etiquetas que se conservan (todas las que produce la configuración de TinyMCE)
+ETIQUETAS = {
+    'a', 'b', 'blockquote', 'br', 'caption', 'code', 'col', 'colgroup', 'div', 'em',
+    'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li',
+    'ol', 'p', 'picture', 'pre', 's', 'source', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td',
+    'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+# Etiquetas que se eliminan junto con todo su contenido
+ETIQUETAS_ELIMINADAS = {
+    'button', 'embed', 'form', 'head', 'iframe', 'noscript', 'object', 'script',
+    'select', 'style', 'template', 'textarea', 'title',
+}
+SINONIMOS = {'strike': 's', 'del': 's', 'ins': 'u'}
+VACIAS = {'br', 'col', 'hr', 'img', 'source'}
+# Elementos sin cierre en HTML (aunque no se conserven)
+_VACIAS_HTML = VACIAS | {'area', 'base', 'embed', 'input', 'link', 'meta', 'param', 'track', 'wbr'}
+# Bloques: los espacios a su alrededor no se muestran y se eliminan
+BLOQUES = {
+    'blockquote', 'br', 'caption', 'col', 'colgroup', 'div', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'ol', 'p', 'pre', 'table',
+    'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+# Cierres implícitos de HTML: abrir la llave cierra la etiqueta abierta del primer
+# conjunto, salvo que antes aparezca una del segundo (<li>uno<li>dos)
+CIERRES_IMPLICITOS = {
+    'li': ({'li'}, {'ol', 'ul'}),
+    'td': ({'td', 'th'}, {'table', 'tr'}),
+    'th': ({'td', 'th'}, {'table', 'tr'}),
+    'tr': ({'tr'}, {'table', 'tbody', 'tfoot', 'thead'}),
+}
+_CIERRE_PARRAFO = ({'p'}, BLOQUES - {'p'})
+_CIERRAN_PARRAFO = {
+    'blockquote', 'div', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'ol', 'p',
+    'pre', 'table', 'ul',
+}
+
+ATRIBUTOS_GLOBALES = {'class', 'style', 'title', 'lang', 'dir'}
+ATRIBUTOS = {
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height', 'srcset', 'sizes', 'loading', 'decoding'},
+    'source': {'type', 'srcset', 'sizes'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start', 'type'},
+    'col': {'span'},
+    'colgroup': {'span'},
+}
+ESTILOS = {
+    'background-color', 'border', 'border-collapse', 'color', 'float', 'font-style',
+    'font-weight', 'height', 'list-style-type', 'margin-left', 'margin-right',
+    'padding-left', 'text-align', 'text-decoration', 'vertical-align', 'width',
+}
+
+ESQUEMAS_PERMITIDOS = {'http', 'https', 'mailto'}
+# Imágenes incrustadas por TinyMCE; SVG no porque puede llevar scripts
+_DATA_IMAGEN = re.compile(r'data:image/(?:png|jpe?g|gif|webp|avif);base64,[a-z0-9+/=\s]*\Z', re.IGNORECASE)
+_ESQUEMA = re.compile(r'([a-z][a-z0-9+.\-]*):', re.IGNORECASE)
+# Solo espacios ASCII: \s también coincide con &nbsp;, que TinyMCE usa a propósito
+_ESPACIOS = re.compile(r'[ \t\n\r\f]+')
+# Valores permitidos de los atributos que no son texto libre
+_VALORES = {
+    'width': re.compile(r'\d+'),
+    'height': re.compile(r'\d+'),
+    'colspan': re.compile(r'\d+'),
+    'rowspan': re.compile(r'\d+'),
+    'span': re.compile(r'\d+'),
+    'start': re.compile(r'-?\d+'),
+    'loading': re.compile(r'lazy|eager'),
+    'decoding': re.compile(r'async|sync|auto'),
+    'type': re.compile(r'image/[a-z0-9.+\-]+|[1aAiI]'),
+    'sizes': re.compile(r'[a-z0-9():.,%\- ]+', re.IGNORECASE),
+}
+_DESCRIPTOR = re.compile(r'\d+w|\d+(?:\.\d+)?x')
+_CONTROL = re.compile(r'[\x00-\x20\x7f]+')
+_PARRAFOS_VACIOS_INICIO = re.compile(r'\A(?:<p>(?:\xa0|<br>| )*</p>)+')
+_PARRAFOS_VACIOS_FIN = re.compile(r'(?:<p>(?:\xa0|<br>| )*</p>)+\Z')
+
+
+def _url_segura(valor, etiqueta):
+    # Los navegadores ignoran espacios y caracteres de control dentro del esquema ("java\nscript:")
+    compacta = _CONTROL.sub('', valor)
+    esquema = _ESQUEMA.match(compacta)
+    if esquema is None:
+        return True
+    if etiqueta == 'img' and _DATA_IMAGEN.match(valor.strip()):
+        return True
+    return esquema.group(1).lower() in ESQUEMAS_PERMITIDOS
+
+
+def _srcset(valor):
+    # Candidatos "url [descriptor]" separados por comas; cualquier candidato inválido anula el atributo
+    candidatos = []
+    for candidato in valor.split(','):
+        partes = candidato.split()
+        if not partes or len(partes) > 2 or not _url_segura(partes[0], 'source'):
+            return ''
+        if len(partes) == 2 and not _DESCRIPTOR.fullmatch(partes[1]):
+            return ''
+        candidatos.append(' '.join(partes))
+    return ', '.join(candidatos)
+
+
+def _srcset_variantes(variantes):
+    return ', '.join(f'{url} {ancho}w' for url, ancho in variantes)
+
+
+def _serializar(atributos):
+    return ''.join(f' {nombre}="{escape(valor)}"' for nombre, valor in atributos.items())
+
+
+def _estilo(valor):
+    declaraciones = []
+    for declaracion in valor.split(';'):
+        propiedad, _, contenido = declaracion.partition(':')
+        propiedad = propiedad.strip().lower()
+        contenido = _ESPACIOS.sub(' ', contenido).strip()
+        if propiedad not in ESTILOS or not contenido:
+            continue
+        if any(peligroso in contenido.lower() for peligroso in ('url(', 'expression(', '\\', '/*')):
+            continue
+        declaraciones.append(f'{propiedad}:{contenido}')
+    return ';'.join(declaraciones)
+
+
+class _Procesador(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.salida = []
+        # (etiqueta, emitida) de cada etiqueta abierta
+        self.abiertas = []
+        # Profundidad dentro de una etiqueta eliminada con su contenido
+        self.eliminando = 0
+        self.en_pre = 0
+        # True justo después de un bloque: se descartan los espacios iniciales del texto
+        self.tras_bloque = True
+
+    def _atributos(self, etiqueta, atributos):
+        permitidos = ATRIBUTOS_GLOBALES | ATRIBUTOS.get(etiqueta, set())
+        limpios = {}
+        for nombre, valor in atributos:
+            nombre = nombre.lower()
+            valor = (valor or '').strip()
+            if nombre not in permitidos or nombre in limpios:
+                continue
+            if nombre in ('href', 'src') and not _url_segura(valor, etiqueta):
+                continue
+            if nombre == 'style':
+                valor = _estilo(valor)
+            elif nombre == 'class':
+                valor = ' '.join(valor.split())
+            elif nombre == 'srcset':
+                valor = _srcset(valor)
+            elif nombre in _VALORES and not _VALORES[nombre].fullmatch(valor):
+                continue
+            if valor or nombre == 'alt':
+                limpios[nombre] = valor
+        if limpios.get('target') == '_blank':
+            limpios['rel'] = 'noopener noreferrer'
+        return limpios
+
+    def _imagen(self, atributos):
+        """
+        HTML de una imagen: si está incrustada se extrae a archivos y se sirve
+        con <picture>/srcset; si no, el mismo <img> con carga diferida.
+        """
+        atributos.setdefault('loading', 'lazy')
+        imagen = None
+        if atributos['src'][:5].lower() == 'data:':
+            imagen = extraer_imagen(atributos['src'])
+        if imagen is None:
+            return f'<img{_serializar(atributos)}>'
+
+        # Ancho en pantalla: el que dio el editor o el de la variante más grande (nunca se amplía)
+        maximo = imagen.variantes[next(iter(imagen.variantes))][-1][1]
+        ancho = int(atributos.get('width', maximo))
+        if 'height' not in atributos:
+            atributos['height'] = str(max(1, round(ancho * imagen.alto / imagen.ancho)))
+        atributos['width'] = str(ancho)
+        sizes = f'(max-width: {ancho}px) 100vw, {ancho}px'
+
+        # El último formato (el más compatible) va en <img>; los demás en <source>
+        *fuentes, (_, variantes) = imagen.variantes.items()
+        atributos.update(src=variantes[-1][0], srcset=_srcset_variantes(variantes), sizes=sizes, decoding='async')
+        html = f'<img{_serializar(atributos)}>'
+        if not fuentes:
+            return html
+        sources = ''.join(
+            f'<source{_serializar({"type": TIPOS[formato], "srcset": _srcset_variantes(variantes), "sizes": sizes})}>'
+            for formato, variantes in fuentes
+        )
+        return f'<picture>{sources}{html}</picture>'
+
+    def _bloque(self):
+        # Quita los espacios finales del texto que precede a un bloque
+        if not self.en_pre and self.salida and not self.salida[-1].endswith('>'):
+            self.salida[-1] = self.salida[-1].rstrip(' ')
+        self.tras_bloque = True
+
+    def handle_starttag(self, etiqueta, atributos):
+        if etiqueta in ETIQUETAS_ELIMINADAS:
+            if etiqueta not in _VACIAS_HTML:
+                self.eliminando += 1
+            return
+        if self.eliminando:
+            return
+        etiqueta = SINONIMOS.get(etiqueta, etiqueta)
+        if etiqueta not in ETIQUETAS:
+            return
+        self._cierre_implicito(etiqueta)
+        atributos = self._atributos(etiqueta, atributos)
+        if etiqueta == 'img':
+            if 'src' in atributos:
+                # Una imagen cuenta como texto: el espacio que le sigue se conserva
+                self.salida.append(self._imagen(atributos))
+                self.tras_bloque = False
+            return
+        if etiqueta == 'source' and 'srcset' not in atributos:
+            return
+        if etiqueta == 'span' and not atributos:
+            # Un <span> sin atributos no aporta nada (TinyMCE los deja al quitar formato);
+            # se apila sin emitir para que su cierre no cierre otro <span>
+            self.abiertas.append((etiqueta, False))
+            return
+        if etiqueta in BLOQUES:
+            self._bloque()
+        self.salida.append(f'<{etiqueta}{_serializar(atributos)}>')
+        if etiqueta in VACIAS:
+            return
+        self.abiertas.append((etiqueta, True))
+        if etiqueta == 'pre':
+            self.en_pre += 1
+
+    def _cierre_implicito(self, etiqueta):
+        if etiqueta in CIERRES_IMPLICITOS:
+            cierra, limite = CIERRES_IMPLICITOS[etiqueta]
+        elif etiqueta in _CIERRAN_PARRAFO:
+            cierra, limite = _CIERRE_PARRAFO
+        else:
+            return
+        for abierta, _ in reversed(self.abiertas):
+            if abierta in cierra:
+                self.handle_endtag(abierta)
+                return
+            if abierta in limite:
+                return
+
+    def handle_startendtag(self, etiqueta, atributos):
+        self.handle_starttag(etiqueta, atributos)
+        if etiqueta not in _VACIAS_HTML:
+            self.handle_endtag(etiqueta)
+
+    def handle_endtag(self, etiqueta):
+        if etiqueta in ETIQUETAS_ELIMINADAS:
+            self.eliminando = max(self.eliminando - 1, 0)
+            return
+        if self.eliminando:
+            return
+        etiqueta = SINONIMOS.get(etiqueta, etiqueta)
+        if all(abierta != etiqueta for abierta, _ in self.abiertas):
+            # Cierre sin apertura (o de una etiqueta descartada): se ignora
+            return
+        # Cierra también las etiquetas que quedaron abiertas dentro de esta
+        while True:
+            abierta, emitida = self.abiertas.pop()
+            if emitida:
+                self._cerrar(abierta)
+            if abierta == etiqueta:
+                break
+
+    def _cerrar(self, etiqueta):
+        if etiqueta in BLOQUES:
+            self._bloque()
+        if etiqueta == 'pre':
+            self.en_pre -= 1
+        self.salida.append(f'</{etiqueta}>')
+
+    def handle_data(self, texto):
+        if self.eliminando:
+            return
+        if not self.en_pre:
+            texto = _ESPACIOS.sub(' ', texto)
+            if self.tras_bloque:
+                texto = texto.lstrip(' ')
+            if not texto:
+                return
+            self.tras_bloque = texto.endswith(' ')
+        self.salida.append(escape(texto, quote=False))
+
+    def resultado(self):
+        for abierta, emitida in reversed(self.abiertas):
+            if emitida:
+                self._cerrar(abierta)
+        self._bloque()
+        return ''.join(self.salida)
+
+
+def procesar_html(fuente):
+    """
+    Versión sanitizada, minificada y normalizada del HTML `fuente`.
+    """
+    if not fuente or not fuente.strip():
+        return ''
+    procesador = _Procesador()
+    procesador.feed(fuente)
+    procesador.close()
+    html = procesador.resultado()
+    # Párrafos vacíos que TinyMCE deja al inicio o al final del contenido
+    html = _PARRAFOS_VACIOS_INICIO.sub('', html)
+    return _PARRAFOS_VACIOS_FIN.sub('', html)
+
+
+def procesar_campos(obj, campos):
+    """
+    Llena `<campo>_procesado` de cada campo de `campos` en `obj` y las
+    métricas de tamaño (html_bytes_fuente, html_bytes_procesado, en UTF-8).
+    Devuelve la lista de campos asignados, para update_fields o bulk_update.
+    """
+    bytes_fuente = bytes_procesado = 0
+    for campo in campos:
+        fuente = getattr(obj, campo) or ''
+        procesado = procesar_html(fuente)
+        setattr(obj, f'{campo}_procesado', procesado)
+        bytes_fuente += len(fuente.encode('utf-8'))
+        bytes_procesado += len(procesado.encode('utf-8'))
+    obj.html_bytes_fuente = bytes_fuente
+    obj.html_bytes_procesado = bytes_procesado
+    return [f'{campo}_procesado' for campo in campos] + ['html_bytes_fuente', 'html_bytes_procesado']
+
+
+def reprocesar(modelo, campos, lote=500, solo_imagenes=False):
+    """
+    Vuelve a procesar las filas de `modelo` en lotes y guarda solo las que
+    cambiaron. Sirve para llenar los campos procesados de filas creadas antes
+    de este pipeline (o con bulk_create) y tras cambiar las reglas. Con
+    solo_imagenes=True solo se leen las filas con imágenes incrustadas.
+    Devuelve (filas, actualizadas, bytes_fuente, bytes_procesado).
+    """
+    destino = [f'{campo}_procesado' for campo in campos] + ['html_bytes_fuente', 'html_bytes_procesado']
+    # bulk_update no dispara auto_now; la fecha cambia la versión del catálogo (lessons.catalogo)
+    fecha = any(f.name == 'fecha_modificacion' for f in modelo._meta.fields)
+    actualizar = destino + ['fecha_modificacion'] if fecha else destino
+    ahora = timezone.now()
+    filas = actualizadas = bytes_fuente = bytes_procesado = 0
+    pendientes = []
+    consulta = modelo.objects.only('pk', *campos, *destino).order_by('pk')
+    if solo_imagenes:
+        consulta = consulta.filter(reduce(operator.or_, (Q(**{f'{campo}__contains': 'data:image/'}) for campo in campos)))
+    for obj in consulta.iterator(chunk_size=lote):
+        antes = [getattr(obj, campo) for campo in destino]
+        procesar_campos(obj, campos)
+        filas += 1
+        bytes_fuente += obj.html_bytes_fuente
+        bytes_procesado += obj.html_bytes_procesado
+        if [getattr(obj, campo) for campo in destino] != antes:
+            if fecha:
+                obj.fecha_modificacion = ahora
+            pendientes.append(obj)
+        if len(pendientes) >= lote:
+            modelo.objects.bulk_update(pendientes, actualizar)
+            actualizadas += len(pendientes)
+            pendientes = []
+    if pendientes:
+        modelo.objects.bulk_update(pendientes, actualizar)
+        actualizadas += len(pendientes)
+    return filas, actualizadas, bytes_fuente, bytes_procesado
@@ -0,0 +1,451 @@
+"""
+Carga declarativa del contenido educativo (currículo).
+
+Un archivo de currículo (JSON o YAML) describe el árbol completo:
+Leccion -> Tema -> ContenidoTema / Ejercicio -> OpcionMultiple.
+Cada nodo se identifica por su llave natural (orden o letra), de modo que
+volver a cargar el mismo archivo actualiza las filas existentes en lugar de
+recrearlas y los IDs se mantienen estables.
+
+El mismo formato sirve como snapshot para mover contenido entre bases de
+datos (export_curriculum / import_curriculum): cada nodo lleva el hash de
+su contenido y el archivo completo se guarda comprimido con gzip.
+"""
+
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+
+
+BATCH_SIZE = 500
+
+FORMATO_SNAPSHOT = 'matelog-curriculum'
+VERSION_SNAPSHOT = 1
+
+# Campos de contenido que se comparan/actualizan en cada nivel del árbol
+CAMPOS_LECCION = ['titulo', 'descripcion', 'is_active']
+CAMPOS_TEMA = ['titulo', 'descripcion', 'is_active']
+CAMPOS_CONTENIDO = ['tipo', 'contenido_texto']
+CAMPOS_EJERCICIO = [
+    'tipo', 'dificultad', 'instruccion', 'enunciado', 'respuesta_correcta',
+    'texto_ayuda', 'retroalimentacion_correcta', 'retroalimentacion_incorrecta',
+    'mostrar_dificultad',
+]
+CAMPOS_OPCION = ['texto']
+
+DEFAULTS_LECCION = {'is_active': True}
+DEFAULTS_TEMA = {'is_active': True}
+DEFAULTS_EJERCICIO = {
+    'texto_ayuda': '',
+    'retroalimentacion_correcta': '',
+    'retroalimentacion_incorrecta': '',
+    'mostrar_dificultad': False,
+}
+
+
+class CurriculumError(ValueError):
+    """
+    Error de formato o de validación en un archivo de currículo.
+    """
+
+
+def leer_curriculum(ruta):
+    """
+    Lee un archivo de currículo en JSON o YAML y devuelve el diccionario.
+    Los archivos terminados en .gz (snapshots) se descomprimen y se verifica
+    su hash antes de devolverlos.
+    """
+    ruta = Path(ruta)
+    sufijos = [sufijo.lower() for sufijo in ruta.suffixes]
+
+    if sufijos and sufijos[-1] == '.gz':
+        try:
+            texto = gzip.decompress(ruta.read_bytes()).decode('utf-8')
+        except OSError as e:
+            raise CurriculumError(f'El snapshot no es un archivo gzip válido: {e}')
+        sufijos = sufijos[:-1]
+    else:
+        texto = ruta.read_text(encoding='utf-8')
+
+    if sufijos and sufijos[-1] in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise CurriculumError(
+                'Para leer archivos YAML se requiere PyYAML (pip install PyYAML)'
+            )
+        data = yaml.safe_load(texto)
+    else:
+        data = json.loads(texto)
+
+    if not isinstance(data, dict) or not isinstance(data.get('lecciones'), list):
+        raise CurriculumError("El currículo debe tener una lista 'lecciones' en la raíz")
+
+    if 'hash' in data and data['hash'] != hash_snapshot(data['lecciones']):
+        raise CurriculumError('El hash del snapshot no coincide: el archivo está dañado o fue editado')
+    return data
+
+
+def hash_fila(valores):
+    """
+    Hash corto y estable de los valores de contenido de una fila.
+    """
+    canonico = json.dumps(valores, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(canonico.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def hash_snapshot(lecciones):
+    """
+    Hash SHA-256 de todo el árbol de lecciones (incluye los hashes de cada nodo).
+    """
+    canonico = json.dumps(lecciones, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+
+def _validar_opciones(campo, valor, choices, ruta):
+    validos = [clave for clave, _ in choices]
+    if valor not in validos:
+        raise CurriculumError(
+            f"{ruta}: '{campo}' debe ser uno de {validos} (se recibió {valor!r})"
+        )
+
+
+def _requeridos(nodo, campos, ruta):
+    faltantes = [campo for campo in campos if campo not in nodo]
+    if faltantes:
+        raise CurriculumError(f"{ruta}: faltan los campos {faltantes}")
+
+
+def _validar_unicos(nodos, llave, ruta):
+    """
+    Verifica que la llave natural (orden o letra) no se repita entre los
+    nodos hermanos: la base la rechazaría recién en bulk_create.
+    """
+    vistos = {}
+    for i, nodo in enumerate(nodos):
+        if not isinstance(nodo, dict) or llave not in nodo:
+            continue  # Lo reporta _requeridos al cargar el nodo
+        if nodo[llave] in vistos:
+            raise CurriculumError(
+                f"{ruta}[{i}]: '{llave}' {nodo[llave]!r} repetido (ya usado en {ruta}[{vistos[nodo[llave]]}])"
+            )
+        vistos[nodo[llave]] = i
+
+
+def _validar_llaves(lecciones_data):
+    """
+    Recorre todo el árbol y verifica las llaves naturales antes de escribir nada.
+    """
+    _validar_unicos(lecciones_data, 'orden', 'lecciones')
+    for i, leccion in enumerate(lecciones_data):
+        temas = leccion.get('temas', []) if isinstance(leccion, dict) else []
+        _validar_unicos(temas, 'orden', f'lecciones[{i}].temas')
+        for j, tema in enumerate(temas):
+            if not isinstance(tema, dict):
+                continue
+            ruta_tema = f'lecciones[{i}].temas[{j}]'
+            _validar_unicos(tema.get('contenidos', []), 'orden', f'{ruta_tema}.contenidos')
+            ejercicios = tema.get('ejercicios', [])
+            _validar_unicos(ejercicios, 'orden', f'{ruta_tema}.ejercicios')
+            for k, ejercicio in enumerate(ejercicios):
+                if isinstance(ejercicio, dict):
+                    _validar_unicos(ejercicio.get('opciones', []), 'letra', f'{ruta_tema}.ejercicios[{k}].opciones')
+
+
+def _valores(nodo, campos, defaults):
+    return {campo: nodo.get(campo, defaults.get(campo)) for campo in campos}
+
+
+class _Nivel:
+    """
+    Acumula las altas y cambios de un nivel del árbol para escribirlos en bloque.
+    """
+
+    def __init__(self, modelo, campos):
+        self.modelo = modelo
+        self.campos = campos
+        self.nuevos = []
+        self.modificados = []
+        self.sin_cambios = 0
+
+    def upsert(self, existente, valores, **llaves):
+        """
+        Compara el hash de los valores con el de la fila existente (si la hay)
+        y la encola para bulk_create o bulk_update. Las filas cuyo hash no
+        cambió no se tocan. Devuelve la instancia resultante.
+
+        El hash se calcula siempre de los valores: el 'hash' que traen los
+        nodos de un snapshot no se usa, porque un nodo editado a mano puede
+        conservar el de antes.
+        """
+        if existente is None:
+            obj = self.modelo(**llaves, **valores)
+            self.nuevos.append(obj)
+            return obj
+
+        actuales = {campo: getattr(existente, campo) for campo in self.campos}
+        if hash_fila(actuales) == hash_fila(valores):
+            self.sin_cambios += 1
+            return existente
+
+        for campo, valor in valores.items():
+            setattr(existente, campo, valor)
+        self.modificados.append(existente)
+        return existente
+
+    def escribir(self, ahora):
+        # bulk_create/bulk_update no llaman a save(): el HTML se procesa aquí
+        campos_procesados = []
+        if hasattr(self.modelo, 'procesar_html'):
+            for obj in self.nuevos + self.modificados:
+                campos_procesados = obj.procesar_html()
+
+        if self.nuevos:
+            self.modelo.objects.bulk_create(self.nuevos, batch_size=BATCH_SIZE)
+
+        if self.modificados:
+            campos = list(self.campos) + campos_procesados
+            # bulk_update no dispara auto_now, así que se asigna a mano
+            if any(f.name == 'fecha_modificacion' for f in self.modelo._meta.fields):
+                for obj in self.modificados:
+                    obj.fecha_modificacion = ahora
+                campos.append('fecha_modificacion')
+            self.modelo.objects.bulk_update(self.modificados, campos, batch_size=BATCH_SIZE)
+
+    def resumen(self):
+        return {
+            'creados': len(self.nuevos),
+            'actualizados': len(self.modificados),
+            'sin_cambios': self.sin_cambios,
+        }
+
+
+def cargar_curriculum(data, prune=False):
+    """
+    Inserta o actualiza el árbol de contenido descrito en `data` usando
+    bulk_create/bulk_update dentro de una sola transacción.
+
+    Las llaves naturales repetidas en el archivo (orden, letra) se rechazan
+    con CurriculumError antes de escribir.
+
+    Con prune=True, las lecciones y temas que no aparecen en el archivo se
+    desactivan (soft delete) y los contenidos, ejercicios y opciones ausentes
+    de los temas cargados se eliminan.
+
+    Devuelve un diccionario con el resumen de cambios por modelo.
+    """
+    ahora = timezone.now()
+    lecciones_data = data['lecciones']
+    _validar_llaves(lecciones_data)
+
+    with transaction.atomic():
+        # ---------- Lecciones ----------
+        nivel_lecciones = _Nivel(Leccion, CAMPOS_LECCION)
+        existentes = {l.orden: l for l in Leccion.objects.all()}
+        lecciones = []
+        for i, nodo in enumerate(lecciones_data):
+            ruta = f"lecciones[{i}]"
+            _requeridos(nodo, ['orden', 'titulo', 'descripcion'], ruta)
+            leccion = nivel_lecciones.upsert(
+                existentes.get(nodo['orden']),
+                _valores(nodo, CAMPOS_LECCION, DEFAULTS_LECCION),
+                orden=nodo['orden'],
+            )
+            lecciones.append((leccion, nodo, ruta))
+        nivel_lecciones.escribir(ahora)
+
+        # ---------- Temas ----------
+        nivel_temas = _Nivel(Tema, CAMPOS_TEMA)
+        existentes = {
+            (t.leccion_id, t.orden): t
+            for t in Tema.objects.filter(leccion__in=[l for l, _, _ in lecciones])
+        }
+        temas = []
+        for leccion, nodo_leccion, ruta_leccion in lecciones:
+            for j, nodo in enumerate(nodo_leccion.get('temas', [])):
+                ruta = f"{ruta_leccion}.temas[{j}]"
+                _requeridos(nodo, ['orden', 'titulo', 'descripcion'], ruta)
+                tema = nivel_temas.upsert(
+                    existentes.get((leccion.id, nodo['orden'])),
+                    _valores(nodo, CAMPOS_TEMA, DEFAULTS_TEMA),
+                    leccion=leccion, orden=nodo['orden'],
+                )
+                temas.append((tema, nodo, ruta))
+        nivel_temas.escribir(ahora)
+        temas_ids = [t.id for t, _, _ in temas]
+
+        # ---------- Contenidos y ejercicios ----------
+        nivel_contenidos = _Nivel(ContenidoTema, CAMPOS_CONTENIDO)
+        nivel_ejercicios = _Nivel(Ejercicio, CAMPOS_EJERCICIO)
+        contenidos_existentes = {
+            (c.tema_id, c.orden): c
+            for c in ContenidoTema.objects.filter(tema_id__in=temas_ids)
+        }
+        ejercicios_existentes = {
+            (e.tema_id, e.orden): e
+            for e in Ejercicio.objects.filter(tema_id__in=temas_ids)
+        }
+        contenidos_vistos = set()
+        ejercicios = []
+        for tema, nodo_tema, ruta_tema in temas:
+            for k, nodo in enumerate(nodo_tema.get('contenidos', [])):
+                ruta = f"{ruta_tema}.contenidos[{k}]"
+                _requeridos(nodo, ['orden', 'tipo', 'contenido_texto'], ruta)
+                _validar_opciones('tipo', nodo['tipo'], ContenidoTema.TIPO_CHOICES, ruta)
+                nivel_contenidos.upsert(
+                    contenidos_existentes.get((tema.id, nodo['orden'])),
+                    _valores(nodo, CAMPOS_CONTENIDO, {}),
+                    tema=tema, orden=nodo['orden'],
+                )
+                contenidos_vistos.add((tema.id, nodo['orden']))
+
+            for k, nodo in enumerate(nodo_tema.get('ejercicios', [])):
+                ruta = f"{ruta_tema}.ejercicios[{k}]"
+                _requeridos(
+                    nodo,
+                    ['orden', 'tipo', 'dificultad', 'instruccion', 'enunciado', 'respuesta_correcta'],
+                    ruta,
+                )
+                _validar_opciones('tipo', nodo['tipo'], Ejercicio.TIPO_CHOICES, ruta)
+                _validar_opciones('dificultad', nodo['dificultad'], Ejercicio.DIFICULTAD_CHOICES, ruta)
+                ejercicio = nivel_ejercicios.upsert(
+                    ejercicios_existentes.get((tema.id, nodo['orden'])),
+                    _valores(nodo, CAMPOS_EJERCICIO, DEFAULTS_EJERCICIO),
+                    tema=tema, orden=nodo['orden'],
+                )
+                ejercicios.append((ejercicio, nodo, ruta))
+        nivel_contenidos.escribir(ahora)
+        nivel_ejercicios.escribir(ahora)
+        ejercicios_ids = [e.id for e, _, _ in ejercicios]
+
+        # ---------- Opciones múltiples ----------
+        nivel_opciones = _Nivel(OpcionMultiple, CAMPOS_OPCION)
+        opciones_existentes = {
+            (o.ejercicio_id, o.letra): o
+            for o in OpcionMultiple.objects.filter(ejercicio_id__in=ejercicios_ids)
+        }
+        opciones_vistas = set()
+        for ejercicio, nodo_ejercicio, ruta_ejercicio in ejercicios:
+            for m, nodo in enumerate(nodo_ejercicio.get('opciones', [])):
+                ruta = f"{ruta_ejercicio}.opciones[{m}]"
+                _requeridos(nodo, ['letra', 'texto'], ruta)
+                _validar_opciones('letra', nodo['letra'], OpcionMultiple.LETRA_CHOICES, ruta)
+                nivel_opciones.upsert(
+                    opciones_existentes.get((ejercicio.id, nodo['letra'])),
+                    _valores(nodo, CAMPOS_OPCION, {}),
+                    ejercicio=ejercicio, letra=nodo['letra'],
+                )
+                opciones_vistas.add((ejercicio.id, nodo['letra']))
+        nivel_opciones.escribir(ahora)
+        ejercicios_tocados = {o.ejercicio_id for o in nivel_opciones.nuevos + nivel_opciones.modificados}
+
+        resumen = {
+            'lecciones': nivel_lecciones.resumen(),
+            'temas': nivel_temas.resumen(),
+            'contenidos': nivel_contenidos.resumen(),
+            'ejercicios': nivel_ejercicios.resumen(),
+            'opciones': nivel_opciones.resumen(),
+        }
+
+        if prune:
+            # Lecciones y temas usan soft delete para no romper el progreso guardado
+            resumen['lecciones']['desactivados'] = Leccion.objects.filter(
+                is_active=True
+            ).exclude(id__in=[l.id for l, _, _ in lecciones]).update(
+                is_active=False, fecha_modificacion=ahora
+            )
+            resumen['temas']['desactivados'] = Tema.objects.filter(
+                is_active=True, leccion__in=[l for l, _, _ in lecciones]
+            ).exclude(id__in=temas_ids).update(
+                is_active=False, fecha_modificacion=ahora
+            )
+            resumen['contenidos']['eliminados'] = _eliminar_ausentes(
+                contenidos_existentes, contenidos_vistos
+            )
+            resumen['ejercicios']['eliminados'] = _eliminar_ausentes(
+                ejercicios_existentes, {(e.tema_id, e.orden) for e, _, _ in ejercicios}
+            )
+            resumen['opciones']['eliminados'] = _eliminar_ausentes(
+                opciones_existentes, opciones_vistas
+            )
+            ejercicios_tocados |= {llave[0] for llave in opciones_existentes if llave not in opciones_vistas}
+
+        # Las opciones no tienen fecha propia: la versión del contenido del
+        # tema (lessons.catalogo) sale de la de sus ejercicios
+        Ejercicio.objects.filter(id__in=ejercicios_tocados).update(fecha_modificacion=ahora)
+
+    return resumen
+
+
+def _eliminar_ausentes(existentes, vistos):
+    ids = [obj.id for llave, obj in existentes.items() if llave not in vistos]
+    if not ids:
+        return 0
+    modelo = next(iter(existentes.values())).__class__
+    eliminados = 0
+    for inicio in range(0, len(ids), BATCH_SIZE):
+        _, por_modelo = modelo.objects.filter(id__in=ids[inicio:inicio + BATCH_SIZE]).delete()
+        eliminados += por_modelo.get(modelo._meta.label, 0)
+    return eliminados
+
+
+def _nodo(obj, llave, campos):
+    valores = {campo: getattr(obj, campo) for campo in campos}
+    return {llave: getattr(obj, llave), **valores, 'hash': hash_fila(valores)}
+
+
+def exportar_curriculum():
+    """
+    Genera el snapshot completo del contenido (incluidas lecciones y temas
+    inactivos) con el hash de cada nodo y el hash global del árbol.
+    """
+    lecciones = Leccion.objects.order_by('orden').prefetch_related(
+        'temas__contenidos',
+        'temas__ejercicios__opciones',
+    )
+
+    arbol = []
+    for leccion in lecciones:
+        nodo_leccion = _nodo(leccion, 'orden', CAMPOS_LECCION)
+        nodo_leccion['temas'] = []
+        for tema in sorted(leccion.temas.all(), key=lambda t: t.orden):
+            nodo_tema = _nodo(tema, 'orden', CAMPOS_TEMA)
+            nodo_tema['contenidos'] = [
+                _nodo(contenido, 'orden', CAMPOS_CONTENIDO)
+                for contenido in sorted(tema.contenidos.all(), key=lambda c: c.orden)
+            ]
+            nodo_tema['ejercicios'] = []
+            for ejercicio in sorted(tema.ejercicios.all(), key=lambda e: e.orden):
+                nodo_ejercicio = _nodo(ejercicio, 'orden', CAMPOS_EJERCICIO)
+                nodo_ejercicio['opciones'] = [
+                    _nodo(opcion, 'letra', CAMPOS_OPCION)
+                    for opcion in sorted(ejercicio.opciones.all(), key=lambda o: o.letra)
+                ]
+                nodo_tema['ejercicios'].append(nodo_ejercicio)
+            nodo_leccion['temas'].append(nodo_tema)
+        arbol.append(nodo_leccion)
+
+    return {
+        'formato': FORMATO_SNAPSHOT,
+        'version': VERSION_SNAPSHOT,
+        'generado': timezone.now().isoformat(),
+        'hash': hash_snapshot(arbol),
+        'lecciones': arbol,
+    }
+
+
+def escribir_snapshot(data, ruta):
+    """
+    Guarda el snapshot como JSON comprimido con gzip. Se fija mtime=0 para
+    que el mismo contenido produzca siempre los mismos bytes.
+    """
+    contenido = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+    Path(ruta).write_bytes(comprimido)
+    return len(contenido), len(comprimido)
@@ -0,0 +1,31 @@
+"""
+Comando para exportar todo el contenido educativo a un snapshot comprimido.
+Ejecutar con: python manage.py export_curriculum curriculum.json.gz
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lessons.curriculum import exportar_curriculum, escribir_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta lecciones, temas, contenidos, ejercicios y opciones a un snapshot '
+        'JSON comprimido (gzip) con el hash de cada fila.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del snapshot a generar (debe terminar en .json.gz)')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        if not ruta.endswith('.json.gz'):
+            raise CommandError('El snapshot debe tener extensión .json.gz')
+
+        data = exportar_curriculum()
+        tamano, tamano_comprimido = escribir_snapshot(data, ruta)
+
+        self.stdout.write(f"  - lecciones: {len(data['lecciones'])}")
+        self.stdout.write(f'  - tamaño: {tamano} bytes ({tamano_comprimido} comprimido)')
+        self.stdout.write(f"  - hash: {data['hash']}")
+        self.stdout.write(self.style.SUCCESS(f'Snapshot guardado en {ruta}'))
@@ -0,0 +1,29 @@
+"""
+Comando para importar un snapshot generado con export_curriculum.
+Ejecutar con: python manage.py import_curriculum curriculum.json.gz
+"""
+
+from django.core.management.base import CommandError
+
+from lessons.curriculum import FORMATO_SNAPSHOT, VERSION_SNAPSHOT
+from .load_curriculum import Command as LoadCurriculumCommand
+
+
+class Command(LoadCurriculumCommand):
+    help = (
+        'Importa un snapshot .json.gz verificando su hash. Solo se escriben las filas '
+        'cuyo hash cambió; las demás conservan su fecha_modificacion.'
+    )
+
+    def leer(self, ruta):
+        data = super().leer(ruta)
+
+        if data.get('formato') != FORMATO_SNAPSHOT or 'hash' not in data:
+            raise CommandError('El archivo no es un snapshot generado con export_curriculum')
+        if data.get('version') != VERSION_SNAPSHOT:
+            raise CommandError(
+                f"Versión de snapshot no soportada: {data.get('version')} (se esperaba {VERSION_SNAPSHOT})"
+            )
+
+        self.stdout.write(f"Snapshot {data['hash'][:12]} generado el {data.get('generado')}")
+        return data
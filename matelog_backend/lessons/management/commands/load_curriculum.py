@@ -0,0 +1,62 @@
+"""
+Comando para cargar el contenido educativo desde un archivo de currículo.
+Ejecutar con: python manage.py load_curriculum curriculum/demo.json
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from lessons.curriculum import CurriculumError, leer_curriculum, cargar_curriculum
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga (inserta o actualiza) lecciones, temas, contenidos, ejercicios y '
+        'opciones desde un archivo JSON/YAML, manteniendo estables los IDs existentes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta al archivo de currículo (.json, .yaml o .yml)')
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Desactiva lecciones/temas y elimina contenidos/ejercicios/opciones que no estén en el archivo',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcula los cambios sin guardarlos en la base de datos',
+        )
+
+    def leer(self, ruta):
+        try:
+            return leer_curriculum(ruta)
+        except FileNotFoundError:
+            raise CommandError(f'No existe el archivo {ruta}')
+        except (CurriculumError, ValueError) as e:
+            raise CommandError(f'Archivo de currículo inválido: {e}')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        data = self.leer(options['archivo'])
+
+        try:
+            with transaction.atomic():
+                resumen = cargar_curriculum(data, prune=options['prune'])
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+        except CurriculumError as e:
+            raise CommandError(str(e))
+
+        for modelo, conteos in resumen.items():
+            detalle = ', '.join(f'{clave}: {valor}' for clave, valor in conteos.items())
+            self.stdout.write(f'  - {modelo}: {detalle}')
+
+        duracion = time.perf_counter() - inicio
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Simulación terminada en {duracion:.2f}s (sin cambios guardados)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Currículo cargado en {duracion:.2f}s'))
@@ -0,0 +1,38 @@
+"""
+Comando para volver a procesar el HTML de TinyMCE de contenidos y ejercicios.
+Necesario después de cambiar las reglas de lessons/contenido_html.py o de
+cargar filas con bulk_create/SQL directo; el guardado normal ya lo procesa.
+Con --solo-imagenes solo recorre las filas con imágenes incrustadas, para
+extraerlas a MEDIA_ROOT (lessons/imagenes.py).
+Ejecutar con: python manage.py process_html [--solo-imagenes]
+"""
+
+from django.core.management.base import BaseCommand
+
+from lessons.contenido_html import reprocesar
+from lessons.models import ContenidoTema, Ejercicio
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenera la versión sanitizada y minificada de los campos HTML de contenidos y '
+        'ejercicios (extrae las imágenes incrustadas) y muestra el tamaño antes y después.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Filas leídas y escritas por lote (default: 500)')
+        parser.add_argument('--solo-imagenes', action='store_true',
+                            help='Procesar solo las filas con imágenes incrustadas (data: URI)')
+
+    def handle(self, *args, **options):
+        for modelo in (ContenidoTema, Ejercicio):
+            filas, actualizadas, bytes_fuente, bytes_procesado = reprocesar(
+                modelo, modelo.campos_html, options['lote'], options['solo_imagenes']
+            )
+            cambio = 100 * (bytes_procesado / bytes_fuente - 1) if bytes_fuente else 0
+            self.stdout.write(
+                f'  - {modelo._meta.verbose_name_plural}: {filas} filas, {actualizadas} actualizadas, '
+                f'{bytes_fuente} -> {bytes_procesado} bytes ({cambio:+.1f}%)'
+            )
+        self.stdout.write(self.style.SUCCESS('HTML procesado'))
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+from lessons.contenido_html import reprocesar
+
+
+def procesar_existentes(apps, schema_editor):
+    # Las listas se copian aquí: los modelos históricos no tienen campos_html
+    reprocesar(apps.get_model("lessons", "ContenidoTema"), ["contenido_texto"])
+    reprocesar(
+        apps.get_model("lessons", "Ejercicio"),
+        [
+            "instruccion",
+            "enunciado",
+            "texto_ayuda",
+            "retroalimentacion_correcta",
+            "retroalimentacion_incorrecta",
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lessons", "0002_remove_contenidotema_imagen_remove_ejercicio_imagen_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenidotema",
+            name="contenido_texto_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="contenidotema",
+            name="html_bytes_fuente",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="HTML original (bytes)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenidotema",
+            name="html_bytes_procesado",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="HTML procesado (bytes)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="enunciado_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="html_bytes_fuente",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="HTML original (bytes)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="html_bytes_procesado",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="HTML procesado (bytes)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="instruccion_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="retroalimentacion_correcta_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="retroalimentacion_incorrecta_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="ejercicio",
+            name="texto_ayuda_procesado",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(procesar_existentes, migrations.RunPython.noop),
+    ]
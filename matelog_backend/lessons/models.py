@@ -1,7 +1,10 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import unicodedata
 
+from .contenido_html import procesar_campos
+
 
 class Leccion(models.Model):
     """
@@ -61,7 +64,26 @@ class Tema(models.Model):
         return f"{status} {self.leccion.titulo} - Tema {self.orden}: {self.titulo}"
 
 
-class ContenidoTema(models.Model):
+class HTMLProcesadoMixin:
+    """
+    Al guardar, genera la versión procesada (sanitizada y minificada) de cada
+    campo de `campos_html` en `<campo>_procesado`, que es la que sirve la API.
+    Ver lessons.contenido_html.
+    """
+    campos_html = ()
+
+    def procesar_html(self):
+        return procesar_campos(self, self.campos_html)
+
+    def save(self, *args, **kwargs):
+        campos = self.procesar_html()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.campos_html):
+            kwargs['update_fields'] = {*update_fields, *campos}
+        super().save(*args, **kwargs)
+
+
+class ContenidoTema(HTMLProcesadoMixin, models.Model):
     """
     Modelo para los recuadros de Teoría, Ejemplo y Ejemplo Extra.
     Se muestran secuencialmente antes de los ejercicios.
@@ -85,6 +107,15 @@ class ContenidoTema(models.Model):
         help_text="Contenido en HTML desde TinyMCE (incluye formato, imágenes, tablas, etc.)"
     )
     
+    # HTML procesado al guardar (lo que sirve la API) y tamaños antes/después
+    contenido_texto_procesado = models.TextField(blank=True, editable=False)
+    html_bytes_fuente = models.PositiveIntegerField(default=0, editable=False,
+                                                    verbose_name="HTML original (bytes)")
+    html_bytes_procesado = models.PositiveIntegerField(default=0, editable=False,
+                                                       verbose_name="HTML procesado (bytes)")
+    
+    campos_html = ('contenido_texto',)
+    
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
     
@@ -98,7 +129,7 @@ class ContenidoTema(models.Model):
         return f"{self.tema.titulo} - {self.get_tipo_display()} #{self.orden}"
 
 
-class Ejercicio(models.Model):
+class Ejercicio(HTMLProcesadoMixin, models.Model):
     """
     Modelo de Ejercicio. Pertenece a un Tema.
     Puede ser de respuesta abierta o de opción múltiple.
@@ -160,6 +191,22 @@ class Ejercicio(models.Model):
         help_text="Si se marca, la dificultad será visible para el estudiante"
     )
     
+    # HTML procesado al guardar (lo que sirve la API) y tamaños antes/después
+    instruccion_procesado = models.TextField(blank=True, editable=False)
+    enunciado_procesado = models.TextField(blank=True, editable=False)
+    texto_ayuda_procesado = models.TextField(blank=True, editable=False)
+    retroalimentacion_correcta_procesado = models.TextField(blank=True, editable=False)
+    retroalimentacion_incorrecta_procesado = models.TextField(blank=True, editable=False)
+    html_bytes_fuente = models.PositiveIntegerField(default=0, editable=False,
+                                                    verbose_name="HTML original (bytes)")
+    html_bytes_procesado = models.PositiveIntegerField(default=0, editable=False,
+                                                       verbose_name="HTML procesado (bytes)")
+    
+    campos_html = (
+        'instruccion', 'enunciado', 'texto_ayuda',
+        'retroalimentacion_correcta', 'retroalimentacion_incorrecta',
+    )
+    
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
     
@@ -223,4 +270,15 @@ class OpcionMultiple(models.Model):
         unique_together = ['ejercicio', 'letra']
     
     def __str__(self):
-        return f"{self.ejercicio} - Opción {self.letra}"
\ No newline at end of file
+        return f"{self.ejercicio} - Opción {self.letra}"
+
+    # Las opciones no tienen fecha propia: cambiar una cambia la versión del
+    # contenido de su ejercicio (lessons.catalogo)
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Ejercicio.objects.filter(pk=self.ejercicio_id).update(fecha_modificacion=timezone.now())
+
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        Ejercicio.objects.filter(pk=self.ejercicio_id).update(fecha_modificacion=timezone.now())
+        return resultado
@@ -0,0 +1,97 @@
+"""
+Progreso del estudiante en las respuestas de lecciones, común a las vistas
+sync (views.py) y async (async_views.py). Las funciones reciben las filas ya
+consultadas y no tocan la base de datos: cada vista hace sus consultas con
+el ORM sync o async y arma la respuesta con estas funciones.
+"""
+
+from django.utils import timezone
+
+from monitoring.instrumentacion import medir
+from tracking.models import ProgresoTema
+from .serializers import leccion_detalle_dict, leccion_lista_dict
+
+
+def progreso_leccion_dict(progreso):
+    """
+    Progreso de una lección (ProgresoLeccion o None si no la ha empezado).
+    """
+    if progreso is None:
+        return {'estado': 'SIN_INICIAR', 'porcentaje_completado': 0.0}
+    return {
+        'estado': progreso.estado,
+        'porcentaje_completado': float(progreso.porcentaje_completado),
+    }
+
+
+def progreso_tema_dict(progreso):
+    return {
+        'estado': progreso.estado,
+        'desbloqueado': progreso.desbloqueado,
+        'porcentaje_acierto': float(progreso.porcentaje_acierto),
+        'intentos_realizados': progreso.intentos_realizados,
+    }
+
+
+def lecciones_lista_data(lecciones, progresos):
+    """
+    Lista de GET /api/lessons/lecciones/: `lecciones` anotadas con
+    cantidad_temas_activos y `progresos` como {leccion_id: ProgresoLeccion}.
+    """
+    lecciones_data = []
+    for leccion in lecciones:
+        with medir('serializer'):
+            leccion_dict = leccion_lista_dict(leccion)
+        leccion_dict['progreso'] = progreso_leccion_dict(progresos.get(leccion.id))
+        lecciones_data.append(leccion_dict)
+    return lecciones_data
+
+
+def iniciar_leccion(progreso, creado):
+    """
+    Marca la lección como EN_PROGRESO al abrirla. Devuelve True si hay que
+    guardar el progreso.
+    """
+    if not creado and progreso.estado != 'SIN_INICIAR':
+        return False
+    progreso.estado = 'EN_PROGRESO'
+    if not progreso.fecha_inicio:
+        progreso.fecha_inicio = timezone.now()
+    return True
+
+
+def temas_sin_progreso(usuario, temas, progresos):
+    """
+    ProgresoTema (sin guardar) de los temas que todavía no tienen uno, para
+    bulk_create. El primer tema se crea ya desbloqueado.
+    """
+    return [
+        ProgresoTema(usuario=usuario, tema=tema, desbloqueado=(tema.orden == 1))
+        for tema in temas
+        if tema.id not in progresos
+    ]
+
+
+def leccion_detalle_data(leccion, progreso_leccion, progresos):
+    """
+    Detalle de GET /api/lessons/<id>/ con el progreso de la lección y de
+    cada tema (`progresos` como {tema_id: ProgresoTema}).
+
+    Devuelve (data, desbloqueados): los ProgresoTema del primer tema que
+    estaban bloqueados se desbloquean y la vista debe guardarlos
+    (update_fields=['desbloqueado']).
+    """
+    with medir('serializer'):
+        leccion_data = leccion_detalle_dict(leccion)
+
+    desbloqueados = []
+    for tema_data in leccion_data['temas']:
+        progreso_tema = progresos[tema_data['id']]
+        # El primer tema siempre está desbloqueado
+        if tema_data['orden'] == 1 and not progreso_tema.desbloqueado:
+            progreso_tema.desbloqueado = True
+            desbloqueados.append(progreso_tema)
+        tema_data['progreso'] = progreso_tema_dict(progreso_tema)
+
+    leccion_data['progreso'] = progreso_leccion_dict(progreso_leccion)
+    return leccion_data, desbloqueados
@@ -15,8 +15,10 @@ class ContenidoTemaSerializer(serializers.ModelSerializer):
     """
     Serializer para contenido de temas (teoría/ejemplos).
     Las imágenes están incrustadas en contenido_texto mediante TinyMCE.
+    contenido_texto es el HTML procesado al guardar (sanitizado y minificado).
     """
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    contenido_texto = serializers.CharField(source='contenido_texto_procesado', read_only=True)
     
     class Meta:
         model = ContenidoTema
@@ -27,9 +29,13 @@ class EjercicioSerializer(serializers.ModelSerializer):
     """
     Serializer para ejercicios (sin incluir la respuesta correcta).
     Las imágenes están incrustadas en enunciado mediante TinyMCE.
+    Los campos HTML son la versión procesada al guardar (sanitizada y minificada).
     """
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     dificultad_display = serializers.CharField(source='get_dificultad_display', read_only=True)
+    instruccion = serializers.CharField(source='instruccion_procesado', read_only=True)
+    enunciado = serializers.CharField(source='enunciado_procesado', read_only=True)
+    texto_ayuda = serializers.CharField(source='texto_ayuda_procesado', read_only=True)
     opciones = OpcionMultipleSerializer(many=True, read_only=True)
     tiene_ayuda = serializers.SerializerMethodField()
     
@@ -40,7 +46,7 @@ class EjercicioSerializer(serializers.ModelSerializer):
                  'enunciado', 'opciones', 'texto_ayuda', 'tiene_ayuda']
     
     def get_tiene_ayuda(self, obj):
-        return bool(obj.texto_ayuda)
+        return bool(obj.texto_ayuda_procesado)
 
 
 class EjercicioValidacionSerializer(serializers.Serializer):
@@ -53,6 +59,16 @@ class EjercicioValidacionSerializer(serializers.Serializer):
     tiempo_respuesta_segundos = serializers.IntegerField(required=False, allow_null=True)
 
 
+class RespuestaPendienteSerializer(EjercicioValidacionSerializer):
+    """
+    Respuesta guardada sin conexión por el frontend, para sincronizar en lote.
+    id_local la identifica en la cola del cliente; respondida_en es la hora
+    en que se respondió (sin ella se usa la de la sincronización).
+    """
+    id_local = serializers.CharField(max_length=64)
+    respondida_en = serializers.DateTimeField(required=False)
+
+
 class TemaListSerializer(serializers.ModelSerializer):
     """
     Serializer simplificado para lista de temas.
@@ -66,9 +82,14 @@ class TemaListSerializer(serializers.ModelSerializer):
                  'cantidad_contenidos', 'cantidad_ejercicios']
     
     def get_cantidad_contenidos(self, obj):
+        # Usar el conteo anotado por la vista si está disponible
+        if hasattr(obj, 'cantidad_contenidos'):
+            return obj.cantidad_contenidos
         return obj.contenidos.count()
     
     def get_cantidad_ejercicios(self, obj):
+        if hasattr(obj, 'cantidad_ejercicios'):
+            return obj.cantidad_ejercicios
         return obj.ejercicios.count()
 
 
@@ -95,6 +116,8 @@ class LeccionListSerializer(serializers.ModelSerializer):
         fields = ['id', 'titulo', 'descripcion', 'orden', 'cantidad_temas']
     
     def get_cantidad_temas(self, obj):
+        if hasattr(obj, 'cantidad_temas_activos'):
+            return obj.cantidad_temas_activos
         return obj.temas.filter(is_active=True).count()
 
 
@@ -109,4 +132,103 @@ class LeccionDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'titulo', 'descripcion', 'orden', 'temas']
     
     def get_temas(self, obj):
-        return obj.temas.filter(is_active=True)
\ No newline at end of file
+        return obj.temas.filter(is_active=True)
+
+# ---------------------------------------------------------------------------
+# Versiones en dict plano de los serializers de la ruta de lectura del
+# estudiante. Devuelven exactamente lo mismo que TemaDetailSerializer,
+# LeccionDetailSerializer y LeccionListSerializer (los tests lo comparan)
+# sin el costo de DRF campo por campo; las etiquetas de los choices se
+# resuelven con diccionarios armados una sola vez. Al agregar un campo a uno
+# de esos serializers hay que agregarlo también aquí.
+# Comparación: python -m benchmarks.serializacion
+# ---------------------------------------------------------------------------
+
+_TIPOS_CONTENIDO = dict(ContenidoTema.TIPO_CHOICES)
+_TIPOS_EJERCICIO = dict(Ejercicio.TIPO_CHOICES)
+_DIFICULTADES = dict(Ejercicio.DIFICULTAD_CHOICES)
+
+
+def tema_detalle_dict(tema):
+    """
+    Como TemaDetailSerializer(tema).data. Usa los contenidos, ejercicios y
+    opciones precargados (prefetch_related) si los hay.
+    """
+    return {
+        'id': tema.id,
+        'titulo': tema.titulo,
+        'descripcion': tema.descripcion,
+        'orden': tema.orden,
+        'contenidos': [
+            {
+                'id': contenido.id,
+                'tipo': contenido.tipo,
+                'tipo_display': _TIPOS_CONTENIDO.get(contenido.tipo, contenido.tipo),
+                'orden': contenido.orden,
+                'contenido_texto': contenido.contenido_texto_procesado,
+            }
+            for contenido in tema.contenidos.all()
+        ],
+        'ejercicios': [
+            {
+                'id': ejercicio.id,
+                'orden': ejercicio.orden,
+                'tipo': ejercicio.tipo,
+                'tipo_display': _TIPOS_EJERCICIO.get(ejercicio.tipo, ejercicio.tipo),
+                'dificultad': ejercicio.dificultad,
+                'dificultad_display': _DIFICULTADES.get(ejercicio.dificultad, ejercicio.dificultad),
+                'mostrar_dificultad': ejercicio.mostrar_dificultad,
+                'instruccion': ejercicio.instruccion_procesado,
+                'enunciado': ejercicio.enunciado_procesado,
+                'opciones': [{'letra': opcion.letra, 'texto': opcion.texto} for opcion in ejercicio.opciones.all()],
+                'texto_ayuda': ejercicio.texto_ayuda_procesado,
+                'tiene_ayuda': bool(ejercicio.texto_ayuda_procesado),
+            }
+            for ejercicio in tema.ejercicios.all()
+        ],
+    }
+
+
+def leccion_lista_dict(leccion):
+    """
+    Como LeccionListSerializer(leccion).data.
+    """
+    if hasattr(leccion, 'cantidad_temas_activos'):
+        cantidad_temas = leccion.cantidad_temas_activos
+    else:
+        cantidad_temas = leccion.temas.filter(is_active=True).count()
+    return {
+        'id': leccion.id,
+        'titulo': leccion.titulo,
+        'descripcion': leccion.descripcion,
+        'orden': leccion.orden,
+        'cantidad_temas': cantidad_temas,
+    }
+
+
+def leccion_detalle_dict(leccion):
+    """
+    Como LeccionDetailSerializer(leccion).data. Usa los conteos anotados
+    en los temas (cantidad_contenidos, cantidad_ejercicios) si los hay.
+    """
+    temas = []
+    for tema in leccion.temas.all():
+        temas.append({
+            'id': tema.id,
+            'titulo': tema.titulo,
+            'descripcion': tema.descripcion,
+            'orden': tema.orden,
+            'cantidad_contenidos': (
+                tema.cantidad_contenidos if hasattr(tema, 'cantidad_contenidos') else tema.contenidos.count()
+            ),
+            'cantidad_ejercicios': (
+                tema.cantidad_ejercicios if hasattr(tema, 'cantidad_ejercicios') else tema.ejercicios.count()
+            ),
+        })
+    return {
+        'id': leccion.id,
+        'titulo': leccion.titulo,
+        'descripcion': leccion.descripcion,
+        'orden': leccion.orden,
+        'temas': temas,
+    }
@@ -1,3 +1,796 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from matelog_backend import json_rapido
+from matelog_backend.compresion import codificaciones, elegir_codificacion
+from matelog_backend.testing import (
+    PresupuestoMixin,
+    crear_catalogo,
+    crear_estudiante,
+    crear_historial,
+)
+from monitoring import metricas
+from tracking.models import ProgresoTema
+from . import async_views
+from .contenido_html import procesar_html
+from .curriculum import CurriculumError, cargar_curriculum, escribir_snapshot, leer_curriculum
+from .models import ContenidoTema, Ejercicio, Leccion, OpcionMultiple, Tema
+from .serializers import (
+    LeccionDetailSerializer,
+    LeccionListSerializer,
+    TemaDetailSerializer,
+    leccion_detalle_dict,
+    leccion_lista_dict,
+    tema_detalle_dict,
+)
+
+
+class PresupuestoLessonsTests(PresupuestoMixin, TestCase):
+    """
+    Presupuesto de consultas SQL y tiempo para cada URL de lessons.urls,
+    medido con un catálogo de 10 lecciones x 8 temas x 30 ejercicios.
+    """
+    urlconf = 'lessons.urls'
+    presupuestos = {
+        # nombre_url: (max_queries, max_ms)
+        'leccion-list': (4, 150),
+        'leccion-detail': (12, 150),
+        'leccion-paquete': (8, 400),
+        'tema-detail': (8, 250),
+        'tema-contenido': (8, 250),
+        'validar-ejercicio': (9, 100),
+        'sincronizar-respuestas': (12, 200),
+        'finalizar-tema': (17, 150),
+        'reintentar-tema': (6, 100),
+        'volver-tema': (3, 100),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecciones = crear_catalogo()
+        cls.usuario = crear_estudiante()
+        cls.progresos = crear_historial(cls.usuario, cls.lecciones[0])
+        cls.tema = cls.progresos[0].tema
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_leccion_list(self):
+        respuesta = self.assertPresupuesto('leccion-list', 'GET', '/api/lessons/lecciones/')
+        self.assertEqual(len(respuesta.json()), 10)
+        self.assertEqual(respuesta.json()[0]['cantidad_temas'], 8)
+        self.assertEqual(respuesta.json()[0]['progreso']['estado'], 'EN_PROGRESO')
+
+    def test_leccion_detail_primera_visita(self):
+        leccion = self.lecciones[1]
+        respuesta = self.assertPresupuesto('leccion-detail', 'GET', f'/api/lessons/lecciones/{leccion.id}/')
+        temas = respuesta.json()['temas']
+        self.assertEqual(len(temas), 8)
+        self.assertEqual(temas[0]['cantidad_ejercicios'], 30)
+        self.assertTrue(temas[0]['progreso']['desbloqueado'])
+        self.assertFalse(temas[1]['progreso']['desbloqueado'])
+        self.assertEqual(ProgresoTema.objects.filter(usuario=self.usuario, tema__leccion=leccion).count(), 8)
+
+    def test_leccion_detail_con_historial(self):
+        leccion = self.lecciones[0]
+        respuesta = self.assertPresupuesto('leccion-detail', 'GET', f'/api/lessons/lecciones/{leccion.id}/')
+        self.assertEqual(respuesta.json()['temas'][3]['progreso']['intentos_realizados'], 2)
+
+    def test_leccion_paquete(self):
+        cache.clear()
+        leccion = self.lecciones[0]
+        respuesta = self.assertPresupuesto('leccion-paquete', 'GET', f'/api/lessons/lecciones/{leccion.id}/paquete/')
+        data = respuesta.json()
+        self.assertEqual(len(data['temas']), 8)
+        self.assertEqual(len(data['temas'][0]['ejercicios']), 30)
+        self.assertEqual(respuesta['ETag'], f'W/"{data["version"]}"')
+
+    def test_tema_detail(self):
+        respuesta = self.assertPresupuesto('tema-detail', 'GET', f'/api/lessons/temas/{self.tema.id}/')
+        data = respuesta.json()
+        self.assertEqual(len(data['ejercicios']), 30)
+        self.assertEqual(len(data['ejercicios'][1]['opciones']), 4)
+        self.assertEqual(data['total_ejercicios_respondidos'], 30)
+
+    def test_tema_detail_solo_progreso(self):
+        respuesta = self.assertPresupuesto('tema-detail', 'GET', f'/api/lessons/temas/{self.tema.id}/?contenido=0')
+        data = respuesta.json()
+        self.assertNotIn('ejercicios', data)
+        self.assertEqual(data['total_ejercicios_respondidos'], 30)
+        self.assertEqual(data['siguiente_ejercicio_index'], 0)
+
+    def test_tema_contenido(self):
+        cache.clear()
+        respuesta = self.assertPresupuesto('tema-contenido', 'GET', f'/api/lessons/temas/{self.tema.id}/contenido/')
+        data = respuesta.json()
+        self.assertEqual(len(data['ejercicios']), 30)
+        self.assertEqual(len(data['ejercicios'][1]['opciones']), 4)
+        self.assertNotIn('ejercicios_respondidos', data)
+
+    def test_validar_ejercicio(self):
+        leccion = self.lecciones[1]
+        ejercicio = leccion.temas.get(orden=1).ejercicios.get(orden=2)
+        respuesta = self.assertPresupuesto('validar-ejercicio', 'POST', '/api/lessons/ejercicios/validar/', {
+            'ejercicio_id': ejercicio.id, 'respuesta': 'a', 'tiempo_respuesta_segundos': 12,
+        })
+        self.assertTrue(respuesta.json()['es_correcta'])
+
+    def test_validar_ejercicio_ya_respondido(self):
+        ejercicio = self.tema.ejercicios.get(orden=3)
+        respuesta = self.assertPresupuesto('validar-ejercicio', 'POST', '/api/lessons/ejercicios/validar/', {
+            'ejercicio_id': ejercicio.id, 'respuesta': 'verdadero',
+        })
+        self.assertFalse(respuesta.json()['es_correcta'])
+
+    def test_sincronizar_respuestas(self):
+        tema = self.lecciones[1].temas.get(orden=1)
+        respuestas = [
+            {'id_local': f'r{ejercicio.id}', 'ejercicio_id': ejercicio.id, 'respuesta': 'A'}
+            for ejercicio in tema.ejercicios.all()
+        ]
+        respuesta = self.assertPresupuesto(
+            'sincronizar-respuestas', 'POST', '/api/lessons/ejercicios/sincronizar/', {'respuestas': respuestas}
+        )
+        self.assertEqual(len(respuesta.json()['resultados']), 30)
+        self.assertEqual(self.usuario.respuestas.filter(progreso_tema__tema=tema).count(), 30)
+
+    def test_finalizar_tema(self):
+        respuesta = self.assertPresupuesto('finalizar-tema', 'POST', f'/api/lessons/temas/{self.tema.id}/finalizar/')
+        data = respuesta.json()
+        self.assertEqual(data['ejercicios_correctos'], 20)
+        self.assertEqual(data['numero_intento'], 3)
+
+    def test_finalizar_tema_aprobado(self):
+        self.usuario.respuestas.filter(progreso_tema__tema=self.tema).update(es_correcta=True)
+        respuesta = self.assertPresupuesto('finalizar-tema', 'POST', f'/api/lessons/temas/{self.tema.id}/finalizar/')
+        self.assertTrue(respuesta.json()['aprobado'])
+        self.assertIsNotNone(respuesta.json()['siguiente_tema_id'])
+
+    def test_reintentar_tema(self):
+        self.assertPresupuesto('reintentar-tema', 'POST', f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        self.assertFalse(self.usuario.respuestas.filter(progreso_tema__tema=self.tema).exists())
+
+    def test_volver_tema(self):
+        self.assertPresupuesto('volver-tema', 'POST', f'/api/lessons/temas/{self.tema.id}/volver/')
+
+
+# URLconf de prueba: las vistas async de la ruta de lectura (ASYNC_VIEWS=True)
+urlpatterns = [
+    path('api/lessons/lecciones/', async_views.LeccionListView.as_view(), name='leccion-list'),
+    path('api/lessons/lecciones/<int:leccion_id>/', async_views.LeccionDetailView.as_view(), name='leccion-detail'),
+    path(
+        'api/lessons/lecciones/<int:leccion_id>/paquete/', async_views.LeccionPaqueteView.as_view(),
+        name='leccion-paquete',
+    ),
+    path('api/lessons/temas/<int:tema_id>/', async_views.TemaDetailView.as_view(), name='tema-detail'),
+    path(
+        'api/lessons/temas/<int:tema_id>/contenido/', async_views.TemaContenidoView.as_view(), name='tema-contenido'
+    ),
+    path('', include('matelog_backend.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PresupuestoLessonsAsyncTests(PresupuestoLessonsTests):
+    """
+    Los mismos presupuestos con las vistas async de lessons/async_views.py.
+    """
+
+    def test_respuestas_iguales_a_las_sync(self):
+        otro = crear_estudiante(username='otro')
+        crear_historial(otro, self.lecciones[0])
+        rutas = [
+            '/api/lessons/lecciones/',
+            f'/api/lessons/lecciones/{self.lecciones[0].id}/',
+            f'/api/lessons/lecciones/{self.lecciones[0].id}/paquete/',
+            f'/api/lessons/temas/{self.tema.id}/',
+            f'/api/lessons/temas/{self.tema.id}/?contenido=0',
+            f'/api/lessons/temas/{self.tema.id}/contenido/',
+        ]
+        for ruta in rutas:
+            respuesta_async = self.client.get(ruta, secure=True)
+            with self.settings(ROOT_URLCONF='matelog_backend.urls'):
+                self.client.force_login(otro)
+                respuesta_sync = self.client.get(ruta, secure=True)
+                self.client.force_login(self.usuario)
+            self.assertEqual(respuesta_async.json(), respuesta_sync.json(), ruta)
+
+    def test_requiere_autenticacion(self):
+        self.client.logout()
+        respuesta = self.client.get('/api/lessons/lecciones/', secure=True)
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertIn('detail', respuesta.json())
+
+    def test_tema_inexistente(self):
+        respuesta = self.client.get('/api/lessons/temas/999999/', secure=True)
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertIn('detail', respuesta.json())
+
+
+class ProcesarHTMLTests(SimpleTestCase):
+    """
+    Sanitizado, minificado y normalización del HTML de TinyMCE.
+    """
+
+    def test_elimina_scripts_eventos_y_urls_peligrosas(self):
+        html = procesar_html(
+            '<p onclick="x()">a<script>alert(1)</script>b</p>'
+            '<a href="java\nscript:alert(1)">c</a><img src="data:image/svg+xml;base64,AA" alt="">'
+            '<img src="a.png" srcset="b.png 1x, javascript:alert(1) 2x" loading="ya" onerror="x()">'
+            '<iframe src="https://example.com"></iframe>'
+        )
+        self.assertEqual(html, '<p>ab</p><a>c</a><img src="a.png" loading="lazy">')
+
+    def test_conserva_formato_de_tinymce(self):
+        html = procesar_html(
+            '<p style="text-align: center; position: fixed">\n  <b>Hola</b>   <span>mundo</span>\n</p>\n'
+            '<table>\n<tbody>\n<tr>\n<td colspan="2">1&nbsp;&lt;&nbsp;2</td>\n</tr>\n</tbody>\n</table>'
+            '<img src="/media/a.png" alt="Figura" width="50%"> <a href="https://example.com" target="_blank">x</a>'
+        )
+        self.assertEqual(
+            html,
+            '<p style="text-align:center"><b>Hola</b> mundo</p>'
+            '<table><tbody><tr><td colspan="2">1\xa0&lt;\xa02</td></tr></tbody></table>'
+            '<img src="/media/a.png" alt="Figura" loading="lazy"> '
+            '<a href="https://example.com" target="_blank" rel="noopener noreferrer">x</a>'
+        )
+
+    def test_minifica_y_cierra_etiquetas(self):
+        self.assertEqual(procesar_html('<p>&nbsp;</p>\n<!-- x -->\n<pre>  a\n  b</pre><ul><li>uno<li>dos'),
+                         '<pre>  a\n  b</pre><ul><li>uno</li><li>dos</li></ul>')
+        self.assertEqual(procesar_html('<p>a<div>b</div><table><tr><td>1<td>2<tr><td>3</table>'),
+                         '<p>a</p><div>b</div><table><tr><td>1</td><td>2</td></tr><tr><td>3</td></tr></table>')
+        self.assertEqual(procesar_html('  \n '), '')
+
+    def test_idempotente(self):
+        fuente = '<p>Texto <em>con</em> &amp; <span style="color: red">estilo</span></p><p>&nbsp;</p><p>fin</p>'
+        html = procesar_html(fuente)
+        self.assertEqual(procesar_html(html), html)
+
+
+class ImagenesIncrustadasTests(TestCase):
+    """
+    Las imágenes pegadas en TinyMCE (data: URI) se extraen a MEDIA_ROOT.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        leccion = Leccion.objects.create(orden=1, titulo='Lección', descripcion='')
+        cls.tema = Tema.objects.create(leccion=leccion, orden=1, titulo='Tema', descripcion='')
+        salida = io.BytesIO()
+        Image.linear_gradient('L').resize((1200, 800)).convert('RGB').save(salida, 'PNG')
+        cls.data_uri = 'data:image/png;base64,' + base64.b64encode(salida.getvalue()).decode()
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        ajustes = override_settings(MEDIA_ROOT=self.media, IMAGENES_ANCHOS=[480, 960], IMAGENES_FORMATOS=['webp'])
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def archivos(self):
+        return sorted(os.listdir(os.path.join(self.media, 'contenido')))
+
+    def test_extrae_variantes_con_srcset(self):
+        contenido = ContenidoTema.objects.create(
+            tema=self.tema, orden=1, tipo='TEORIA',
+            contenido_texto=f'<p>Figura <img src="{self.data_uri}" alt="Gráfica"></p>',
+        )
+        nombres = self.archivos()
+        self.assertEqual([n.split('-')[1] for n in nombres], ['480.webp', '960.webp'])
+        prefijo = f"/media/contenido/{nombres[0].split('-')[0]}"
+        self.assertEqual(
+            contenido.contenido_texto_procesado,
+            f'<p>Figura <img src="{prefijo}-960.webp" alt="Gráfica" loading="lazy" height="640" width="960" '
+            f'srcset="{prefijo}-480.webp 480w, {prefijo}-960.webp 960w" '
+            f'sizes="(max-width: 960px) 100vw, 960px" decoding="async"></p>'
+        )
+        self.assertLess(contenido.html_bytes_procesado, contenido.html_bytes_fuente / 10)
+        with Image.open(os.path.join(self.media, 'contenido', nombres[0])) as variante:
+            self.assertEqual(variante.size, (480, 320))
+
+        # La misma imagen en otro contenido reutiliza los archivos
+        otro = ContenidoTema.objects.create(
+            tema=self.tema, orden=2, tipo='EJEMPLO', contenido_texto=f'<img src="{self.data_uri}" width="300">',
+        )
+        self.assertEqual(self.archivos(), nombres)
+        self.assertIn('width="300" loading="lazy" height="200"', otro.contenido_texto_procesado)
+        self.assertEqual(procesar_html(otro.contenido_texto_procesado), otro.contenido_texto_procesado)
+
+    def test_picture_con_varios_formatos(self):
+        with self.settings(IMAGENES_FORMATOS=['avif', 'webp']):
+            html = procesar_html(f'<img src="{self.data_uri}">')
+        self.assertTrue(html.startswith('<picture><source type="image/avif" srcset="/media/contenido/'))
+        self.assertTrue(html.endswith('decoding="async"></picture>'))
+        self.assertEqual(len(self.archivos()), 4)
+
+    def test_comando_solo_imagenes(self):
+        contenido = ContenidoTema.objects.create(tema=self.tema, orden=1, tipo='TEORIA', contenido_texto='<p>a</p>')
+        ContenidoTema.objects.filter(id=contenido.id).update(contenido_texto=f'<img src="{self.data_uri}">')
+        salida = StringIO()
+        call_command('process_html', '--solo-imagenes', stdout=salida)
+        self.assertIn('Contenidos de Temas: 1 filas, 1 actualizadas', salida.getvalue())
+        self.assertIn('Ejercicios: 0 filas', salida.getvalue())
+        contenido.refresh_from_db()
+        self.assertIn('srcset=', contenido.contenido_texto_procesado)
+
+
+class ContenidoHTMLProcesadoTests(TestCase):
+    """
+    El HTML procesado se guarda junto a la fuente y es el que sirve la API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+        leccion = Leccion.objects.create(orden=1, titulo='Lección', descripcion='')
+        cls.tema = Tema.objects.create(leccion=leccion, orden=1, titulo='Tema', descripcion='')
+
+    def test_save_procesa_y_mide(self):
+        contenido = ContenidoTema.objects.create(
+            tema=self.tema, orden=1, tipo='TEORIA', contenido_texto='<p>\n  Hola <script>x</script></p>\n'
+        )
+        contenido.refresh_from_db()
+        self.assertEqual(contenido.contenido_texto_procesado, '<p>Hola</p>')
+        self.assertEqual(contenido.html_bytes_fuente, len(contenido.contenido_texto))
+        self.assertEqual(contenido.html_bytes_procesado, len('<p>Hola</p>'))
+
+        contenido.contenido_texto = '<p>Otro</p>'
+        contenido.save(update_fields=['contenido_texto'])
+        contenido.refresh_from_db()
+        self.assertEqual(contenido.contenido_texto_procesado, '<p>Otro</p>')
+
+    def test_api_sirve_html_procesado(self):
+        ejercicio = Ejercicio.objects.create(
+            tema=self.tema, orden=1, tipo='ABIERTO', dificultad='FACIL',
+            instruccion='<p>Resuelve&nbsp;</p>', enunciado='<p onmouseover="x()">2 + 2</p>',
+            respuesta_correcta='4', retroalimentacion_correcta='<p>  <b>Bien</b></p>',
+        )
+        self.client.force_login(self.usuario)
+        data = self.client.get(f'/api/lessons/temas/{self.tema.id}/', secure=True).json()
+        self.assertEqual(data['ejercicios'][0]['enunciado'], '<p>2 + 2</p>')
+        self.assertEqual(data['ejercicios'][0]['instruccion'], '<p>Resuelve\xa0</p>')
+        self.assertFalse(data['ejercicios'][0]['tiene_ayuda'])
+
+        respuesta = self.client.post('/api/lessons/ejercicios/validar/', {
+            'ejercicio_id': ejercicio.id, 'respuesta': '4',
+        }, content_type='application/json', secure=True)
+        self.assertEqual(respuesta.json()['retroalimentacion'], '<p><b>Bien</b></p>')
+
+    def test_curriculum_y_comando(self):
+        cargar_curriculum({'lecciones': [{
+            'orden': 2, 'titulo': 'L2', 'descripcion': '',
+            'temas': [{'orden': 1, 'titulo': 'T', 'descripcion': '', 'contenidos': [
+                {'orden': 1, 'tipo': 'TEORIA', 'contenido_texto': '<p> <strike>a</strike> </p>'},
+            ]}],
+        }]})
+        contenido = ContenidoTema.objects.get(tema__leccion__orden=2)
+        self.assertEqual(contenido.contenido_texto_procesado, '<p><s>a</s></p>')
+
+        # Filas escritas sin save() (SQL directo, bulk_update) se procesan con el comando
+        ContenidoTema.objects.filter(id=contenido.id).update(contenido_texto='<p>b</p>')
+        salida = StringIO()
+        call_command('process_html', stdout=salida)
+        self.assertIn('1 actualizadas', salida.getvalue())
+        contenido.refresh_from_db()
+        self.assertEqual(contenido.contenido_texto_procesado, '<p>b</p>')
+
+
+def _curriculum():
+    return {'lecciones': [
+        {'orden': orden, 'titulo': f'Lección {orden}', 'descripcion': '', 'temas': [{
+            'orden': 1, 'titulo': 'Tema', 'descripcion': '',
+            'contenidos': [{'orden': 1, 'tipo': 'TEORIA', 'contenido_texto': '<p>Teoría</p>'}],
+            'ejercicios': [
+                {'orden': 1, 'tipo': 'ABIERTO', 'dificultad': 'FACIL', 'instruccion': 'Responde',
+                 'enunciado': '<p>2 + 2</p>', 'respuesta_correcta': '4'},
+                {'orden': 2, 'tipo': 'MULTIPLE', 'dificultad': 'INTERMEDIO', 'instruccion': 'Elige',
+                 'enunciado': '<p>¿p ∧ q?</p>', 'respuesta_correcta': 'A', 'opciones': [
+                     {'letra': 'A', 'texto': 'Verdadero'}, {'letra': 'B', 'texto': 'Falso'},
+                 ]},
+            ],
+        }]}
+        for orden in (1, 2)
+    ]}
+
+
+class CurriculumTests(TestCase):
+    """
+    Carga declarativa del currículo (lessons.curriculum, load_curriculum) y
+    snapshots (export_curriculum, import_curriculum).
+    """
+
+    def cargar(self, data, **opciones):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as archivo:
+            json.dump(data, archivo)
+        self.addCleanup(os.remove, archivo.name)
+        salida = StringIO()
+        call_command('load_curriculum', archivo.name, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def ids(self):
+        return {
+            modelo.__name__: sorted(modelo.objects.values_list('id', flat=True))
+            for modelo in (Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple)
+        }
+
+    def test_ids_estables(self):
+        self.cargar(_curriculum())
+        ids = self.ids()
+        self.assertEqual(len(ids['OpcionMultiple']), 4)
+
+        salida = self.cargar(_curriculum())
+        self.assertEqual(self.ids(), ids)
+        self.assertIn('ejercicios: creados: 0, actualizados: 0, sin_cambios: 4', salida)
+
+    def test_filas_sin_cambios_conservan_fecha(self):
+        self.cargar(_curriculum())
+        fechas = dict(Ejercicio.objects.values_list('id', 'fecha_modificacion'))
+        data = _curriculum()
+        data['lecciones'][0]['temas'][0]['ejercicios'][0]['respuesta_correcta'] = '5'
+
+        salida = self.cargar(data)
+        self.assertIn('ejercicios: creados: 0, actualizados: 1, sin_cambios: 3', salida)
+        cambiado = Ejercicio.objects.get(tema__leccion__orden=1, orden=1)
+        self.assertEqual(cambiado.respuesta_correcta, '5')
+        self.assertGreater(cambiado.fecha_modificacion, fechas[cambiado.id])
+        for ejercicio_id, fecha in Ejercicio.objects.exclude(id=cambiado.id).values_list('id', 'fecha_modificacion'):
+            self.assertEqual(fecha, fechas[ejercicio_id])
+
+    def test_dry_run_no_escribe(self):
+        salida = self.cargar(_curriculum(), dry_run=True)
+        self.assertIn('lecciones: creados: 2', salida)
+        self.assertFalse(Leccion.objects.exists())
+
+        self.cargar(_curriculum())
+        data = _curriculum()
+        data['lecciones'][1]['titulo'] = 'Otro título'
+        self.cargar(data, dry_run=True)
+        self.assertEqual(Leccion.objects.get(orden=2).titulo, 'Lección 2')
+
+    def test_prune(self):
+        self.cargar(_curriculum())
+        data = _curriculum()
+        del data['lecciones'][1]
+        tema = data['lecciones'][0]['temas'][0]
+        del tema['ejercicios'][0]
+        del tema['ejercicios'][0]['opciones'][1]
+
+        # Sin --prune lo que falta en el archivo se conserva
+        self.cargar(data)
+        self.assertEqual(Leccion.objects.filter(is_active=True).count(), 2)
+        self.assertEqual(Ejercicio.objects.count(), 4)
+
+        salida = self.cargar(data, prune=True)
+        self.assertIn('desactivados: 1', salida)
+        self.assertFalse(Leccion.objects.get(orden=2).is_active)
+        # La lección desactivada no se toca; de los temas cargados se eliminan las filas ausentes
+        self.assertEqual(Ejercicio.objects.filter(tema__leccion__orden=1).count(), 1)
+        self.assertEqual(
+            list(OpcionMultiple.objects.filter(ejercicio__tema__leccion__orden=1).values_list('letra', flat=True)),
+            ['A'],
+        )
+        self.assertEqual(Ejercicio.objects.filter(tema__leccion__orden=2).count(), 2)
+
+    def test_llaves_repetidas(self):
+        data = _curriculum()
+        ejercicios = data['lecciones'][1]['temas'][0]['ejercicios']
+        ejercicios[1]['orden'] = 1
+        with self.assertRaisesMessage(CommandError, "lecciones[1].temas[0].ejercicios[1]: 'orden' 1 repetido"):
+            self.cargar(data)
+        self.assertFalse(Leccion.objects.exists())
+
+        data = _curriculum()
+        data['lecciones'][0]['temas'][0]['ejercicios'][1]['opciones'][1]['letra'] = 'A'
+        with self.assertRaisesMessage(CurriculumError, "opciones[1]: 'letra' 'A' repetido"):
+            cargar_curriculum(data)
+
+        data = _curriculum()
+        data['lecciones'][1]['orden'] = 1
+        with self.assertRaisesMessage(CurriculumError, "lecciones[1]: 'orden' 1 repetido"):
+            cargar_curriculum(data)
+
+    def exportar(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ruta = os.path.join(directorio.name, 'curriculum.json.gz')
+        call_command('export_curriculum', ruta, stdout=StringIO())
+        return ruta
+
+    def test_snapshot_ida_y_vuelta(self):
+        self.cargar(_curriculum())
+        Leccion.objects.filter(orden=2).update(is_active=False)
+        ids = self.ids()
+        ruta = self.exportar()
+
+        salida = StringIO()
+        call_command('import_curriculum', ruta, stdout=salida)
+        for modelo in ('lecciones', 'temas', 'contenidos', 'ejercicios', 'opciones'):
+            self.assertRegex(salida.getvalue(), rf'{modelo}: creados: 0, actualizados: 0, sin_cambios: [1-9]')
+        self.assertEqual(self.ids(), ids)
+        self.assertFalse(Leccion.objects.get(orden=2).is_active)
+
+    def test_snapshot_alterado(self):
+        self.cargar(_curriculum())
+        ruta = self.exportar()
+        data = leer_curriculum(ruta)
+        data['lecciones'][0]['titulo'] = 'Editado a mano'
+        escribir_snapshot(data, ruta)
+
+        with self.assertRaisesMessage(CommandError, 'El hash del snapshot no coincide'):
+            call_command('import_curriculum', ruta, stdout=StringIO())
+        self.assertEqual(Leccion.objects.get(orden=1).titulo, 'Lección 1')
+
+        # Sin el hash global, los nodos editados conservan su 'hash' anterior: igual se aplican
+        del data['hash']
+        escribir_snapshot(data, ruta)
+        salida = StringIO()
+        call_command('load_curriculum', ruta, stdout=salida)
+        self.assertIn('lecciones: creados: 0, actualizados: 1, sin_cambios: 1', salida.getvalue())
+        self.assertEqual(Leccion.objects.get(orden=1).titulo, 'Editado a mano')
+
+        # Un archivo de currículo común no es un snapshot
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as archivo:
+            json.dump(_curriculum(), archivo)
+        self.addCleanup(os.remove, archivo.name)
+        with self.assertRaisesMessage(CommandError, 'no es un snapshot'):
+            call_command('import_curriculum', archivo.name, stdout=StringIO())
+
+
+class CompresionTests(TestCase):
+    """
+    CompresionMiddleware y los payloads del catálogo comprimidos una sola vez
+    por versión de contenido (lessons.catalogo).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecciones = crear_catalogo(lecciones=1, temas_por_leccion=2, contenidos_por_tema=2, ejercicios_por_tema=6)
+        cls.usuario = crear_estudiante()
+        cls.tema = cls.lecciones[0].temas.get(orden=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def get(self, ruta, **headers):
+        return self.client.get(ruta, secure=True, headers=headers)
+
+    def test_middleware_comprime_segun_accept_encoding(self):
+        ruta = f'/api/lessons/temas/{self.tema.id}/'
+        sin = self.get(ruta)
+        self.assertFalse(sin.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', sin['Vary'])
+
+        con = self.get(ruta, accept_encoding='gzip, deflate')
+        self.assertEqual(con['Content-Encoding'], 'gzip')
+        self.assertEqual(int(con['Content-Length']), len(con.content))
+        self.assertEqual(gzip.decompress(con.content), sin.content)
+
+        rechazado = self.get(ruta, accept_encoding='gzip;q=0')
+        self.assertFalse(rechazado.has_header('Content-Encoding'))
+
+    def test_elegir_codificacion(self):
+        factory = RequestFactory()
+        casos = [
+            ('', None),
+            ('gzip', 'gzip'),
+            ('br;q=0, gzip', 'gzip'),
+            ('*', codificaciones()[0]),
+            ('identity', None),
+        ]
+        for encabezado, esperada in casos:
+            request = factory.get('/', HTTP_ACCEPT_ENCODING=encabezado)
+            self.assertEqual(elegir_codificacion(request), esperada, encabezado)
+
+    def test_catalogo_precomprimido(self):
+        ruta = f'/api/lessons/temas/{self.tema.id}/contenido/'
+        lecturas = {r: metricas.CACHE.valores.get(('catalogo', r), 0) for r in ('hit', 'miss')}
+        plano = self.get(ruta)
+        self.assertEqual(len(plano.json()['ejercicios']), 6)
+        self.assertTrue(plano['ETag'].startswith('W/"'))
+
+        comprimido = self.get(ruta, accept_encoding='gzip')
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(comprimido.content), plano.content)
+        # Los bytes salen del cache: dos peticiones devuelven exactamente lo mismo
+        self.assertEqual(self.get(ruta, accept_encoding='gzip').content, comprimido.content)
+
+        with self.assertNumQueries(3):  # sesión, usuario y la versión
+            self.get(ruta, accept_encoding='gzip')
+
+        no_modificado = self.get(ruta, if_none_match=plano['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+        self.assertEqual(no_modificado.content, b'')
+
+        # Las lecturas del cache cuentan en matelog_cache_hit_ratio{cache="catalogo"}
+        self.assertEqual(metricas.CACHE.valores[('catalogo', 'miss')] - lecturas['miss'], 1)
+        self.assertEqual(metricas.CACHE.valores[('catalogo', 'hit')] - lecturas['hit'], 4)
+
+    def test_cambios_cambian_la_version(self):
+        ruta = f'/api/lessons/temas/{self.tema.id}/contenido/'
+        etags = [self.get(ruta)['ETag']]
+
+        opcion = OpcionMultiple.objects.filter(ejercicio__tema=self.tema).first()
+        opcion.texto = 'Otra opción'
+        opcion.save()
+        respuesta = self.get(ruta)
+        etags.append(respuesta['ETag'])
+        textos = [o['texto'] for e in respuesta.json()['ejercicios'] for o in e['opciones']]
+        self.assertIn('Otra opción', textos)
+
+        contenido = self.tema.contenidos.first()
+        contenido.contenido_texto = '<p>Nuevo</p>'
+        contenido.save()
+        etags.append(self.get(ruta)['ETag'])
+
+        contenido.delete()
+        etags.append(self.get(ruta)['ETag'])
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_tema_bloqueado(self):
+        tema = self.lecciones[0].temas.get(orden=2)
+        respuesta = self.get(f'/api/lessons/temas/{tema.id}/contenido/')
+        self.assertEqual(respuesta.status_code, 403)
+        ProgresoTema.objects.create(usuario=self.usuario, tema=tema, desbloqueado=True)
+        self.assertEqual(self.get(f'/api/lessons/temas/{tema.id}/contenido/').status_code, 200)
+
+        self.assertEqual(self.get('/api/lessons/temas/999999/contenido/').status_code, 404)
+
+
+class SerializadoresDictTests(TestCase):
+    """
+    Los serializers en dict plano devuelven lo mismo que los de DRF.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecciones = crear_catalogo(lecciones=2, temas_por_leccion=3, contenidos_por_tema=2, ejercicios_por_tema=4)
+        tema = cls.lecciones[0].temas.get(orden=1)
+        tema.ejercicios.filter(orden=2).update(texto_ayuda_procesado='<p>Pista</p>', mostrar_dificultad=False)
+
+    def test_tema_detalle(self):
+        for tema in Tema.objects.prefetch_related('contenidos', 'ejercicios__opciones'):
+            self.assertEqual(tema_detalle_dict(tema), TemaDetailSerializer(tema).data)
+
+    def test_lecciones(self):
+        for leccion in Leccion.objects.prefetch_related('temas'):
+            self.assertEqual(leccion_detalle_dict(leccion), LeccionDetailSerializer(leccion).data)
+            self.assertEqual(leccion_lista_dict(leccion), LeccionListSerializer(leccion).data)
+
+
+class JSONRapidoTests(SimpleTestCase):
+    """
+    json_rapido produce los mismos bytes que JSONRenderer de DRF, con y sin orjson.
+    """
+    datos = {
+        'texto': 'Función f(x) = 2x²   <b>"citas"</b>\u2028',
+        'fecha': datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'dia': date(2025, 3, 1),
+        'decimal': Decimal('87.50'),
+        'perezoso': gettext_lazy('Opción A'),
+        'ids': {15: {'es_correcta': True}, 3: None},
+        'lista': [1, 2.5, None, False],
+    }
+
+    def test_mismos_bytes_que_drf(self):
+        esperado = JSONRenderer().render(self.datos)
+        for rapido in (True, False):
+            with self.settings(JSON_RAPIDO=rapido):
+                self.assertEqual(json_rapido.dumps(self.datos), esperado, rapido)
+                self.assertEqual(json_rapido.RenderizadorJSON().render(self.datos), esperado, rapido)
+                self.assertEqual(json_rapido.loads(esperado), json_rapido.loads(esperado.decode()))
+
+    def test_parser(self):
+        parser = json_rapido.ParserJSON()
+        self.assertEqual(parser.parse(io.BytesIO('{"respuesta": "ñ"}'.encode())), {'respuesta': 'ñ'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"respuesta":'))
+
+
+class SinConexionTests(TestCase):
+    """
+    Paquete de la lección y sincronización de respuestas guardadas sin conexión.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecciones = crear_catalogo(lecciones=1, temas_por_leccion=2, contenidos_por_tema=1, ejercicios_por_tema=4)
+        cls.usuario = crear_estudiante()
+        cls.leccion = cls.lecciones[0]
+        cls.tema = cls.leccion.temas.get(orden=1)
+        cls.progreso = ProgresoTema.objects.create(usuario=cls.usuario, tema=cls.tema, desbloqueado=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def sincronizar(self, respuestas):
+        respuesta = self.client.post(
+            '/api/lessons/ejercicios/sincronizar/', {'respuestas': respuestas},
+            content_type='application/json', secure=True,
+        )
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()['resultados']
+
+    def test_paquete_versionado(self):
+        ruta = f'/api/lessons/lecciones/{self.leccion.id}/paquete/'
+        paquete = self.client.get(ruta, secure=True).json()
+        self.assertEqual([t['orden'] for t in paquete['temas']], [1, 2])
+        self.assertNotIn('respuesta_correcta', paquete['temas'][0]['ejercicios'][0])
+        etag = f'W/"{paquete["version"]}"'
+        self.assertEqual(self.client.get(ruta, secure=True, headers={'If-None-Match': etag}).status_code, 304)
+
+        # Desactivar un tema cambia la versión y lo quita del paquete
+        tema = self.leccion.temas.get(orden=2)
+        tema.is_active = False
+        tema.save()
+        nuevo = self.client.get(ruta, secure=True, headers={'If-None-Match': etag})
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertNotEqual(nuevo.json()['version'], paquete['version'])
+        self.assertEqual(len(nuevo.json()['temas']), 1)
+
+        self.assertEqual(self.client.get('/api/lessons/lecciones/999999/paquete/', secure=True).status_code, 404)
+
+    def test_sincronizar(self):
+        abierto, multiple = self.tema.ejercicios.get(orden=1), self.tema.ejercicios.get(orden=2)
+        respondida_en = timezone.now() - timedelta(hours=2)
+        lote = [
+            {'id_local': 'a', 'ejercicio_id': abierto.id, 'respuesta': 'Verdadero', 'uso_ayuda': True,
+             'tiempo_respuesta_segundos': 40, 'respondida_en': respondida_en.isoformat()},
+            {'id_local': 'b', 'ejercicio_id': multiple.id, 'respuesta': 'C'},
+            {'id_local': 'c', 'ejercicio_id': 999999, 'respuesta': 'x'},
+            {'id_local': 'd', 'respuesta': 'sin ejercicio'},
+            'no es un objeto',
+        ]
+        resultados = self.sincronizar(lote)
+        self.assertEqual([r['id_local'] for r in resultados], ['a', 'b', 'c', 'd', None])
+        self.assertTrue(resultados[0]['es_correcta'])
+        self.assertEqual(resultados[0]['retroalimentacion'], '<p>Bien</p>')
+        self.assertFalse(resultados[1]['es_correcta'])
+        self.assertIn('error', resultados[2])
+        self.assertIn('ejercicio_id', resultados[3]['error'])
+
+        guardada = self.usuario.respuestas.get(ejercicio=abierto)
+        self.assertEqual(guardada.progreso_tema, self.progreso)
+        self.assertEqual(guardada.fecha_respuesta, respondida_en)
+        self.assertTrue(guardada.uso_ayuda)
+        self.progreso.refresh_from_db()
+        self.assertEqual(self.progreso.estado, 'INICIADO')
+
+        # Reenviar el lote (p. ej. si se cortó la red antes de la respuesta) no duplica
+        otra_vez = self.sincronizar(lote[:2] + [{'id_local': 'e', 'ejercicio_id': multiple.id, 'respuesta': 'A'}])
+        self.assertFalse(otra_vez[2]['es_correcta'])
+        self.assertEqual(self.usuario.respuestas.count(), 2)
+
+    def test_limites(self):
+        respuesta = self.client.post(
+            '/api/lessons/ejercicios/sincronizar/', {'respuestas': [{}] * 201},
+            content_type='application/json', secure=True,
+        )
+        self.assertEqual(respuesta.status_code, 400)
+
+        ejercicio = self.tema.ejercicios.get(orden=1)
+        futuro = timezone.now() + timedelta(days=3)
+        self.sincronizar([{
+            'id_local': 'f', 'ejercicio_id': ejercicio.id, 'respuesta': 'verdadero', 'respondida_en': futuro.isoformat(),
+        }])
+        self.assertLess(self.usuario.respuestas.get().fecha_respuesta, futuro)
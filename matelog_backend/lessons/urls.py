@@ -1,25 +1,38 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     LeccionListView,
     LeccionDetailView,
+    LeccionPaqueteView,
     TemaDetailView,
+    TemaContenidoView,
     ValidarRespuestaView,
+    SincronizarRespuestasView,
     FinalizarTemaView,
     VolverAlTemaView,
     ReintentarTemaView,  # Agregar esta línea
 )
 
+if settings.ASYNC_VIEWS:
+    # Ruta de lectura del estudiante con vistas async (despliegue ASGI)
+    from .async_views import (  # noqa: F811
+        LeccionListView, LeccionDetailView, LeccionPaqueteView, TemaDetailView, TemaContenidoView,
+    )
+
 urlpatterns = [
     # Lecciones
     path('lecciones/', LeccionListView.as_view(), name='leccion-list'),
     path('lecciones/<int:leccion_id>/', LeccionDetailView.as_view(), name='leccion-detail'),
+    path('lecciones/<int:leccion_id>/paquete/', LeccionPaqueteView.as_view(), name='leccion-paquete'),
     
     # Temas
     path('temas/<int:tema_id>/', TemaDetailView.as_view(), name='tema-detail'),
+    path('temas/<int:tema_id>/contenido/', TemaContenidoView.as_view(), name='tema-contenido'),
     path('temas/<int:tema_id>/finalizar/', FinalizarTemaView.as_view(), name='finalizar-tema'),
     path('temas/<int:tema_id>/reintentar/', ReintentarTemaView.as_view(), name='reintentar-tema'),
     path('temas/<int:tema_id>/volver/', VolverAlTemaView.as_view(), name='volver-tema'),
     
     # Ejercicios
     path('ejercicios/validar/', ValidarRespuestaView.as_view(), name='validar-ejercicio'),
+    path('ejercicios/sincronizar/', SincronizarRespuestasView.as_view(), name='sincronizar-respuestas'),
 ]
\ No newline at end of file
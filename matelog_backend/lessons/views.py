@@ -1,16 +1,21 @@
+import logging
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db import models
-from .models import Leccion, Tema, Ejercicio
+from django.db import models, transaction
+from . import catalogo, progreso
+from .models import Leccion, Tema, ContenidoTema, Ejercicio
 from .serializers import (
-    LeccionListSerializer,
-    LeccionDetailSerializer,
-    TemaDetailSerializer,
     EjercicioValidacionSerializer,
+    RespuestaPendienteSerializer,
+    tema_detalle_dict,
 )
+from monitoring import metricas
+from monitoring.instrumentacion import medir
 from tracking.models import (
     ProgresoLeccion,
     ProgresoTema,
@@ -18,41 +23,36 @@ from tracking.models import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+def lecciones_con_progreso(usuario):
+    """
+    Lecciones activas con el progreso del usuario, como las devuelve
+    GET /api/lessons/lecciones/ (también se usan en /api/users/bootstrap/).
+    """
+    lecciones = Leccion.objects.filter(is_active=True).annotate(
+        cantidad_temas_activos=models.Count('temas', filter=models.Q(temas__is_active=True))
+    ).order_by('orden')
+    
+    # Obtener el progreso del usuario para todas las lecciones en una sola consulta
+    progresos = {
+        progreso_leccion.leccion_id: progreso_leccion
+        for progreso_leccion in ProgresoLeccion.objects.filter(usuario=usuario)
+    }
+    return progreso.lecciones_lista_data(lecciones, progresos)
+
+
 class LeccionListView(APIView):
     """
     Vista para listar todas las lecciones disponibles.
     Endpoint: GET /api/lecciones/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def get(self, request):
-        lecciones = Leccion.objects.filter(is_active=True).order_by('orden')
-        
-        # Obtener el progreso del usuario para cada lección
-        lecciones_data = []
-        for leccion in lecciones:
-            progreso = ProgresoLeccion.objects.filter(
-                usuario=request.user,
-                leccion=leccion
-            ).first()
-            
-            serializer = LeccionListSerializer(leccion)
-            leccion_dict = serializer.data
-            
-            if progreso:
-                leccion_dict['progreso'] = {
-                    'estado': progreso.estado,
-                    'porcentaje_completado': float(progreso.porcentaje_completado)
-                }
-            else:
-                leccion_dict['progreso'] = {
-                    'estado': 'SIN_INICIAR',
-                    'porcentaje_completado': 0.0
-                }
-            
-            lecciones_data.append(leccion_dict)
-        
-        return Response(lecciones_data, status=status.HTTP_200_OK)
+        return Response(lecciones_con_progreso(request.user), status=status.HTTP_200_OK)
 
 
 class LeccionDetailView(APIView):
@@ -61,9 +61,18 @@ class LeccionDetailView(APIView):
     Endpoint: GET /api/lecciones/<id>/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def get(self, request, leccion_id):
-        leccion = get_object_or_404(Leccion, id=leccion_id, is_active=True)
+        temas_con_conteos = Tema.objects.annotate(
+            cantidad_contenidos=models.Count('contenidos', distinct=True),
+            cantidad_ejercicios=models.Count('ejercicios', distinct=True),
+        ).order_by('orden')
+        leccion = get_object_or_404(
+            Leccion.objects.prefetch_related(models.Prefetch('temas', queryset=temas_con_conteos)),
+            id=leccion_id,
+            is_active=True
+        )
         
         # Crear o actualizar progreso de la lección
         from django.utils import timezone
@@ -72,50 +81,54 @@ class LeccionDetailView(APIView):
             leccion=leccion,
             defaults={'estado': 'EN_PROGRESO', 'fecha_inicio': timezone.now()}
         )
-        
-        if created or progreso_leccion.estado == 'SIN_INICIAR':
-            progreso_leccion.estado = 'EN_PROGRESO'
-            if not progreso_leccion.fecha_inicio:
-                progreso_leccion.fecha_inicio = timezone.now()
+        if progreso.iniciar_leccion(progreso_leccion, created):
             progreso_leccion.save()
         
-        # Serializar la lección
-        serializer = LeccionDetailSerializer(leccion)
-        leccion_data = serializer.data
+        # Obtener (o crear en bloque) el progreso del usuario en todos los temas
+        progresos = self._progresos_temas(request.user, list(leccion.temas.all()))
         
-        # Agregar información de progreso para cada tema
-        temas_con_progreso = []
-        primer_tema_desbloqueado = False
+        leccion_data, desbloqueados = progreso.leccion_detalle_data(leccion, progreso_leccion, progresos)
+        for progreso_tema in desbloqueados:
+            progreso_tema.save(update_fields=['desbloqueado'])
         
-        for tema_data in leccion_data['temas']:
-            tema = Tema.objects.get(id=tema_data['id'])
-            progreso_tema, _ = ProgresoTema.objects.get_or_create(
-                usuario=request.user,
-                tema=tema
-            )
-            
-            # El primer tema siempre está desbloqueado
-            if tema.orden == 1 and not progreso_tema.desbloqueado:
-                progreso_tema.desbloqueado = True
-                progreso_tema.save()
-                primer_tema_desbloqueado = True
-            
-            tema_data['progreso'] = {
-                'estado': progreso_tema.estado,
-                'desbloqueado': progreso_tema.desbloqueado,
-                'porcentaje_acierto': float(progreso_tema.porcentaje_acierto),
-                'intentos_realizados': progreso_tema.intentos_realizados,
-            }
-            
-            temas_con_progreso.append(tema_data)
-        
-        leccion_data['temas'] = temas_con_progreso
-        leccion_data['progreso'] = {
-            'estado': progreso_leccion.estado,
-            'porcentaje_completado': float(progreso_leccion.porcentaje_completado)
+        return Response(leccion_data, status=status.HTTP_200_OK)
+    
+    def _progresos_temas(self, usuario, temas):
+        """
+        Devuelve {tema_id: ProgresoTema} creando en bloque los que falten.
+        """
+        progresos = {
+            progreso_tema.tema_id: progreso_tema
+            for progreso_tema in ProgresoTema.objects.filter(usuario=usuario, tema__in=temas)
         }
+        faltantes = progreso.temas_sin_progreso(usuario, temas, progresos)
         
-        return Response(leccion_data, status=status.HTTP_200_OK)
+        if faltantes:
+            # ignore_conflicts cubre el caso de dos peticiones simultáneas del mismo usuario
+            ProgresoTema.objects.bulk_create(faltantes, ignore_conflicts=True)
+            progresos = {
+                progreso_tema.tema_id: progreso_tema
+                for progreso_tema in ProgresoTema.objects.filter(usuario=usuario, tema__in=temas)
+            }
+        
+        return progresos
+
+
+class LeccionPaqueteView(APIView):
+    """
+    Paquete de la lección para usarla sin conexión: el contenido de todos sus
+    temas activos en un solo documento versionado, cacheado y ya comprimido
+    (ver lessons.catalogo). No incluye progreso ni respuestas correctas.
+    Endpoint: GET /api/lecciones/<id>/paquete/
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
+
+    def get(self, request, leccion_id):
+        version = catalogo.version_leccion(leccion_id)
+        if version is None:
+            raise Http404
+        return catalogo.respuesta_catalogo(request, catalogo.entrada_leccion(leccion_id, version))
 
 
 class TemaDetailView(APIView):
@@ -123,13 +136,32 @@ class TemaDetailView(APIView):
     Vista para obtener el contenido completo de un tema.
     Endpoint: GET /api/temas/<id>/
     Modificación 6: Incluye ejercicios_respondidos y siguiente_ejercicio_index.
+    Con ?contenido=0 devuelve solo el id y esos campos de progreso; el
+    contenido se pide a TemaContenidoView (cacheado y ya comprimido).
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def get(self, request, tema_id):
         from django.utils import timezone
         
-        tema = get_object_or_404(Tema, id=tema_id, is_active=True)
+        solo_progreso = request.query_params.get('contenido') == '0'
+        if solo_progreso:
+            # Solo el progreso del estudiante: el contenido sale de /contenido/ (lessons.catalogo)
+            tema = get_object_or_404(Tema, id=tema_id, is_active=True)
+        else:
+            tema = get_object_or_404(
+                Tema.objects.prefetch_related(
+                    # Solo el HTML procesado: la fuente puede traer imágenes incrustadas de varios MB
+                    models.Prefetch('contenidos', queryset=ContenidoTema.objects.defer(*ContenidoTema.campos_html)),
+                    models.Prefetch(
+                        'ejercicios',
+                        queryset=Ejercicio.objects.defer(*Ejercicio.campos_html).prefetch_related('opciones'),
+                    ),
+                ),
+                id=tema_id,
+                is_active=True
+            )
         
         # Verificar que el tema esté desbloqueado
         progreso_tema, created = ProgresoTema.objects.get_or_create(
@@ -150,19 +182,24 @@ class TemaDetailView(APIView):
             progreso_tema.save()
         
         # Serializar el tema
-        serializer = TemaDetailSerializer(tema)
-        tema_data = serializer.data
+        if solo_progreso:
+            tema_data = {'id': tema.id}
+            ejercicios_ids = list(tema.ejercicios.values_list('id', flat=True))
+        else:
+            with medir('serializer'):
+                tema_data = tema_detalle_dict(tema)
+            ejercicios_ids = [ejercicio['id'] for ejercicio in tema_data['ejercicios']]
         
         # Modificación 6: Obtener respuestas previas
         respuestas_previas = RespuestaEjercicio.objects.filter(
             usuario=request.user,
             progreso_tema=progreso_tema
-        ).select_related('ejercicio')
+        )
         
         # Crear diccionario de ejercicios respondidos
         ejercicios_respondidos = {}
         for respuesta in respuestas_previas:
-            ejercicios_respondidos[respuesta.ejercicio.id] = {
+            ejercicios_respondidos[respuesta.ejercicio_id] = {
                 'respuesta_usuario': respuesta.respuesta_usuario,
                 'es_correcta': respuesta.es_correcta,
                 'uso_ayuda': respuesta.uso_ayuda
@@ -170,13 +207,13 @@ class TemaDetailView(APIView):
         
         # Determinar índice del siguiente ejercicio sin responder
         siguiente_ejercicio_index = 0
-        for idx, ejercicio in enumerate(tema_data['ejercicios']):
-            if ejercicio['id'] not in ejercicios_respondidos:
+        for idx, ejercicio_id in enumerate(ejercicios_ids):
+            if ejercicio_id not in ejercicios_respondidos:
                 siguiente_ejercicio_index = idx
                 break
         
         # Si todos están respondidos, mantener en el último
-        if len(ejercicios_respondidos) == len(tema_data['ejercicios']):
+        if len(ejercicios_respondidos) == len(ejercicios_ids):
             siguiente_ejercicio_index = 0
         
         # Agregar información de progreso
@@ -187,12 +224,37 @@ class TemaDetailView(APIView):
         return Response(tema_data, status=status.HTTP_200_OK)
 
 
+class TemaContenidoView(APIView):
+    """
+    Contenido del tema (teoría, ejercicios y opciones), igual para todos los
+    estudiantes: sale del cache ya comprimido (ver lessons.catalogo).
+    Endpoint: GET /api/temas/<id>/contenido/
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
+
+    def get(self, request, tema_id):
+        version = catalogo.version_tema(tema_id)
+        if version is None:
+            raise Http404
+        orden, version = version
+        if orden != 1 and not ProgresoTema.objects.filter(
+            usuario=request.user, tema_id=tema_id, desbloqueado=True
+        ).exists():
+            return Response(
+                {'error': 'Este tema aún no está desbloqueado'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return catalogo.respuesta_catalogo(request, catalogo.entrada_tema(tema_id, version))
+
+
 class ValidarRespuestaView(APIView):
     """
     Vista para validar la respuesta de un ejercicio.
     Endpoint: POST /api/ejercicios/validar/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def post(self, request):
         try:
@@ -208,7 +270,7 @@ class ValidarRespuestaView(APIView):
             
             # Obtener ejercicio (SIN is_active porque Ejercicio no tiene ese campo)
             try:
-                ejercicio = Ejercicio.objects.get(id=ejercicio_id)
+                ejercicio = Ejercicio.objects.select_related('tema').defer(*Ejercicio.campos_html).get(id=ejercicio_id)
             except Ejercicio.DoesNotExist:
                 return Response(
                     {'error': 'Ejercicio no encontrado'},
@@ -227,6 +289,14 @@ class ValidarRespuestaView(APIView):
                 }
             )
             
+            if created:
+                # El frontend abre el tema (TemaDetailView) antes de responder;
+                # llegar aquí sin progreso indica un flujo inesperado
+                logger.warning(
+                    'Progreso del tema %s creado al validar una respuesta', ejercicio.tema_id,
+                    extra={'tema_id': ejercicio.tema_id, 'ejercicio_id': ejercicio.id}
+                )
+            
             # Si el progreso ya existía pero no tenía fecha de inicio, establecerla
             if not created and not progreso_tema.fecha_inicio:
                 progreso_tema.fecha_inicio = timezone.now()
@@ -249,10 +319,10 @@ class ValidarRespuestaView(APIView):
                     'es_correcta': respuesta_existente.es_correcta,
                 }
                 
-                if respuesta_existente.es_correcta and ejercicio.retroalimentacion_correcta:
-                    response_data['retroalimentacion'] = ejercicio.retroalimentacion_correcta
-                elif not respuesta_existente.es_correcta and ejercicio.retroalimentacion_incorrecta:
-                    response_data['retroalimentacion'] = ejercicio.retroalimentacion_incorrecta
+                if respuesta_existente.es_correcta and ejercicio.retroalimentacion_correcta_procesado:
+                    response_data['retroalimentacion'] = ejercicio.retroalimentacion_correcta_procesado
+                elif not respuesta_existente.es_correcta and ejercicio.retroalimentacion_incorrecta_procesado:
+                    response_data['retroalimentacion'] = ejercicio.retroalimentacion_incorrecta_procesado
                 
                 return Response(response_data, status=status.HTTP_200_OK)
             
@@ -266,6 +336,7 @@ class ValidarRespuestaView(APIView):
                 uso_ayuda=uso_ayuda,
                 tiempo_respuesta_segundos=tiempo_respuesta
             )
+            metricas.RESPUESTAS.inc(resultado='correcta' if es_correcta else 'incorrecta')
             
             # Preparar respuesta
             response_data = {
@@ -273,23 +344,18 @@ class ValidarRespuestaView(APIView):
             }
             
             # Agregar retroalimentación si existe
-            if es_correcta and ejercicio.retroalimentacion_correcta:
-                response_data['retroalimentacion'] = ejercicio.retroalimentacion_correcta
-            elif not es_correcta and ejercicio.retroalimentacion_incorrecta:
-                response_data['retroalimentacion'] = ejercicio.retroalimentacion_incorrecta
+            if es_correcta and ejercicio.retroalimentacion_correcta_procesado:
+                response_data['retroalimentacion'] = ejercicio.retroalimentacion_correcta_procesado
+            elif not es_correcta and ejercicio.retroalimentacion_incorrecta_procesado:
+                response_data['retroalimentacion'] = ejercicio.retroalimentacion_incorrecta_procesado
             
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
-            # Log del error para debugging
-            import traceback
-            print("=" * 80)
-            print("ERROR EN VALIDAR RESPUESTA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Ejercicio ID: {request.data.get('ejercicio_id')}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception(
+                'Error al validar respuesta del ejercicio %s', request.data.get('ejercicio_id'),
+                extra={'ejercicio_id': request.data.get('ejercicio_id')}
+            )
             
             return Response(
                 {'error': f'Error al procesar respuesta: {str(e)}'},
@@ -297,6 +363,141 @@ class ValidarRespuestaView(APIView):
             )
 
 
+class SincronizarRespuestasView(APIView):
+    """
+    Registra en lote las respuestas que el frontend guardó sin conexión.
+    Endpoint: POST /api/ejercicios/sincronizar/
+    Body: {"respuestas": [{id_local, ejercicio_id, respuesta, uso_ayuda,
+           tiempo_respuesta_segundos, respondida_en}, ...]}
+
+    Cada respuesta se valida y registra como en ValidarRespuestaView; si el
+    ejercicio ya tenía respuesta en el progreso actual se devuelve la
+    anterior, así que reenviar un lote es seguro. Devuelve un resultado por
+    respuesta, en el mismo orden: {id_local, ejercicio_id, es_correcta,
+    retroalimentacion} o {id_local, error} (el cliente descarta ambas).
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
+    MAX_RESPUESTAS = 200
+
+    def post(self, request):
+        respuestas = request.data.get('respuestas') if isinstance(request.data, dict) else None
+        if not isinstance(respuestas, list) or len(respuestas) > self.MAX_RESPUESTAS:
+            return Response(
+                {'error': f'Se esperaba una lista "respuestas" de hasta {self.MAX_RESPUESTAS} elementos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados = [None] * len(respuestas)
+        validas = []
+        for indice, item in enumerate(respuestas):
+            serializer = RespuestaPendienteSerializer(data=item)
+            if serializer.is_valid():
+                validas.append((indice, serializer.validated_data))
+            else:
+                id_local = item.get('id_local') if isinstance(item, dict) else None
+                resultados[indice] = {'id_local': id_local, 'error': serializer.errors}
+
+        for indice, resultado in self._registrar(request.user, validas).items():
+            resultados[indice] = resultado
+        return Response({'resultados': resultados}, status=status.HTTP_200_OK)
+
+    def _registrar(self, usuario, validas):
+        """
+        Registra las respuestas validadas [(índice, datos)] y devuelve
+        {índice: resultado}. Consultas constantes por lote: ejercicios,
+        progresos, respuestas previas e inserciones.
+        """
+        from django.utils import timezone
+
+        ahora = timezone.now()
+        ejercicios = Ejercicio.objects.defer(*Ejercicio.campos_html).in_bulk(
+            {datos['ejercicio_id'] for _, datos in validas}
+        )
+        temas_ids = {ejercicio.tema_id for ejercicio in ejercicios.values()}
+        progresos = {
+            progreso.tema_id: progreso
+            for progreso in ProgresoTema.objects.filter(usuario=usuario, tema_id__in=temas_ids)
+        }
+        faltantes = temas_ids - set(progresos)
+        if faltantes:
+            # Como en ValidarRespuestaView: el tema se abrió antes de responder
+            logger.warning(
+                'Progreso de %s temas creado al sincronizar respuestas', len(faltantes),
+                extra={'temas_ids': sorted(faltantes)}
+            )
+            ProgresoTema.objects.bulk_create([
+                ProgresoTema(usuario=usuario, tema_id=tema_id, desbloqueado=True,
+                             estado='INICIADO', fecha_inicio=ahora)
+                for tema_id in faltantes
+            ], ignore_conflicts=True)
+            progresos = {
+                progreso.tema_id: progreso
+                for progreso in ProgresoTema.objects.filter(usuario=usuario, tema_id__in=temas_ids)
+            }
+        for progreso in progresos.values():
+            if not progreso.fecha_inicio:
+                progreso.fecha_inicio = ahora
+                progreso.estado = 'INICIADO'
+                progreso.save(update_fields=['fecha_inicio', 'estado'])
+
+        existentes = {
+            (respuesta.ejercicio_id, respuesta.progreso_tema_id): respuesta
+            for respuesta in RespuestaEjercicio.objects.filter(
+                usuario=usuario, progreso_tema__in=list(progresos.values()), ejercicio_id__in=list(ejercicios)
+            )
+        }
+
+        resultados = {}
+        nuevas = []
+        con_hora = []
+        for indice, datos in validas:
+            ejercicio = ejercicios.get(datos['ejercicio_id'])
+            if ejercicio is None:
+                resultados[indice] = {'id_local': datos['id_local'], 'error': 'Ejercicio no encontrado'}
+                continue
+            progreso = progresos[ejercicio.tema_id]
+            respuesta = existentes.get((ejercicio.id, progreso.id))
+            if respuesta is None:
+                respuesta = RespuestaEjercicio(
+                    usuario=usuario,
+                    ejercicio=ejercicio,
+                    progreso_tema=progreso,
+                    respuesta_usuario=datos['respuesta'],
+                    es_correcta=ejercicio.validar_respuesta(datos['respuesta']),
+                    uso_ayuda=datos.get('uso_ayuda', False),
+                    tiempo_respuesta_segundos=datos.get('tiempo_respuesta_segundos') or 0,
+                )
+                existentes[(ejercicio.id, progreso.id)] = respuesta
+                nuevas.append(respuesta)
+                if 'respondida_en' in datos:
+                    # La hora real de la respuesta, nunca en el futuro
+                    con_hora.append((respuesta, min(datos['respondida_en'], ahora)))
+
+            resultado = {
+                'id_local': datos['id_local'],
+                'ejercicio_id': ejercicio.id,
+                'es_correcta': respuesta.es_correcta,
+            }
+            if respuesta.es_correcta and ejercicio.retroalimentacion_correcta_procesado:
+                resultado['retroalimentacion'] = ejercicio.retroalimentacion_correcta_procesado
+            elif not respuesta.es_correcta and ejercicio.retroalimentacion_incorrecta_procesado:
+                resultado['retroalimentacion'] = ejercicio.retroalimentacion_incorrecta_procesado
+            resultados[indice] = resultado
+
+        if nuevas:
+            with transaction.atomic():
+                RespuestaEjercicio.objects.bulk_create(nuevas)
+                if con_hora:
+                    # fecha_respuesta es auto_now_add: bulk_create la fija en la hora actual
+                    for respuesta, respondida_en in con_hora:
+                        respuesta.fecha_respuesta = respondida_en
+                    RespuestaEjercicio.objects.bulk_update([r for r, _ in con_hora], ['fecha_respuesta'])
+            for respuesta in nuevas:
+                metricas.RESPUESTAS.inc(resultado='correcta' if respuesta.es_correcta else 'incorrecta')
+        return resultados
+
+
 class FinalizarTemaView(APIView):
     """
     Vista para finalizar un tema y calcular el progreso.
@@ -304,6 +505,7 @@ class FinalizarTemaView(APIView):
     Modificación 7: Registra cada intento en IntentoTema.
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def post(self, request, tema_id):
         try:
@@ -329,11 +531,17 @@ class FinalizarTemaView(APIView):
                 progreso_tema=progreso_tema
             )
             
-            # Calcular estadísticas
+            # Calcular estadísticas (una sola consulta para todos los conteos)
             total_ejercicios = tema.ejercicios.count()
-            ejercicios_correctos = respuestas.filter(es_correcta=True).count()
-            ejercicios_incorrectos = respuestas.filter(es_correcta=False).count()
-            ejercicios_con_ayuda = respuestas.filter(uso_ayuda=True).count()
+            estadisticas = respuestas.aggregate(
+                correctos=models.Count('id', filter=models.Q(es_correcta=True)),
+                incorrectos=models.Count('id', filter=models.Q(es_correcta=False)),
+                con_ayuda=models.Count('id', filter=models.Q(uso_ayuda=True)),
+                tiempo_total=models.Sum('tiempo_respuesta_segundos'),
+            )
+            ejercicios_correctos = estadisticas['correctos']
+            ejercicios_incorrectos = estadisticas['incorrectos']
+            ejercicios_con_ayuda = estadisticas['con_ayuda']
             
             # Calcular porcentaje de aciertos
             if total_ejercicios > 0:
@@ -342,9 +550,7 @@ class FinalizarTemaView(APIView):
                 porcentaje_acierto = 0
             
             # Calcular tiempos
-            tiempo_total_segundos = respuestas.aggregate(
-                total=models.Sum('tiempo_respuesta_segundos')
-            )['total'] or 0
+            tiempo_total_segundos = estadisticas['tiempo_total'] or 0
             
             tiempo_promedio_por_ejercicio = (
                 tiempo_total_segundos // total_ejercicios if total_ejercicios > 0 else 0
@@ -438,14 +644,7 @@ class FinalizarTemaView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            import traceback
-            print("=" * 80)
-            print("ERROR EN FINALIZAR TEMA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Tema ID: {tema_id}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception('Error al finalizar el tema %s', tema_id, extra={'tema_id': tema_id})
             
             return Response(
                 {'error': f'Error al finalizar tema: {str(e)}'},
@@ -459,6 +658,7 @@ class VolverAlTemaView(APIView):
     Endpoint: POST /api/temas/<id>/volver/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def post(self, request, tema_id):
         tema = get_object_or_404(Tema, id=tema_id, is_active=True)
@@ -479,6 +679,7 @@ class ReintentarTemaView(APIView):
     Endpoint: POST /api/temas/<id>/reintentar/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'aprendizaje'
     
     def post(self, request, tema_id):
         try:
@@ -510,14 +711,7 @@ class ReintentarTemaView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            import traceback
-            print("=" * 80)
-            print("ERROR EN REINTENTAR TEMA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Tema ID: {tema_id}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception('Error al reintentar el tema %s', tema_id, extra={'tema_id': tema_id})
             
             return Response(
                 {'error': f'Error al reintentar tema: {str(e)}'},
@@ -0,0 +1,159 @@
+"""
+Soporte para servir la API con ASGI (uvicorn).
+
+Las vistas async no pueden usar APIView de DRF (sus vistas son síncronas),
+así que `VistaAsync` reproduce lo que DRF hace en la ruta del estudiante:
+autenticación por sesión o token firmado, verificación CSRF para sesiones,
+límites de tasa (matelog_backend.limites), lectura del cuerpo JSON y respuestas de error con el mismo formato
+({'detail': ...}).
+
+También incluye una versión de WhiteNoiseMiddleware que soporta el modo
+async: un solo middleware síncrono en la cadena obliga a Django a atender
+cada petición en un hilo y se pierde la ventaja de ASGI.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import CSRFCheck
+from rest_framework.settings import api_settings
+from whitenoise.middleware import WhiteNoiseMiddleware as _WhiteNoiseMiddleware
+
+from users.authentication import TokenFirmadoAuthentication
+from .json_rapido import dumps, loads
+
+
+def respuesta_json(data, status=200):
+    """
+    Respuesta JSON con el mismo formato que RenderizadorJSON (json_rapido).
+    """
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def _error(excepcion):
+    return respuesta_json({'detail': excepcion.detail}, status=excepcion.status_code)
+
+
+def _verificar_csrf(request):
+    """
+    Igual que SessionAuthentication.enforce_csrf: devuelve el motivo del
+    rechazo o None si el token es válido.
+    """
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def _verificar_limites(request, vista):
+    """
+    Igual que APIView.check_throttles: devuelve la excepción Throttled con la
+    mayor espera, o None si ningún límite rechaza la petición.
+    """
+    esperas = []
+    for clase in api_settings.DEFAULT_THROTTLE_CLASSES:
+        limite = clase()
+        if hasattr(limite, 'aallow_request'):
+            permitido = await limite.aallow_request(request, vista)
+        else:
+            permitido = await sync_to_async(limite.allow_request)(request, vista)
+        if not permitido:
+            esperas.append(limite.wait())
+    if not esperas:
+        return None
+    esperas = [espera for espera in esperas if espera is not None]
+    return exceptions.Throttled(max(esperas, default=None))
+
+
+def _leer_cuerpo(request):
+    if not request.body:
+        return {}
+    if request.content_type == 'application/json':
+        return loads(request.body)
+    return request.POST
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class VistaAsync(View):
+    """
+    Base de las vistas async de la API. Las subclases definen handlers
+    `async def get/post(self, request, ...)`, usan `request.user` (ya cargado)
+    y `request.data`, y devuelven `respuesta_json(...)`.
+    """
+    requiere_autenticacion = True
+    throttle_scope = None
+
+    def dispatch(self, request, *args, **kwargs):
+        return self._despachar(request, *args, **kwargs)
+
+    async def _despachar(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return _error(exceptions.MethodNotAllowed(request.method))
+
+        # request.user es perezoso y síncrono: se reemplaza por el usuario ya cargado.
+        # Mismo orden que DEFAULT_AUTHENTICATION_CLASSES: primero la sesión, luego el token.
+        request.user = await request.auser()
+        if request.user.is_authenticated:
+            if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+                motivo = _verificar_csrf(request)
+                if motivo:
+                    return _error(exceptions.PermissionDenied(f'CSRF Failed: {motivo}'))
+        else:
+            try:
+                autenticado = TokenFirmadoAuthentication().authenticate(request)
+            except exceptions.AuthenticationFailed as e:
+                # Como DRF con SessionAuthentication primero (sin header WWW-Authenticate): 403
+                return respuesta_json({'detail': e.detail}, status=403)
+            if autenticado is not None:
+                request.user = autenticado[0]
+
+        if self.requiere_autenticacion and not request.user.is_authenticated:
+            return respuesta_json({'detail': exceptions.NotAuthenticated.default_detail}, status=403)
+
+        rechazo = await _verificar_limites(request, self)
+        if rechazo is not None:
+            respuesta = _error(rechazo)
+            if rechazo.wait is not None:
+                respuesta['Retry-After'] = '%d' % rechazo.wait
+            return respuesta
+
+        try:
+            request.data = _leer_cuerpo(request)
+        except ValueError as e:
+            return _error(exceptions.ParseError(f'JSON parse error - {e}'))
+
+        try:
+            return await handler(request, *args, **kwargs)
+        except Http404:
+            return _error(exceptions.NotFound())
+
+
+class WhiteNoiseMiddleware(_WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que funciona en modo sync (WSGI) y async (ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
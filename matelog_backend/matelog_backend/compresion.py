@@ -0,0 +1,127 @@
+"""
+Compresión de respuestas (gzip y, si está instalado el paquete Brotli, br).
+
+`CompresionMiddleware` comprime las respuestas dinámicas (JSON de la API,
+CSV del admin, HTML) según el Accept-Encoding del cliente. Las respuestas que
+ya traen Content-Encoding no se tocan: así pasan tal cual los archivos
+estáticos precomprimidos de WhiteNoise y los payloads del catálogo
+(lessons.catalogo), que se comprimen una sola vez por versión de contenido
+con `comprimir_todo` y se eligen con `elegir_codificacion`.
+
+Como GZipMiddleware de Django, gzip agrega bytes aleatorios al encabezado
+para mitigar BREACH; el token CSRF además va enmascarado en cada respuesta.
+"""
+
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin Brotli solo se usa gzip
+    brotli = None
+
+
+# No vale la pena comprimir respuestas más chicas (mismo umbral que GZipMiddleware)
+TAMANO_MINIMO = 200
+TIPOS_COMPRIMIBLES = re.compile(r'(text/|application/(json|javascript|xml)|image/svg\+xml)')
+
+
+def codificaciones():
+    """
+    Codificaciones disponibles, en orden de preferencia.
+    """
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def elegir_codificacion(request, disponibles=None):
+    """
+    La primera codificación de `disponibles` (por defecto `codificaciones()`)
+    que acepta el cliente según Accept-Encoding (q=0 la rechaza), o None.
+    """
+    aceptadas = set()
+    for parte in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        nombre, _, parametros = parte.partition(';')
+        calidad = re.search(r'q=([0-9.]+)', parametros)
+        try:
+            if calidad and float(calidad.group(1)) == 0:
+                continue
+        except ValueError:
+            continue
+        aceptadas.add(nombre.strip().lower())
+    for codificacion in disponibles or codificaciones():
+        if codificacion in aceptadas or '*' in aceptadas:
+            return codificacion
+    return None
+
+
+def comprimir(contenido, codificacion, maximo=False):
+    """
+    Nivel rápido para respuestas dinámicas; con maximo=True el nivel más alto
+    (sin bytes aleatorios), para lo que se comprime una sola vez.
+    """
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=11 if maximo else 4)
+    if maximo:
+        return gzip.compress(contenido, compresslevel=9, mtime=0)
+    return compress_string(contenido, max_random_bytes=100)
+
+
+def comprimir_todo(contenido):
+    """
+    {codificación: bytes} con todas las codificaciones disponibles al nivel
+    máximo, para contenido que se sirve muchas veces sin cambios.
+    """
+    return {codificacion: comprimir(contenido, codificacion, maximo=True) for codificacion in codificaciones()}
+
+
+class CompresionMiddleware:
+    """
+    Comprime las respuestas con br o gzip. Debe ir antes de los middlewares
+    que leen o modifican el cuerpo (se ejecuta después de ellos en la
+    respuesta). Funciona en modo sync (WSGI) y async (ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.procesar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.procesar(request, await self.get_response(request))
+
+    def procesar(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < TAMANO_MINIMO:
+            return response
+        if not TIPOS_COMPRIMIBLES.match(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = elegir_codificacion(request)
+        if codificacion is None:
+            return response
+        comprimido = comprimir(response.content, codificacion)
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response['Content-Length'] = str(len(comprimido))
+        response['Content-Encoding'] = codificacion
+        # Un ETag fuerte identifica los bytes exactos: al comprimir pasa a ser débil
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
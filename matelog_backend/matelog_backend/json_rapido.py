@@ -0,0 +1,94 @@
+"""
+Serialización JSON de la API con orjson (si está instalado) y json de la
+biblioteca estándar como respaldo.
+
+`dumps` produce exactamente los mismos bytes que JSONRenderer de DRF en
+ambos casos: UTF-8 sin escapar, separadores compactos, U+2028/U+2029
+escapados y las fechas, Decimal, UUID y textos perezosos con el formato de
+rest_framework.utils.encoders.JSONEncoder (orjson le pasa esos tipos con
+OPT_PASSTHROUGH_DATETIME y `default`). Las llaves que no son texto (p. ej.
+los ids de ejercicios_respondidos) se convierten a texto igual que en json.
+Única diferencia: NaN e Infinity, que DRF rechaza, orjson los escribe como null.
+
+`RenderizadorJSON` y `ParserJSON` reemplazan a los de DRF en
+DEFAULT_RENDERER_CLASSES y DEFAULT_PARSER_CLASSES; las vistas async
+(matelog_backend.asincrono) y el catálogo (lessons.catalogo) usan `dumps` y
+`loads` directamente.
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+
+_ENCODER = JSONEncoder()
+_OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+
+def _dumps_estandar(data):
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'),
+    ).encode()
+
+
+def dumps(data):
+    """
+    `data` como JSON en bytes UTF-8, con el formato de JSONRenderer.
+    """
+    if orjson is not None and settings.JSON_RAPIDO:
+        contenido = orjson.dumps(data, default=_ENCODER.default, option=_OPCIONES)
+    else:
+        contenido = _dumps_estandar(data)
+    # Válidos en JSON pero no en JavaScript (como en JSONRenderer)
+    if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+        contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return contenido
+
+
+def loads(contenido):
+    """
+    JSON (bytes o str) a objetos de Python. Lanza ValueError si no es válido.
+    """
+    if orjson is not None and settings.JSON_RAPIDO:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+
+class RenderizadorJSON(JSONRenderer):
+    """
+    JSONRenderer con `dumps`. Con indentación (API navegable o
+    `Accept: application/json; indent=2`) usa el de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ParserJSON(JSONParser):
+    """
+    JSONParser con `loads`.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            contenido = stream.read()
+            if encoding.lower() not in ('utf-8', 'utf8'):
+                contenido = contenido.decode(encoding)
+            return loads(contenido)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
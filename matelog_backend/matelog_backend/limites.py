@@ -0,0 +1,117 @@
+"""
+Límites de tasa (throttling) con token buckets guardados en el cache.
+
+Cada vista declara su alcance en `throttle_scope` ('tracking' o
+'aprendizaje') y cada alcance tiene dos buckets:
+  - por IP (`<alcance>_ip`): cuenta todas las peticiones, anónimas o no. Un
+    salón completo suele salir a internet con la misma IP, así que este
+    límite debe alcanzar para todo un grupo.
+  - por usuario (`<alcance>_usuario`): solo peticiones autenticadas.
+
+Las tasas se definen en REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] con el
+formato de DRF ('120/min'): el bucket admite ráfagas de hasta 120 peticiones
+y se recarga a 120 por minuto. Las vistas sin `throttle_scope` no se limitan.
+
+Cada verificación es una lectura (y, si se admite la petición, una
+escritura) del cache, sin consultas a la base de datos; las lecturas se
+cuentan en matelog_cache_requests_total (cache="limites"). La lectura y la
+escritura no son atómicas: con peticiones simultáneas de la misma llave se
+puede admitir alguna de más. Con el cache en memoria local cada worker
+lleva sus propios buckets; REDIS_URL los comparte entre workers.
+"""
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from monitoring import metricas
+
+
+class _TokenBucketThrottle(SimpleRateThrottle):
+    cache_format = 'limite:%(scope)s:%(ident)s'
+    tipo = None
+
+    def __init__(self):
+        # La tasa depende del alcance de la vista; se resuelve en allow_request
+        self.espera = None
+
+    def get_rate(self):
+        # Se lee en cada petición (no al importar) para respetar override_settings
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def _preparar(self, request, view):
+        """
+        Resuelve alcance, tasa y llave. Devuelve False si la petición no se limita.
+        """
+        alcance = getattr(view, 'throttle_scope', None)
+        if not alcance:
+            return False
+        self.alcance = alcance
+        self.scope = f'{alcance}_{self.tipo}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return False
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        return self.key is not None
+
+    def _consumir(self, estado):
+        """
+        Recarga el bucket según el tiempo transcurrido y toma un token.
+        `estado` es (tokens, timestamp) o None para un bucket nuevo (lleno).
+        Devuelve el nuevo estado, o None si no hay token disponible.
+        """
+        ahora = self.timer()
+        tokens, ultimo = estado or (self.num_requests, ahora)
+        tokens = min(self.num_requests, tokens + (ahora - ultimo) * self.num_requests / self.duration)
+        if tokens < 1:
+            self.espera = (1 - tokens) * self.duration / self.num_requests
+            metricas.LIMITES_RECHAZADOS.inc(alcance=self.alcance, limite=self.tipo)
+            return None
+        return tokens - 1, ahora
+
+    def allow_request(self, request, view):
+        if not self._preparar(request, view):
+            return True
+        estado = self._consumir(metricas.leer_cache(self.cache, self.key, nombre='limites'))
+        if estado is None:
+            return False
+        # Un bucket sin uso durante `duration` vuelve a estar lleno: no hace falta guardarlo más
+        self.cache.set(self.key, estado, self.duration)
+        return True
+
+    async def aallow_request(self, request, view):
+        """
+        allow_request para las vistas async (matelog_backend.asincrono).
+        """
+        if not self._preparar(request, view):
+            return True
+        estado = self._consumir(await metricas.aleer_cache(self.cache, self.key, nombre='limites'))
+        if estado is None:
+            return False
+        await self.cache.aset(self.key, estado, self.duration)
+        return True
+
+    def wait(self):
+        return self.espera
+
+
+class LimitePorIP(_TokenBucketThrottle):
+    """
+    Bucket por IP del cliente (REMOTE_ADDR, o X-Forwarded-For según NUM_PROXIES).
+    """
+    tipo = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LimitePorUsuario(_TokenBucketThrottle):
+    """
+    Bucket por usuario autenticado; las peticiones anónimas solo cuentan por IP.
+    """
+    tipo = 'usuario'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
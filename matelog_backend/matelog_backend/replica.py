@@ -0,0 +1,78 @@
+"""
+Lecturas desde una réplica opcional de la base de datos.
+
+Si DATABASE_REPLICA_URL está definida, settings agrega la conexión 'replica'.
+Las lecturas van a la réplica solo dentro de `leer_de_replica()` (admin,
+exportaciones, analítica); todo lo demás, incluidas las vistas que escriben y
+luego leen lo escrito (ValidarRespuestaView, FinalizarTemaView), sigue en
+'default'. Sin réplica configurada el router no cambia nada.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+REPLICA = 'replica'
+
+_usar_replica = ContextVar('usar_replica', default=False)
+
+
+@contextmanager
+def leer_de_replica():
+    """
+    Context manager / decorador: las lecturas del bloque van a la réplica.
+    Como decorador (@leer_de_replica()) cada llamada entra con su propio
+    token, así que se puede usar en vistas que atienden varios hilos.
+    """
+    token = _usar_replica.set(True)
+    try:
+        yield
+    finally:
+        _usar_replica.reset(token)
+
+
+def replica_disponible():
+    return REPLICA in connections.settings
+
+
+class ReplicaRouter:
+    """
+    Router de DATABASE_ROUTERS. Las escrituras y migraciones siempre van a 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _usar_replica.get() or not replica_disponible():
+            return None
+        # Dentro de una transacción en el primario se lee lo que ella escribió
+        if connections['default'].in_atomic_block:
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambas conexiones tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaAdminMixin:
+    """
+    Mixin para ModelAdmin: el listado (GET) se lee y renderiza desde la réplica.
+    Las acciones (POST) siguen en el primario salvo que se marquen con @leer_de_replica().
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with leer_de_replica():
+            response = super().changelist_view(request, extra_context)
+            # El queryset del listado se evalúa al renderizar la plantilla
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
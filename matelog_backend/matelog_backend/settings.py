@@ -11,8 +11,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 import dj_database_url
-from decouple import config
+from decouple import Choices, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,16 +51,20 @@ INSTALLED_APPS = [
     'users',
     'lessons',
     'tracking',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.InstrumentacionMiddleware',  # Primero, para medir a todos los demás
+    'matelog_backend.compresion.CompresionMiddleware',  # Comprime al final, con el cuerpo ya armado
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise debe ir después de SecurityMiddleware
+    'matelog_backend.asincrono.WhiteNoiseMiddleware',  # WhiteNoise debe ir después de SecurityMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe ir antes de CommonMiddleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitoring.middleware.PerfiladorMiddleware',  # Después de AuthenticationMiddleware (header solo para staff)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +89,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'matelog_backend.wsgi.application'
 
+# Vistas async (lessons/async_views.py, tracking/async_views.py) para la ruta de
+# lectura del estudiante y el tracking. Activar solo al servir con ASGI (uvicorn):
+# con WSGI cada vista async necesita su propio event loop y es más lenta.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -91,21 +101,70 @@ WSGI_APPLICATION = 'matelog_backend.wsgi.application'
 # Configuración de base de datos: PostgreSQL para producción, SQLite para desarrollo
 if config('DATABASE_URL', default=None):
     # Producción: usar PostgreSQL desde Render
+    # DB_POOL=True usa el pool de psycopg 3 de Django (un pool por worker de gunicorn,
+    # DB_POOL_MAX_SIZE debe ser al menos el número de threads). El pool no admite
+    # conexiones persistentes, así que en ese modo CONN_MAX_AGE es 0.
+    DB_POOL = config('DB_POOL', default=False, cast=bool)
     DATABASES = {
         'default': dj_database_url.config(
             default=config('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True,
+            conn_max_age=0 if DB_POOL else config('DB_CONN_MAX_AGE', default=600, cast=int),
+            conn_health_checks=not DB_POOL,
         )
     }
+    _opciones_db = DATABASES['default'].setdefault('OPTIONS', {})
+    if DB_POOL:
+        _opciones_db['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Segundos que una petición espera una conexión libre antes de fallar
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        }
+    # Corta consultas que excedan el límite (ms, 0 = sin límite)
+    DB_STATEMENT_TIMEOUT_MS = config('DB_STATEMENT_TIMEOUT_MS', default=0, cast=int)
+    if DB_STATEMENT_TIMEOUT_MS:
+        _opciones_db['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
 else:
-    # Desarrollo local: usar SQLite
+    # Desarrollo local (o una escuela con un solo servidor): usar SQLite
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
         }
     }
+    # Perfil para escrituras concurrentes (tracking): WAL permite leer mientras otro escribe,
+    # BEGIN IMMEDIATE toma el lock de escritura al iniciar la transacción (así el busy timeout
+    # aplica en lugar de fallar con "database is locked" al pasar de lectura a escritura)
+    if config('SQLITE_TUNING', default=True, cast=bool):
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE_MB', default=128, cast=int) * 1024 * 1024}",
+                f"PRAGMA cache_size=-{config('SQLITE_CACHE_SIZE_MB', default=32, cast=int) * 1024}",
+                'PRAGMA temp_store=MEMORY',
+            ]),
+            'transaction_mode': 'IMMEDIATE',
+            # Segundos que una escritura espera el lock (busy timeout)
+            'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=float),
+        }
+
+
+# Réplica de lectura opcional (matelog_backend.replica): el admin y las exportaciones leen de
+# ella; las escrituras y el flujo de los estudiantes siguen en 'default'. En local se puede
+# probar con una copia de SQLite: DATABASE_REPLICA_URL=sqlite:////ruta/replica.sqlite3
+if config('DATABASE_REPLICA_URL', default=None):
+    DATABASES['replica'] = dj_database_url.parse(
+        config('DATABASE_REPLICA_URL'),
+        conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0),
+        conn_health_checks=DATABASES['default'].get('CONN_HEALTH_CHECKS', False),
+    )
+    if DATABASES['replica']['ENGINE'] == DATABASES['default']['ENGINE']:
+        DATABASES['replica']['OPTIONS'] = dict(DATABASES['default'].get('OPTIONS', {}))
+    # En las pruebas la réplica apunta a la base de datos de prueba de 'default'
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['matelog_backend.replica.ReplicaRouter']
 
 
 # TinyMCE Configuration
@@ -183,6 +242,13 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Imágenes incrustadas en el contenido de TinyMCE (lessons.imagenes): se extraen a
+# MEDIA_ROOT/contenido/. IMAGENES_URL es el prefijo que se escribe en el HTML; si el
+# frontend está en otro dominio debe ser absoluto (p. ej. https://api.ejemplo.com/media/)
+IMAGENES_URL = config('IMAGENES_URL', default=MEDIA_URL)
+IMAGENES_ANCHOS = [int(a) for a in config('IMAGENES_ANCHOS', default='480,960,1440').split(',')]
+IMAGENES_FORMATOS = config('IMAGENES_FORMATOS', default='avif,webp').split(',')
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -212,26 +278,89 @@ CSRF_COOKIE_HTTPONLY = False  # Permite acceso desde JavaScript
 CSRF_COOKIE_SAMESITE = 'Lax' if not DEBUG else None
 
 
+# Cache
+# Con REDIS_URL se usa Redis (compartido entre workers y servidores); si no,
+# memoria local del proceso.
+if config('REDIS_URL', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Session Settings
+# SESSION_MODE elige dónde se guardan las sesiones:
+#   db: tabla django_session (una lectura por petición autenticada)
+#   cached_db: cache + django_session; las lecturas salen del cache. Con varios
+#              workers requiere REDIS_URL (con LocMem, logout en un worker no
+#              invalida la copia en cache de los demás)
+#   signed_cookies: la sesión viaja firmada en la cookie, sin almacenamiento
+#                   en el servidor (logout no invalida cookies ya copiadas)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = config('SESSION_MODE', default='db', cast=Choices(list(SESSION_ENGINES)))
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
 SESSION_COOKIE_SECURE = not DEBUG  # True en producción
 SESSION_COOKIE_SAMESITE = 'Lax' if not DEBUG else None
 SESSION_COOKIE_HTTPONLY = True
-SESSION_COOKIE_AGE = 1209600  # 2 semanas
+SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', default=1209600, cast=int)  # 2 semanas
 
 
 # REST Framework Settings
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'users.authentication.TokenFirmadoAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON con orjson si está instalado (mismo formato que los de DRF), ver matelog_backend/json_rapido.py
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'matelog_backend.json_rapido.RenderizadorJSON',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'matelog_backend.json_rapido.ParserJSON',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
+    # Límites de tasa por alcance (throttle_scope de la vista), ver matelog_backend/limites.py
+    'DEFAULT_THROTTLE_CLASSES': [
+        'matelog_backend.limites.LimitePorIP',
+        'matelog_backend.limites.LimitePorUsuario',
+    ] if THROTTLE_ENABLED else [],
+    'DEFAULT_THROTTLE_RATES': {
+        # El límite por IP debe alcanzar para un salón completo detrás de la misma IP
+        'tracking_ip': config('THROTTLE_TRACKING_IP', default='1200/min'),
+        'tracking_usuario': config('THROTTLE_TRACKING_USUARIO', default='60/min'),
+        'aprendizaje_ip': config('THROTTLE_APRENDIZAJE_IP', default='2400/min'),
+        'aprendizaje_usuario': config('THROTTLE_APRENDIZAJE_USUARIO', default='120/min'),
+    },
+    # Proxies delante de la aplicación (Render agrega uno): la IP del cliente se toma de X-Forwarded-For
+    'NUM_PROXIES': config('NUM_PROXIES', default=0 if DEBUG else 1, cast=int),
 }
 
+# False fuerza json de la biblioteca estándar aunque orjson esté instalado (para comparar)
+JSON_RAPIDO = config('JSON_RAPIDO', default=True, cast=bool)
+
+# Tokens firmados (users.authentication): duración del access y del refresh en segundos
+TOKEN_ACCESS_SECONDS = config('TOKEN_ACCESS_SECONDS', default=900, cast=int)
+TOKEN_REFRESH_SECONDS = config('TOKEN_REFRESH_SECONDS', default=604800, cast=int)
+
 # En desarrollo, también habilitar el BrowsableAPIRenderer
 if DEBUG:
     REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
@@ -239,9 +368,21 @@ if DEBUG:
     )
 
 
+# Al recargar la app o iniciar sesión se reanuda la sesión de estudio abierta
+# si tuvo actividad (latido del frontend) hace menos de estos minutos
+SESION_REANUDAR_MINUTOS = config('SESION_REANUDAR_MINUTOS', default=30, cast=int)
+
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Iteraciones de PBKDF2 para las contraseñas generadas en el alta masiva
+# (users.roster); se recalculan con el costo completo en el primer login
+ROSTER_PASSWORD_ITERATIONS = config('ROSTER_PASSWORD_ITERATIONS', default=100000, cast=int)
+# Estudiantes por CSV en el admin: los hashes se calculan dentro de la petición (~50 ms cada uno)
+# y deben terminar antes del timeout de gunicorn; los grupos más grandes van por provision_roster
+ROSTER_ADMIN_MAX_ESTUDIANTES = config('ROSTER_ADMIN_MAX_ESTUDIANTES', default=150, cast=int)
+
 
 # Security settings for production
 if not DEBUG:
@@ -264,7 +405,39 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
 
 
+# Monitoreo de peticiones (monitoring.middleware.InstrumentacionMiddleware)
+# Server-Timing expone consultas y tiempos internos: solo en desarrollo salvo que se pida
+MONITORING_SERVER_TIMING = config('MONITORING_SERVER_TIMING', default=DEBUG, cast=bool)
+MONITORING_SLOW_REQUEST_MS = config('MONITORING_SLOW_REQUEST_MS', default=500, cast=int)
+MONITORING_SLOW_SAMPLE_RATE = config('MONITORING_SLOW_SAMPLE_RATE', default=1.0, cast=float)
+MONITORING_SLOW_BUFFER_SIZE = config('MONITORING_SLOW_BUFFER_SIZE', default=200, cast=int)
+
+# Métricas (monitoring.metricas). Con varios workers de gunicorn MONITORING_METRICS_DIR debe
+# apuntar a un directorio compartido y vacío al arrancar, p. ej. /tmp/matelog_metrics
+MONITORING_METRICS_DIR = config('MONITORING_METRICS_DIR', default='')
+MONITORING_METRICS_FLUSH_SECONDS = config('MONITORING_METRICS_FLUSH_SECONDS', default=1.0, cast=float)
+MONITORING_METRICS_TOKEN = config('MONITORING_METRICS_TOKEN', default='')
+
+# Perfilador por muestreo (monitoring.middleware.PerfiladorMiddleware). Apagado por defecto;
+# los usuarios staff pueden perfilar una petición con el header X-Perfilar: 1
+MONITORING_PROFILE_SAMPLE_RATE = config('MONITORING_PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+MONITORING_PROFILE_ENDPOINTS = [
+    e for e in config('MONITORING_PROFILE_ENDPOINTS', default='').split(',') if e
+]
+MONITORING_PROFILE_INTERVAL_MS = config('MONITORING_PROFILE_INTERVAL_MS', default=5, cast=float)
+MONITORING_PROFILES_DIR = config('MONITORING_PROFILES_DIR', default=str(BASE_DIR / 'perfiles'))
+MONITORING_PROFILES_MAX = config('MONITORING_PROFILES_MAX', default=200, cast=int)
+
+
 # Logging configuration
+# Los handlers solo encolan; un hilo en segundo plano escribe una línea JSON por evento
+# con request_id, usuario_id, endpoint y duración (monitoring.logs). LOG_FORMAT=texto
+# usa el formato legible de antes, útil en desarrollo. Con `manage.py test` los
+# eventos se descartan (NullHandler) para que la salida muestre solo los fallos;
+# assertLogs sigue funcionando porque agrega su propio handler.
+LOG_FORMAT = config('LOG_FORMAT', default='json')
+TESTING = sys.argv[1:2] == ['test']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -273,11 +446,16 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'monitoring.logs.FormatoJSON',
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'logging.NullHandler',
+        } if TESTING else {
+            '()': 'monitoring.logs.handler_en_cola',
+            'formatter': 'verbose' if LOG_FORMAT == 'texto' else 'json',
         },
     },
     'root': {
@@ -290,5 +468,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'monitoring.peticiones': {
+            'handlers': ['console'],
+            'level': config('MONITORING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
     },
-}
\ No newline at end of file
+}
@@ -0,0 +1,200 @@
+"""
+Utilidades para las pruebas de presupuesto de rendimiento.
+
+Cada endpoint de la API tiene un presupuesto máximo de consultas SQL y de
+tiempo de respuesta. Las pruebas se ejecutan contra un catálogo grande y un
+historial de estudiante realista, de modo que un N+1 nuevo en una vista o
+serializer hace fallar la prueba y muestra el SQL repetido.
+
+El tiempo se puede relajar en máquinas lentas con la variable de entorno
+PRESUPUESTO_TIEMPO_FACTOR (p. ej. PRESUPUESTO_TIEMPO_FACTOR=3).
+"""
+
+import os
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+
+
+FACTOR_TIEMPO = float(os.environ.get('PRESUPUESTO_TIEMPO_FACTOR', '1'))
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalizar_sql(sql):
+    """
+    Reemplaza los literales por '?' para agrupar consultas con la misma forma.
+    """
+    return _LITERALES.sub('?', sql)
+
+
+def describir_consultas(consultas):
+    """
+    Texto con las consultas repetidas (posibles N+1) y el listado completo.
+    """
+    formas = Counter(normalizar_sql(q['sql']) for q in consultas)
+    repetidas = [(n, sql) for sql, n in formas.most_common() if n > 1]
+
+    lineas = []
+    if repetidas:
+        lineas.append('Consultas repetidas:')
+        lineas.extend(f'  {n}x {sql}' for n, sql in repetidas)
+    lineas.append('Todas las consultas:')
+    lineas.extend(f'  {i}. {q["sql"]}' for i, q in enumerate(consultas, start=1))
+    return '\n'.join(lineas)
+
+
+def nombres_de_urls(urlconf):
+    """
+    Nombres de todas las URLs definidas en un módulo urls (p. ej. 'lessons.urls').
+    """
+    nombres = set()
+    for patron in get_resolver(urlconf).url_patterns:
+        if isinstance(patron, URLResolver):
+            continue
+        if patron.name:
+            nombres.add(patron.name)
+    return nombres
+
+
+class PresupuestoMixin:
+    """
+    Mixin para TestCase con aserciones de presupuesto de consultas y tiempo.
+    Las subclases declaran `urlconf` y `presupuestos = {nombre_url: (max_queries, max_ms)}`.
+    """
+    urlconf = None
+    presupuestos = {}
+
+    def assertPresupuesto(self, nombre, metodo, ruta, data=None, status=200):
+        """
+        Ejecuta la petición y verifica status, cantidad de consultas y tiempo.
+        Devuelve la respuesta para aserciones adicionales.
+        """
+        max_queries, max_ms = self.presupuestos[nombre]
+        max_ms *= FACTOR_TIEMPO
+
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            if metodo == 'GET':
+                respuesta = self.client.get(ruta, secure=True)
+            else:
+                respuesta = self.client.post(ruta, data=data or {}, content_type='application/json', secure=True)
+            ms = (time.perf_counter() - inicio) * 1000
+
+        self.assertEqual(
+            respuesta.status_code, status,
+            f'{nombre}: status {respuesta.status_code} (se esperaba {status}): {respuesta.content[:500]!r}'
+        )
+        if len(capturadas) > max_queries:
+            self.fail(
+                f'{nombre}: {len(capturadas)} consultas SQL (presupuesto: {max_queries})\n'
+                f'{describir_consultas(capturadas.captured_queries)}'
+            )
+        if ms > max_ms:
+            self.fail(f'{nombre}: {ms:.1f}ms (presupuesto: {max_ms:.0f}ms)')
+        return respuesta
+
+    def test_todas_las_urls_tienen_presupuesto(self):
+        if self.urlconf is None:
+            return
+        sin_presupuesto = nombres_de_urls(self.urlconf) - set(self.presupuestos)
+        self.assertFalse(
+            sin_presupuesto,
+            f'URLs de {self.urlconf} sin presupuesto de rendimiento: {sorted(sin_presupuesto)}'
+        )
+
+
+def crear_catalogo(lecciones=10, temas_por_leccion=8, contenidos_por_tema=4, ejercicios_por_tema=30, orden_inicial=1):
+    """
+    Crea un catálogo grande con bulk_create. Los ejercicios pares son de opción
+    múltiple (4 opciones, respuesta 'A') y los impares abiertos (respuesta 'verdadero').
+    Las lecciones se numeran desde `orden_inicial`.
+    Devuelve la lista de lecciones creadas.
+    """
+    from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+
+    objs_lecciones = Leccion.objects.bulk_create([
+        Leccion(orden=i, titulo=f'Lección {i}', descripcion=f'<p>Descripción {i}</p>')
+        for i in range(orden_inicial, orden_inicial + lecciones)
+    ])
+    temas = Tema.objects.bulk_create([
+        Tema(leccion=leccion, orden=j, titulo=f'Tema {leccion.orden}.{j}', descripcion='<p>Tema</p>')
+        for leccion in objs_lecciones
+        for j in range(1, temas_por_leccion + 1)
+    ])
+    contenidos = [
+        ContenidoTema(tema=tema, orden=k, tipo='TEORIA', contenido_texto=f'<h3>Teoría {k}</h3><p>{"texto " * 50}</p>')
+        for tema in temas
+        for k in range(1, contenidos_por_tema + 1)
+    ]
+    ejercicios = [
+        Ejercicio(
+            tema=tema, orden=k,
+            tipo='MULTIPLE' if k % 2 == 0 else 'ABIERTO',
+            dificultad='FACIL',
+            instruccion='Responde',
+            enunciado=f'<p>Ejercicio {k}</p>',
+            respuesta_correcta='A' if k % 2 == 0 else 'verdadero',
+            texto_ayuda='Ayuda',
+            retroalimentacion_correcta='<p>Bien</p>',
+            retroalimentacion_incorrecta='<p>Revisa</p>',
+        )
+        for tema in temas
+        for k in range(1, ejercicios_por_tema + 1)
+    ]
+    # bulk_create no llama a save(): el HTML procesado se genera a mano
+    for obj in contenidos + ejercicios:
+        obj.procesar_html()
+    ContenidoTema.objects.bulk_create(contenidos)
+    ejercicios = Ejercicio.objects.bulk_create(ejercicios)
+    OpcionMultiple.objects.bulk_create([
+        OpcionMultiple(ejercicio=ejercicio, letra=letra, texto=f'Opción {letra}')
+        for ejercicio in ejercicios if ejercicio.tipo == 'MULTIPLE'
+        for letra in 'ABCD'
+    ])
+    return objs_lecciones
+
+
+def crear_estudiante(username='estudiante', password='Clave-Segura-123'):
+    from users.models import CustomUser
+
+    return CustomUser.objects.create_user(
+        username=username, password=password,
+        grupo='A', especialidad='INFORMATICA', genero='N', edad='16',
+    )
+
+
+def crear_historial(usuario, leccion):
+    """
+    Historial de un estudiante que ya trabajó en todos los temas de la lección:
+    progreso, respuestas a todos los ejercicios e intentos previos.
+    """
+    from django.utils import timezone
+    from tracking.models import ProgresoLeccion, ProgresoTema, RespuestaEjercicio, IntentoTema
+
+    ahora = timezone.now()
+    ProgresoLeccion.objects.create(usuario=usuario, leccion=leccion, estado='EN_PROGRESO', fecha_inicio=ahora)
+    temas = list(leccion.temas.prefetch_related('ejercicios'))
+    progresos = ProgresoTema.objects.bulk_create([
+        ProgresoTema(usuario=usuario, tema=tema, estado='INICIADO', desbloqueado=True,
+                     fecha_inicio=ahora, intentos_realizados=2)
+        for tema in temas
+    ])
+    RespuestaEjercicio.objects.bulk_create([
+        RespuestaEjercicio(usuario=usuario, ejercicio=ejercicio, progreso_tema=progreso,
+                           respuesta_usuario='A', es_correcta=ejercicio.orden % 3 != 0,
+                           tiempo_respuesta_segundos=30)
+        for tema, progreso in zip(temas, progresos)
+        for ejercicio in tema.ejercicios.all()
+    ])
+    IntentoTema.objects.bulk_create([
+        IntentoTema(usuario=usuario, tema=tema, progreso_tema=progreso, numero_intento=n,
+                    ejercicios_totales=30, porcentaje_acierto=60, fecha_inicio=ahora)
+        for tema, progreso in zip(temas, progresos)
+        for n in (1, 2)
+    ])
+    return progresos
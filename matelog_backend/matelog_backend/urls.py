@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
+    path('admin/monitoring/', include('monitoring.urls')),
     path('admin/', admin.site.urls),
     
     # API endpoints
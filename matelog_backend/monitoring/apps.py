@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import metricas
+        from .instrumentacion import instalar_captura_sql
+
+        def contar_conexion(sender, connection, **kwargs):
+            metricas.CONEXIONES_CREADAS.inc(alias=connection.alias)
+            instalar_captura_sql(connection)
+
+        connection_created.connect(contar_conexion, weak=False, dispatch_uid='monitoring.contar_conexion')
@@ -0,0 +1,155 @@
+"""
+Medición por petición: consultas SQL, tiempo en SQL, tiempos por sección
+(serializer, etc.) y tiempo total.
+
+La medición activa vive en un ContextVar, así que cada hilo/petición tiene
+la suya. Las vistas marcan secciones con el context manager `medir`:
+
+    with medir('serializer'):
+        data = serializer.data
+"""
+
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# Cantidad de consultas más lentas que se conservan por petición
+CONSULTAS_LENTAS_POR_PETICION = 5
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """
+    Acumula las métricas de una petición.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_queries = 0
+        self.sql_ms = 0.0
+        self.tiempos = {}
+        # heap de (ms, sql) con las consultas más lentas
+        self.consultas_lentas = []
+
+    def registrar_sql(self, sql, ms):
+        self.sql_queries += 1
+        self.sql_ms += ms
+        if len(self.consultas_lentas) < CONSULTAS_LENTAS_POR_PETICION:
+            heapq.heappush(self.consultas_lentas, (ms, sql))
+        elif ms > self.consultas_lentas[0][0]:
+            heapq.heapreplace(self.consultas_lentas, (ms, sql))
+
+    def agregar_tiempo(self, nombre, ms):
+        self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + ms
+
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def medicion_actual():
+    """
+    Medición de la petición en curso, o None fuera de una petición.
+    """
+    return _medicion_actual.get()
+
+
+@contextmanager
+def medir(nombre):
+    """
+    Suma el tiempo del bloque a la sección `nombre` de la petición en curso.
+    Fuera de una petición no hace nada.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.agregar_tiempo(nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def _capturar_sql(execute, sql, params, many, context):
+    """
+    execute_wrapper de Django: mide cada consulta de la conexión.
+    """
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.registrar_sql(sql, (time.perf_counter() - inicio) * 1000)
+
+
+def instalar_captura_sql(conexion):
+    """
+    Agrega `_capturar_sql` a una conexión (una sola vez). Se llama al crear
+    cada conexión (ver apps.py) en lugar de hacerlo por petición: con vistas
+    async el ORM ejecuta el SQL en otro hilo, con otra conexión, pero el
+    ContextVar de la medición se propaga a sync_to_async.
+    """
+    if _capturar_sql not in conexion.execute_wrappers:
+        # Al inicio de la lista: no interfiere con los execute_wrapper() temporales
+        conexion.execute_wrappers.insert(0, _capturar_sql)
+
+
+@contextmanager
+def medir_peticion():
+    """
+    Activa una medición nueva para la petición (o tarea async) en curso.
+    """
+    medicion = Medicion()
+    token = _medicion_actual.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+class BufferLentas:
+    """
+    Buffer circular (por proceso) con las últimas peticiones lentas.
+    """
+
+    def __init__(self, tamano):
+        self._lock = threading.Lock()
+        self._datos = deque(maxlen=tamano)
+
+    def agregar(self, registro):
+        with self._lock:
+            self._datos.append(registro)
+
+    def listar(self):
+        """
+        Registros del más reciente al más antiguo.
+        """
+        with self._lock:
+            return list(reversed(self._datos))
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+peticiones_lentas = BufferLentas(getattr(settings, 'MONITORING_SLOW_BUFFER_SIZE', 200))
+
+
+def muestrear_lenta(total_ms):
+    """
+    Indica si una petición que tardó `total_ms` se guarda en el buffer de lentas.
+    """
+    umbral = getattr(settings, 'MONITORING_SLOW_REQUEST_MS', 500)
+    if total_ms < umbral:
+        return False
+    tasa = getattr(settings, 'MONITORING_SLOW_SAMPLE_RATE', 1.0)
+    return tasa >= 1 or random.random() < tasa
@@ -0,0 +1,172 @@
+"""
+Logging estructurado y no bloqueante.
+
+Los handlers de la aplicación solo encolan el registro (ColaHandler); un hilo
+en segundo plano (QueueListener) lo formatea como una línea JSON y lo
+escribe. Cada línea incluye el request id, el usuario, el endpoint y, si
+aplica, la duración de la petición en curso.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.functional import empty
+
+
+_peticion_actual = ContextVar('peticion_actual', default=None)
+
+_REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+# Atributos propios de LogRecord; el resto son campos enviados con extra=
+_ATRIBUTOS_LOGRECORD = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+_CAMPOS_CONTEXTO = ('request_id', 'usuario_id', 'endpoint')
+
+
+def nuevo_request_id(request):
+    """
+    Usa el X-Request-ID del proxy si es válido; si no, genera uno.
+    """
+    recibido = request.headers.get('X-Request-ID', '')
+    return recibido if _REQUEST_ID_VALIDO.match(recibido) else uuid.uuid4().hex
+
+
+def iniciar_contexto(request, request_id):
+    """
+    Asocia la petición al contexto actual. Devuelve el token para `terminar_contexto`.
+    """
+    return _peticion_actual.set((request_id, request))
+
+
+def terminar_contexto(token):
+    _peticion_actual.reset(token)
+
+
+def usuario_id(request):
+    """
+    ID del usuario solo si la petición ya lo cargó, para no agregar
+    consultas a endpoints anónimos (csrf, choices).
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is None or getattr(usuario, '_wrapped', None) is empty:
+        return None
+    return usuario.pk if usuario.is_authenticated else None
+
+
+def nombre_endpoint(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match is not None else None
+
+
+def contexto_actual():
+    """
+    request_id, usuario_id y endpoint de la petición en curso (vacío fuera de una petición).
+    """
+    actual = _peticion_actual.get()
+    if actual is None:
+        return {}
+    request_id, request = actual
+    return {
+        'request_id': request_id,
+        'usuario_id': usuario_id(request),
+        'endpoint': nombre_endpoint(request),
+    }
+
+
+class FormatoJSON(logging.Formatter):
+    """
+    Una línea JSON por evento con los campos de contexto y los enviados con extra=.
+    """
+
+    def format(self, record):
+        documento = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for campo in _CAMPOS_CONTEXTO:
+            documento[campo] = getattr(record, campo, None)
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_LOGRECORD and clave not in documento:
+                documento[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            documento['excepcion'] = record.exc_text
+        if record.stack_info:
+            documento['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(documento, ensure_ascii=False, default=str)
+
+
+class ColaHandler(QueueHandler):
+    """
+    Encola los registros sin bloquear la petición. El formato y la escritura
+    ocurren en el hilo del QueueListener con el handler `destino`.
+
+    Si la cola está llena (tormenta de errores) el registro se descarta y se
+    cuenta en `descartados` en lugar de frenar a los workers.
+    """
+
+    def __init__(self, destino, capacidad=10000):
+        super().__init__(queue.Queue(maxsize=capacidad))
+        self.destino = destino
+        self.descartados = 0
+        self.listener = None
+        self.iniciar()
+        # Con gunicorn --preload el hilo del listener no sobrevive al fork
+        os.register_at_fork(after_in_child=self._reiniciar_en_hijo)
+        atexit.register(self.detener)
+
+    def iniciar(self):
+        self.listener = QueueListener(self.queue, self.destino, respect_handler_level=True)
+        self.listener.start()
+
+    def detener(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _reiniciar_en_hijo(self):
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.listener = None
+        self.iniciar()
+
+    def setFormatter(self, fmt):
+        # El formato se aplica en el hilo del listener
+        self.destino.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Se ejecuta en el hilo de la petición: copia el contexto (que vive en
+        ContextVars) y resuelve el mensaje antes de encolar. El traceback se
+        formatea en el hilo del listener.
+        """
+        record = logging.makeLogRecord(vars(record))
+        for campo, valor in contexto_actual().items():
+            if getattr(record, campo, None) is None:
+                setattr(record, campo, valor)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def handler_en_cola(stream=None, capacidad=10000):
+    """
+    Factory para LOGGING (dictConfig): {'()': 'monitoring.logs.handler_en_cola', 'formatter': 'json'}.
+    """
+    return ColaHandler(logging.StreamHandler(stream or sys.stderr), capacidad=capacidad)
@@ -0,0 +1,392 @@
+"""
+Registro de métricas en proceso (contadores, histogramas y gauges) con
+exposición en el formato de texto de Prometheus.
+
+Con varios workers de gunicorn cada proceso publica periódicamente sus
+valores en un archivo dentro de MONITORING_METRICS_DIR y el endpoint de
+métricas combina los archivos de todos los procesos:
+  - contadores e histogramas se suman (incluidos los de workers que ya
+    terminaron, para que los totales no retrocedan),
+  - gauges se combinan solo entre procesos vivos (suma o máximo).
+Sin MONITORING_METRICS_DIR se exponen solo los valores del proceso actual.
+"""
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, registro, nombre, ayuda, etiquetas=()):
+        self.registro = registro
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.valores = {}
+
+    def _llave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f'{self.nombre}: se esperaban las etiquetas {self.etiquetas}, no {tuple(etiquetas)}')
+        return tuple(str(etiquetas[e]) for e in self.etiquetas)
+
+    def exportar(self):
+        return [[list(llave), valor] for llave, valor in self.valores.items()]
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, cantidad=1, **etiquetas):
+        llave = self._llave(etiquetas)
+        with self.registro.lock:
+            self.valores[llave] = self.valores.get(llave, 0) + cantidad
+            self.registro.sucio = True
+
+
+class Gauge(_Metrica):
+    tipo = 'gauge'
+
+    def __init__(self, registro, nombre, ayuda, etiquetas=(), agregacion='sum'):
+        super().__init__(registro, nombre, ayuda, etiquetas)
+        self.agregacion = agregacion
+
+    def set(self, valor, **etiquetas):
+        llave = self._llave(etiquetas)
+        with self.registro.lock:
+            self.valores[llave] = valor
+            self.registro.sucio = True
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, registro, nombre, ayuda, etiquetas=(), buckets=BUCKETS_DURACION):
+        super().__init__(registro, nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, **etiquetas):
+        llave = self._llave(etiquetas)
+        with self.registro.lock:
+            actual = self.valores.get(llave)
+            if actual is None:
+                # [conteos por bucket (no acumulados) + overflow, suma, cantidad]
+                actual = self.valores[llave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            indice = next((i for i, limite in enumerate(self.buckets) if valor <= limite), len(self.buckets))
+            actual[0][indice] += 1
+            actual[1] += valor
+            actual[2] += 1
+            self.registro.sucio = True
+
+    def exportar(self):
+        return [[list(llave), [list(v[0]), v[1], v[2]]] for llave, v in self.valores.items()]
+
+
+class Registro:
+    """
+    Conjunto de métricas del proceso y su publicación en disco.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metricas = {}
+        self.recolectores = []
+        self.sucio = False
+        self._ultima_publicacion = 0.0
+
+    def _agregar(self, metrica):
+        if metrica.nombre in self.metricas:
+            raise ValueError(f'Métrica duplicada: {metrica.nombre}')
+        self.metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Contador(self, nombre, ayuda, etiquetas))
+
+    def gauge(self, nombre, ayuda, etiquetas=(), agregacion='sum'):
+        return self._agregar(Gauge(self, nombre, ayuda, etiquetas, agregacion))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_DURACION):
+        return self._agregar(Histograma(self, nombre, ayuda, etiquetas, buckets))
+
+    def al_recolectar(self, funcion):
+        """
+        Registra una función que actualiza gauges justo antes de publicar.
+        """
+        self.recolectores.append(funcion)
+        return funcion
+
+    def instantanea(self):
+        for funcion in self.recolectores:
+            funcion()
+        with self.lock:
+            return {
+                nombre: {
+                    'tipo': m.tipo,
+                    'ayuda': m.ayuda,
+                    'etiquetas': list(m.etiquetas),
+                    'buckets': list(getattr(m, 'buckets', ())),
+                    'agregacion': getattr(m, 'agregacion', None),
+                    'valores': m.exportar(),
+                }
+                for nombre, m in self.metricas.items()
+            }
+
+    def publicar(self, forzar=False):
+        """
+        Escribe la instantánea del proceso en MONITORING_METRICS_DIR si hubo
+        cambios y pasó el intervalo mínimo (MONITORING_METRICS_FLUSH_SECONDS).
+        """
+        directorio = _directorio()
+        if directorio is None:
+            return
+        ahora = time.monotonic()
+        intervalo = getattr(settings, 'MONITORING_METRICS_FLUSH_SECONDS', 1.0)
+        if not forzar and (not self.sucio or ahora - self._ultima_publicacion < intervalo):
+            return
+        self._ultima_publicacion = ahora
+        self.sucio = False
+        escribir_instantanea(directorio, os.getpid(), self.instantanea())
+
+
+def _directorio():
+    directorio = getattr(settings, 'MONITORING_METRICS_DIR', '')
+    return Path(directorio) if directorio else None
+
+
+def escribir_instantanea(directorio, pid, datos):
+    """
+    Escritura atómica (archivo temporal + rename) para que el lector nunca
+    vea un JSON a medias.
+    """
+    directorio.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix=f'.{pid}-', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(temporal, directorio / f'{pid}.json')
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def leer_instantaneas(directorio):
+    """
+    Lista de (pid, datos, vivo) con las instantáneas publicadas por cada proceso.
+    """
+    resultado = []
+    for ruta in directorio.glob('*.json'):
+        try:
+            pid = int(ruta.stem)
+            datos = json.loads(ruta.read_text(encoding='utf-8'))
+        except (ValueError, OSError):
+            continue
+        resultado.append((pid, datos, _proceso_vivo(pid)))
+    return resultado
+
+
+def combinar(instantaneas):
+    """
+    Combina las instantáneas de varios procesos en una sola.
+    `instantaneas` es una lista de (datos, vivo).
+    """
+    combinadas = {}
+    for datos, vivo in instantaneas:
+        for nombre, metrica in datos.items():
+            destino = combinadas.setdefault(nombre, {**metrica, 'valores': {}})
+            if metrica['tipo'] == 'gauge' and not vivo:
+                continue
+            for llave, valor in metrica['valores']:
+                llave = tuple(llave)
+                previo = destino['valores'].get(llave)
+                if previo is None:
+                    destino['valores'][llave] = json.loads(json.dumps(valor))
+                elif metrica['tipo'] == 'counter':
+                    destino['valores'][llave] = previo + valor
+                elif metrica['tipo'] == 'histogram':
+                    previo[0] = [a + b for a, b in zip(previo[0], valor[0])]
+                    previo[1] += valor[1]
+                    previo[2] += valor[2]
+                elif metrica['agregacion'] == 'max':
+                    destino['valores'][llave] = max(previo, valor)
+                else:
+                    destino['valores'][llave] = previo + valor
+    return combinadas
+
+
+def _formatear_numero(valor):
+    if isinstance(valor, float):
+        if math.isinf(valor):
+            return '+Inf' if valor > 0 else '-Inf'
+        return repr(valor)
+    return str(valor)
+
+
+def _formatear_etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for n, v in pares
+    )
+    return '{' + texto + '}'
+
+
+def exposicion(combinadas):
+    """
+    Texto en el formato de exposición de Prometheus (versión 0.0.4).
+    """
+    lineas = []
+    for nombre in sorted(combinadas):
+        metrica = combinadas[nombre]
+        lineas.append(f'# HELP {nombre} {metrica["ayuda"]}')
+        lineas.append(f'# TYPE {nombre} {metrica["tipo"]}')
+        etiquetas = metrica['etiquetas']
+        for llave in sorted(metrica['valores']):
+            valor = metrica['valores'][llave]
+            if metrica['tipo'] != 'histogram':
+                lineas.append(f'{nombre}{_formatear_etiquetas(etiquetas, llave)} {_formatear_numero(valor)}')
+                continue
+            conteos, suma, cantidad = valor
+            acumulado = 0
+            for limite, conteo in zip(list(metrica['buckets']) + [math.inf], conteos):
+                acumulado += conteo
+                le = _formatear_numero(float(limite))
+                lineas.append(f'{nombre}_bucket{_formatear_etiquetas(etiquetas, llave, [("le", le)])} {acumulado}')
+            lineas.append(f'{nombre}_sum{_formatear_etiquetas(etiquetas, llave)} {_formatear_numero(suma)}')
+            lineas.append(f'{nombre}_count{_formatear_etiquetas(etiquetas, llave)} {cantidad}')
+    return '\n'.join(lineas) + '\n'
+
+
+def recolectar():
+    """
+    Texto de exposición con las métricas de todos los procesos.
+    """
+    directorio = _directorio()
+    if directorio is None:
+        return exposicion(combinar([(registro.instantanea(), True)]))
+    registro.publicar(forzar=True)
+    instantaneas = [(datos, vivo) for _, datos, vivo in leer_instantaneas(directorio)]
+    return exposicion(combinar(instantaneas))
+
+
+registro = Registro()
+atexit.register(registro.publicar, forzar=True)
+
+
+# Métricas de la aplicación
+
+PETICIONES = registro.contador(
+    'matelog_http_requests_total', 'Peticiones HTTP por endpoint, método y status.',
+    ('endpoint', 'metodo', 'status'),
+)
+DURACION = registro.histograma(
+    'matelog_http_request_duration_seconds', 'Duración de las peticiones HTTP por endpoint.',
+    ('endpoint',),
+)
+CONSULTAS = registro.histograma(
+    'matelog_http_request_queries', 'Consultas SQL por petición y endpoint.',
+    ('endpoint',), buckets=BUCKETS_CONSULTAS,
+)
+EVENTOS_TRACKING = registro.contador(
+    'matelog_tracking_events_total', 'Eventos de tracking recibidos por tipo de evento y pantalla.',
+    ('evento', 'tipo_pantalla'),
+)
+RESPUESTAS = registro.contador(
+    'matelog_exercise_answers_total', 'Respuestas a ejercicios registradas por resultado.',
+    ('resultado',),
+)
+CONEXIONES_CREADAS = registro.contador(
+    'matelog_db_connections_created_total', 'Conexiones a la base de datos abiertas por alias.',
+    ('alias',),
+)
+POOL = registro.gauge(
+    'matelog_db_pool', 'Estado del pool de conexiones (psycopg) por alias y estadística.',
+    ('alias', 'estadistica'),
+)
+LIMITES_RECHAZADOS = registro.contador(
+    'matelog_throttle_rejections_total', 'Peticiones rechazadas por límite de tasa por alcance y tipo de límite.',
+    ('alcance', 'limite'),
+)
+CACHE = registro.contador(
+    'matelog_cache_requests_total', 'Lecturas de cache por cache y resultado (hit/miss).',
+    ('cache', 'resultado'),
+)
+CACHE_HIT_RATIO = registro.gauge(
+    'matelog_cache_hit_ratio', 'Proporción de hits de cache desde el inicio del proceso.',
+    ('cache',), agregacion='max',
+)
+
+
+def registrar_peticion(endpoint, metodo, status, duracion_ms, sql_queries):
+    endpoint = endpoint or 'sin_ruta'
+    PETICIONES.inc(endpoint=endpoint, metodo=metodo, status=status)
+    DURACION.observar(duracion_ms / 1000, endpoint=endpoint)
+    CONSULTAS.observar(sql_queries, endpoint=endpoint)
+
+
+_SIN_VALOR = object()
+
+
+def _contar_lectura(valor, default, nombre):
+    CACHE.inc(cache=nombre, resultado='miss' if valor is _SIN_VALOR else 'hit')
+    return default if valor is _SIN_VALOR else valor
+
+
+def leer_cache(cache, clave, default=None, nombre='default'):
+    """
+    cache.get() que además cuenta hits y misses en matelog_cache_requests_total.
+    `nombre` identifica al usuario del cache (catalogo, limites) en la métrica.
+    """
+    return _contar_lectura(cache.get(clave, _SIN_VALOR), default, nombre)
+
+
+async def aleer_cache(cache, clave, default=None, nombre='default'):
+    """
+    leer_cache para código async (cache.aget()).
+    """
+    return _contar_lectura(await cache.aget(clave, _SIN_VALOR), default, nombre)
+
+
+@registro.al_recolectar
+def _actualizar_hit_ratio():
+    totales = {}
+    for (nombre, resultado), cantidad in list(CACHE.valores.items()):
+        hits, total = totales.get(nombre, (0, 0))
+        totales[nombre] = (hits + (cantidad if resultado == 'hit' else 0), total + cantidad)
+    for nombre, (hits, total) in totales.items():
+        CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=nombre)
+
+
+@registro.al_recolectar
+def _actualizar_pool():
+    from django.db import connections
+
+    for alias in connections:
+        conexion = connections[alias]
+        if conexion.vendor != 'postgresql' or not conexion.settings_dict.get('OPTIONS', {}).get('pool'):
+            continue
+        pool = conexion.pool
+        if pool is None:
+            continue
+        for estadistica, valor in pool.get_stats().items():
+            POOL.set(valor, alias=alias, estadistica=estadistica)
@@ -0,0 +1,198 @@
+import logging
+import random
+import threading
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metricas
+from .instrumentacion import medir_peticion, muestrear_lenta, peticiones_lentas
+from .perfilador import PerfiladorMuestreo, guardar_perfil
+from .logs import iniciar_contexto, nombre_endpoint, nuevo_request_id, terminar_contexto, usuario_id
+
+
+logger = logging.getLogger('monitoring.peticiones')
+
+
+def _server_timing(medicion, total_ms):
+    partes = [f'sql;dur={medicion.sql_ms:.2f};desc="{medicion.sql_queries} queries"']
+    partes.extend(f'{nombre};dur={ms:.2f}' for nombre, ms in medicion.tiempos.items())
+    partes.append(f'total;dur={total_ms:.2f}')
+    return ', '.join(partes)
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada petición (consultas SQL, tiempo en SQL, secciones marcadas con
+    `medir` y tiempo total), la registra en el log con campos estructurados,
+    agrega el header Server-Timing (con MONITORING_SERVER_TIMING, por
+    defecto solo con DEBUG) y guarda las peticiones lentas en el
+    buffer que se consulta desde el admin. También alimenta las métricas
+    de monitoring.metricas.
+
+    Cada petición recibe un request id (el X-Request-ID del proxy o uno nuevo)
+    que se devuelve en la respuesta y se incluye en todas las líneas de log
+    emitidas durante la petición.
+
+    Debe ir primero en MIDDLEWARE para incluir el tiempo de los demás.
+    Funciona en modo sync (WSGI) y async (ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request_id = nuevo_request_id(request)
+        request.request_id = request_id
+        token = iniciar_contexto(request, request_id)
+        try:
+            with medir_peticion() as medicion:
+                response = self.get_response(request)
+            return self.procesar(request, request_id, response, medicion)
+        finally:
+            terminar_contexto(token)
+
+    async def __acall__(self, request):
+        request_id = nuevo_request_id(request)
+        request.request_id = request_id
+        token = iniciar_contexto(request, request_id)
+        try:
+            with medir_peticion() as medicion:
+                response = await self.get_response(request)
+            return self.procesar(request, request_id, response, medicion)
+        finally:
+            terminar_contexto(token)
+
+    def procesar(self, request, request_id, response, medicion):
+        total_ms = medicion.total_ms()
+
+        endpoint = nombre_endpoint(request)
+        campos = {
+            'request_id': request_id,
+            'endpoint': endpoint,
+            'metodo': request.method,
+            'ruta': request.path,
+            'status': response.status_code,
+            'usuario_id': usuario_id(request),
+            'duracion_ms': round(total_ms, 2),
+            'sql_queries': medicion.sql_queries,
+            'sql_ms': round(medicion.sql_ms, 2),
+            'tiempos': {nombre: round(ms, 2) for nombre, ms in medicion.tiempos.items()},
+        }
+
+        response['X-Request-ID'] = request_id
+        if getattr(settings, 'MONITORING_SERVER_TIMING', False):
+            response['Server-Timing'] = _server_timing(medicion, total_ms)
+
+        lenta = muestrear_lenta(total_ms)
+        if lenta:
+            peticiones_lentas.agregar({
+                **campos,
+                'fecha': datetime.now(timezone.utc),
+                'consultas_lentas': [
+                    {'ms': round(ms, 2), 'sql': sql[:1000]}
+                    for ms, sql in sorted(medicion.consultas_lentas, reverse=True)
+                ],
+            })
+
+        metricas.registrar_peticion(endpoint, request.method, response.status_code, total_ms, medicion.sql_queries)
+        metricas.registro.publicar()
+
+        logger.log(
+            logging.WARNING if lenta else logging.INFO,
+            '%s %s %s %.1fms (%d queries, %.1fms SQL)',
+            request.method, request.path, response.status_code, total_ms,
+            medicion.sql_queries, medicion.sql_ms,
+            extra=campos,
+        )
+        return response
+
+
+class PerfiladorMiddleware:
+    """
+    Perfila (opt-in) la vista y el render de una petición con el perfilador
+    estadístico de monitoring.perfilador. Se activa:
+      - para una fracción MONITORING_PROFILE_SAMPLE_RATE de las peticiones
+        (filtradas por MONITORING_PROFILE_ENDPOINTS si se indica), o
+      - cuando un usuario staff envía el header `X-Perfilar: 1`.
+    El perfil queda guardado con el request id, que se devuelve en X-Perfil-ID.
+
+    Debe ir después de AuthenticationMiddleware. Funciona en modo sync y async;
+    en async se muestrea el hilo del event loop, que puede estar atendiendo
+    otras peticiones a la vez.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django envuelve un process_view síncrono en sync_to_async (un salto de hilo por petición)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.terminar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.terminar(request, await self.get_response(request))
+
+    def terminar(self, request, response):
+        perfilador = getattr(request, '_perfilador', None)
+        if perfilador is None:
+            return response
+
+        perfilador.detener()
+        request_id = getattr(request, 'request_id', None) or f'{id(request):x}'
+        guardar_perfil(request_id, perfilador, {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'endpoint': nombre_endpoint(request),
+            'metodo': request.method,
+            'ruta': request.path,
+            'status': response.status_code,
+            'usuario_id': usuario_id(request),
+            'duracion_ms': round(perfilador.duracion_ms, 2),
+            'intervalo_ms': perfilador.intervalo * 1000,
+        })
+        response['X-Perfil-ID'] = request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        usuario = getattr(request, 'user', None) if request.headers.get('X-Perfilar') == '1' else None
+        self._iniciar(request, usuario)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        usuario = await request.auser() if request.headers.get('X-Perfilar') == '1' else None
+        self._iniciar(request, usuario)
+        return None
+
+    def _iniciar(self, request, usuario):
+        if self._debe_perfilar(request, usuario):
+            request._perfilador = PerfiladorMuestreo(
+                threading.get_ident(), getattr(settings, 'MONITORING_PROFILE_INTERVAL_MS', 5)
+            ).iniciar()
+
+    def _debe_perfilar(self, request, usuario):
+        # usuario solo se carga si la petición trae el header X-Perfilar
+        if usuario is not None and usuario.is_active and usuario.is_staff:
+            return True
+
+        tasa = getattr(settings, 'MONITORING_PROFILE_SAMPLE_RATE', 0.0)
+        if tasa <= 0:
+            return False
+        endpoints = getattr(settings, 'MONITORING_PROFILE_ENDPOINTS', [])
+        if endpoints and nombre_endpoint(request) not in endpoints:
+            return False
+        return random.random() < tasa
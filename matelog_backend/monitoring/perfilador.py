@@ -0,0 +1,136 @@
+"""
+Perfilador estadístico por petición.
+
+Un hilo muestrea cada MONITORING_PROFILE_INTERVAL_MS la pila del hilo que
+atiende la petición (sys._current_frames) y cuenta las pilas repetidas. El
+resultado se guarda en formato "collapsed stacks" (una línea `f1;f2;f3 N`),
+que entienden flamegraph.pl, speedscope e inferno.
+
+Los perfiles se guardan en MONITORING_PROFILES_DIR (compartido entre
+workers) con el request id como nombre: `<request_id>.collapsed` y
+`<request_id>.json` con los datos de la petición.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+
+_REQUEST_ID_SEGURO = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._-')
+
+
+def _etiqueta(codigo, raiz):
+    archivo = codigo.co_filename
+    if archivo.startswith(raiz):
+        archivo = archivo[len(raiz):]
+    elif 'site-packages' + os.sep in archivo:
+        archivo = archivo.split('site-packages' + os.sep, 1)[1]
+    return f'{codigo.co_name} ({archivo}:{codigo.co_firstlineno})'.replace(';', ',')
+
+
+class PerfiladorMuestreo:
+    """
+    Muestrea la pila de un hilo hasta que se llama a `detener()`.
+    """
+
+    def __init__(self, thread_id, intervalo_ms=5):
+        self.thread_id = thread_id
+        self.intervalo = intervalo_ms / 1000
+        self.pilas = Counter()
+        self.muestras = 0
+        self.inicio = None
+        self.duracion_ms = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+        self._raiz = str(settings.BASE_DIR) + os.sep
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        self.duracion_ms = (time.perf_counter() - self.inicio) * 1000
+        return self
+
+    def _muestrear(self):
+        etiquetas = {}
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            pila = []
+            while frame is not None:
+                codigo = frame.f_code
+                etiqueta = etiquetas.get(codigo)
+                if etiqueta is None:
+                    etiqueta = etiquetas[codigo] = _etiqueta(codigo, self._raiz)
+                pila.append(etiqueta)
+                frame = frame.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+                self.muestras += 1
+
+    def collapsed(self):
+        return ''.join(f'{pila} {n}\n' for pila, n in self.pilas.most_common())
+
+
+def directorio_perfiles():
+    return Path(getattr(settings, 'MONITORING_PROFILES_DIR'))
+
+
+def _ruta(request_id, extension):
+    if not request_id or set(request_id) - _REQUEST_ID_SEGURO:
+        raise ValueError(f'request id inválido: {request_id!r}')
+    return directorio_perfiles() / f'{request_id}.{extension}'
+
+
+def guardar_perfil(request_id, perfilador, datos):
+    """
+    Guarda el perfil y borra los más antiguos si se supera MONITORING_PROFILES_MAX.
+    """
+    directorio = directorio_perfiles()
+    directorio.mkdir(parents=True, exist_ok=True)
+    _ruta(request_id, 'collapsed').write_text(perfilador.collapsed(), encoding='utf-8')
+    _ruta(request_id, 'json').write_text(
+        json.dumps({**datos, 'request_id': request_id, 'muestras': perfilador.muestras}, default=str),
+        encoding='utf-8',
+    )
+
+    maximo = getattr(settings, 'MONITORING_PROFILES_MAX', 200)
+    metadatos = sorted(directorio.glob('*.json'), key=lambda r: r.stat().st_mtime, reverse=True)
+    for ruta in metadatos[maximo:]:
+        ruta.unlink(missing_ok=True)
+        ruta.with_suffix('.collapsed').unlink(missing_ok=True)
+
+
+def listar_perfiles():
+    """
+    Metadatos de los perfiles guardados, del más reciente al más antiguo.
+    """
+    directorio = directorio_perfiles()
+    if not directorio.is_dir():
+        return []
+    perfiles = []
+    for ruta in directorio.glob('*.json'):
+        try:
+            perfiles.append(json.loads(ruta.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return sorted(perfiles, key=lambda p: p.get('fecha', ''), reverse=True)
+
+
+def leer_perfil(request_id):
+    """
+    Texto collapsed del perfil, o None si no existe.
+    """
+    try:
+        return _ruta(request_id, 'collapsed').read_text(encoding='utf-8')
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,298 @@
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from matelog_backend.testing import PresupuestoMixin, crear_catalogo, crear_estudiante
+from users.models import CustomUser
+from . import metricas
+from .instrumentacion import peticiones_lentas
+from .perfilador import PerfiladorMuestreo, guardar_perfil, leer_perfil, listar_perfiles
+from .logs import ColaHandler, FormatoJSON, iniciar_contexto, terminar_contexto
+
+
+class InstrumentacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_catalogo(lecciones=2, temas_por_leccion=2, ejercicios_por_tema=4)
+        cls.usuario = crear_estudiante()
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        peticiones_lentas.limpiar()
+
+    @override_settings(MONITORING_SERVER_TIMING=True)
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.get('/api/lessons/lecciones/', secure=True)
+        server_timing = respuesta['Server-Timing']
+        consultas = int(re.search(r'sql;dur=[\d.]+;desc="(\d+) queries"', server_timing).group(1))
+        self.assertEqual(consultas, len(capturadas))
+        self.assertIn('serializer;dur=', server_timing)
+        self.assertIn('total;dur=', server_timing)
+
+    @override_settings(MONITORING_SERVER_TIMING=False)
+    def test_sin_server_timing_en_produccion(self):
+        for cliente in (self.client, self.client_class()):
+            respuesta = cliente.get('/api/users/choices/', secure=True)
+            self.assertFalse(respuesta.has_header('Server-Timing'))
+            self.assertTrue(respuesta.has_header('X-Request-ID'))
+
+    def test_log_estructurado(self):
+        with self.assertLogs('monitoring.peticiones', 'INFO') as logs:
+            self.client.get('/api/users/profile/', secure=True)
+        registro = logs.records[-1]
+        self.assertEqual(registro.endpoint, 'profile')
+        self.assertEqual(registro.usuario_id, self.usuario.id)
+        self.assertEqual(registro.status, 200)
+        self.assertIn('serializer', registro.tiempos)
+
+    def test_peticiones_rapidas_no_se_guardan(self):
+        self.client.get('/api/users/choices/', secure=True)
+        self.assertEqual(peticiones_lentas.listar(), [])
+
+    @override_settings(MONITORING_SLOW_REQUEST_MS=0)
+    def test_peticiones_lentas_se_guardan(self):
+        self.client.get('/api/lessons/lecciones/', secure=True)
+        registro = peticiones_lentas.listar()[0]
+        self.assertEqual(registro['endpoint'], 'leccion-list')
+        self.assertEqual(registro['usuario_id'], self.usuario.id)
+        self.assertTrue(registro['consultas_lentas'])
+
+    def test_vista_admin_requiere_staff(self):
+        respuesta = self.client.get('/admin/monitoring/peticiones-lentas/', secure=True)
+        self.assertEqual(respuesta.status_code, 302)
+
+
+class PresupuestoMonitoringTests(PresupuestoMixin, TestCase):
+    urlconf = 'monitoring.urls'
+    presupuestos = {
+        # nombre_url: (max_queries, max_ms)
+        'peticiones-lentas': (2, 200),
+        'metricas': (2, 200),
+        'perfiles': (2, 200),
+        'descargar-perfil': (2, 100),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(username='admin', password='Clave-Segura-123')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MONITORING_PROFILES_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    @override_settings(MONITORING_SLOW_REQUEST_MS=0)
+    def test_peticiones_lentas(self):
+        peticiones_lentas.limpiar()
+        self.client.get('/api/users/choices/', secure=True)
+        respuesta = self.assertPresupuesto('peticiones-lentas', 'GET', '/admin/monitoring/peticiones-lentas/')
+        self.assertContains(respuesta, '/api/users/choices/')
+
+    def test_peticiones_lentas_json(self):
+        respuesta = self.assertPresupuesto(
+            'peticiones-lentas', 'GET', '/admin/monitoring/peticiones-lentas/?formato=json'
+        )
+        self.assertIn('peticiones', respuesta.json())
+
+    def test_metricas(self):
+        self.client.get('/api/users/choices/', secure=True)
+        respuesta = self.assertPresupuesto('metricas', 'GET', '/admin/monitoring/metricas/')
+        self.assertIn('matelog_http_requests_total{endpoint="choices",metodo="GET",status="200"}',
+                      respuesta.content.decode())
+
+    def test_perfiles(self):
+        respuesta = self.client.get('/api/users/profile/', secure=True, headers={'X-Perfilar': '1'})
+        request_id = respuesta['X-Perfil-ID']
+        respuesta = self.assertPresupuesto('perfiles', 'GET', '/admin/monitoring/perfiles/')
+        self.assertContains(respuesta, request_id)
+        respuesta = self.assertPresupuesto('descargar-perfil', 'GET', f'/admin/monitoring/perfiles/{request_id}/')
+        self.assertEqual(respuesta['Content-Disposition'], f'attachment; filename="{request_id}.collapsed"')
+
+
+class PerfiladorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MONITORING_PROFILES_DIR=directorio.name, MONITORING_PROFILE_INTERVAL_MS=1)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.client.force_login(self.usuario)
+
+    def test_header_solo_para_staff(self):
+        respuesta = self.client.get('/api/users/profile/', secure=True, headers={'X-Perfilar': '1'})
+        self.assertNotIn('X-Perfil-ID', respuesta)
+
+    @override_settings(MONITORING_PROFILE_SAMPLE_RATE=1.0, MONITORING_PROFILE_ENDPOINTS=['profile'])
+    def test_muestreo_por_endpoint(self):
+        respuesta = self.client.get('/api/users/choices/', secure=True)
+        self.assertNotIn('X-Perfil-ID', respuesta)
+        respuesta = self.client.get('/api/users/profile/', secure=True)
+        perfil = leer_perfil(respuesta['X-Perfil-ID'])
+        self.assertIsNotNone(perfil)
+        for linea in perfil.splitlines():
+            self.assertRegex(linea, r'^\S.* \d+$')
+
+    def test_perfilador_muestrea_hilo(self):
+        perfilador = PerfiladorMuestreo(threading.get_ident(), intervalo_ms=1).iniciar()
+        fin = time.perf_counter() + 0.05
+        while time.perf_counter() < fin:
+            pass
+        perfilador.detener()
+        self.assertGreater(perfilador.muestras, 0)
+        self.assertIn('test_perfilador_muestrea_hilo', perfilador.collapsed())
+
+    @override_settings(MONITORING_PROFILES_MAX=2)
+    def test_limite_de_perfiles(self):
+        perfilador = PerfiladorMuestreo(threading.get_ident())
+        for i in range(4):
+            guardar_perfil(f'perfil-{i}', perfilador, {'fecha': f'2026-01-0{i + 1}'})
+            os.utime(Path(settings.MONITORING_PROFILES_DIR) / f'perfil-{i}.json', (i, i))
+        self.assertEqual([p['request_id'] for p in listar_perfiles()], ['perfil-3', 'perfil-2'])
+
+    def test_request_id_invalido(self):
+        self.assertIsNone(leer_perfil('../settings'))
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        self.registro = metricas.Registro()
+        self.contador = self.registro.contador('prueba_total', 'Contador.', ('endpoint',))
+        self.histograma = self.registro.histograma('prueba_segundos', 'Histograma.', buckets=(0.1, 1.0))
+        self.gauge = self.registro.gauge('prueba_gauge', 'Gauge.')
+
+    def test_exposicion_histograma(self):
+        for valor in (0.05, 0.5, 5):
+            self.histograma.observar(valor)
+        texto = metricas.exposicion(metricas.combinar([(self.registro.instantanea(), True)]))
+        self.assertIn('# TYPE prueba_segundos histogram', texto)
+        self.assertIn('prueba_segundos_bucket{le="0.1"} 1', texto)
+        self.assertIn('prueba_segundos_bucket{le="1.0"} 2', texto)
+        self.assertIn('prueba_segundos_bucket{le="+Inf"} 3', texto)
+        self.assertIn('prueba_segundos_count 3', texto)
+
+    def test_etiquetas_invalidas(self):
+        with self.assertRaises(ValueError):
+            self.contador.inc(otra='x')
+
+    def test_combinar_procesos(self):
+        self.contador.inc(endpoint='login')
+        self.gauge.set(2)
+        instantanea = self.registro.instantanea()
+        # Un proceso vivo y uno terminado con los mismos valores
+        combinadas = metricas.combinar([(instantanea, True), (instantanea, False)])
+        self.assertEqual(combinadas['prueba_total']['valores'][('login',)], 2)
+        self.assertEqual(combinadas['prueba_gauge']['valores'][()], 2)
+
+    def test_multiproceso_en_archivos(self):
+        self.contador.inc(3, endpoint='login')
+        with tempfile.TemporaryDirectory() as directorio:
+            directorio = Path(directorio)
+            metricas.escribir_instantanea(directorio, 1, self.registro.instantanea())
+            metricas.escribir_instantanea(directorio, 2, self.registro.instantanea())
+            instantaneas = metricas.leer_instantaneas(directorio)
+        combinadas = metricas.combinar([(datos, vivo) for _, datos, vivo in instantaneas])
+        self.assertEqual(combinadas['prueba_total']['valores'][('login',)], 6)
+
+    @override_settings(MONITORING_METRICS_TOKEN='secreto')
+    def test_hit_ratio_de_cache(self):
+        cache.clear()
+        self.client.force_login(crear_estudiante())
+        # Cada petición limitada lee sus buckets (IP y usuario): la primera falla, la segunda acierta
+        for _ in range(2):
+            self.client.post('/api/tracking/iniciar/', {'tipo_pantalla': 'LOGIN'},
+                             content_type='application/json', secure=True)
+        texto = self.client.get(
+            '/admin/monitoring/metricas/', secure=True, headers={'Authorization': 'Bearer secreto'}
+        ).content.decode()
+        self.assertRegex(texto, r'matelog_cache_requests_total\{cache="limites",resultado="hit"\} [1-9]')
+        proporcion = re.search(r'matelog_cache_hit_ratio\{cache="limites"\} ([0-9.]+)', texto)
+        self.assertIsNotNone(proporcion)
+        self.assertGreater(float(proporcion.group(1)), 0)
+
+    def test_endpoint_requiere_staff_o_token(self):
+        self.assertEqual(self.client.get('/admin/monitoring/metricas/', secure=True).status_code, 403)
+        with override_settings(MONITORING_METRICS_TOKEN='secreto'):
+            respuesta = self.client.get(
+                '/admin/monitoring/metricas/', secure=True, headers={'Authorization': 'Bearer secreto'}
+            )
+            self.assertEqual(respuesta.status_code, 200)
+            respuesta = self.client.get(
+                '/admin/monitoring/metricas/', secure=True, headers={'Authorization': 'Bearer otro'}
+            )
+            self.assertEqual(respuesta.status_code, 403)
+
+
+class LogsTests(TestCase):
+
+    def setUp(self):
+        self.salida = io.StringIO()
+        self.handler = ColaHandler(logging.StreamHandler(self.salida))
+        self.handler.setFormatter(FormatoJSON())
+        self.logger = logging.getLogger('monitoring.tests.logs')
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(self.handler.detener)
+
+    def lineas(self):
+        self.handler.detener()
+        return [json.loads(linea) for linea in self.salida.getvalue().splitlines()]
+
+    def test_linea_json_con_contexto(self):
+        request = RequestFactory().get('/api/lessons/lecciones/')
+        token = iniciar_contexto(request, 'abc123def456')
+        try:
+            self.logger.warning('Tema %s lento', 7, extra={'duracion_ms': 812.5})
+        finally:
+            terminar_contexto(token)
+        linea, = self.lineas()
+        self.assertEqual(linea['mensaje'], 'Tema 7 lento')
+        self.assertEqual(linea['nivel'], 'WARNING')
+        self.assertEqual(linea['request_id'], 'abc123def456')
+        self.assertEqual(linea['duracion_ms'], 812.5)
+
+    def test_excepcion(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception('Falló')
+        linea, = self.lineas()
+        self.assertIn('ZeroDivisionError', linea['excepcion'])
+        self.assertIsNone(linea['request_id'])
+
+    def test_cola_llena_descarta(self):
+        self.handler.detener()
+        handler = ColaHandler(logging.StreamHandler(io.StringIO()), capacidad=1)
+        handler.detener()
+        for _ in range(3):
+            handler.handle(logging.makeLogRecord({'msg': 'x'}))
+        self.assertEqual(handler.descartados, 2)
+
+    def test_request_id_en_respuesta(self):
+        respuesta = self.client.get('/api/users/choices/', secure=True, headers={'X-Request-ID': 'proxy-1234567'})
+        self.assertEqual(respuesta['X-Request-ID'], 'proxy-1234567')
+        respuesta = self.client.get('/api/users/choices/', secure=True, headers={'X-Request-ID': 'no valido!'})
+        self.assertRegex(respuesta['X-Request-ID'], r'^[0-9a-f]{32}$')
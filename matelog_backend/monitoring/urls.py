@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import descargar_perfil_view, metricas_view, perfiles_view, peticiones_lentas_view
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('peticiones-lentas/', peticiones_lentas_view, name='peticiones-lentas'),
+    path('metricas/', metricas_view, name='metricas'),
+    path('perfiles/', perfiles_view, name='perfiles'),
+    path('perfiles/<str:request_id>/', descargar_perfil_view, name='descargar-perfil'),
+]
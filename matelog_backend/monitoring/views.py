@@ -0,0 +1,85 @@
+import hmac
+
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
+from django.conf import settings
+from django.views.decorators.http import require_http_methods
+
+from . import metricas
+from .instrumentacion import peticiones_lentas
+from .perfilador import leer_perfil, listar_perfiles
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def peticiones_lentas_view(request):
+    """
+    Últimas peticiones lentas registradas por este proceso.
+    GET ?formato=json devuelve los registros en JSON; POST vacía el buffer.
+    """
+    if request.method == 'POST':
+        peticiones_lentas.limpiar()
+        return redirect('monitoring:peticiones-lentas')
+
+    registros = peticiones_lentas.listar()
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({'peticiones': registros}, encoder=DjangoJSONEncoder)
+
+    return render(request, 'monitoring/peticiones_lentas.html', {
+        **admin.site.each_context(request),
+        'title': 'Peticiones lentas',
+        'registros': registros,
+        'umbral_ms': getattr(settings, 'MONITORING_SLOW_REQUEST_MS', 500),
+        'tasa_muestreo': getattr(settings, 'MONITORING_SLOW_SAMPLE_RATE', 1.0),
+    })
+
+
+def _token_valido(request):
+    token = getattr(settings, 'MONITORING_METRICS_TOKEN', '')
+    encabezado = request.headers.get('Authorization', '')
+    if not token or not encabezado.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(encabezado[len('Bearer '):].encode(), token.encode())
+
+
+@require_http_methods(["GET"])
+def metricas_view(request):
+    """
+    Métricas de todos los workers en el formato de texto de Prometheus.
+    Acceso para staff (sesión del admin) o con Authorization: Bearer <MONITORING_METRICS_TOKEN>.
+    """
+    if not (_token_valido(request) or (request.user.is_active and request.user.is_staff)):
+        return HttpResponse('No autorizado\n', status=403, content_type='text/plain')
+    return HttpResponse(metricas.recolectar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def perfiles_view(request):
+    """
+    Perfiles guardados por el perfilador de muestreo (todos los workers).
+    """
+    return render(request, 'monitoring/perfiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Perfiles de peticiones',
+        'perfiles': listar_perfiles(),
+        'tasa_muestreo': getattr(settings, 'MONITORING_PROFILE_SAMPLE_RATE', 0.0),
+        'endpoints': getattr(settings, 'MONITORING_PROFILE_ENDPOINTS', []),
+    })
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def descargar_perfil_view(request, request_id):
+    """
+    Descarga el perfil en formato collapsed stacks (flamegraph.pl, speedscope).
+    """
+    contenido = leer_perfil(request_id)
+    if contenido is None:
+        raise Http404('Perfil no encontrado')
+    respuesta = HttpResponse(contenido, content_type='text/plain; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{request_id}.collapsed"'
+    return respuesta
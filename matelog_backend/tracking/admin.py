@@ -1,4 +1,5 @@
 from django.contrib import admin
+from matelog_backend.replica import ReplicaAdminMixin, leer_de_replica
 from .models import (
     SesionEstudio, 
     ProgresoLeccion, 
@@ -10,8 +11,8 @@ from .models import (
 
 
 @admin.register(SesionEstudio)
-class SesionEstudioAdmin(admin.ModelAdmin):
-    list_display = ('usuario', 'fecha_inicio', 'fecha_fin', 'duracion_minutos')
+class SesionEstudioAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ('usuario', 'fecha_inicio', 'ultima_actividad', 'fecha_fin', 'duracion_minutos')
     list_filter = ('fecha_inicio', 'usuario')
     search_fields = ('usuario__username',)
     readonly_fields = ('fecha_inicio',)
@@ -19,7 +20,7 @@ class SesionEstudioAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProgresoLeccion)
-class ProgresoLeccionAdmin(admin.ModelAdmin):
+class ProgresoLeccionAdmin(ReplicaAdminMixin, admin.ModelAdmin):
     list_display = ('usuario', 'leccion', 'estado', 'porcentaje_completado', 'fecha_inicio', 'fecha_completado')
     list_filter = ('estado', 'leccion', 'fecha_inicio')
     search_fields = ('usuario__username', 'leccion__titulo')
@@ -28,7 +29,7 @@ class ProgresoLeccionAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProgresoTema)
-class ProgresoTemaAdmin(admin.ModelAdmin):
+class ProgresoTemaAdmin(ReplicaAdminMixin, admin.ModelAdmin):
     list_display = (
         'usuario', 
         'tema', 
@@ -57,7 +58,7 @@ class ProgresoTemaAdmin(admin.ModelAdmin):
 
 
 @admin.register(RespuestaEjercicio)
-class RespuestaEjercicioAdmin(admin.ModelAdmin):
+class RespuestaEjercicioAdmin(ReplicaAdminMixin, admin.ModelAdmin):
     list_display = (
         'usuario', 
         'ejercicio_breve', 
@@ -67,6 +68,7 @@ class RespuestaEjercicioAdmin(admin.ModelAdmin):
         'fecha_respuesta'
     )
     list_filter = ('es_correcta', 'uso_ayuda', 'fecha_respuesta', 'ejercicio__tema')
+    list_select_related = ('usuario', 'ejercicio')
     search_fields = ('usuario__username', 'ejercicio__enunciado')
     readonly_fields = ('fecha_respuesta',)
     ordering = ('-fecha_respuesta',)
@@ -77,7 +79,7 @@ class RespuestaEjercicioAdmin(admin.ModelAdmin):
 
 
 @admin.register(ActividadPantalla)
-class ActividadPantallaAdmin(admin.ModelAdmin):
+class ActividadPantallaAdmin(ReplicaAdminMixin, admin.ModelAdmin):
     list_display = (
         'usuario_display', 
         'tipo_pantalla', 
@@ -111,7 +113,7 @@ class ActividadPantallaAdmin(admin.ModelAdmin):
 
 # Modificación 7: Admin para IntentoTema
 @admin.register(IntentoTema)
-class IntentoTemaAdmin(admin.ModelAdmin):
+class IntentoTemaAdmin(ReplicaAdminMixin, admin.ModelAdmin):
     list_display = (
         'usuario',
         'tema',
@@ -138,6 +140,8 @@ class IntentoTemaAdmin(admin.ModelAdmin):
         'tema__titulo'
     )
     
+    list_select_related = ('usuario', 'tema')
+    
     readonly_fields = (
         'fecha_inicio',
         'fecha_finalizacion',
@@ -188,6 +192,7 @@ class IntentoTemaAdmin(admin.ModelAdmin):
     # Acciones personalizadas
     actions = ['exportar_intentos_csv']
     
+    @leer_de_replica()
     def exportar_intentos_csv(self, request, queryset):
         import csv
         from django.http import HttpResponse
@@ -211,7 +216,7 @@ class IntentoTemaAdmin(admin.ModelAdmin):
             'Fecha Finalización'
         ])
         
-        for intento in queryset:
+        for intento in queryset.select_related('usuario', 'tema').iterator(chunk_size=2000):
             writer.writerow([
                 intento.usuario.username,
                 intento.tema.titulo,
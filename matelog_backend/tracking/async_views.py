@@ -0,0 +1,185 @@
+"""
+Versiones async (ORM async de Django) de las vistas de tracking.
+Se usan en lugar de las de views.py cuando ASYNC_VIEWS=True (despliegue ASGI);
+las respuestas son idénticas.
+"""
+
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+
+from matelog_backend.asincrono import VistaAsync, respuesta_json
+from monitoring import metricas
+from .models import SesionEstudio, ActividadPantalla
+from .views import INTERVALO_LATIDO, _tipo_para_metrica, sesiones_reanudables
+
+
+async def _abrir_o_reanudar_sesion(usuario):
+    """
+    Versión async de views.abrir_o_reanudar_sesion.
+    """
+    ahora = timezone.now()
+    sesion = await sesiones_reanudables(usuario, ahora).afirst()
+    if sesion is None:
+        return await SesionEstudio.objects.acreate(usuario=usuario), False
+    if sesion.ultima_actividad < ahora - INTERVALO_LATIDO:
+        sesion.ultima_actividad = ahora
+        await sesion.asave(update_fields=['ultima_actividad'])
+    return sesion, True
+
+
+class IniciarSesionView(VistaAsync):
+    """
+    Vista async para iniciar una sesión de estudio.
+    Endpoint: POST /api/tracking/sesion/iniciar/
+    """
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        sesion, reanudada = await _abrir_o_reanudar_sesion(request.user)
+        return respuesta_json({
+            'sesion_id': sesion.id,
+            'fecha_inicio': sesion.fecha_inicio,
+            'reanudada': reanudada,
+        }, status=200 if reanudada else 201)
+
+
+class LatidoSesionView(VistaAsync):
+    """
+    Vista async para mantener viva una sesión de estudio.
+    Endpoint: POST /api/tracking/sesion/latido/
+    """
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        sesion_id = request.data.get('sesion_id')
+
+        if not sesion_id:
+            return respuesta_json({'error': 'Se requiere sesion_id'}, status=400)
+
+        ahora = timezone.now()
+        sesion = sesiones_reanudables(request.user, ahora).filter(id=sesion_id)
+        actualizada = await sesion.filter(ultima_actividad__lt=ahora - INTERVALO_LATIDO).aupdate(ultima_actividad=ahora)
+        if not actualizada and not await sesion.aexists():
+            return respuesta_json({'error': 'Sesión no encontrada o expirada'}, status=404)
+
+        return respuesta_json({'actualizada': bool(actualizada)})
+
+
+class FinalizarSesionView(VistaAsync):
+    """
+    Vista async para finalizar una sesión de estudio.
+    Endpoint: POST /api/tracking/sesion/finalizar/
+    """
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        sesion_id = request.data.get('sesion_id')
+
+        if not sesion_id:
+            return respuesta_json({'error': 'Se requiere sesion_id'}, status=400)
+
+        sesion = await aget_object_or_404(SesionEstudio, id=sesion_id, usuario=request.user)
+        sesion.fecha_fin = timezone.now()
+        sesion.ultima_actividad = sesion.fecha_fin
+
+        # Calcular duración en minutos
+        duracion = (sesion.fecha_fin - sesion.fecha_inicio).total_seconds() / 60
+        sesion.duracion_minutos = int(duracion)
+        await sesion.asave()
+
+        return respuesta_json({
+            'mensaje': 'Sesión finalizada correctamente',
+            'duracion_minutos': sesion.duracion_minutos
+        })
+
+
+class IniciarActividadView(VistaAsync):
+    """
+    Vista async para registrar el inicio de una actividad en una pantalla.
+    Endpoint: POST /api/tracking/iniciar/
+    """
+    requiere_autenticacion = False
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        tipo_pantalla = request.data.get('tipo_pantalla', 'OTRA')
+
+        # Obtener metadatos opcionales
+        metadata = request.data.get('metadata', {})
+        leccion_id = metadata.get('leccion_id')
+        tema_id = metadata.get('tema_id')
+
+        actividad = await ActividadPantalla.objects.acreate(
+            usuario=request.user if request.user.is_authenticated else None,
+            tipo_pantalla=tipo_pantalla,
+            leccion_id=leccion_id,
+            tema_id=tema_id
+        )
+        metricas.EVENTOS_TRACKING.inc(evento='iniciar-actividad', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
+
+        return respuesta_json({
+            'actividad_id': actividad.id,
+            'tiempo_inicio': actividad.tiempo_inicio
+        }, status=201)
+
+
+class FinalizarActividadView(VistaAsync):
+    """
+    Vista async para finalizar una actividad de pantalla.
+    Endpoint: POST /api/tracking/finalizar/
+    """
+    requiere_autenticacion = False
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        actividad_id = request.data.get('actividad_id')
+
+        if not actividad_id:
+            return respuesta_json({'error': 'Se requiere actividad_id'}, status=400)
+
+        try:
+            actividad = await ActividadPantalla.objects.aget(id=actividad_id)
+        except ActividadPantalla.DoesNotExist:
+            return respuesta_json({'error': 'Actividad no encontrada'}, status=404)
+
+        actividad.tiempo_fin = timezone.now()
+
+        # Calcular tiempo en segundos
+        tiempo_total = (actividad.tiempo_fin - actividad.tiempo_inicio).total_seconds()
+        actividad.tiempo_segundos = int(tiempo_total)
+        await actividad.asave()
+        metricas.EVENTOS_TRACKING.inc(evento='finalizar-actividad', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
+
+        return respuesta_json({
+            'mensaje': 'Actividad finalizada correctamente',
+            'tiempo_segundos': actividad.tiempo_segundos
+        })
+
+
+class RegistrarVolverContenidoView(VistaAsync):
+    """
+    Vista async para registrar cuando el usuario presiona el botón "Volver" en el contenido.
+    Endpoint: POST /api/tracking/volver-contenido/
+    """
+    requiere_autenticacion = False
+    throttle_scope = 'tracking'
+
+    async def post(self, request):
+        actividad_id = request.data.get('actividad_id')
+
+        if not actividad_id:
+            return respuesta_json({'error': 'Se requiere actividad_id'}, status=400)
+
+        try:
+            actividad = await ActividadPantalla.objects.aget(id=actividad_id)
+        except ActividadPantalla.DoesNotExist:
+            return respuesta_json({'error': 'Actividad no encontrada'}, status=404)
+
+        actividad.veces_volver_contenido += 1
+        await actividad.asave()
+        metricas.EVENTOS_TRACKING.inc(evento='volver-contenido', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
+
+        return respuesta_json({
+            'mensaje': 'Click en volver registrado',
+            'veces_volver': actividad.veces_volver_contenido
+        })
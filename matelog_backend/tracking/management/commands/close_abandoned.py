@@ -0,0 +1,138 @@
+"""
+Comando para cerrar las sesiones de estudio y actividades de pantalla que
+quedaron abiertas (el navegador se cerró sin llamar a finalizar).
+Pensado para ejecutarse periódicamente (cron). Recorre las filas abiertas en
+lotes por id (keyset) y cierra cada lote con un solo UPDATE que calcula el fin
+estimado en la base de datos, así que se puede correr sobre tablas de decenas
+de millones de filas sin bloquearlas ni traer las filas a Python.
+Ejecutar con: python manage.py close_abandoned --umbral 120 --lote 5000
+
+Fin estimado:
+  - Sesión: el último evento del estudiante que todavía pertenece a ella,
+    es decir, su último latido (ultima_actividad) o la última actividad de
+    pantalla iniciada antes de que la sesión expirara por inactividad
+    (ultima_actividad + SESION_REANUDAR_MINUTOS).
+  - Actividad: el siguiente evento del estudiante (la siguiente actividad de
+    pantalla o, si no hay, el último latido de su sesión), con un máximo de
+    --max-actividad minutos. Las actividades anónimas se cierran con
+    duración 0.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import ExpressionWrapper, F, Func, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from tracking.models import ActividadPantalla, SesionEstudio
+
+
+class _Segundos(Func):
+    """
+    Segundos enteros entre dos fechas: _Segundos(fin, inicio).
+    """
+    output_field = IntegerField()
+    template = 'CAST(FLOOR(EXTRACT(EPOCH FROM (%(expressions)s))) AS INTEGER)'
+    arg_joiner = ' - '
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # julianday() es un double: se redondea a milisegundos antes de truncar
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(ROUND((julianday(%(expressions)s)) * 86400, 3) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Cierra en lotes las sesiones de estudio y actividades de pantalla abandonadas, '
+        'con un fin estimado a partir del siguiente evento del estudiante.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--umbral', type=int, default=120,
+                            help='Minutos sin actividad para considerar abandonada una fila (default: 120)')
+        parser.add_argument('--max-actividad', type=int, default=30,
+                            help='Duración máxima estimada de una actividad en minutos (default: 30)')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas cerradas por lote (default: 5000)')
+        parser.add_argument('--pausa', type=float, default=0.1,
+                            help='Segundos de espera entre lotes (default: 0.1)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        limite = timezone.now() - timedelta(minutes=options['umbral'])
+        self.lotes = 0
+
+        sesiones = self.cerrar_sesiones(limite, options)
+        actividades = self.cerrar_actividades(limite, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{sesiones} sesiones y {actividades} actividades cerradas en {self.lotes} lotes '
+            f'({time.perf_counter() - inicio:.1f}s)'
+        ))
+
+    def recorrer(self, abiertas, valores, options):
+        """
+        Recorre `abiertas` por id en lotes de --lote filas y cierra cada lote
+        con un UPDATE de `valores`. Se vuelve a filtrar por `abiertas`: una
+        fila cerrada por el frontend entre la lectura y la escritura no se toca.
+        """
+        total = 0
+        ultimo_id = 0
+        while True:
+            ids = list(abiertas.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:options['lote']])
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+            cerradas = abiertas.filter(id__in=ids).update(**valores)
+            total += cerradas
+            self.lotes += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  - lote {self.lotes}: {cerradas} {abiertas.model._meta.verbose_name_plural}')
+            if len(ids) < options['lote']:
+                break
+            time.sleep(options['pausa'])
+        return total
+
+    def cerrar_sesiones(self, limite, options):
+        ventana = timedelta(minutes=settings.SESION_REANUDAR_MINUTOS)
+        abiertas = SesionEstudio.objects.filter(fecha_fin__isnull=True, ultima_actividad__lt=limite)
+        # Última actividad de pantalla del estudiante desde el inicio de la sesión hasta que expiró
+        ultimo_evento = ActividadPantalla.objects.filter(
+            usuario=OuterRef('usuario'),
+            tiempo_inicio__gte=OuterRef('fecha_inicio'),
+            tiempo_inicio__lt=OuterRef('ultima_actividad') + ventana,
+        ).order_by('-tiempo_inicio').values(evento=Coalesce('tiempo_fin', 'tiempo_inicio'))[:1]
+        fin = Greatest(
+            F('ultima_actividad'),
+            Least(Coalesce(Subquery(ultimo_evento), F('ultima_actividad')), F('ultima_actividad') + ventana),
+        )
+        return self.recorrer(abiertas, {
+            'fecha_fin': fin,
+            'ultima_actividad': fin,
+            'duracion_minutos': ExpressionWrapper(_Segundos(fin, F('fecha_inicio')) / 60, IntegerField()),
+        }, options)
+
+    def cerrar_actividades(self, limite, options):
+        maximo = timedelta(minutes=options['max_actividad'])
+        abiertas = ActividadPantalla.objects.filter(tiempo_fin__isnull=True, tiempo_inicio__lt=limite)
+        siguiente = ActividadPantalla.objects.filter(
+            usuario=OuterRef('usuario'), tiempo_inicio__gt=OuterRef('tiempo_inicio'),
+        ).order_by('tiempo_inicio').values('tiempo_inicio')[:1]
+        latido = SesionEstudio.objects.filter(
+            usuario=OuterRef('usuario'), fecha_inicio__lte=OuterRef('tiempo_inicio'),
+        ).order_by('-fecha_inicio').values('ultima_actividad')[:1]
+        fin = Least(
+            Greatest(Coalesce(Subquery(siguiente), Subquery(latido), F('tiempo_inicio')), F('tiempo_inicio')),
+            F('tiempo_inicio') + maximo,
+        )
+        return self.recorrer(abiertas, {
+            'tiempo_fin': fin,
+            'tiempo_segundos': _Segundos(fin, F('tiempo_inicio')),
+        }, options)
@@ -0,0 +1,512 @@
+"""
+Comando para generar datos sintéticos de estudiantes y su historial de tracking.
+Pensado para pruebas de rendimiento: no usar en la base de datos de producción.
+Ejecutar con: python manage.py generate_load_data --estudiantes 5000 --workers 4
+"""
+
+import csv
+import io
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from lessons.models import Tema, Ejercicio
+from users.models import CustomUser
+from tracking.models import (
+    SesionEstudio,
+    ProgresoLeccion,
+    ProgresoTema,
+    RespuestaEjercicio,
+    ActividadPantalla,
+    IntentoTema,
+)
+
+
+# Distribuciones aproximadas de la población de estudiantes
+DISTRIBUCION_GRUPO = {'A': 0.27, 'B': 0.26, 'C': 0.24, 'D': 0.23}
+DISTRIBUCION_ESPECIALIDAD = {
+    'INFORMATICA': 0.35,
+    'ADMINISTRACION': 0.30,
+    'AGRONOMIA': 0.20,
+    'ELECTRONICA': 0.15,
+}
+DISTRIBUCION_GENERO = {'M': 0.48, 'F': 0.48, 'O': 0.02, 'N': 0.02}
+DISTRIBUCION_EDAD = {'14': 0.05, '15': 0.30, '16': 0.35, '17': 0.22, '18': 0.08}
+
+# Modelos de comportamiento: parámetros de la simulación de cada estudiante
+MODELOS_COMPORTAMIENTO = {
+    'constante': {
+        'sesiones_por_semana': 3.0,
+        'minutos_por_sesion': 40,
+        'prob_acierto': 0.85,
+        'prob_ayuda': 0.10,
+        'prob_abandono_tema': 0.01,
+        'max_intentos': 4,
+        'segundos_por_ejercicio': 45,
+        'prob_sesion_sin_cerrar': 0.40,
+        'prob_actividad_sin_cerrar': 0.05,
+    },
+    'irregular': {
+        'sesiones_por_semana': 1.2,
+        'minutos_por_sesion': 25,
+        'prob_acierto': 0.70,
+        'prob_ayuda': 0.30,
+        'prob_abandono_tema': 0.05,
+        'max_intentos': 3,
+        'segundos_por_ejercicio': 70,
+        'prob_sesion_sin_cerrar': 0.70,
+        'prob_actividad_sin_cerrar': 0.15,
+    },
+    'abandono': {
+        'sesiones_por_semana': 2.0,
+        'minutos_por_sesion': 20,
+        'prob_acierto': 0.55,
+        'prob_ayuda': 0.45,
+        'prob_abandono_tema': 0.30,
+        'max_intentos': 2,
+        'segundos_por_ejercicio': 90,
+        'prob_sesion_sin_cerrar': 0.85,
+        'prob_actividad_sin_cerrar': 0.30,
+    },
+}
+
+CHUNK_INSERT = 5000
+
+
+def _elegir(rng, distribucion):
+    return rng.choices(list(distribucion), weights=list(distribucion.values()))[0]
+
+
+def _parse_mezcla(valor):
+    """
+    Convierte 'constante=0.5,irregular=0.3,abandono=0.2' en un diccionario de pesos.
+    """
+    mezcla = {}
+    for parte in valor.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in MODELOS_COMPORTAMIENTO:
+            raise CommandError(
+                f"Modelo de comportamiento desconocido: {nombre!r} "
+                f"(disponibles: {', '.join(MODELOS_COMPORTAMIENTO)})"
+            )
+        try:
+            mezcla[nombre] = float(peso or 1)
+        except ValueError:
+            raise CommandError(f'Peso inválido para {nombre}: {peso!r}')
+    return mezcla
+
+
+def _convertidor(campo, conexion):
+    """
+    Devuelve la función que adapta un valor Python al formato del motor,
+    o None si el valor se puede enviar tal cual (enteros, textos, booleanos).
+    """
+    tipo = campo.get_internal_type()
+    if tipo == 'DateTimeField':
+        return conexion.ops.adapt_datetimefield_value
+    if tipo == 'DecimalField':
+        return lambda valor: conexion.ops.adapt_decimalfield_value(
+            valor, campo.max_digits, campo.decimal_places
+        )
+    return None
+
+
+def insertar_filas(modelo, columnas, filas):
+    """
+    Inserta filas crudas (tuplas en el orden de `columnas`) sin pasar por save()
+    ni por los auto_now_add, para conservar las fechas simuladas.
+    En PostgreSQL usa COPY; en otros motores, executemany en bloques.
+    """
+    if not filas:
+        return
+    conexion = connections[DEFAULT_DB_ALIAS]
+    campos = [modelo._meta.get_field(columna) for columna in columnas]
+    tabla = conexion.ops.quote_name(modelo._meta.db_table)
+    nombres = ', '.join(conexion.ops.quote_name(campo.column) for campo in campos)
+    convertidores = [_convertidor(campo, conexion) for campo in campos]
+
+    def preparar(fila):
+        return [
+            valor if convertir is None or valor is None else convertir(valor)
+            for convertir, valor in zip(convertidores, fila)
+        ]
+
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for fila in filas:
+                writer.writerow([r'\N' if valor is None else valor for valor in preparar(fila)])
+            buffer.seek(0)
+            sql = f"COPY {tabla} ({nombres}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            crudo = cursor.cursor
+            if hasattr(crudo, 'copy_expert'):
+                # psycopg2
+                crudo.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with crudo.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        else:
+            marcadores = ', '.join(['%s'] * len(campos))
+            sql = f'INSERT INTO {tabla} ({nombres}) VALUES ({marcadores})'
+            for inicio in range(0, len(filas), CHUNK_INSERT):
+                cursor.executemany(sql, [preparar(fila) for fila in filas[inicio:inicio + CHUNK_INSERT]])
+
+
+class _Simulador:
+    """
+    Simula el recorrido de un estudiante por el catálogo y acumula las filas
+    de sesiones, actividades, progreso, intentos y respuestas.
+    """
+
+    def __init__(self, rng, catalogo, desde, hasta):
+        self.rng = rng
+        self.catalogo = catalogo
+        self.desde = desde
+        self.hasta = hasta
+        self.sesiones = []
+        self.actividades = []
+        self.progreso_lecciones = []
+        self.progreso_temas = []
+        self.intentos = []
+        self.respuestas = []
+
+    def simular(self, usuario_id, modelo):
+        self.usuario_id = usuario_id
+        self.modelo = modelo
+        self.reloj = self.desde + timedelta(
+            seconds=self.rng.uniform(0, (self.hasta - self.desde).total_seconds() / 2)
+        )
+        self._abrir_sesion()
+
+        for leccion_id, temas in self.catalogo:
+            if self.reloj >= self.hasta:
+                break
+            inicio_leccion = self.reloj
+            completados = 0
+            for tema_id, ejercicios in temas:
+                self._actividad('DETALLE_LECCION', 10, 60, leccion_id=leccion_id)
+                if self._simular_tema(leccion_id, tema_id, ejercicios) != 'COMPLETADO':
+                    # El siguiente tema no llega a desbloquearse
+                    break
+                completados += 1
+
+            porcentaje = Decimal(completados * 100 / len(temas)).quantize(Decimal('0.01')) if temas else Decimal('0')
+            estado = 'COMPLETADA' if temas and completados == len(temas) else 'EN_PROGRESO'
+            self.progreso_lecciones.append((
+                self.usuario_id, leccion_id, estado, inicio_leccion,
+                self.reloj if estado == 'COMPLETADA' else None, porcentaje,
+            ))
+            if estado != 'COMPLETADA':
+                break
+
+        self._cerrar_sesion()
+
+    def _simular_tema(self, leccion_id, tema_id, ejercicios):
+        m = self.modelo
+        clave = (self.usuario_id, tema_id)
+        fecha_inicio = self.reloj
+        estado = 'INICIADO'
+        porcentaje = Decimal('0')
+        fecha_completado = None
+        respuestas_intento = []
+        intentos = 0
+
+        while intentos < m['max_intentos']:
+            if self.reloj >= self.hasta or self.rng.random() < m['prob_abandono_tema']:
+                break
+            self._actividad('CONTENIDO_TEMA', 60, 400, leccion_id=leccion_id, tema_id=tema_id)
+
+            inicio_intento = self.reloj
+            respuestas_intento = []
+            for ejercicio_id, tipo, respuesta_correcta in ejercicios:
+                es_correcta = self.rng.random() < m['prob_acierto']
+                segundos = max(5, int(self.rng.expovariate(1 / m['segundos_por_ejercicio'])))
+                self._avanzar(segundos)
+                respuestas_intento.append([
+                    self.usuario_id, ejercicio_id, clave,
+                    respuesta_correcta if es_correcta else ('Z' if tipo == 'MULTIPLE' else 'no sé'),
+                    es_correcta, self.rng.random() < m['prob_ayuda'], segundos, self.reloj,
+                ])
+            self._actividad_cerrada('EJERCICIOS', inicio_intento, leccion_id=leccion_id, tema_id=tema_id)
+
+            intentos += 1
+            correctas = sum(1 for r in respuestas_intento if r[4])
+            total = len(ejercicios)
+            anterior = porcentaje
+            porcentaje = Decimal(correctas * 100 / total if total else 0).quantize(Decimal('0.01'))
+            aprobado = porcentaje >= 80
+            tiempo_total = sum(r[6] for r in respuestas_intento)
+            self.intentos.append([
+                self.usuario_id, tema_id, clave, intentos, correctas, total - correctas, total,
+                porcentaje, sum(1 for r in respuestas_intento if r[5]), tiempo_total,
+                tiempo_total // total if total else 0, aprobado, inicio_intento, self.reloj,
+                porcentaje - anterior if intentos > 1 else Decimal('0'),
+            ])
+            if aprobado:
+                estado = 'COMPLETADO'
+                fecha_completado = self.reloj
+                break
+
+        # Solo se conservan las respuestas del último intento (reintentar borra las anteriores)
+        self.respuestas.extend(respuestas_intento)
+        if intentos == 0:
+            estado = 'SIN_INICIAR'
+        self.progreso_temas.append((
+            self.usuario_id, tema_id, estado, True,
+            fecha_inicio if intentos else None, fecha_completado, porcentaje, intentos,
+        ))
+        return estado
+
+    def _actividad(self, tipo, minimo, maximo, leccion_id=None, tema_id=None):
+        inicio = self.reloj
+        self._avanzar(self.rng.randint(minimo, maximo))
+        self._actividad_cerrada(tipo, inicio, leccion_id=leccion_id, tema_id=tema_id)
+
+    def _actividad_cerrada(self, tipo, inicio, leccion_id=None, tema_id=None):
+        if self.rng.random() < self.modelo['prob_actividad_sin_cerrar']:
+            fin, segundos = None, 0
+        else:
+            fin = self.reloj
+            segundos = int((fin - inicio).total_seconds())
+        volver = self.rng.randint(0, 2) if tipo == 'CONTENIDO_TEMA' else 0
+        self.actividades.append((self.usuario_id, tipo, inicio, fin, segundos, leccion_id, tema_id, volver))
+
+    def _avanzar(self, segundos):
+        self.reloj += timedelta(seconds=segundos)
+        if self.reloj >= self.fin_sesion:
+            self._cerrar_sesion()
+            dias = self.rng.expovariate(self.modelo['sesiones_por_semana'] / 7)
+            self.reloj += timedelta(days=dias, hours=self.rng.uniform(0, 6))
+            self._abrir_sesion()
+
+    def _abrir_sesion(self):
+        self.inicio_sesion = self.reloj
+        minutos = max(5, self.rng.gauss(self.modelo['minutos_por_sesion'], self.modelo['minutos_por_sesion'] / 3))
+        self.fin_sesion = self.reloj + timedelta(minutes=minutos)
+        self._actividad_cerrada('LISTA_LECCIONES', self.reloj)
+
+    def _cerrar_sesion(self):
+        if self.rng.random() < self.modelo['prob_sesion_sin_cerrar']:
+            fin, minutos = None, 0
+        else:
+            fin = self.reloj
+            minutos = int((fin - self.inicio_sesion).total_seconds() // 60)
+        # El último latido llega con la última actividad, aunque la sesión quede sin cerrar
+        self.sesiones.append((self.usuario_id, self.inicio_sesion, fin, minutos, self.reloj))
+
+
+def _cargar_catalogo():
+    """
+    Devuelve [(leccion_id, [(tema_id, [(ejercicio_id, tipo, respuesta_correcta), ...]), ...]), ...]
+    con las lecciones y temas activos en orden.
+    """
+    ejercicios_por_tema = {}
+    for ejercicio_id, tema_id, tipo, respuesta in Ejercicio.objects.filter(
+        tema__is_active=True, tema__leccion__is_active=True
+    ).order_by('orden').values_list('id', 'tema_id', 'tipo', 'respuesta_correcta'):
+        ejercicios_por_tema.setdefault(tema_id, []).append((ejercicio_id, tipo, respuesta))
+
+    catalogo = []
+    for tema in Tema.objects.filter(is_active=True, leccion__is_active=True).order_by('leccion__orden', 'orden'):
+        if not catalogo or catalogo[-1][0] != tema.leccion_id:
+            catalogo.append((tema.leccion_id, []))
+        catalogo[-1][1].append((tema.id, ejercicios_por_tema.get(tema.id, [])))
+    return catalogo
+
+
+def _generar_chunk(parametros):
+    """
+    Crea un bloque de estudiantes con todo su historial dentro de una transacción.
+    Se ejecuta en el proceso principal o en un worker del pool.
+    """
+    (indice_chunk, primer_numero, cantidad, prefijo, password_hash,
+     catalogo, mezcla, semilla, desde, hasta) = parametros
+    rng = random.Random(semilla * 1_000_003 + indice_chunk)
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        usuarios = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'{prefijo}{numero:07d}',
+                password=password_hash,
+                grupo=_elegir(rng, DISTRIBUCION_GRUPO),
+                especialidad=_elegir(rng, DISTRIBUCION_ESPECIALIDAD),
+                genero=_elegir(rng, DISTRIBUCION_GENERO),
+                edad=_elegir(rng, DISTRIBUCION_EDAD),
+                date_joined=ahora,
+            )
+            for numero in range(primer_numero, primer_numero + cantidad)
+        ], batch_size=1000)
+        if any(usuario.pk is None for usuario in usuarios):
+            # Motores sin RETURNING en bulk_create
+            ids = dict(CustomUser.objects.filter(
+                username__in=[u.username for u in usuarios]
+            ).values_list('username', 'id'))
+            for usuario in usuarios:
+                usuario.pk = ids[usuario.username]
+
+        simulador = _Simulador(rng, catalogo, desde, hasta)
+        for usuario in usuarios:
+            simulador.simular(usuario.pk, MODELOS_COMPORTAMIENTO[_elegir(rng, mezcla)])
+
+        insertar_filas(
+            SesionEstudio, ['usuario_id', 'fecha_inicio', 'fecha_fin', 'duracion_minutos', 'ultima_actividad'],
+            simulador.sesiones,
+        )
+        insertar_filas(
+            ActividadPantalla,
+            ['usuario_id', 'tipo_pantalla', 'tiempo_inicio', 'tiempo_fin', 'tiempo_segundos',
+             'leccion_id', 'tema_id', 'veces_volver_contenido'],
+            simulador.actividades,
+        )
+        insertar_filas(
+            ProgresoLeccion,
+            ['usuario_id', 'leccion_id', 'estado', 'fecha_inicio', 'fecha_completado', 'porcentaje_completado'],
+            simulador.progreso_lecciones,
+        )
+        insertar_filas(
+            ProgresoTema,
+            ['usuario_id', 'tema_id', 'estado', 'desbloqueado', 'fecha_inicio',
+             'fecha_completado', 'porcentaje_acierto', 'intentos_realizados'],
+            simulador.progreso_temas,
+        )
+
+        # Resolver los IDs de ProgresoTema recién insertados
+        progreso_ids = {
+            (usuario_id, tema_id): progreso_id
+            for usuario_id, tema_id, progreso_id in ProgresoTema.objects.filter(
+                usuario_id__in=[u.pk for u in usuarios]
+            ).values_list('usuario_id', 'tema_id', 'id')
+        }
+        for fila in simulador.intentos:
+            fila[2] = progreso_ids[fila[2]]
+        for fila in simulador.respuestas:
+            fila[2] = progreso_ids[fila[2]]
+
+        insertar_filas(
+            IntentoTema,
+            ['usuario_id', 'tema_id', 'progreso_tema_id', 'numero_intento', 'ejercicios_correctos',
+             'ejercicios_incorrectos', 'ejercicios_totales', 'porcentaje_acierto', 'ejercicios_con_ayuda',
+             'tiempo_total_segundos', 'tiempo_promedio_por_ejercicio', 'aprobado', 'fecha_inicio',
+             'fecha_finalizacion', 'mejora_porcentaje'],
+            simulador.intentos,
+        )
+        insertar_filas(
+            RespuestaEjercicio,
+            ['usuario_id', 'ejercicio_id', 'progreso_tema_id', 'respuesta_usuario', 'es_correcta',
+             'uso_ayuda', 'tiempo_respuesta_segundos', 'fecha_respuesta'],
+            simulador.respuestas,
+        )
+
+    return {
+        'usuarios': len(usuarios),
+        'sesiones': len(simulador.sesiones),
+        'actividades': len(simulador.actividades),
+        'progreso_lecciones': len(simulador.progreso_lecciones),
+        'progreso_temas': len(simulador.progreso_temas),
+        'intentos': len(simulador.intentos),
+        'respuestas': len(simulador.respuestas),
+    }
+
+
+def _inicializar_worker():
+    # Cada proceso abre su propia conexión a la base de datos
+    import django
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera estudiantes sintéticos con sesiones, progreso, intentos, respuestas y '
+        'actividad de pantalla para pruebas de rendimiento.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=100,
+                            help='Cantidad de estudiantes a generar (default: 100)')
+        parser.add_argument('--mezcla', default='constante=0.5,irregular=0.35,abandono=0.15',
+                            help='Pesos de los modelos de comportamiento, p. ej. constante=0.5,abandono=0.5')
+        parser.add_argument('--dias', type=int, default=120,
+                            help='Días de historial a simular hacia atrás desde hoy (default: 120)')
+        parser.add_argument('--prefijo', default='carga_',
+                            help="Prefijo de los usernames generados (default: 'carga_')")
+        parser.add_argument('--password', default='carga12345',
+                            help='Contraseña común de los estudiantes generados')
+        parser.add_argument('--chunk', type=int, default=500,
+                            help='Estudiantes por transacción (default: 500)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Procesos en paralelo (solo PostgreSQL; en SQLite se usa 1)')
+        parser.add_argument('--semilla', type=int, default=42,
+                            help='Semilla para que la generación sea reproducible')
+        parser.add_argument('--limpiar', action='store_true',
+                            help='Elimina antes a los usuarios con el mismo prefijo y su historial')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        for opcion in ('estudiantes', 'dias', 'chunk', 'workers'):
+            if options[opcion] < 1:
+                raise CommandError(f'--{opcion} debe ser al menos 1 (recibido: {options[opcion]})')
+        prefijo = options['prefijo']
+        mezcla = _parse_mezcla(options['mezcla'])
+        workers = options['workers']
+        if connection.vendor != 'postgresql' and workers > 1:
+            self.stdout.write(self.style.WARNING('SQLite no admite escrituras en paralelo; se usará 1 worker'))
+            workers = 1
+
+        existentes = CustomUser.objects.filter(username__startswith=prefijo)
+        if existentes.exists():
+            if not options['limpiar']:
+                raise CommandError(
+                    f"Ya existen usuarios con el prefijo '{prefijo}'. Usa --limpiar o cambia --prefijo."
+                )
+            eliminados, _ = existentes.delete()
+            self.stdout.write(f'  - Eliminadas {eliminados} filas de una generación anterior')
+
+        catalogo = _cargar_catalogo()
+        if not catalogo:
+            raise CommandError('No hay lecciones activas. Carga el contenido con load_curriculum primero.')
+
+        hasta = timezone.now()
+        desde = hasta - timedelta(days=options['dias'])
+        password_hash = make_password(options['password'])
+
+        tareas = []
+        for indice, primero in enumerate(range(0, options['estudiantes'], options['chunk'])):
+            cantidad = min(options['chunk'], options['estudiantes'] - primero)
+            tareas.append((indice, primero + 1, cantidad, prefijo, password_hash,
+                           catalogo, mezcla, options['semilla'], desde, hasta))
+
+        totales = {}
+        if workers > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+                resultados = pool.map(_generar_chunk, tareas)
+                for numero, resultado in enumerate(resultados, start=1):
+                    self._acumular(totales, resultado, numero, len(tareas))
+        else:
+            for numero, tarea in enumerate(tareas, start=1):
+                self._acumular(totales, _generar_chunk(tarea), numero, len(tareas))
+
+        duracion = time.perf_counter() - inicio
+        filas = sum(totales.values())
+        for nombre, valor in totales.items():
+            self.stdout.write(f'  - {nombre}: {valor}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{filas} filas generadas en {duracion:.1f}s ({filas / duracion:,.0f} filas/s)'
+        ))
+
+    def _acumular(self, totales, resultado, numero, total_chunks):
+        for clave, valor in resultado.items():
+            totales[clave] = totales.get(clave, 0) + valor
+        self.stdout.write(f'  Bloque {numero}/{total_chunks} listo ({resultado["usuarios"]} estudiantes)')
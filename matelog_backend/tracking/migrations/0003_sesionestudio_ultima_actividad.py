@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:27
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def inicializar_ultima_actividad(apps, schema_editor):
+    # Sesiones existentes: la última actividad conocida es el cierre o, si no hay, el inicio
+    SesionEstudio = apps.get_model("tracking", "SesionEstudio")
+    SesionEstudio.objects.update(ultima_actividad=Coalesce("fecha_fin", "fecha_inicio"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0002_alter_actividadpantalla_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sesionestudio",
+            name="ultima_actividad",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="Último latido del frontend; la sesión se reanuda si es reciente",
+            ),
+        ),
+        migrations.RunPython(inicializar_ultima_actividad, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="sesionestudio",
+            index=models.Index(
+                fields=["usuario", "ultima_actividad"], name="sesion_usuario_actividad_idx"
+            ),
+        ),
+    ]
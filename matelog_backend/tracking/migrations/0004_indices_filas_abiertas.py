@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracking", "0003_sesionestudio_ultima_actividad"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="actividadpantalla",
+            index=models.Index(
+                fields=["usuario", "tiempo_inicio"], name="actividad_usuario_inicio_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="actividadpantalla",
+            index=models.Index(
+                condition=models.Q(("tiempo_fin__isnull", True)),
+                fields=["id"],
+                name="actividad_abierta_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sesionestudio",
+            index=models.Index(
+                condition=models.Q(("fecha_fin__isnull", True)),
+                fields=["id"],
+                name="sesion_abierta_idx",
+            ),
+        ),
+    ]
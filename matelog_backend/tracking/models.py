@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from lessons.models import Leccion, Tema, Ejercicio
 
 
@@ -15,6 +18,10 @@ class SesionEstudio(models.Model):
     )
     fecha_inicio = models.DateTimeField(auto_now_add=True)
     fecha_fin = models.DateTimeField(null=True, blank=True)
+    ultima_actividad = models.DateTimeField(
+        default=timezone.now,
+        help_text="Último latido del frontend; la sesión se reanuda si es reciente"
+    )
     duracion_minutos = models.IntegerField(
         default=0,
         help_text="Duración total de la sesión en minutos"
@@ -24,6 +31,12 @@ class SesionEstudio(models.Model):
         verbose_name = 'Sesión de Estudio'
         verbose_name_plural = 'Sesiones de Estudio'
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Búsqueda de la sesión abierta a reanudar
+            models.Index(fields=['usuario', 'ultima_actividad'], name='sesion_usuario_actividad_idx'),
+            # Recorrido por id de las sesiones abiertas (close_abandoned)
+            models.Index(fields=['id'], condition=models.Q(fecha_fin__isnull=True), name='sesion_abierta_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.username} - {self.fecha_inicio.strftime('%Y-%m-%d %H:%M')}"
@@ -213,6 +226,12 @@ class ActividadPantalla(models.Model):
         verbose_name = 'Actividad de Pantalla'
         verbose_name_plural = 'Actividades de Pantalla'
         ordering = ['-tiempo_inicio']
+        indexes = [
+            # Siguiente actividad del estudiante (fin estimado en close_abandoned)
+            models.Index(fields=['usuario', 'tiempo_inicio'], name='actividad_usuario_inicio_idx'),
+            # Recorrido por id de las actividades abiertas (close_abandoned)
+            models.Index(fields=['id'], condition=models.Q(tiempo_fin__isnull=True), name='actividad_abierta_idx'),
+        ]
 
     def __str__(self):
         usuario_str = self.usuario.username if self.usuario else "Anónimo"
@@ -324,7 +343,8 @@ class IntentoTema(models.Model):
             ).first()
             
             if intento_anterior:
-                self.mejora_porcentaje = self.porcentaje_acierto - intento_anterior.porcentaje_acierto
+                # porcentaje_acierto puede venir como float desde la vista
+                self.mejora_porcentaje = Decimal(str(self.porcentaje_acierto)) - intento_anterior.porcentaje_acierto
             else:
                 self.mejora_porcentaje = 0
         else:
@@ -1,3 +1,484 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import models, transaction
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from matelog_backend.limites import _TokenBucketThrottle
+from matelog_backend.replica import ReplicaRouter, leer_de_replica
+from matelog_backend.testing import PresupuestoMixin, crear_catalogo, crear_estudiante, crear_historial
+from monitoring import metricas
+from tracking.models import (
+    ActividadPantalla, IntentoTema, ProgresoLeccion, ProgresoTema, RespuestaEjercicio, SesionEstudio,
+)
+from users.authentication import emitir_tokens
+from users.models import CustomUser
+from . import async_views
+
+
+class PresupuestoTrackingTests(PresupuestoMixin, TestCase):
+    """
+    Presupuesto de consultas SQL y tiempo para cada URL de tracking.urls.
+    Son las llamadas más frecuentes del frontend (una o dos por pantalla).
+    """
+    urlconf = 'tracking.urls'
+    presupuestos = {
+        # nombre_url: (max_queries, max_ms)
+        'iniciar-sesion': (4, 50),
+        'latido-sesion': (3, 50),
+        'finalizar-sesion': (4, 50),
+        'iniciar-actividad': (3, 50),
+        'finalizar-actividad': (4, 50),
+        'volver-contenido': (4, 50),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_iniciar_sesion(self):
+        self.assertPresupuesto('iniciar-sesion', 'POST', '/api/tracking/sesion/iniciar/', status=201)
+
+    def test_iniciar_sesion_reanuda(self):
+        abierta = SesionEstudio.objects.create(usuario=self.usuario)
+        respuesta = self.assertPresupuesto('iniciar-sesion', 'POST', '/api/tracking/sesion/iniciar/')
+        self.assertEqual(respuesta.json()['sesion_id'], abierta.id)
+        self.assertTrue(respuesta.json()['reanudada'])
+
+        # Sin actividad dentro de la ventana se abre otra
+        SesionEstudio.objects.update(ultima_actividad=timezone.now() - timedelta(hours=1))
+        respuesta = self.client.post('/api/tracking/sesion/iniciar/', secure=True)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertNotEqual(respuesta.json()['sesion_id'], abierta.id)
+
+    def test_latido_sesion(self):
+        sesion = SesionEstudio.objects.create(
+            usuario=self.usuario, ultima_actividad=timezone.now() - timedelta(minutes=2)
+        )
+        respuesta = self.assertPresupuesto('latido-sesion', 'POST', '/api/tracking/sesion/latido/', {
+            'sesion_id': sesion.id,
+        })
+        self.assertTrue(respuesta.json()['actualizada'])
+        sesion.refresh_from_db()
+        self.assertGreater(sesion.ultima_actividad, timezone.now() - timedelta(seconds=5))
+
+        # Otro latido dentro del mismo minuto no modifica la fila
+        ultima_actividad = sesion.ultima_actividad
+        respuesta = self.client.post('/api/tracking/sesion/latido/', {'sesion_id': sesion.id},
+                                     content_type='application/json', secure=True)
+        self.assertFalse(respuesta.json()['actualizada'])
+        sesion.refresh_from_db()
+        self.assertEqual(sesion.ultima_actividad, ultima_actividad)
+
+    def test_latido_sesion_expirada(self):
+        sesion = SesionEstudio.objects.create(
+            usuario=self.usuario, ultima_actividad=timezone.now() - timedelta(hours=1)
+        )
+        respuesta = self.client.post('/api/tracking/sesion/latido/', {'sesion_id': sesion.id},
+                                     content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 404)
+        sesion.refresh_from_db()
+        self.assertLess(sesion.ultima_actividad, timezone.now() - timedelta(minutes=59))
+
+    def test_finalizar_sesion(self):
+        sesion = SesionEstudio.objects.create(usuario=self.usuario)
+        self.assertPresupuesto('finalizar-sesion', 'POST', '/api/tracking/sesion/finalizar/', {
+            'sesion_id': sesion.id,
+        })
+
+    def test_iniciar_actividad(self):
+        self.assertPresupuesto('iniciar-actividad', 'POST', '/api/tracking/iniciar/', {
+            'tipo_pantalla': 'CONTENIDO_TEMA', 'metadata': {'leccion_id': 1, 'tema_id': 1},
+        }, status=201)
+
+    def test_iniciar_actividad_anonima(self):
+        self.client.logout()
+        self.assertPresupuesto('iniciar-actividad', 'POST', '/api/tracking/iniciar/', {
+            'tipo_pantalla': 'LOGIN',
+        }, status=201)
+
+    def test_finalizar_actividad(self):
+        actividad = ActividadPantalla.objects.create(usuario=self.usuario, tipo_pantalla='EJERCICIOS')
+        self.assertPresupuesto('finalizar-actividad', 'POST', '/api/tracking/finalizar/', {
+            'actividad_id': actividad.id,
+        })
+
+    def test_volver_contenido(self):
+        actividad = ActividadPantalla.objects.create(usuario=self.usuario, tipo_pantalla='CONTENIDO_TEMA')
+        respuesta = self.assertPresupuesto('volver-contenido', 'POST', '/api/tracking/volver-contenido/', {
+            'actividad_id': actividad.id,
+        })
+        self.assertEqual(respuesta.json()['veces_volver'], 1)
+
+
+
+# URLconf de prueba: las vistas async de tracking (ASYNC_VIEWS=True)
+urlpatterns = [
+    path('api/tracking/sesion/iniciar/', async_views.IniciarSesionView.as_view(), name='iniciar-sesion'),
+    path('api/tracking/sesion/latido/', async_views.LatidoSesionView.as_view(), name='latido-sesion'),
+    path('api/tracking/sesion/finalizar/', async_views.FinalizarSesionView.as_view(), name='finalizar-sesion'),
+    path('api/tracking/iniciar/', async_views.IniciarActividadView.as_view(), name='iniciar-actividad'),
+    path('api/tracking/finalizar/', async_views.FinalizarActividadView.as_view(), name='finalizar-actividad'),
+    path('api/tracking/volver-contenido/', async_views.RegistrarVolverContenidoView.as_view(), name='volver-contenido'),
+    path('', include('matelog_backend.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PresupuestoTrackingAsyncTests(PresupuestoTrackingTests):
+    """
+    Los mismos presupuestos con las vistas async de tracking/async_views.py.
+    """
+
+    def test_csrf_para_usuarios_autenticados(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.usuario)
+        respuesta = client.post('/api/tracking/sesion/iniciar/', secure=True)
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertIn('CSRF Failed', respuesta.json()['detail'])
+
+    def test_actividad_anonima_sin_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        respuesta = client.post('/api/tracking/iniciar/', {'tipo_pantalla': 'LOGIN'},
+                                content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_token_firmado(self):
+        client = Client(enforce_csrf_checks=True)
+        access = emitir_tokens(self.usuario)['access']
+        respuesta = client.post('/api/tracking/sesion/iniciar/', headers={'Authorization': f'Bearer {access}'}, secure=True)
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_json_invalido(self):
+        respuesta = self.client.post('/api/tracking/finalizar/', '{', content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_metodo_no_permitido(self):
+        respuesta = self.client.get('/api/tracking/sesion/iniciar/', secure=True)
+        self.assertEqual(respuesta.status_code, 405)
+
+    @override_settings(MONITORING_SERVER_TIMING=True)
+    async def test_cliente_asgi(self):
+        # Cadena de middlewares en modo async: Server-Timing debe contar el SQL del ORM async
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.post('/api/tracking/sesion/iniciar/', secure=True)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertRegex(respuesta['Server-Timing'], r'sql;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_CLASSES': ['matelog_backend.limites.LimitePorIP', 'matelog_backend.limites.LimitePorUsuario'],
+    'DEFAULT_THROTTLE_RATES': {
+        'tracking_ip': '6/min', 'tracking_usuario': '3/min',
+        'aprendizaje_ip': '100/min', 'aprendizaje_usuario': '100/min',
+    },
+})
+class LimitesTests(TestCase):
+    """
+    Token buckets por IP y por usuario de matelog_backend/limites.py.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def setUp(self):
+        cache.clear()
+        self.reloj = [1000.0]
+        patcher = mock.patch.object(_TokenBucketThrottle, 'timer', lambda _: self.reloj[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def iniciar_actividad(self, client=None):
+        return (client or self.client).post('/api/tracking/iniciar/', {'tipo_pantalla': 'LOGIN'},
+                                            content_type='application/json', secure=True)
+
+    def rechazos(self, limite):
+        return metricas.LIMITES_RECHAZADOS.valores.get(('tracking', limite), 0)
+
+    def test_limite_por_ip_para_anonimos(self):
+        rechazos = self.rechazos('ip')
+        for _ in range(6):
+            self.assertEqual(self.iniciar_actividad().status_code, 201)
+
+        # El rechazo no toca la base de datos
+        with self.assertNumQueries(0):
+            respuesta = self.iniciar_actividad()
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertEqual(respuesta['Retry-After'], '10')
+        self.assertEqual(self.rechazos('ip'), rechazos + 1)
+        self.assertEqual(ActividadPantalla.objects.count(), 6)
+
+        # El bucket se recarga con el tiempo (6 por minuto: uno cada 10 s)
+        self.reloj[0] += 10
+        self.assertEqual(self.iniciar_actividad().status_code, 201)
+        self.assertEqual(self.iniciar_actividad().status_code, 429)
+
+    def test_limite_por_usuario(self):
+        rechazos = self.rechazos('usuario')
+        self.client.force_login(self.usuario)
+        for _ in range(3):
+            self.assertEqual(self.iniciar_actividad().status_code, 201)
+        self.assertEqual(self.iniciar_actividad().status_code, 429)
+        self.assertEqual(self.rechazos('usuario'), rechazos + 1)
+
+        # Otro estudiante desde la misma IP tiene su propio bucket
+        otro = Client()
+        otro.force_login(crear_estudiante('otro'))
+        self.assertEqual(self.iniciar_actividad(otro).status_code, 201)
+
+    def test_alcances_separados(self):
+        self.client.force_login(self.usuario)
+        for _ in range(4):
+            self.iniciar_actividad()
+        self.assertEqual(self.iniciar_actividad().status_code, 429)
+        self.assertEqual(self.client.get('/api/lessons/lecciones/', secure=True).status_code, 200)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []})
+    def test_desactivado(self):
+        for _ in range(10):
+            self.assertEqual(self.iniciar_actividad().status_code, 201)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LimitesAsyncTests(LimitesTests):
+    """
+    Los mismos límites en las vistas async de tracking.
+    """
+
+
+class CerrarAbandonadasTests(TestCase):
+    """
+    Comando close_abandoned: cierre en lotes con fin estimado.
+    """
+
+    def setUp(self):
+        self.ahora = timezone.now()
+        self.usuario = crear_estudiante()
+
+    def hace(self, **kwargs):
+        return self.ahora - timedelta(**kwargs)
+
+    def sesion(self, inicio, ultima_actividad, **kwargs):
+        sesion = SesionEstudio.objects.create(usuario=self.usuario, **kwargs)
+        SesionEstudio.objects.filter(id=sesion.id).update(fecha_inicio=inicio, ultima_actividad=ultima_actividad)
+        return sesion
+
+    def actividad(self, inicio, usuario=None, **kwargs):
+        actividad = ActividadPantalla.objects.create(usuario=usuario, tipo_pantalla='EJERCICIOS', **kwargs)
+        ActividadPantalla.objects.filter(id=actividad.id).update(tiempo_inicio=inicio)
+        return actividad
+
+    def cerrar(self, **opciones):
+        salida = StringIO()
+        call_command('close_abandoned', pausa=0, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_fin_estimado(self):
+        sesion = self.sesion(self.hace(hours=5), self.hace(hours=4))
+        primera = self.actividad(self.hace(hours=4, minutes=10), self.usuario)
+        # Evento después del último latido, antes de que la sesión expirara
+        self.actividad(self.hace(hours=4, minutes=5), self.usuario, tiempo_fin=self.hace(hours=3, minutes=58))
+        ultima = self.actividad(self.hace(hours=3, minutes=55), self.usuario)
+        anonima = self.actividad(self.hace(hours=3))
+        reciente = self.actividad(self.hace(minutes=10), crear_estudiante('otro'))
+
+        self.assertIn('1 sesiones y 3 actividades cerradas', self.cerrar())
+
+        sesion.refresh_from_db()
+        self.assertEqual(sesion.fecha_fin, self.hace(hours=3, minutes=55))
+        self.assertEqual(sesion.duracion_minutos, 65)
+
+        # Hasta la siguiente actividad del estudiante
+        primera.refresh_from_db()
+        self.assertEqual(primera.tiempo_segundos, 300)
+        # Sin actividad siguiente: hasta el último latido de su sesión (el cierre estimado)
+        ultima.refresh_from_db()
+        self.assertEqual(ultima.tiempo_fin, sesion.fecha_fin)
+        self.assertEqual(ultima.tiempo_segundos, 0)
+
+        anonima.refresh_from_db()
+        self.assertEqual(anonima.tiempo_fin, anonima.tiempo_inicio)
+        reciente.refresh_from_db()
+        self.assertIsNone(reciente.tiempo_fin)
+
+    def test_duracion_maxima_de_actividad(self):
+        actividad = self.actividad(self.hace(days=2), self.usuario)
+        self.actividad(self.hace(days=1), self.usuario, tiempo_fin=self.hace(days=1))
+        self.cerrar(max_actividad=30)
+        actividad.refresh_from_db()
+        self.assertEqual(actividad.tiempo_segundos, 30 * 60)
+
+    def test_sesion_activa_no_se_cierra(self):
+        sesion = self.sesion(self.hace(hours=5), self.hace(minutes=5))
+        self.cerrar()
+        sesion.refresh_from_db()
+        self.assertIsNone(sesion.fecha_fin)
+
+    def test_lotes(self):
+        for i in range(5):
+            self.actividad(self.hace(hours=10, minutes=i), self.usuario)
+        self.assertIn('0 sesiones y 5 actividades cerradas en 3 lotes', self.cerrar(lote=2))
+        self.assertFalse(ActividadPantalla.objects.filter(tiempo_fin__isnull=True).exists())
+
+
+class GenerarDatosCargaTests(TestCase):
+    """
+    Comando generate_load_data sobre la base de pruebas (SQLite: executemany).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_catalogo(lecciones=2, temas_por_leccion=2, contenidos_por_tema=1, ejercicios_por_tema=4)
+
+    def generar(self, **opciones):
+        salida = StringIO()
+        call_command('generate_load_data', stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_cantidad_de_filas(self):
+        # Bloques de inserción chicos para pasar varias veces por executemany
+        with mock.patch('tracking.management.commands.generate_load_data.CHUNK_INSERT', 7):
+            salida = self.generar(estudiantes=25, chunk=10)
+        self.assertIn('Bloque 3/3 listo (5 estudiantes)', salida)
+
+        usuarios = CustomUser.objects.filter(username__startswith='carga_')
+        self.assertEqual(usuarios.count(), 25)
+        filtro = {'usuario__in': usuarios}
+        for nombre, modelo in [
+            ('sesiones', SesionEstudio), ('actividades', ActividadPantalla),
+            ('progreso_lecciones', ProgresoLeccion), ('progreso_temas', ProgresoTema),
+            ('intentos', IntentoTema), ('respuestas', RespuestaEjercicio),
+        ]:
+            cantidad = modelo.objects.filter(**filtro).count()
+            self.assertIn(f'  - {nombre}: {cantidad}\n', salida)
+        # Cada estudiante empieza al menos la primera lección
+        self.assertGreaterEqual(ProgresoLeccion.objects.filter(**filtro).count(), 25)
+        # Las respuestas apuntan al progreso del mismo estudiante
+        self.assertFalse(RespuestaEjercicio.objects.filter(**filtro).exclude(
+            progreso_tema__usuario=models.F('usuario')
+        ).exists())
+
+    def test_limpiar(self):
+        self.generar(estudiantes=5, chunk=5)
+        with self.assertRaisesMessage(CommandError, 'Ya existen usuarios'):
+            self.generar(estudiantes=5, chunk=5)
+        self.generar(estudiantes=3, chunk=5, limpiar=True)
+        self.assertEqual(CustomUser.objects.filter(username__startswith='carga_').count(), 3)
+
+    def test_argumentos_invalidos(self):
+        for opciones, mensaje in [
+            ({'chunk': 0}, '--chunk debe ser al menos 1'),
+            ({'estudiantes': -5}, '--estudiantes debe ser al menos 1'),
+            ({'workers': -1}, '--workers debe ser al menos 1'),
+            ({'dias': 0}, '--dias debe ser al menos 1'),
+        ]:
+            with self.subTest(**opciones), self.assertRaisesMessage(CommandError, mensaje):
+                self.generar(**opciones)
+        self.assertFalse(CustomUser.objects.filter(username__startswith='carga_').exists())
+
+    def test_sesiones_con_ultima_actividad(self):
+        # Las filas crudas deben traer todas las columnas NOT NULL (ultima_actividad no tiene default en la base)
+        self.generar(estudiantes=30, chunk=10)
+        sesiones = SesionEstudio.objects.filter(usuario__username__startswith='carga_')
+        self.assertTrue(sesiones.exists())
+        for inicio, fin, ultima_actividad in sesiones.values_list('fecha_inicio', 'fecha_fin', 'ultima_actividad'):
+            self.assertGreaterEqual(ultima_actividad, inicio)
+            if fin is not None:
+                self.assertEqual(ultima_actividad, fin)
+
+
+@mock.patch('matelog_backend.replica.replica_disponible', return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_lecturas_en_primario_por_defecto(self, _):
+        self.assertIsNone(self.router.db_for_read(IntentoTema))
+
+    def test_lecturas_en_replica_dentro_del_contexto(self, _):
+        with leer_de_replica():
+            self.assertEqual(self.router.db_for_read(IntentoTema), 'replica')
+        self.assertIsNone(self.router.db_for_read(IntentoTema))
+
+    def test_transaccion_lee_del_primario(self, _):
+        with leer_de_replica(), transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(IntentoTema))
+
+    def test_escrituras_y_migraciones_en_primario(self, _):
+        with leer_de_replica():
+            self.assertEqual(self.router.db_for_write(IntentoTema), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'tracking'))
+        self.assertTrue(self.router.allow_migrate('default', 'tracking'))
+
+    def test_decorador_en_varios_hilos(self, _):
+        # Como en IntentoTemaAdmin: una sola función decorada que atienden varios hilos a la vez
+        barrera = threading.Barrier(4)
+        destinos, errores = [], []
+
+        @leer_de_replica()
+        def exportar():
+            barrera.wait(timeout=5)
+            destinos.append(self.router.db_for_read(IntentoTema))
+            barrera.wait(timeout=5)
+
+        def hilo():
+            try:
+                exportar()
+                # Al salir el hilo vuelve a leer del primario
+                destinos.append(self.router.db_for_read(IntentoTema))
+            except Exception as exc:
+                errores.append(exc)
+
+        hilos = [threading.Thread(target=hilo) for _ in range(4)]
+        for t in hilos:
+            t.start()
+        for t in hilos:
+            t.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(destinos.count('replica'), 4)
+        self.assertEqual(destinos.count(None), 4)
+
+    def test_sin_replica_no_cambia_nada(self, replica_disponible):
+        replica_disponible.return_value = False
+        with leer_de_replica():
+            self.assertIsNone(self.router.db_for_read(IntentoTema))
+
+
+class TrackingAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        leccion, = crear_catalogo(lecciones=1, temas_por_leccion=3, ejercicios_por_tema=4)
+        crear_historial(crear_estudiante(), leccion)
+        cls.admin = CustomUser.objects.create_superuser(username='admin', password='Clave-Segura-123')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_listados(self):
+        for modelo in ('sesionestudio', 'progresoleccion', 'progresotema', 'respuestaejercicio',
+                       'actividadpantalla', 'intentotema'):
+            respuesta = self.client.get(f'/admin/tracking/{modelo}/', secure=True)
+            self.assertEqual(respuesta.status_code, 200, modelo)
+
+    def test_exportar_intentos_csv(self):
+        ids = list(IntentoTema.objects.values_list('id', flat=True))
+        respuesta = self.client.post('/admin/tracking/intentotema/', {
+            'action': 'exportar_intentos_csv', '_selected_action': ids,
+        }, secure=True)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv')
+        self.assertEqual(len(respuesta.content.decode().strip().splitlines()), len(ids) + 1)
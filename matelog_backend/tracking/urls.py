@@ -1,15 +1,30 @@
+from django.conf import settings
 from django.urls import path
-from .views import (
-    IniciarSesionView,
-    FinalizarSesionView,
-    IniciarActividadView,
-    FinalizarActividadView,
-    RegistrarVolverContenidoView,
-)
+
+if settings.ASYNC_VIEWS:
+    # Vistas async (despliegue ASGI)
+    from .async_views import (
+        IniciarSesionView,
+        LatidoSesionView,
+        FinalizarSesionView,
+        IniciarActividadView,
+        FinalizarActividadView,
+        RegistrarVolverContenidoView,
+    )
+else:
+    from .views import (
+        IniciarSesionView,
+        LatidoSesionView,
+        FinalizarSesionView,
+        IniciarActividadView,
+        FinalizarActividadView,
+        RegistrarVolverContenidoView,
+    )
 
 urlpatterns = [
     # Sesiones de estudio
     path('sesion/iniciar/', IniciarSesionView.as_view(), name='iniciar-sesion'),
+    path('sesion/latido/', LatidoSesionView.as_view(), name='latido-sesion'),
     path('sesion/finalizar/', FinalizarSesionView.as_view(), name='finalizar-sesion'),
     
     # Actividades de pantalla
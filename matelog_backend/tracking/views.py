@@ -1,25 +1,106 @@
+from datetime import timedelta
+
+from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from monitoring import metricas
 from .models import SesionEstudio, ActividadPantalla
 
 
+_TIPOS_PANTALLA = {clave for clave, _ in ActividadPantalla.TIPO_PANTALLA_CHOICES}
+
+
+def _tipo_para_metrica(tipo_pantalla):
+    """
+    El frontend puede enviar cualquier texto; en las métricas solo se usan
+    los tipos conocidos para no crear una serie por cada valor distinto.
+    """
+    return tipo_pantalla if tipo_pantalla in _TIPOS_PANTALLA else 'OTRA'
+
+
+# A lo más una escritura de ultima_actividad por minuto y sesión
+INTERVALO_LATIDO = timedelta(minutes=1)
+
+
+def sesiones_reanudables(usuario, ahora):
+    """
+    Sesiones abiertas del usuario con actividad dentro de la ventana
+    SESION_REANUDAR_MINUTOS, la más reciente primero.
+    """
+    limite = ahora - timedelta(minutes=settings.SESION_REANUDAR_MINUTOS)
+    return SesionEstudio.objects.filter(
+        usuario=usuario, fecha_fin__isnull=True, ultima_actividad__gte=limite
+    ).order_by('-ultima_actividad')
+
+
+def abrir_o_reanudar_sesion(usuario):
+    """
+    Sesión de estudio abierta del usuario con actividad reciente, o una nueva
+    si no hay. Devuelve (sesion, reanudada).
+    """
+    ahora = timezone.now()
+    sesion = sesiones_reanudables(usuario, ahora).first()
+    if sesion is None:
+        return SesionEstudio.objects.create(usuario=usuario), False
+    if sesion.ultima_actividad < ahora - INTERVALO_LATIDO:
+        sesion.ultima_actividad = ahora
+        sesion.save(update_fields=['ultima_actividad'])
+    return sesion, True
+
+
 class IniciarSesionView(APIView):
     """
-    Vista para iniciar una sesión de estudio.
+    Vista para iniciar (o reanudar) una sesión de estudio.
     Endpoint: POST /api/tracking/sesion/iniciar/
+    Si el usuario tiene una sesión abierta con actividad reciente se reanuda
+    en lugar de crear otra.
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'tracking'
     
     def post(self, request):
-        sesion = SesionEstudio.objects.create(usuario=request.user)
+        sesion, reanudada = abrir_o_reanudar_sesion(request.user)
         return Response({
             'sesion_id': sesion.id,
-            'fecha_inicio': sesion.fecha_inicio
-        }, status=status.HTTP_201_CREATED)
+            'fecha_inicio': sesion.fecha_inicio,
+            'reanudada': reanudada,
+        }, status=status.HTTP_200_OK if reanudada else status.HTTP_201_CREATED)
+
+
+class LatidoSesionView(APIView):
+    """
+    Vista para mantener viva una sesión de estudio (latido periódico del frontend).
+    Endpoint: POST /api/tracking/sesion/latido/
+    Actualiza ultima_actividad con un UPDATE condicional: a lo más una
+    escritura por minuto. Responde 404 si la sesión se cerró o expiró por
+    inactividad; el frontend debe iniciar otra.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tracking'
+    
+    def post(self, request):
+        sesion_id = request.data.get('sesion_id')
+        
+        if not sesion_id:
+            return Response(
+                {'error': 'Se requiere sesion_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ahora = timezone.now()
+        sesion = sesiones_reanudables(request.user, ahora).filter(id=sesion_id)
+        actualizada = sesion.filter(ultima_actividad__lt=ahora - INTERVALO_LATIDO).update(ultima_actividad=ahora)
+        if not actualizada and not sesion.exists():
+            return Response(
+                {'error': 'Sesión no encontrada o expirada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({'actualizada': bool(actualizada)}, status=status.HTTP_200_OK)
 
 
 class FinalizarSesionView(APIView):
@@ -28,6 +109,7 @@ class FinalizarSesionView(APIView):
     Endpoint: POST /api/tracking/sesion/finalizar/
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'tracking'
     
     def post(self, request):
         sesion_id = request.data.get('sesion_id')
@@ -40,6 +122,7 @@ class FinalizarSesionView(APIView):
         
         sesion = get_object_or_404(SesionEstudio, id=sesion_id, usuario=request.user)
         sesion.fecha_fin = timezone.now()
+        sesion.ultima_actividad = sesion.fecha_fin
         
         # Calcular duración en minutos
         duracion = (sesion.fecha_fin - sesion.fecha_inicio).total_seconds() / 60
@@ -58,6 +141,7 @@ class IniciarActividadView(APIView):
     Endpoint: POST /api/tracking/iniciar/
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'tracking'
     
     def post(self, request):
         tipo_pantalla = request.data.get('tipo_pantalla', 'OTRA')
@@ -74,6 +158,7 @@ class IniciarActividadView(APIView):
             leccion_id=leccion_id,
             tema_id=tema_id
         )
+        metricas.EVENTOS_TRACKING.inc(evento='iniciar-actividad', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
         
         return Response({
             'actividad_id': actividad.id,
@@ -87,6 +172,7 @@ class FinalizarActividadView(APIView):
     Endpoint: POST /api/tracking/finalizar/
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'tracking'
     
     def post(self, request):
         actividad_id = request.data.get('actividad_id')
@@ -105,6 +191,7 @@ class FinalizarActividadView(APIView):
             tiempo_total = (actividad.tiempo_fin - actividad.tiempo_inicio).total_seconds()
             actividad.tiempo_segundos = int(tiempo_total)
             actividad.save()
+            metricas.EVENTOS_TRACKING.inc(evento='finalizar-actividad', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
             
             return Response({
                 'mensaje': 'Actividad finalizada correctamente',
@@ -125,6 +212,7 @@ class RegistrarVolverContenidoView(APIView):
     Modificación 4: Tracking de navegación hacia atrás.
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'tracking'
     
     def post(self, request):
         actividad_id = request.data.get('actividad_id')
@@ -139,6 +227,7 @@ class RegistrarVolverContenidoView(APIView):
             actividad = ActividadPantalla.objects.get(id=actividad_id)
             actividad.veces_volver_contenido += 1
             actividad.save()
+            metricas.EVENTOS_TRACKING.inc(evento='volver-contenido', tipo_pantalla=_tipo_para_metrica(actividad.tipo_pantalla))
             
             return Response({
                 'mensaje': 'Click en volver registrado',
@@ -1,6 +1,22 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
 from .models import CustomUser
+from .roster import RosterInvalido, credenciales_csv, leer_roster, provisionar
+
+
+class RosterForm(forms.Form):
+    archivo = forms.FileField(
+        label='CSV del grupo',
+        help_text='Columnas: username, grupo, especialidad, genero, edad',
+    )
 
 
 @admin.register(CustomUser)
@@ -68,4 +84,57 @@ class CustomUserAdmin(UserAdmin):
         ('Información del Estudiante', {
             'fields': ('grupo', 'especialidad', 'genero', 'edad')
         }),
-    )
\ No newline at end of file
+    )
+
+    # Botón "Importar grupo (CSV)" en la lista de usuarios
+    change_list_template = 'admin/users/customuser/change_list.html'
+
+    def get_urls(self):
+        return [
+            path(
+                'importar-roster/',
+                self.admin_site.admin_view(self.importar_roster),
+                name='users_customuser_importar_roster',
+            ),
+        ] + super().get_urls()
+
+    def importar_roster(self, request):
+        """
+        Alta masiva desde el CSV de un grupo. Devuelve el CSV de credenciales
+        como descarga; si hay errores no se crea ningún usuario.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = RosterForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                texto = form.cleaned_data['archivo'].read().decode('utf-8-sig')
+                # Hashes en este proceso: un pool de procesos desde un worker web con hilos
+                # (logs, perfilador) puede bloquearse al hacer fork y le quita los núcleos a las peticiones
+                filas = leer_roster(texto)
+                maximo = settings.ROSTER_ADMIN_MAX_ESTUDIANTES
+                if len(filas) > maximo:
+                    raise RosterInvalido([
+                        f'El archivo tiene {len(filas)} estudiantes y desde el admin se admiten hasta {maximo}. '
+                        'Para grupos más grandes usa: python manage.py provision_roster grupo.csv --salida credenciales.csv'
+                    ])
+                credenciales = provisionar(filas, workers=1)
+            except UnicodeDecodeError:
+                messages.error(request, 'El archivo debe estar codificado en UTF-8')
+            except RosterInvalido as e:
+                for error in e.errores:
+                    messages.error(request, error)
+            else:
+                respuesta = HttpResponse(credenciales_csv(credenciales), content_type='text/csv; charset=utf-8')
+                nombre = f"credenciales_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+                return respuesta
+
+        return TemplateResponse(request, 'admin/users/customuser/importar_roster.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Importar grupo (CSV)',
+            'opts': self.opts,
+            'form': form,
+            'maximo': settings.ROSTER_ADMIN_MAX_ESTUDIANTES,
+        })
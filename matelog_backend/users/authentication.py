@@ -0,0 +1,112 @@
+"""
+Autenticación con tokens firmados (sin estado), alternativa a sesión + CSRF.
+
+Se emiten dos tokens firmados con SECRET_KEY (django.core.signing):
+  - access: corta duración (TOKEN_ACCESS_SECONDS). Lleva los datos del perfil,
+    así que se verifica sin consultar la base de datos.
+  - refresh: larga duración (TOKEN_REFRESH_SECONDS). Solo sirve para pedir un
+    access nuevo; al usarlo se verifica contra la base de datos que el usuario
+    siga activo y no haya cambiado su contraseña.
+
+El frontend envía el access en `Authorization: Bearer <token>`. Como no hay
+cookie de sesión, estas peticiones no necesitan token CSRF.
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .models import CustomUser
+
+
+SALT_ACCESS = 'users.token.access'
+SALT_REFRESH = 'users.token.refresh'
+
+# Campos del perfil incluidos en el access token (los que devuelve /profile/)
+CAMPOS_PERFIL = ('username', 'grupo', 'especialidad', 'genero', 'edad', 'is_staff')
+
+
+def _huella(usuario):
+    """
+    Parte del hash de sesión del usuario (deriva de la contraseña): cambia al
+    cambiar la contraseña e invalida los refresh tokens emitidos antes.
+    """
+    return usuario.get_session_auth_hash()[:16]
+
+
+def emitir_tokens(usuario):
+    """
+    Devuelve {'access', 'refresh', 'expira_en'} para el usuario.
+    """
+    datos = {campo: getattr(usuario, campo) for campo in CAMPOS_PERFIL}
+    datos.update({'id': usuario.pk, 'date_joined': usuario.date_joined.isoformat()})
+    return {
+        'access': signing.dumps(datos, salt=SALT_ACCESS, compress=True),
+        'refresh': signing.dumps({'id': usuario.pk, 'huella': _huella(usuario)}, salt=SALT_REFRESH),
+        'expira_en': settings.TOKEN_ACCESS_SECONDS,
+    }
+
+
+def usuario_de_refresh(token):
+    """
+    Usuario del refresh token, o None si el token es inválido, expiró o el
+    usuario ya no está activo o cambió su contraseña.
+    """
+    try:
+        datos = signing.loads(token, salt=SALT_REFRESH, max_age=settings.TOKEN_REFRESH_SECONDS)
+    except signing.BadSignature:
+        return None
+    usuario = CustomUser.objects.filter(pk=datos['id'], is_active=True).first()
+    if usuario is None or _huella(usuario) != datos['huella']:
+        return None
+    return usuario
+
+
+def usuario_de_access(token):
+    """
+    Reconstruye el usuario a partir del access token, sin consultar la base de
+    datos. Lanza AuthenticationFailed si el token es inválido o expiró.
+    """
+    try:
+        datos = signing.loads(token, salt=SALT_ACCESS, max_age=settings.TOKEN_ACCESS_SECONDS)
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed('Token expirado')
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Token inválido')
+
+    usuario = CustomUser(
+        id=datos['id'],
+        date_joined=datetime.fromisoformat(datos['date_joined']),
+        is_active=True,
+        **{campo: datos[campo] for campo in CAMPOS_PERFIL},
+    )
+    # Instancia "existente": se puede usar como FK y en filtros como un usuario cargado
+    usuario._state.adding = False
+    usuario._state.db = 'default'
+    return usuario
+
+
+class TokenFirmadoAuthentication(BaseAuthentication):
+    """
+    Autenticación DRF con el access token en `Authorization: Bearer <token>`.
+    No consulta la base de datos ni exige CSRF.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        partes = get_authorization_header(request).split()
+        if not partes or partes[0].lower() != self.keyword.lower().encode():
+            return None
+        try:
+            if len(partes) != 2:
+                raise ValueError
+            token = partes[1].decode('ascii')
+        except (ValueError, UnicodeError):
+            raise exceptions.AuthenticationFailed('Header Authorization inválido')
+        return usuario_de_access(token), None
+
+    def authenticate_header(self, request):
+        return self.keyword
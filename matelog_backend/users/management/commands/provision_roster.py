@@ -0,0 +1,44 @@
+"""
+Comando para dar de alta a todos los estudiantes de un grupo desde un CSV
+(username, grupo, especialidad, genero, edad) y generar el CSV de credenciales.
+Ejecutar con: python manage.py provision_roster grupo_a.csv --salida credenciales_a.csv
+"""
+
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.roster import RosterInvalido, credenciales_csv, leer_roster, provisionar
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea en bloque los estudiantes de un CSV con contraseñas generadas '
+        '(hash en paralelo, una sola transacción) y escribe el CSV de credenciales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='CSV con columnas username, grupo, especialidad, genero, edad')
+        parser.add_argument('--salida', required=True,
+                            help='Ruta del CSV de credenciales a generar (contiene contraseñas en texto plano)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Procesos para calcular los hashes (default: núcleos disponibles)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        salida = Path(options['salida'])
+        if salida.exists():
+            raise CommandError(f'{salida} ya existe; no se sobrescriben credenciales')
+
+        try:
+            filas = leer_roster(Path(options['archivo']).read_text(encoding='utf-8-sig'))
+            credenciales = provisionar(filas, workers=options['workers'])
+        except RosterInvalido as e:
+            raise CommandError('El CSV tiene errores; no se creó ningún usuario:\n' + '\n'.join(e.errores))
+        salida.write_text(credenciales_csv(credenciales), encoding='utf-8')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(credenciales)} estudiantes creados en {time.perf_counter() - inicio:.1f}s; '
+            f'credenciales en {salida}'
+        ))
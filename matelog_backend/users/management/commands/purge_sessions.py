@@ -0,0 +1,47 @@
+"""
+Comando para eliminar las sesiones expiradas de la tabla django_session.
+Pensado para ejecutarse periódicamente (cron); borra en lotes cortos para no
+bloquear la tabla mientras los estudiantes inician sesión.
+Ejecutar con: python manage.py purge_sessions --lote 5000
+"""
+
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Elimina en lotes las sesiones expiradas de la base de datos (modos db y cached_db).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Sesiones eliminadas por lote (default: 5000)')
+        parser.add_argument('--pausa', type=float, default=0.1,
+                            help='Segundos de espera entre lotes (default: 0.1)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        ahora = timezone.now()
+        expiradas = Session.objects.filter(expire_date__lt=ahora)
+        total = 0
+        lotes = 0
+
+        while True:
+            claves = list(expiradas.values_list('session_key', flat=True)[:options['lote']])
+            if not claves:
+                break
+            # Se vuelve a filtrar por fecha: una sesión renovada entre lecturas no se borra
+            eliminadas, _ = Session.objects.filter(session_key__in=claves, expire_date__lt=ahora).delete()
+            total += eliminadas
+            lotes += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  - lote {lotes}: {eliminadas} sesiones')
+            if len(claves) < options['lote']:
+                break
+            time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} sesiones expiradas eliminadas en {lotes} lotes ({time.perf_counter() - inicio:.1f}s)'
+        ))
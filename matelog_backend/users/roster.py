@@ -0,0 +1,166 @@
+"""
+Alta masiva de estudiantes a partir de la lista de un grupo (CSV).
+
+El CSV tiene las columnas username, grupo, especialidad, genero, edad. Para
+cada estudiante se genera una contraseña aleatoria; los hashes se calculan en
+paralelo en un pool de procesos (provision_roster; el admin los calcula en el
+mismo proceso para no abrir procesos desde un worker web con hilos) y todos
+los usuarios se insertan con bulk_create en una sola transacción. Si alguna
+fila es inválida no se crea ningún usuario.
+
+Las contraseñas generadas se hashean con menos iteraciones de PBKDF2
+(ROSTER_PASSWORD_ITERATIONS) porque son aleatorias y de un solo uso: Django
+vuelve a calcular el hash con el costo completo en el primer inicio de sesión
+del estudiante (PBKDF2PasswordHasher.must_update).
+"""
+
+import csv
+import io
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import CustomUser, GRUPO_CHOICES, ESPECIALIDAD_CHOICES, GENERO_CHOICES, EDAD_CHOICES
+
+
+COLUMNAS = ('username', 'grupo', 'especialidad', 'genero', 'edad')
+CHOICES = {
+    'grupo': {clave for clave, _ in GRUPO_CHOICES},
+    'especialidad': {clave for clave, _ in ESPECIALIDAD_CHOICES},
+    'genero': {clave for clave, _ in GENERO_CHOICES},
+    'edad': {clave for clave, _ in EDAD_CHOICES},
+}
+
+# Sin caracteres que se confunden al copiar la contraseña de una hoja impresa (0/O, 1/l/I)
+ALFABETO_PASSWORD = 'abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+LONGITUD_PASSWORD = 12
+
+# Contraseñas por tarea del pool
+LOTE_HASH = 25
+
+
+class RosterInvalido(Exception):
+    """
+    El CSV tiene errores; `errores` es la lista de mensajes (con número de línea).
+    """
+
+    def __init__(self, errores):
+        super().__init__('\n'.join(errores))
+        self.errores = errores
+
+
+def leer_roster(texto):
+    """
+    Valida el CSV y devuelve la lista de filas (dicts con COLUMNAS).
+    Lanza RosterInvalido con todos los errores encontrados.
+    """
+    lector = csv.DictReader(io.StringIO(texto.lstrip('\ufeff')))
+    encabezados = [(c or '').strip().lower() for c in (lector.fieldnames or [])]
+    faltantes = [c for c in COLUMNAS if c not in encabezados]
+    if faltantes:
+        raise RosterInvalido([f"Faltan columnas: {', '.join(faltantes)}"])
+    lector.fieldnames = encabezados
+
+    filas = []
+    errores = []
+    vistos = {}
+    for numero, registro in enumerate(lector, start=2):
+        fila = {c: (registro.get(c) or '').strip() for c in COLUMNAS}
+        if not any(fila.values()):
+            continue
+        for campo in ('grupo', 'especialidad', 'genero'):
+            fila[campo] = fila[campo].upper()
+
+        try:
+            CustomUser.username_validator(fila['username'])
+        except ValidationError:
+            errores.append(f"Línea {numero}: username inválido '{fila['username']}'")
+        for campo, validos in CHOICES.items():
+            if fila[campo] not in validos:
+                errores.append(f"Línea {numero}: {campo} inválido '{fila[campo]}'")
+        if fila['username'] in vistos:
+            errores.append(f"Línea {numero}: username '{fila['username']}' repetido (línea {vistos[fila['username']]})")
+        vistos.setdefault(fila['username'], numero)
+        filas.append(fila)
+
+    if not filas and not errores:
+        errores.append('El archivo no tiene estudiantes')
+
+    existentes = CustomUser.objects.filter(username__in=list(vistos)).values_list('username', flat=True)
+    errores.extend(f"El usuario '{username}' ya existe" for username in sorted(existentes))
+    if errores:
+        raise RosterInvalido(errores)
+    return filas
+
+
+def generar_password():
+    return ''.join(secrets.choice(ALFABETO_PASSWORD) for _ in range(LONGITUD_PASSWORD))
+
+
+def _hashear_lote(argumentos):
+    passwords, iteraciones = argumentos
+    # PBKDF2 explícito: si el hasher por defecto es otro, Django también lo actualiza al iniciar sesión
+    hasher = get_hasher('pbkdf2_sha256')
+    return [hasher.encode(password, hasher.salt(), iteraciones) for password in passwords]
+
+
+def _inicializar_worker():
+    # Con 'spawn' (macOS, Windows) el proceso hijo no hereda Django configurado
+    import django
+    django.setup()
+
+
+def hashear_passwords(passwords, workers=None, iteraciones=None):
+    """
+    Hashes PBKDF2 de las contraseñas, en paralelo si workers > 1.
+    """
+    iteraciones = iteraciones or settings.ROSTER_PASSWORD_ITERATIONS
+    workers = workers or os.cpu_count() or 1
+    lotes = [(passwords[i:i + LOTE_HASH], iteraciones) for i in range(0, len(passwords), LOTE_HASH)]
+    if workers <= 1 or len(lotes) <= 1:
+        return [h for lote in lotes for h in _hashear_lote(lote)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(lotes)), initializer=_inicializar_worker) as pool:
+        return [h for resultado in pool.map(_hashear_lote, lotes) for h in resultado]
+
+
+def provisionar(filas, workers=None, iteraciones=None):
+    """
+    Crea los estudiantes de `filas` en una transacción.
+    Devuelve las credenciales: lista de dicts con las COLUMNAS y 'password'.
+    Lanza RosterInvalido si algún username se creó entre la validación y el alta.
+    """
+    credenciales = [{**fila, 'password': generar_password()} for fila in filas]
+    hashes = hashear_passwords([c['password'] for c in credenciales], workers, iteraciones)
+
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create([
+                CustomUser(password=hash_password, **{c: credencial[c] for c in COLUMNAS})
+                for credencial, hash_password in zip(credenciales, hashes)
+            ], batch_size=500)
+    except IntegrityError:
+        # Alguien creó el mismo username después de leer_roster (p. ej. un registro simultáneo)
+        existentes = CustomUser.objects.filter(
+            username__in=[fila['username'] for fila in filas]
+        ).values_list('username', flat=True)
+        raise RosterInvalido(
+            [f"El usuario '{username}' ya existe" for username in sorted(existentes)]
+            or ['No se pudieron crear los usuarios; intenta de nuevo']
+        )
+    return credenciales
+
+
+def credenciales_csv(credenciales):
+    """
+    CSV con username, password y los datos del estudiante, para entregar al docente.
+    """
+    salida = io.StringIO()
+    escritor = csv.DictWriter(salida, fieldnames=['username', 'password', *COLUMNAS[1:]])
+    escritor.writeheader()
+    escritor.writerows(credenciales)
+    return salida.getvalue()
@@ -1,3 +1,347 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from matelog_backend.testing import PresupuestoMixin, crear_catalogo, crear_estudiante
+from .authentication import emitir_tokens
+from .models import CustomUser
+from .roster import RosterInvalido, leer_roster, provisionar
+
+
+class PresupuestoUsersTests(PresupuestoMixin, TestCase):
+    """
+    Presupuesto de consultas SQL y tiempo para cada URL de users.urls.
+    El tiempo de register y login está dominado por el hash de la contraseña.
+    """
+    urlconf = 'users.urls'
+    presupuestos = {
+        # nombre_url: (max_queries, max_ms)
+        'register': (2, 1500),
+        'login': (9, 1500),
+        'token': (2, 1500),
+        'token-refrescar': (1, 50),
+        'logout': (4, 50),
+        'profile': (2, 50),
+        'choices': (0, 50),
+        'csrf': (0, 50),
+        'bootstrap': (6, 200),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def test_register(self):
+        self.assertPresupuesto('register', 'POST', '/api/users/register/', {
+            'username': 'nuevo', 'password': 'Clave-Segura-123', 'password_confirm': 'Clave-Segura-123',
+            'grupo': 'A', 'especialidad': 'INFORMATICA', 'genero': 'N', 'edad': '16',
+        }, status=201)
+
+    def test_login(self):
+        self.assertPresupuesto('login', 'POST', '/api/users/login/', {
+            'username': 'estudiante', 'password': 'Clave-Segura-123',
+        })
+
+    def test_token(self):
+        respuesta = self.assertPresupuesto('token', 'POST', '/api/users/token/', {
+            'username': 'estudiante', 'password': 'Clave-Segura-123',
+        })
+        self.assertEqual(respuesta.json()['usuario']['username'], 'estudiante')
+        self.assertIn('access', respuesta.json())
+        self.assertNotIn('sessionid', respuesta.cookies)
+
+    def test_token_refrescar(self):
+        refresh = emitir_tokens(self.usuario)['refresh']
+        respuesta = self.assertPresupuesto('token-refrescar', 'POST', '/api/users/token/refrescar/', {
+            'refresh': refresh,
+        })
+        self.assertIn('access', respuesta.json())
+
+    def test_logout(self):
+        self.client.force_login(self.usuario)
+        self.assertPresupuesto('logout', 'POST', '/api/users/logout/')
+
+    def test_profile(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.assertPresupuesto('profile', 'GET', '/api/users/profile/')
+        self.assertEqual(respuesta.json()['username'], 'estudiante')
+
+    def test_choices(self):
+        self.assertPresupuesto('choices', 'GET', '/api/users/choices/')
+
+    def test_csrf(self):
+        self.assertPresupuesto('csrf', 'GET', '/api/users/csrf/')
+
+    def test_bootstrap(self):
+        crear_catalogo(lecciones=3, temas_por_leccion=2, ejercicios_por_tema=2)
+        self.client.force_login(self.usuario)
+        respuesta = self.assertPresupuesto('bootstrap', 'GET', '/api/users/bootstrap/')
+        data = respuesta.json()
+        self.assertEqual(data['usuario']['username'], 'estudiante')
+        self.assertFalse(data['sesion']['reanudada'])
+        self.assertEqual(len(data['lecciones']), 3)
+        self.assertEqual(data['lecciones'][0]['progreso']['estado'], 'SIN_INICIAR')
+        self.assertEqual(data['choices'], self.client.get('/api/users/choices/', secure=True).json())
+        self.assertIn('csrftoken', respuesta.cookies)
+
+    def test_bootstrap_anonimo(self):
+        respuesta = self.assertPresupuesto('bootstrap', 'GET', '/api/users/bootstrap/')
+        data = respuesta.json()
+        self.assertIsNone(data['usuario'])
+        self.assertIsNone(data['lecciones'])
+        self.assertTrue(data['csrfToken'])
+        self.assertIn('csrftoken', respuesta.cookies)
+
+    def test_bootstrap_reanuda_la_sesion(self):
+        self.client.force_login(self.usuario)
+        primera = self.client.get('/api/users/bootstrap/', secure=True).json()['sesion']
+        segunda = self.client.get('/api/users/bootstrap/', secure=True).json()['sesion']
+        self.assertTrue(segunda['reanudada'])
+        self.assertEqual(segunda['sesion_id'], primera['sesion_id'])
+
+        # Fuera de la ventana se abre una sesión nueva
+        self.usuario.sesiones.update(
+            ultima_actividad=timezone.now() - timedelta(minutes=settings.SESION_REANUDAR_MINUTOS + 1)
+        )
+        tercera = self.client.get('/api/users/bootstrap/', secure=True).json()['sesion']
+        self.assertFalse(tercera['reanudada'])
+        self.assertEqual(self.usuario.sesiones.count(), 2)
+
+
+class SesionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def test_modos_sin_lectura_de_django_session(self):
+        for modo in ('cached_db', 'signed_cookies'):
+            with self.subTest(modo=modo), override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[modo]):
+                self.client.post('/api/users/login/', {
+                    'username': 'estudiante', 'password': 'Clave-Segura-123',
+                }, content_type='application/json', secure=True)
+                # Solo la consulta del usuario
+                with self.assertNumQueries(1):
+                    respuesta = self.client.get('/api/users/profile/', secure=True)
+                self.assertEqual(respuesta.status_code, 200)
+
+                self.client.post('/api/users/logout/', secure=True)
+                self.assertEqual(self.client.get('/api/users/profile/', secure=True).status_code, 403)
+
+    def test_purge_sessions(self):
+        for _ in range(5):
+            SessionStore().create()
+        vigente = SessionStore()
+        vigente.create()
+        Session.objects.exclude(session_key=vigente.session_key).update(
+            expire_date=timezone.now() - timedelta(days=1)
+        )
+
+        salida = StringIO()
+        call_command('purge_sessions', lote=2, pausa=0, stdout=salida)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [vigente.session_key])
+        self.assertIn('5 sesiones expiradas eliminadas en 3 lotes', salida.getvalue())
+
+
+class TokenTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_estudiante()
+
+    def setUp(self):
+        # Sin cookie de sesión y con verificación CSRF, como el frontend en modo token
+        self.client = Client(enforce_csrf_checks=True)
+
+    def bearer(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_profile_sin_consultas(self):
+        tokens = emitir_tokens(self.usuario)
+        with self.assertNumQueries(0):
+            respuesta = self.client.get('/api/users/profile/', headers=self.bearer(tokens['access']), secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['grupo_display'], 'Grupo A')
+
+    def test_post_sin_csrf_ni_sesion(self):
+        tokens = emitir_tokens(self.usuario)
+        with self.assertNumQueries(2):
+            respuesta = self.client.post('/api/tracking/sesion/iniciar/', headers=self.bearer(tokens['access']), secure=True)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(self.usuario.sesiones.count(), 1)
+
+    def test_token_invalido(self):
+        respuesta = self.client.get('/api/users/profile/', headers=self.bearer('no-es-un-token'), secure=True)
+        self.assertEqual(respuesta.status_code, 403)
+
+    @override_settings(TOKEN_ACCESS_SECONDS=-1)
+    def test_token_expirado(self):
+        tokens = emitir_tokens(self.usuario)
+        respuesta = self.client.get('/api/users/profile/', headers=self.bearer(tokens['access']), secure=True)
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertEqual(respuesta.json()['detail'], 'Token expirado')
+
+    def test_refresh_invalido_al_cambiar_contrasena(self):
+        refresh = emitir_tokens(self.usuario)['refresh']
+        self.usuario.set_password('Otra-Clave-456')
+        self.usuario.save()
+        respuesta = self.client.post('/api/users/token/refrescar/', {'refresh': refresh},
+                                     content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_access_no_sirve_como_refresh(self):
+        access = emitir_tokens(self.usuario)['access']
+        respuesta = self.client.post('/api/users/token/refrescar/', {'refresh': access},
+                                     content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 401)
+
+
+ROSTER = """username,grupo,especialidad,genero,edad
+ana.lopez,A,INFORMATICA,F,15
+beto.ruiz,a,agronomia,m,16
+carla.diaz,B,ELECTRONICA,N,15
+"""
+
+
+class RosterTests(TestCase):
+
+    def test_leer_roster(self):
+        filas = leer_roster('\ufeff' + ROSTER)
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(filas[1], {
+            'username': 'beto.ruiz', 'grupo': 'A', 'especialidad': 'AGRONOMIA', 'genero': 'M', 'edad': '16',
+        })
+
+    def test_errores_por_linea(self):
+        crear_estudiante('carla.diaz')
+        texto = ROSTER + 'ana.lopez,E,INFORMATICA,F,19\n'
+        with self.assertRaises(RosterInvalido) as contexto:
+            leer_roster(texto)
+        self.assertEqual(contexto.exception.errores, [
+            "Línea 5: grupo inválido 'E'",
+            "Línea 5: edad inválido '19'",
+            "Línea 5: username 'ana.lopez' repetido (línea 2)",
+            "El usuario 'carla.diaz' ya existe",
+        ])
+
+    def test_faltan_columnas(self):
+        with self.assertRaises(RosterInvalido) as contexto:
+            leer_roster('username,grupo\nana,A\n')
+        self.assertEqual(contexto.exception.errores, ['Faltan columnas: especialidad, genero, edad'])
+
+    def test_provisionar_y_login(self):
+        credenciales = provisionar(leer_roster(ROSTER), workers=1)
+        self.assertEqual(CustomUser.objects.filter(username__in=[c['username'] for c in credenciales]).count(), 3)
+
+        ana = credenciales[0]
+        usuario = CustomUser.objects.get(username='ana.lopez')
+        self.assertTrue(usuario.password.startswith(f'pbkdf2_sha256${settings.ROSTER_PASSWORD_ITERATIONS}$'))
+
+        respuesta = self.client.post('/api/users/login/', {'username': 'ana.lopez', 'password': ana['password']},
+                                     content_type='application/json', secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        # El primer login vuelve a calcular el hash con el costo completo
+        usuario.refresh_from_db()
+        self.assertFalse(usuario.password.startswith(f'pbkdf2_sha256${settings.ROSTER_PASSWORD_ITERATIONS}$'))
+
+    def test_usuario_creado_durante_el_alta(self):
+        filas = leer_roster(ROSTER)
+        # Un registro simultáneo crea el mismo username después de validar el CSV
+        crear_estudiante('beto.ruiz')
+        with self.assertRaises(RosterInvalido) as contexto:
+            provisionar(filas, workers=1)
+        self.assertEqual(contexto.exception.errores, ["El usuario 'beto.ruiz' ya existe"])
+        self.assertFalse(CustomUser.objects.filter(username='ana.lopez').exists())
+
+    @override_settings(ROSTER_PASSWORD_ITERATIONS=1000)
+    def test_comando_con_workers(self):
+        filas = 'username,grupo,especialidad,genero,edad\n' + ''.join(
+            f'alumno{i:02d},C,ADMINISTRACION,O,17\n' for i in range(60)
+        )
+        with TemporaryDirectory() as directorio:
+            archivo = Path(directorio, 'grupo_c.csv')
+            archivo.write_text(filas, encoding='utf-8')
+            salida = Path(directorio, 'credenciales.csv')
+
+            call_command('provision_roster', str(archivo), salida=str(salida), workers=2, stdout=StringIO())
+            lineas = salida.read_text(encoding='utf-8').splitlines()
+            self.assertEqual(lineas[0], 'username,password,grupo,especialidad,genero,edad')
+            self.assertEqual(len(lineas), 61)
+            self.assertEqual(CustomUser.objects.filter(grupo='C').count(), 60)
+
+            usuario = CustomUser.objects.get(username='alumno42')
+            self.assertTrue(usuario.check_password(lineas[43].split(',')[1]))
+
+            # No se sobrescriben credenciales ni se crea nada si el CSV tiene errores
+            with self.assertRaises(CommandError):
+                call_command('provision_roster', str(archivo), salida=str(salida))
+
+    def test_comando_no_crea_nada_con_errores(self):
+        with TemporaryDirectory() as directorio:
+            archivo = Path(directorio, 'grupo.csv')
+            archivo.write_text(ROSTER + 'dani,A,INFORMATICA,X,15\n', encoding='utf-8')
+            with self.assertRaisesMessage(CommandError, "Línea 5: genero inválido 'X'"):
+                call_command('provision_roster', str(archivo), salida=str(Path(directorio, 'salida.csv')))
+        self.assertFalse(CustomUser.objects.filter(username='ana.lopez').exists())
+
+    def test_importar_desde_admin(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', password='Clave-Admin-123'))
+        url = '/admin/users/customuser/importar-roster/'
+        self.assertContains(self.client.get('/admin/users/customuser/', secure=True), url)
+
+        respuesta = self.client.post(url, {'archivo': SimpleUploadedFile('grupo.csv', ROSTER.encode())}, secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('attachment', respuesta['Content-Disposition'])
+        self.assertEqual(len(respuesta.content.decode().splitlines()), 4)
+        self.assertTrue(CustomUser.objects.filter(username='carla.diaz').exists())
+
+        # Segunda vez: los usuarios ya existen, se muestran los errores
+        respuesta = self.client.post(url, {'archivo': SimpleUploadedFile('grupo.csv', ROSTER.encode())}, secure=True)
+        self.assertContains(respuesta, "El usuario &#x27;ana.lopez&#x27; ya existe")
+
+    @override_settings(ROSTER_PASSWORD_ITERATIONS=1000)
+    def test_admin_hashea_en_el_mismo_proceso(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', password='Clave-Admin-123'))
+        url = '/admin/users/customuser/importar-roster/'
+        filas = 'username,grupo,especialidad,genero,edad\n' + ''.join(
+            f'alumno{i:02d},C,ADMINISTRACION,O,17\n' for i in range(60)
+        )
+        with mock.patch('users.roster.ProcessPoolExecutor', side_effect=AssertionError('pool en el admin')):
+            respuesta = self.client.post(url, {'archivo': SimpleUploadedFile('grupo.csv', filas.encode())}, secure=True)
+        self.assertIn('attachment', respuesta['Content-Disposition'])
+        self.assertEqual(CustomUser.objects.filter(grupo='C').count(), 60)
+
+    def test_admin_usuario_creado_durante_el_alta(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', password='Clave-Admin-123'))
+        url = '/admin/users/customuser/importar-roster/'
+
+        def leer_y_registrar(texto):
+            filas = leer_roster(texto)
+            crear_estudiante('carla.diaz')
+            return filas
+
+        with mock.patch('users.admin.leer_roster', side_effect=leer_y_registrar):
+            respuesta = self.client.post(url, {'archivo': SimpleUploadedFile('grupo.csv', ROSTER.encode())}, secure=True)
+        self.assertContains(respuesta, "El usuario &#x27;carla.diaz&#x27; ya existe")
+        self.assertFalse(CustomUser.objects.filter(username='ana.lopez').exists())
+
+    @override_settings(ROSTER_ADMIN_MAX_ESTUDIANTES=2)
+    def test_admin_limite_de_estudiantes(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', password='Clave-Admin-123'))
+        url = '/admin/users/customuser/importar-roster/'
+        self.assertContains(self.client.get(url, secure=True), 'hasta 2 estudiantes por archivo')
+
+        respuesta = self.client.post(url, {'archivo': SimpleUploadedFile('grupo.csv', ROSTER.encode())}, secure=True)
+        self.assertContains(respuesta, 'El archivo tiene 3 estudiantes y desde el admin se admiten hasta 2')
+        self.assertContains(respuesta, 'provision_roster')
+        self.assertFalse(CustomUser.objects.filter(username='ana.lopez').exists())
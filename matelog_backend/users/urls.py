@@ -2,17 +2,23 @@ from django.urls import path
 from .views import (
     RegisterView,
     LoginView,
+    TokenView,
+    TokenRefreshView,
     LogoutView,
     UserProfileView,
     RegistrationChoicesView,
     CSRFTokenView,
+    BootstrapView,
 )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('token/', TokenView.as_view(), name='token'),
+    path('token/refrescar/', TokenRefreshView.as_view(), name='token-refrescar'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('choices/', RegistrationChoicesView.as_view(), name='choices'),
     path('csrf/', CSRFTokenView.as_view(), name='csrf'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
 ]
\ No newline at end of file
@@ -2,9 +2,13 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import authenticate, login, logout, user_logged_in
 from django.middleware.csrf import get_token
 from django.http import JsonResponse
+from lessons.views import lecciones_con_progreso
+from monitoring.instrumentacion import medir
+from tracking.views import abrir_o_reanudar_sesion
+from .authentication import emitir_tokens, usuario_de_refresh
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer, ChoicesSerializer
 
 
@@ -68,6 +72,61 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenView(APIView):
+    """
+    Vista para iniciar sesión con tokens firmados (sin cookie de sesión ni CSRF).
+    Endpoint: POST /api/users/token/
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def post(self, request):
+        serializer = UserLoginSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = authenticate(
+            request,
+            username=serializer.validated_data['username'],
+            password=serializer.validated_data['password'],
+        )
+        if user is None:
+            return Response({
+                'error': 'Credenciales inválidas'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        # Actualiza last_login igual que login()
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+        return Response({
+            'mensaje': 'Inicio de sesión exitoso',
+            'usuario': {
+                'id': user.id,
+                'username': user.username,
+                'grupo': user.grupo,
+                'especialidad': user.especialidad,
+            },
+            **emitir_tokens(user),
+        }, status=status.HTTP_200_OK)
+
+
+class TokenRefreshView(APIView):
+    """
+    Vista para obtener tokens nuevos a partir del refresh token.
+    Endpoint: POST /api/users/token/refrescar/
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def post(self, request):
+        user = usuario_de_refresh(request.data.get('refresh') or '')
+        if user is None:
+            return Response({
+                'error': 'Token inválido o expirado'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(emitir_tokens(user), status=status.HTTP_200_OK)
+
+
 class LogoutView(APIView):
     """
     Vista para cerrar sesión.
@@ -90,8 +149,9 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        with medir('serializer'):
+            data = UserProfileSerializer(request.user).data
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class RegistrationChoicesView(APIView):
@@ -116,4 +176,35 @@ class CSRFTokenView(APIView):
     
     def get(self, request):
         csrf_token = get_token(request)
-        return JsonResponse({'csrfToken': csrf_token})
\ No newline at end of file
+        return JsonResponse({'csrfToken': csrf_token})
+
+
+class BootstrapView(APIView):
+    """
+    Vista con todo lo que el frontend necesita al cargar, en una sola petición:
+    CSRF token, choices de registro y, si hay usuario autenticado, su perfil,
+    la sesión de estudio (abierta o reanudada) y las lecciones con progreso.
+    Endpoint: GET /api/users/bootstrap/
+    """
+    permission_classes = [AllowAny]
+    throttle_scope = 'aprendizaje'
+    
+    def get(self, request):
+        data = {
+            'csrfToken': get_token(request),
+            'choices': ChoicesSerializer().to_representation(None),
+            'usuario': None,
+            'sesion': None,
+            'lecciones': None,
+        }
+        if request.user.is_authenticated:
+            sesion, reanudada = abrir_o_reanudar_sesion(request.user)
+            with medir('serializer'):
+                data['usuario'] = UserProfileSerializer(request.user).data
+            data['sesion'] = {
+                'sesion_id': sesion.id,
+                'fecha_inicio': sesion.fecha_inicio,
+                'reanudada': reanudada,
+            }
+            data['lecciones'] = lecciones_con_progreso(request.user)
+        return Response(data, status=status.HTTP_200_OK)